@@ -0,0 +1,106 @@
+"""
+Benchmark del almacén columnar: recarga desde CSV vs. desde Parquet
+
+Copia las corridas grabadas (primeraley/python/ y segundaley/logs/) hasta
+formar un mes de experimentos y mide:
+
+- cargar todos los CSV como lo hace AnalizadorTermodinamico.cargar_datos
+  (read_csv + to_datetime por archivo)
+- la conversión inicial y la incremental (sin cambios) al almacén
+- cargar el mismo conjunto desde el almacén, completo y filtrado por operación
+
+Uso:
+    python benchmarks/bench_almacen.py --corridas 3000
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.almacen import ORIGENES, cargar, convertir
+
+
+def preparar(directorio, n_corridas):
+    """Copia las corridas grabadas de ambos equipos hasta ``n_corridas`` archivos"""
+    originales = [r for origen in ORIGENES for r in sorted(glob.glob(os.path.join(origen, '*.csv')))]
+    for i in range(n_corridas):
+        origen = originales[i % len(originales)]
+        nombre = os.path.basename(origen).replace('.csv', f'_{i:05d}.csv')
+        shutil.copyfile(origen, os.path.join(directorio, nombre))
+
+
+def cargar_csv(directorio):
+    """Recarga por archivo, como AnalizadorTermodinamico y los scripts de análisis"""
+    tablas = []
+    for archivo in glob.glob(os.path.join(directorio, '*.csv')):
+        filas = 2 if os.path.basename(archivo).startswith('presion_') else 0
+        try:
+            df = pd.read_csv(archivo, skiprows=filas)
+        except pd.errors.EmptyDataError:
+            continue
+        try:
+            df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+        except Exception:
+            pass
+        tablas.append(df)
+    return sum(len(t) for t in tablas)
+
+
+def medir(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--corridas', type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        origen = os.path.join(temporal, 'csv')
+        destino = os.path.join(temporal, 'almacen')
+        os.makedirs(origen)
+        preparar(origen, args.corridas)
+
+        print("=" * 60)
+        print("BENCHMARK DEL ALMACÉN COLUMNAR")
+        print("=" * 60)
+        print(f"Corridas: {args.corridas}")
+        print("-" * 60)
+
+        t, filas = medir(lambda: cargar_csv(origen))
+        print(f"{'Recarga desde CSV':<30} {t:7.2f} s  ({filas} filas)")
+
+        t, conteo = medir(lambda: convertir([origen], destino))
+        print(f"{'Conversión inicial':<30} {t:7.2f} s  ({conteo['convertidos']} archivos)")
+        t, conteo = medir(lambda: convertir([origen], destino))
+        print(f"{'Conversión incremental':<30} {t:7.2f} s  ({conteo['al_dia']} al día)")
+
+        def cargar_todo():
+            return sum(len(cargar(equipo, destino)) for equipo in ('primeraley', 'segundaley'))
+        t, filas = medir(cargar_todo)
+        print(f"{'Recarga desde el almacén':<30} {t:7.2f} s  ({filas} filas)")
+
+        t, df = medir(lambda: cargar('segundaley', destino, operacion='operacion'))
+        print(f"{'Solo sesiones en operación':<30} {t:7.2f} s  ({len(df)} filas)")
+
+        tamano_csv = sum(os.path.getsize(r) for r in glob.glob(os.path.join(origen, '*.csv')))
+        tamano_pq = sum(os.path.getsize(r) for r in glob.glob(
+            os.path.join(destino, '**', '*.parquet'), recursive=True))
+        print(f"{'Tamaño CSV / Parquet':<30} {tamano_csv / 1e6:7.1f} MB / {tamano_pq / 1e6:.1f} MB")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark del análisis por lotes de primeraley/ejemplos/analysis_example.py
+
+Copia los CSV de presión grabados en primeraley/python/ hasta formar un
+directorio con muchos experimentos y compara:
+
+- el ciclo original de analizar_directorio (AnalizadorTermodinamico
+  completo, con to_datetime, un archivo tras otro)
+- analizar_directorio con un solo proceso
+- analizar_directorio con un pool de procesos
+- analizar_directorio otra vez sin cambios en los archivos (caché de
+  comun/estadisticas.py)
+
+Antes de cada medición, salvo la última, se vacía el caché.
+
+Uso:
+    python benchmarks/bench_analisis_lote.py --archivos 2000 --procesos 4
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, 'primeraley', 'ejemplos'))
+from analysis_example import AnalizadorTermodinamico, analizar_directorio
+from comun.estadisticas import CACHE
+
+DIR_DATOS = os.path.join(RAIZ, 'primeraley', 'python')
+
+
+def preparar(directorio, n_archivos):
+    """Llena ``directorio`` con ``n_archivos`` copias de los CSV grabados"""
+    originales = sorted(glob.glob(os.path.join(DIR_DATOS, 'presion_*.csv')))
+    for i in range(n_archivos):
+        origen = originales[i % len(originales)]
+        nombre = os.path.basename(origen).replace('.csv', f'_{i:05d}.csv')
+        shutil.copyfile(origen, os.path.join(directorio, nombre))
+    return len(originales)
+
+
+def ciclo_original(directorio):
+    """El ciclo de analizar_directorio antes del modo por lotes"""
+    for archivo in glob.glob(f"{directorio}/*.csv"):
+        AnalizadorTermodinamico(archivo).estadisticas_basicas()
+
+
+def medir(funcion, limpiar=True):
+    if limpiar:
+        CACHE.limpiar()
+    salida = io.StringIO()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(salida):
+        resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--archivos', type=int, default=2000)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        n_originales = preparar(directorio, args.archivos)
+        if not n_originales:
+            print(f"No se encontraron CSV en {DIR_DATOS}")
+            return
+
+        print("=" * 60)
+        print("BENCHMARK DE ANÁLISIS POR LOTES")
+        print("=" * 60)
+        print(f"Archivos: {args.archivos} (copias de {n_originales} grabados) "
+              f"| núcleos: {os.cpu_count()}")
+        print("-" * 60)
+
+        t, _ = medir(lambda: ciclo_original(directorio))
+        print(f"{'Ciclo original':<24} {t:7.2f} s  {args.archivos / t:8.1f} archivos/s")
+
+        t, resumen = medir(lambda: analizar_directorio(directorio, procesos=1, detalle=False))
+        print(f"{'Lote, 1 proceso':<24} {t:7.2f} s  {args.archivos / t:8.1f} archivos/s")
+
+        salida = os.path.join(directorio, 'resumen.csv')
+        t, resumen = medir(lambda: analizar_directorio(directorio, procesos=args.procesos,
+                                                       salida=salida, detalle=False))
+        print(f"{f'Lote, {args.procesos} procesos':<24} {t:7.2f} s  "
+              f"{args.archivos / t:8.1f} archivos/s")
+
+        t, resumen = medir(lambda: analizar_directorio(directorio, procesos=args.procesos,
+                                                       salida=salida, detalle=False),
+                           limpiar=False)
+        print(f"{'Lote, sin cambios':<24} {t:7.2f} s  {args.archivos / t:8.1f} archivos/s")
+        print(f"Filas en el resumen: {len(resumen)} | errores: "
+              f"{int(resumen['Error'].notna().sum()) if 'Error' in resumen else 0}")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
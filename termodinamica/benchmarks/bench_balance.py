@@ -0,0 +1,122 @@
+"""
+Benchmark del balance de energía: calcular (vectorizado) vs. BalanceEnLinea
+
+Genera una sesión sintética consistente: el circuito caliente entra a T1
+constante y cede a la cubeta 3 un calor con efectividad conocida, la
+cubeta se calienta con ese calor (menos pérdidas fijas) y el circuito de
+recirculación casi no fluye (Q2 = 0.09 L/min, como en los logs donde la
+fórmula anterior daba ε > 1). Verifica que ambas rutas den 0 ≤ ε ≤ 1 y la
+efectividad impuesta, que una muestra imposible (T2 < T3) quede en NaN, y
+mide el tiempo de cada una.
+
+Uso:
+    python benchmarks/bench_balance.py --tramas 100000
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.balance import CP_AGUA, BalanceEnLinea, calcular, flujo_masico
+
+EFECTIVIDAD = 0.6
+VOLUMEN_FRIO_L = 10.0
+PERDIDAS_W = 50.0
+
+
+def sesion_sintetica(n, periodo_s=0.5):
+    """
+    Returns:
+        dict: t_s, temp1..temp3 y caudal1..caudal2 de una sesión consistente
+    """
+    t_s = np.arange(n) * periodo_s
+    t1 = np.full(n, 45.0)
+    q1 = np.full(n, 6.0)
+    c1 = flujo_masico(6.0) * CP_AGUA
+    capacidad_cubeta = VOLUMEN_FRIO_L * CP_AGUA  # 1 L = 1 kg
+    t3 = np.empty(n)
+    t3[0] = 10.0
+    for i in range(1, n):
+        calor = EFECTIVIDAD * c1 * (t1[i - 1] - t3[i - 1])
+        t3[i] = t3[i - 1] + (calor - PERDIDAS_W) / capacidad_cubeta * periodo_s
+    t2 = t1 - EFECTIVIDAD * (t1 - t3)
+    return {'t_s': t_s, 'temp1': t1, 'temp2': t2, 'temp3': t3,
+            'caudal1': q1, 'caudal2': np.full(n, 0.09)}
+
+
+def verificar(datos):
+    """
+    Returns:
+        list: Descripción de cada verificación que falló (vacía si todas pasan)
+    """
+    fallas = []
+    vectorizado = calcular(datos['t_s'], datos['temp1'], datos['temp2'], datos['temp3'],
+                           datos['caudal1'], datos['caudal2'], VOLUMEN_FRIO_L)['efectividad']
+    balance = BalanceEnLinea(VOLUMEN_FRIO_L)
+    en_linea = np.array([
+        balance.agregar({canal: float(datos[canal][i]) for canal in datos if canal != 't_s'},
+                        datos['t_s'][i])['efectividad']
+        for i in range(len(datos['t_s']))])
+    for nombre, efectividad in (('calcular', vectorizado), ('BalanceEnLinea', en_linea)):
+        validos = efectividad[np.isfinite(efectividad)]
+        if len(validos) != len(efectividad):
+            fallas.append(f"{nombre}: {len(efectividad) - len(validos)} muestras en NaN")
+        if len(validos) and (validos.min() < 0.0 or validos.max() > 1.0):
+            fallas.append(f"{nombre}: ε fuera de [0, 1] ({validos.min():.3f}..{validos.max():.3f})")
+        if len(validos) and not np.allclose(validos, EFECTIVIDAD):
+            fallas.append(f"{nombre}: ε medio {validos.mean():.3f}, se impuso {EFECTIVIDAD}")
+
+    # T2 por debajo de T3: Q/Q_max > 1, la muestra no es válida
+    imposible = calcular([0.0], [45.0], [5.0], [10.0], [6.0], [6.0])['efectividad']
+    if not np.isnan(imposible[0]):
+        fallas.append(f"T2 < T3 dio ε = {imposible[0]:.3f} en lugar de NaN")
+    return fallas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tramas', type=int, default=100000)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DEL BALANCE DE ENERGÍA")
+    print("=" * 60)
+    datos = sesion_sintetica(args.tramas)
+    print(f"{args.tramas} tramas sintéticas, ε impuesta = {EFECTIVIDAD}, Q2 = 0.09 L/min")
+    print("-" * 60)
+
+    fallas = verificar(sesion_sintetica(2000))
+    print(f"Efectividad en [0, 1] y igual a la impuesta: {'OK' if not fallas else 'FALLA'}")
+    for falla in fallas:
+        print(f"  {falla}")
+
+    inicio = time.perf_counter()
+    calcular(datos['t_s'], datos['temp1'], datos['temp2'], datos['temp3'],
+             datos['caudal1'], datos['caudal2'], VOLUMEN_FRIO_L)
+    vectorizado = time.perf_counter() - inicio
+
+    balance = BalanceEnLinea(VOLUMEN_FRIO_L)
+    canales = [c for c in datos if c != 't_s']
+    filas = [{c: float(datos[c][i]) for c in canales} for i in range(args.tramas)]
+    inicio = time.perf_counter()
+    for fila, t in zip(filas, datos['t_s']):
+        balance.agregar(fila, t)
+    en_linea = time.perf_counter() - inicio
+
+    print(f"{'calcular (vectorizado)':<28} {vectorizado * 1000:10.1f} ms")
+    print(f"{'BalanceEnLinea':<28} {en_linea * 1000:10.1f} ms "
+          f"({en_linea / args.tramas * 1e6:.1f} µs/trama)")
+    print("=" * 60)
+    if fallas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark del canal de comandos: bytes de setpoint durante un arrastre
+
+Reproduce en tiempo real los callbacks que genera un ``tk.Scale`` de 0 a
+10 L/min con resolución 0.1 (como los de segundaley/main.py) al arrastrarlo:
+eventos de movimiento a ~60 Hz siguiendo un perfil de mínimo tirón, un
+callback por cada cambio de valor. Compara:
+
+- el envío original: un ``S1:x`` y un renglón de log por callback
+- CanalComandos con varias ventanas de coalescencia
+
+e informa bytes por el puerto, ocupación del enlace a 115200 baudios,
+renglones de log y el retraso del valor final.
+
+Uso:
+    python benchmarks/bench_comandos.py --arrastres 5
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.comandos import CanalComandos
+
+BAUDIOS = 115200
+EVENTOS_HZ = 60.0
+
+
+class ConexionContadora:
+    """Sustituto de serial.Serial: cuenta bytes y guarda el último comando"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.comandos = 0
+        self.ultimo = None
+        self.t_ultimo = None
+        self.candado = threading.Lock()
+
+    def write(self, datos):
+        with self.candado:
+            self.bytes += len(datos)
+            self.comandos += 1
+            self.ultimo = datos
+            self.t_ultimo = time.perf_counter()
+        return len(datos)
+
+
+def generar_arrastres(n, semilla=1):
+    """
+    Lista de arrastres; cada uno es una lista de (t_relativo_s, valor) con un
+    callback por cambio de valor, más la pausa posterior
+    """
+    azar = random.Random(semilla)
+    valor = 0.0
+    arrastres = []
+    for _ in range(n):
+        destino = round(azar.uniform(0.5, 9.5), 1)
+        duracion = azar.uniform(0.6, 1.5)
+        eventos = []
+        anterior = valor
+        for i in range(1, int(duracion * EVENTOS_HZ) + 1):
+            x = i / (duracion * EVENTOS_HZ)
+            perfil = 10 * x ** 3 - 15 * x ** 4 + 6 * x ** 5  # mínimo tirón
+            actual = round(valor + (destino - valor) * perfil, 1)
+            if actual != anterior:
+                eventos.append((i / EVENTOS_HZ, actual))
+                anterior = actual
+        arrastres.append((eventos, azar.uniform(0.4, 1.0)))
+        valor = destino
+    return arrastres
+
+
+def reproducir(arrastres, enviar):
+    """Llama ``enviar(valor)`` en los instantes de cada callback"""
+    for eventos, pausa in arrastres:
+        inicio = time.perf_counter()
+        for t, valor in eventos:
+            espera = inicio + t - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            enviar(valor)
+        time.sleep(pausa)
+
+
+def medir_original(arrastres):
+    conexion = ConexionContadora()
+    renglones = [0]
+
+    def enviar(valor):
+        conexion.write(f"S1:{valor}\n".encode())
+        renglones[0] += 1
+    reproducir(arrastres, enviar)
+    return conexion, renglones[0], 0.0
+
+
+def medir_canal(arrastres, ventana_s):
+    conexion = ConexionContadora()
+    renglones = [0]
+    canal = CanalComandos(conexion, ventana_s,
+                          al_aplicar=lambda clave, valor: renglones.__setitem__(0, renglones[0] + 1))
+    retrasos = []
+
+    for eventos, pausa in arrastres:
+        inicio = time.perf_counter()
+        for t, valor in eventos:
+            espera = inicio + t - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            canal.fijar('S1', valor)
+        t_final = time.perf_counter()
+        time.sleep(pausa)
+        if eventos and conexion.ultimo == f"S1:{eventos[-1][1]}\n".encode():
+            retrasos.append(max(0.0, conexion.t_ultimo - t_final))
+        else:
+            retrasos.append(float('nan'))
+    canal.cerrar()
+    return conexion, renglones[0], max(retrasos) if retrasos else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--arrastres', type=int, default=5)
+    args = parser.parse_args()
+
+    arrastres = generar_arrastres(args.arrastres)
+    callbacks = sum(len(e) for e, _ in arrastres)
+    duracion = sum(e[-1][0] for e, _ in arrastres if e)
+
+    print("=" * 60)
+    print("BENCHMARK DEL CANAL DE COMANDOS")
+    print("=" * 60)
+    print(f"{args.arrastres} arrastres, {callbacks} callbacks del Scale en {duracion:.1f} s de arrastre")
+    print("-" * 60)
+    print(f"{'Modo':<22} {'comandos':>8} {'bytes':>7} {'enlace':>9} {'log':>5} {'retraso':>9}")
+    resultados = [('Original', medir_original(arrastres))]
+    for ventana in (0.05, 0.15, 0.3):
+        resultados.append((f"Canal, ventana {ventana * 1000:.0f} ms", medir_canal(arrastres, ventana)))
+    base = resultados[0][1][0].bytes
+    for nombre, (conexion, renglones, retraso) in resultados:
+        ocupacion = conexion.bytes * 10.0 / BAUDIOS / duracion * 100.0
+        print(f"{nombre:<22} {conexion.comandos:8d} {conexion.bytes:7d} {ocupacion:8.2f}% "
+              f"{renglones:5d} {retraso * 1000:7.1f} ms")
+    print("-" * 60)
+    for nombre, (conexion, _, _) in resultados[1:]:
+        print(f"{nombre:<22} ahorra {base - conexion.bytes} bytes "
+              f"({100.0 * (base - conexion.bytes) / base:.0f}%)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
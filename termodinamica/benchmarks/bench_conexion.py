@@ -0,0 +1,103 @@
+"""
+Benchmark de la conexión con saludo del firmware (comun/conexion.py)
+
+Compara, sobre el simulador con distintos tiempos de arranque (bootloader +
+setup() del Arduino después del reinicio al abrir el puerto):
+
+- la espera fija anterior: abrir y ``time.sleep(2)`` en el hilo de Tk
+- ``conectar``: abrir y leer hasta la marca de firmware listo
+
+Para cada caso informa el tiempo hasta poder enviar comandos (ahora en un
+hilo aparte; antes con el hilo de Tk bloqueado) y si la primera trama llegó
+al lector. Con un equipo que no responde, mide cuánto tarda en fallar.
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_conexion.py --ensayos 5
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.conexion import MARCAS_PRIMERA_LEY, MARCAS_SEGUNDA_LEY, conectar
+from comun.protocolo import ParserSegundaLey
+from comun.simulador import Simulador, crear_arduino
+
+ESPERA_FIJA_S = 2.0
+
+
+def con_saludo(equipo, arranque_s):
+    """
+    Returns:
+        tuple: (segundos hasta estar listo, tramas de segunda ley en el saludo)
+    """
+    simulador = Simulador(crear_arduino(equipo, semilla=1), arranque_s=arranque_s)
+    puerto = simulador.iniciar()
+    marcas = MARCAS_SEGUNDA_LEY if equipo == 'segundaley' else MARCAS_PRIMERA_LEY
+    try:
+        inicio = time.perf_counter()
+        conexion, saludo = conectar(puerto, simulador.arduino.BAUDIOS, marcas, timeout_s=5.0)
+        listo = time.perf_counter() - inicio
+        # El delimitador que marcó "listo" abre la primera trama; con lo que
+        # siga en el puerto, el parser debe completarla
+        parser = ParserSegundaLey()
+        tramas = len(parser.procesar_texto(saludo.texto))
+        time.sleep(simulador.arduino.PERIODO_S * 1.5)
+        tramas += len(parser.procesar_texto(saludo.lector.leer_texto()))
+        conexion.close()
+    finally:
+        simulador.detener()
+    return listo, tramas
+
+
+def sin_respuesta(timeout_s):
+    """Tiempo hasta el error con un puerto que nunca envía nada"""
+    maestro, esclavo = os.openpty()
+    try:
+        inicio = time.perf_counter()
+        try:
+            conectar(os.ttyname(esclavo), 115200, MARCAS_SEGUNDA_LEY, timeout_s=timeout_s)
+        except TimeoutError:
+            pass
+        return time.perf_counter() - inicio
+    finally:
+        os.close(esclavo)
+        os.close(maestro)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--ensayos', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=4.0, help="timeout del saludo (s)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DE CONEXIÓN CON SALUDO")
+    print("=" * 60)
+    print(f"Espera fija anterior: {ESPERA_FIJA_S:.2f} s (bloqueando el hilo de Tk)")
+    print("-" * 60)
+    print(f"{'Equipo':<12} {'arranque':>9} {'listo (mediana)':>16} {'vs. espera fija':>16} {'1a trama':>9}")
+    for equipo in ('segundaley', 'primeraley'):
+        for arranque in (0.5, 1.0, 1.5):
+            tiempos, tramas = [], []
+            for _ in range(args.ensayos):
+                listo, n = con_saludo(equipo, arranque)
+                tiempos.append(listo)
+                tramas.append(n)
+            primera = "-" if equipo == 'primeraley' else ("sí" if min(tramas) >= 1 else "no")
+            print(f"{equipo:<12} {arranque:8.1f}s {statistics.median(tiempos):15.3f}s "
+                  f"{statistics.median(tiempos) - ESPERA_FIJA_S:+15.3f}s {primera:>9}")
+    print("-" * 60)
+    print(f"Sin respuesta del firmware: error a los {sin_respuesta(args.timeout):.2f} s "
+          f"(timeout {args.timeout:g} s)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark de decimación: tiempo de refresco vs. duración del historial
+
+Grafica historiales de distinto tamaño (de 50 muestras a varias horas) con
+la misma figura de segundaley/main.py sobre un canvas Agg y mide, para cada
+modo de comun.graficas.GraficaBlit (sin decimar, min-max y LTTB):
+
+- el refresco por blitting (lo que ocurre en cada tick de actualizar_graficas)
+- el redibujo completo (cuando cambian los límites o el tamaño de la ventana)
+
+Los historiales largos se construyen repitiendo las sesiones grabadas en
+segundaley/logs/.
+
+Uso:
+    python benchmarks/bench_decimacion.py --tamanos 50 2400 43200 200000
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.graficas import GraficaBlit
+
+DIR_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'segundaley', 'logs')
+SERIES = (('temp1', 'Temp1_C', 1), ('temp2', 'Temp2_C', 1), ('temp3', 'Temp3_C', 1),
+          ('caudal1', 'Caudal1_Lmin', 2), ('caudal2', 'Caudal2_Lmin', 2))
+MODOS = ((None, 'Sin decimar'), ('minmax', 'Min-max'), ('lttb', 'LTTB'))
+
+
+def cargar_series():
+    """Devuelve dict serie -> arreglo con todas las muestras grabadas"""
+    valores = {nombre: [] for nombre, _, _ in SERIES}
+    for archivo in sorted(glob.glob(os.path.join(DIR_LOGS, 'datos_*.csv'))):
+        with open(archivo, newline='', encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                try:
+                    numeros = [float(fila[columna]) for _, columna, _ in SERIES]
+                except (KeyError, ValueError, TypeError):
+                    continue
+                for (nombre, _, _), v in zip(SERIES, numeros):
+                    valores[nombre].append(v)
+    return {k: np.array(v) for k, v in valores.items()}
+
+
+def historial(series, tamano, periodo_s):
+    """Repite las series grabadas hasta ``tamano`` muestras"""
+    datos = {k: np.resize(v, tamano) for k, v in series.items()}
+    return np.arange(tamano) * periodo_s, datos
+
+
+def crear_grafica(decimacion):
+    fig = Figure(figsize=(8, 8), facecolor='#363636')
+    canvas = FigureCanvasAgg(fig)
+    ejes = {1: fig.add_subplot(211), 2: fig.add_subplot(212)}
+    fig.tight_layout(pad=3.0)
+    grafica = GraficaBlit(canvas, decimacion=decimacion)
+    for nombre, _, n_ax in SERIES:
+        grafica.agregar_serie(nombre, ejes[n_ax], '-', label=nombre, linewidth=2)
+    for ax in ejes.values():
+        ax.legend(loc='upper left')
+    return grafica
+
+
+def medir(series, tamano, periodo_s, decimacion, repeticiones):
+    """Devuelve (ms por refresco con blit, ms por redibujo completo, picos conservados)"""
+    x, datos = historial(series, tamano, periodo_s)
+    grafica = crear_grafica(decimacion)
+    grafica.actualizar(x, datos)
+
+    t0 = time.perf_counter()
+    for _ in range(repeticiones):
+        grafica.actualizar(x, datos)
+    t_blit = (time.perf_counter() - t0) * 1000.0 / repeticiones
+
+    t0 = time.perf_counter()
+    for _ in range(max(1, repeticiones // 5)):
+        grafica.canvas.draw()
+    t_completo = (time.perf_counter() - t0) * 1000.0 / max(1, repeticiones // 5)
+
+    picos = all(linea.get_ydata().max() == datos[nombre].max()
+                and linea.get_ydata().min() == datos[nombre].min()
+                for nombre, linea in grafica.series.items())
+    return t_blit, t_completo, picos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tamanos', type=int, nargs='+',
+                        default=[50, 2400, 14400, 43200, 200000],
+                        help="muestras por serie en el historial")
+    parser.add_argument('--periodo', type=float, default=1.5,
+                        help="segundos entre muestras (para mostrar la duración)")
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    series = cargar_series()
+    if not len(series['temp1']):
+        print(f"No se encontraron sesiones en {DIR_LOGS}")
+        return
+
+    print("=" * 72)
+    print("BENCHMARK DE DECIMACIÓN (canvas Agg, 5 series)")
+    print("=" * 72)
+    print(f"{'Muestras':>9} {'Duración':>9}  {'Modo':<12} {'Refresco blit':>14} "
+          f"{'Redibujo':>10}  Picos")
+    print("-" * 72)
+    for tamano in args.tamanos:
+        duracion = tamano * args.periodo / 3600.0
+        for decimacion, nombre in MODOS:
+            t_blit, t_completo, picos = medir(series, tamano, args.periodo,
+                                              decimacion, args.repeticiones)
+            print(f"{tamano:>9} {duracion:>7.2f} h  {nombre:<12} {t_blit:>11.2f} ms "
+                  f"{t_completo:>7.1f} ms  {'sí' if picos else 'no'}")
+        print("-" * 72)
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark de las reglas de disparo (comun/disparadores.py)
+
+Mide:
+
+- el costo de evaluar una regla armada por trama (MotorReglas.evaluar)
+- la latencia de punta a punta en un pseudo-terminal: desde que se escribe
+  la trama que cruza la temperatura objetivo hasta que llega START al otro
+  extremo, con el mismo ciclo de lectura que segundaley/test.py
+  (LectorLineas + ParserSegundaLey + MotorReglas), sin antirrebote y con
+  dos tramas de antirrebote
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_disparadores.py --ensayos 50 --tasa 20
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import select
+import statistics
+import sys
+import threading
+import time
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.disparadores import Condicion, MotorReglas, Regla
+from comun.protocolo import ParserSegundaLey, TramaSegundaLey
+from comun.serie import LectorLineas
+
+UMBRAL = 40.0
+
+
+def trama(temperatura):
+    return TramaSegundaLey(sistema="ESPERANDO", temp1=temperatura, temp2=30.0, temp3=20.0,
+                           caudal1=0.0, caudal2=0.0, volumen1=0.0, volumen2=0.0,
+                           pwm1=0, pwm2=0).a_texto().encode('utf-8')
+
+
+def costo_evaluacion(n_tramas):
+    """Microsegundos por trama de MotorReglas.evaluar con una regla armada"""
+    reglas = MotorReglas()
+    reglas.agregar(Regla('inicio', Condicion('temp1', '>=', 1e9, muestras=2), lambda d: None,
+                         armada=True))
+    datos = TramaSegundaLey(temp1=25.0, temp2=30.0, temp3=20.0, caudal1=1.0).como_dict()
+    inicio = time.perf_counter()
+    for i in range(n_tramas):
+        reglas.evaluar(datos, i * 0.05)
+    return (time.perf_counter() - inicio) / n_tramas * 1e6
+
+
+def latencias(ensayos, tasa, muestras):
+    """
+    Returns:
+        tuple: (cruce -> START, trama que completa el antirrebote -> START) en ms
+    """
+    maestro, esclavo = os.openpty()
+    conexion = serial.Serial(os.ttyname(esclavo), 115200, timeout=0.2)
+    reglas = MotorReglas()
+    reglas.agregar(Regla('inicio', Condicion('temp1', '>=', UMBRAL, muestras=muestras),
+                         lambda disparo: conexion.write(b"START\n")))
+    activo = threading.Event()
+    activo.set()
+
+    def leer():
+        lector = LectorLineas(conexion)
+        parser = ParserSegundaLey()
+        while activo.is_set():
+            texto = lector.leer_texto()
+            t_lectura = time.perf_counter()
+            for t in parser.procesar_texto(texto):
+                reglas.evaluar(t.como_dict(), t_lectura)
+
+    hilo = threading.Thread(target=leer, daemon=True)
+    hilo.start()
+    periodo = 1.0 / tasa
+    abajo, arriba = trama(UMBRAL - 5.0), trama(UMBRAL + 0.5)
+    desde_cruce, desde_trama = [], []
+    for _ in range(ensayos):
+        reglas.armar('inicio')
+        for _ in range(3):
+            os.write(maestro, abajo)
+            time.sleep(periodo)
+        t_cruce = t_ultima = None
+        recibido = b''
+        for _ in range(muestras + 5):
+            t_ultima = time.perf_counter()
+            os.write(maestro, arriba)
+            t_cruce = t_cruce or t_ultima
+            listo, _, _ = select.select([maestro], [], [], periodo)
+            if listo:
+                recibido += os.read(maestro, 64)
+                if b"START" in recibido:
+                    fin = time.perf_counter()
+                    desde_cruce.append((fin - t_cruce) * 1000)
+                    desde_trama.append((fin - t_ultima) * 1000)
+                    break
+            time.sleep(max(0.0, t_ultima + periodo - time.perf_counter()))
+    activo.clear()
+    hilo.join(timeout=1)
+    conexion.close()
+    os.close(esclavo)
+    os.close(maestro)
+    return desde_cruce, desde_trama
+
+
+def _resumen(valores):
+    if not valores:
+        return "sin disparos"
+    ordenados = sorted(valores)
+    p95 = ordenados[min(len(ordenados) - 1, int(0.95 * len(ordenados)))]
+    return f"mediana {statistics.median(valores):7.2f} ms  p95 {p95:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--ensayos', type=int, default=50, help="cruces por configuración")
+    parser.add_argument('--tasa', type=float, default=20.0, help="tramas por segundo")
+    parser.add_argument('--tramas', type=int, default=200000, help="tramas para medir el costo")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DE REGLAS DE DISPARO")
+    print("=" * 60)
+    print(f"{'Evaluación por trama':<30} {costo_evaluacion(args.tramas):7.2f} µs")
+    print(f"Latencia a {args.tasa:g} tramas/s, {args.ensayos} cruces:")
+    for muestras in (1, 2):
+        desde_cruce, desde_trama = latencias(args.ensayos, args.tasa, muestras)
+        print(f"  antirrebote {muestras} trama(s)")
+        print(f"    {'cruce -> START':<26} {_resumen(desde_cruce)}")
+        print(f"    {'última trama -> START':<26} {_resumen(desde_trama)}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark del enlace supervisado: cortes del cable simulados
+
+Sobre el simulador de Segunda Ley, detrás de un enlace simbólico que hace
+de puerto fijo (como ``/dev/ttyACM0`` al reconectar el USB), corta el
+puerto durante distintos tiempos y lo vuelve a abrir. Para cada corte
+informa:
+
+- la demora entre que el puerto vuelve a existir y la primera trama nueva
+- el hueco que ``EnlaceSupervisado`` contabiliza y el que ``LogSesion.huecos``
+  encuentra en el CSV con las marcas de enlace
+- los renglones ``ERROR LECTURA`` que el ciclo anterior (reintento cada 0.1 s
+  sin reconectar) habría escrito durante el mismo corte
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_enlace.py --cortes 0.5 2 5
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.conexion import MARCAS_SEGUNDA_LEY, conectar
+from comun.enlace import EnlaceSupervisado
+from comun.log_sesion import LogSesion
+from comun.protocolo import ESTADO_ENLACE_RESTABLECIDO, ESTADO_SIN_ENLACE, ParserSegundaLey
+from comun.simulador import Simulador, crear_arduino
+
+# El ciclo anterior de leer_datos: registrar el error y dormir 0.1 s
+REINTENTO_ANTERIOR_S = 0.1
+
+
+def arrancar(enlace_simbolico, arranque_s):
+    """Inicia un simulador y apunta ``enlace_simbolico`` a su pseudo-terminal"""
+    simulador = Simulador(crear_arduino('segundaley', semilla=1), arranque_s=arranque_s)
+    puerto = simulador.iniciar()
+    if os.path.lexists(enlace_simbolico):
+        os.remove(enlace_simbolico)
+    os.symlink(puerto, enlace_simbolico)
+    return simulador
+
+
+def medir_corte(directorio, corte_s, arranque_s, espera_max_s):
+    """
+    Returns:
+        dict: demora de la primera trama, hueco contabilizado, hueco en el CSV
+    """
+    puerto = os.path.join(directorio, 'ttyLAB')
+    archivo = os.path.join(directorio, f'datos_corte_{corte_s:g}.csv')
+    simulador = arrancar(puerto, arranque_s)
+    conexion, saludo = conectar(puerto, simulador.arduino.BAUDIOS, MARCAS_SEGUNDA_LEY)
+
+    inicio = time.monotonic()
+    csv = open(archivo, 'w', encoding='utf-8')
+    csv.write("Tiempo_Relativo_s,Temp1_C,Estado_Sistema\n")
+    candado = threading.Lock()
+    restablecido = threading.Event()
+
+    def fila(temperatura, sistema):
+        with candado:
+            csv.write(f"{time.monotonic() - inicio:.3f},{temperatura},{sistema}\n")
+
+    enlace = EnlaceSupervisado(
+        puerto, simulador.arduino.BAUDIOS, MARCAS_SEGUNDA_LEY, conexion, saludo,
+        al_perder=lambda motivo: fila('', ESTADO_SIN_ENLACE),
+        al_restablecer=lambda duracion, intentos: (fila('', ESTADO_ENLACE_RESTABLECIDO),
+                                                   restablecido.set()),
+        espera_max_s=espera_max_s)
+
+    primera_trama = [None]
+    activo = [True]
+
+    def leer():
+        parser = ParserSegundaLey()
+        while activo[0]:
+            for trama in parser.procesar_texto(enlace.leer_texto()):
+                fila(trama.temp1, trama.sistema)
+                if restablecido.is_set() and primera_trama[0] is None:
+                    primera_trama[0] = time.monotonic()
+
+    hilo = threading.Thread(target=leer, daemon=True)
+    hilo.start()
+    try:
+        time.sleep(1.5)
+        simulador.detener()
+        time.sleep(corte_s)
+        simulador = arrancar(puerto, arranque_s)
+        vuelta = time.monotonic()
+        restablecido.wait(espera_max_s + 10.0)
+        time.sleep(1.0)
+    finally:
+        activo[0] = False
+        enlace.close()
+        hilo.join(2.0)
+        simulador.detener()
+        csv.close()
+        if os.path.lexists(puerto):
+            os.remove(puerto)
+
+    huecos = LogSesion(archivo).huecos()
+    return {
+        'demora_s': primera_trama[0] - vuelta if primera_trama[0] else float('nan'),
+        'sin_enlace_s': enlace.tiempo_sin_enlace_s,
+        'reintentos': enlace.reintentos,
+        'hueco_csv_s': float(huecos['duracion_s'].sum()) if len(huecos) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cortes', type=float, nargs='+', default=[0.5, 2.0, 5.0],
+                        help="duración de cada corte (s)")
+    parser.add_argument('--arranque', type=float, default=0.5,
+                        help="arranque del Arduino al reabrir (s)")
+    parser.add_argument('--espera-max', type=float, default=4.0,
+                        help="tope de la espera entre reintentos (s)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DEL ENLACE SUPERVISADO")
+    print("=" * 60)
+    print(f"Arranque del Arduino: {args.arranque:g} s, espera máxima entre reintentos: "
+          f"{args.espera_max:g} s")
+    print("-" * 60)
+    print(f"{'corte':>7} {'1a trama':>10} {'sin enlace':>11} {'reintentos':>10} "
+          f"{'hueco CSV':>10} {'ERROR ant.':>10}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for corte in args.cortes:
+            r = medir_corte(directorio, corte, args.arranque, args.espera_max)
+            errores = int(corte / REINTENTO_ANTERIOR_S)
+            print(f"{corte:6.1f}s {r['demora_s']:9.2f}s {r['sin_enlace_s']:10.2f}s "
+                  f"{r['reintentos']:10d} {r['hueco_csv_s']:9.2f}s {errores:10d}")
+    print("-" * 60)
+    print("Antes: sin reconexión; los renglones de error siguen hasta cerrar la interfaz")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark de refresco de gráficas: redibujo completo vs. blitting
+
+Reproduce la figura de segundaley/main.py (temperaturas y caudales) sobre un
+canvas Agg sin ventana y mide el tiempo por cuadro de:
+
+- la ruta original de actualizar_graficas (clear, plot, legend,
+  tight_layout y draw en cada refresco)
+- comun.graficas.GraficaBlit (set_data + restore_region + blit)
+
+Los datos son una ventana deslizante sobre las sesiones grabadas en
+segundaley/logs/.
+
+Uso:
+    python benchmarks/bench_graficas.py --cuadros 100 --puntos 50
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.graficas import GraficaBlit
+
+DIR_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'segundaley', 'logs')
+SERIES = ('temp1', 'temp2', 'temp3', 'caudal1', 'caudal2')
+COLUMNAS = ('Temp1_C', 'Temp2_C', 'Temp3_C', 'Caudal1_Lmin', 'Caudal2_Lmin')
+
+
+def cargar_datos():
+    """Devuelve (tiempos, dict serie -> valores) de todas las sesiones grabadas, concatenadas"""
+    tiempos = []
+    valores = {s: [] for s in SERIES}
+    desfase = 0.0
+    for archivo in sorted(glob.glob(os.path.join(DIR_LOGS, 'datos_*.csv'))):
+        ultimo = 0.0
+        with open(archivo, newline='', encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                try:
+                    numeros = [float(fila[c]) for c in COLUMNAS]
+                    t = float(fila['Tiempo_Relativo_s'])
+                except (KeyError, ValueError, TypeError):
+                    continue
+                tiempos.append(desfase + t)
+                ultimo = t
+                for s, v in zip(SERIES, numeros):
+                    valores[s].append(v)
+        desfase += ultimo
+    return tiempos, valores
+
+
+def crear_figura():
+    """Misma figura que MonitorArduino.crear_interfaz, sobre un canvas Agg"""
+    fig = Figure(figsize=(8, 8), facecolor='#363636')
+    canvas = FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(211)
+    ax2 = fig.add_subplot(212)
+    for ax, titulo, unidad in ((ax1, 'Temperaturas', '°C'), (ax2, 'Caudales', 'L/min')):
+        ax.set_facecolor('#2b2b2b')
+        ax.set_title(titulo, color='white', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Tiempo (s)', color='white')
+        ax.set_ylabel(unidad, color='white')
+        ax.tick_params(colors='white')
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout(pad=3.0)
+    canvas.draw()
+    return fig, canvas, ax1, ax2
+
+
+def refresco_original(fig, canvas, ax1, ax2, tiempo_relativo, datos):
+    """Copia del cuerpo de actualizar_graficas antes de comun.graficas"""
+    ax1.clear()
+    ax2.clear()
+
+    ax1.set_facecolor('#2b2b2b')
+    ax1.set_title('Temperaturas', color='white', fontsize=12, fontweight='bold')
+    ax1.set_xlabel('Tiempo (s)', color='white')
+    ax1.set_ylabel('°C', color='white')
+    ax1.tick_params(colors='white')
+    ax1.grid(True, alpha=0.3)
+
+    ax1.plot(tiempo_relativo, datos['temp1'], 'r-', label='T1 (Entrada)', linewidth=2)
+    ax1.plot(tiempo_relativo, datos['temp2'], 'g-', label='T2 (Salida)', linewidth=2)
+    ax1.plot(tiempo_relativo, datos['temp3'], 'b-', label='T3 (Frío)', linewidth=2)
+    ax1.legend(facecolor='#363636', edgecolor='white', labelcolor='white', loc='best')
+
+    ax2.set_facecolor('#2b2b2b')
+    ax2.set_title('Caudales', color='white', fontsize=12, fontweight='bold')
+    ax2.set_xlabel('Tiempo (s)', color='white')
+    ax2.set_ylabel('L/min', color='white')
+    ax2.tick_params(colors='white')
+    ax2.grid(True, alpha=0.3)
+
+    ax2.plot(tiempo_relativo, datos['caudal1'], 'c-', label='Q1 (Caliente)', linewidth=2)
+    ax2.plot(tiempo_relativo, datos['caudal2'], 'm-', label='Q2 (Frío)', linewidth=2)
+    ax2.legend(facecolor='#363636', edgecolor='white', labelcolor='white', loc='best')
+
+    fig.tight_layout(pad=3.0)
+    canvas.draw()
+
+
+def ventanas(tiempos, valores, n_cuadros, puntos, avance):
+    """Genera (tiempo_relativo, datos) como los vería actualizar_graficas en cada refresco"""
+    total = len(tiempos)
+    for i in range(n_cuadros):
+        fin = min(puntos + i * avance, total)
+        ini = max(0, fin - puntos)
+        t = tiempos[ini:fin]
+        yield [x - t[0] for x in t], {s: valores[s][ini:fin] for s in SERIES}
+
+
+def medir(nombre, refrescar, cuadros):
+    """Devuelve el resumen de tiempos por cuadro en ms"""
+    tiempos = []
+    for tiempo_relativo, datos in cuadros:
+        t0 = time.perf_counter()
+        refrescar(tiempo_relativo, datos)
+        tiempos.append((time.perf_counter() - t0) * 1000.0)
+    tiempos = np.array(tiempos)
+    return {'nombre': nombre, 'media': tiempos.mean(), 'p95': np.percentile(tiempos, 95),
+            'maximo': tiempos.max()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cuadros', type=int, default=100, help="refrescos a medir por ruta")
+    parser.add_argument('--puntos', type=int, default=50, help="tamaño del historial graficado")
+    parser.add_argument('--avance', type=int, default=10,
+                        help="muestras nuevas entre refrescos (10 = 1 s a 10 tramas/s)")
+    args = parser.parse_args()
+
+    tiempos, valores = cargar_datos()
+    if len(tiempos) < args.puntos:
+        print(f"No hay suficientes datos en {DIR_LOGS}")
+        return
+
+    fig, canvas, ax1, ax2 = crear_figura()
+    r_orig = medir('Redibujo completo (original)',
+                   lambda t, d: refresco_original(fig, canvas, ax1, ax2, t, d),
+                   ventanas(tiempos, valores, args.cuadros, args.puntos, args.avance))
+
+    fig, canvas, ax1, ax2 = crear_figura()
+    grafica = GraficaBlit(canvas)
+    for nombre, ax, estilo in (('temp1', ax1, 'r-'), ('temp2', ax1, 'g-'), ('temp3', ax1, 'b-'),
+                               ('caudal1', ax2, 'c-'), ('caudal2', ax2, 'm-')):
+        grafica.agregar_serie(nombre, ax, estilo, label=nombre, linewidth=2)
+    for ax in (ax1, ax2):
+        ax.legend(facecolor='#363636', edgecolor='white', labelcolor='white', loc='best')
+    canvas.draw()
+    r_blit = medir('GraficaBlit (set_data + blit)', grafica.actualizar,
+                   ventanas(tiempos, valores, args.cuadros, args.puntos, args.avance))
+
+    print("=" * 60)
+    print("BENCHMARK DE REFRESCO DE GRÁFICAS (canvas Agg)")
+    print("=" * 60)
+    print(f"Cuadros: {args.cuadros} | puntos por serie: {args.puntos} | avance: {args.avance}")
+    print("-" * 60)
+    for r in (r_orig, r_blit):
+        print(f"{r['nombre']:.<32} media={r['media']:7.2f} ms  p95={r['p95']:7.2f} ms  "
+              f"máx={r['maximo']:7.2f} ms")
+    print(f"Redibujos completos con blitting: {grafica.redibujados} de {args.cuadros}")
+    print(f"Aceleración media: {r_orig['media'] / r_blit['media']:.1f} x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
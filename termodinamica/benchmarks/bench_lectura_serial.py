@@ -0,0 +1,150 @@
+"""
+Benchmark de lectura serial: sondeo de in_waiting vs. lectura en bloque
+
+Reproduce las sesiones grabadas en segundaley/logs/ con el formato de texto
+de segundaley/arduino/app.ino a través de un pseudo-terminal y mide el
+tiempo de CPU del hilo lector por cada 1,000 tramas, así como el consumo
+en reposo (sin datos llegando).
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_lectura_serial.py --tramas 1000 --tasa 200
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import threading
+import time
+
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.serie import LectorLineas
+from comun.protocolo import TramaSegundaLey
+
+DIR_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'segundaley', 'logs')
+
+
+def cargar_tramas():
+    """Lee todas las sesiones datos_*.csv y devuelve la lista de tramas en bytes"""
+    tramas = []
+    for archivo in sorted(glob.glob(os.path.join(DIR_LOGS, 'datos_*.csv'))):
+        with open(archivo, newline='', encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                try:
+                    tramas.append(TramaSegundaLey.desde_fila_csv(fila).a_texto().encode('utf-8'))
+                except (KeyError, ValueError):
+                    pass
+    return tramas
+
+
+def lector_sondeo(conexion, contador, activo):
+    """Réplica del ciclo original de leer_datos (sondea in_waiting sin pausa)"""
+    while activo.is_set():
+        if conexion.in_waiting:
+            linea = conexion.readline().decode('utf-8', errors='ignore').strip()
+            if "Sistema:" in linea:
+                contador[0] += 1
+
+
+def lector_bloque(conexion, contador, activo):
+    """Ciclo nuevo de leer_datos basado en LectorLineas"""
+    lector = LectorLineas(conexion)
+    while activo.is_set():
+        for linea in lector.leer_lineas():
+            if "Sistema:" in linea:
+                contador[0] += 1
+
+
+def ejecutar(modo, tramas, n_tramas, tasa, reposo_s):
+    """
+    Ejecuta un modo de lectura sobre un pseudo-terminal
+
+    Returns:
+        dict: CPU por 1,000 tramas (ms), CPU en reposo (%) y tramas recibidas
+    """
+    maestro, esclavo = os.openpty()
+    conexion = serial.Serial(os.ttyname(esclavo), 115200, timeout=0.2)
+    contador = [0]
+    activo = threading.Event()
+    activo.set()
+
+    objetivo = lector_sondeo if modo == 'sondeo' else lector_bloque
+    hilo = threading.Thread(target=objetivo, args=(conexion, contador, activo), daemon=True)
+    hilo.start()
+
+    # El escritor corre en este mismo proceso con el mismo costo en ambos
+    # modos, así que la diferencia de process_time() es atribuible al lector
+
+    # Fase 1: reposo (sin datos)
+    cpu_ini = time.process_time()
+    time.sleep(reposo_s)
+    cpu_reposo = time.process_time() - cpu_ini
+
+    # Fase 2: ráfaga de tramas a la tasa indicada
+    periodo = 1.0 / tasa if tasa > 0 else 0.0
+    cpu_ini = time.process_time()
+    inicio = time.perf_counter()
+    for i in range(n_tramas):
+        os.write(maestro, tramas[i % len(tramas)])
+        if periodo:
+            espera = inicio + (i + 1) * periodo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+    limite = time.perf_counter() + 5.0
+    while contador[0] < n_tramas and time.perf_counter() < limite:
+        time.sleep(0.01)
+    cpu_rafaga = time.process_time() - cpu_ini
+
+    activo.clear()
+    hilo.join(timeout=2)
+    conexion.close()
+    os.close(esclavo)
+    os.close(maestro)
+
+    return {
+        'modo': modo,
+        'recibidas': contador[0],
+        'cpu_ms_por_1000': 1000.0 * cpu_rafaga * 1000.0 / max(contador[0], 1),
+        'cpu_reposo_pct': 100.0 * cpu_reposo / reposo_s,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--tramas', type=int, default=1000, help="tramas a enviar por modo")
+    parser.add_argument('--tasa', type=float, default=200.0,
+                        help="tramas por segundo (0 = sin pausa)")
+    parser.add_argument('--reposo', type=float, default=2.0,
+                        help="segundos de medición sin datos")
+    args = parser.parse_args()
+
+    tramas = cargar_tramas()
+    if not tramas:
+        print(f"No se encontraron sesiones en {DIR_LOGS}")
+        return
+
+    print("=" * 60)
+    print("BENCHMARK DE LECTURA SERIAL (pseudo-terminal)")
+    print("=" * 60)
+    print(f"Tramas grabadas: {len(tramas)} | enviadas por modo: {args.tramas} "
+          f"| tasa: {args.tasa:g} tramas/s")
+    print("-" * 60)
+
+    for modo in ('sondeo', 'bloque'):
+        r = ejecutar(modo, tramas, args.tramas, args.tasa, args.reposo)
+        print(f"{r['modo']:<8} recibidas={r['recibidas']:<6} "
+              f"CPU/1000 tramas={r['cpu_ms_por_1000']:8.1f} ms   "
+              f"CPU en reposo={r['cpu_reposo_pct']:5.1f} %")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
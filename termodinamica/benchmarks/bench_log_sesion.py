@@ -0,0 +1,112 @@
+"""
+Benchmark de la lectura por bloques de un log de sesión largo
+
+Repite las filas de los logs grabados en segundaley/logs/ (con el tiempo
+relativo desplazado) hasta formar una corrida desatendida de varias horas
+y compara, en tiempo y pico de memoria (tracemalloc):
+
+- cargar el CSV completo con pandas y agrupar por ventana de tiempo
+- LogSesion.agregar_por_ventana (por bloques, memoria constante)
+- leer solo una hora del medio con el índice disperso
+
+Uso:
+    python benchmarks/bench_log_sesion.py --horas 48 --ventana 60
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+from comun.log_sesion import COLUMNA_TIEMPO, COLUMNAS_NUMERICAS, LogSesion
+from comun.registro import ENCABEZADO_SEGUNDA_LEY
+
+
+def preparar(ruta, horas):
+    """Concatena los logs grabados hasta cubrir ``horas`` de tiempo relativo"""
+    filas = []
+    for archivo in sorted(glob.glob(os.path.join(RAIZ, 'segundaley', 'logs', 'datos_*.csv'))):
+        with open(archivo, newline='', encoding='utf-8', errors='ignore') as f:
+            lector = csv.reader(f)
+            if next(lector, None) != ENCABEZADO_SEGUNDA_LEY:
+                continue
+            filas.extend(fila for fila in lector if len(fila) == len(ENCABEZADO_SEGUNDA_LEY))
+    i_tiempo = ENCABEZADO_SEGUNDA_LEY.index(COLUMNA_TIEMPO)
+    objetivo = horas * 3600.0
+    t = 0.0
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(ENCABEZADO_SEGUNDA_LEY)
+        while t < objetivo:
+            for fila in filas:
+                t += 0.5
+                fila = list(fila)
+                fila[i_tiempo] = f"{t:.3f}"
+                escritor.writerow(fila)
+
+
+def medir(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duracion, pico / 1e6, resultado
+
+
+def completo(ruta, ventana_s):
+    df = pd.read_csv(ruta, na_values=['--'])
+    columnas = [c for c in COLUMNAS_NUMERICAS if c in df.columns]
+    grupos = df[columnas].groupby((df[COLUMNA_TIEMPO] // ventana_s) * ventana_s)
+    return grupos.agg(['mean', 'std', 'min', 'max'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--horas', type=float, default=48.0)
+    parser.add_argument('--ventana', type=float, default=60.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        ruta = os.path.join(temporal, 'datos_largo.csv')
+        preparar(ruta, args.horas)
+
+        print("=" * 60)
+        print("BENCHMARK DE LECTURA POR BLOQUES")
+        print("=" * 60)
+        print(f"Log: {args.horas:g} h, {os.path.getsize(ruta) / 1e6:.1f} MB, "
+              f"ventanas de {args.ventana:g} s")
+        print("-" * 60)
+
+        t, pico, resumen = medir(lambda: completo(ruta, args.ventana))
+        print(f"{'Carga completa + groupby':<30} {t:7.2f} s  pico {pico:7.1f} MB  ({len(resumen)} ventanas)")
+
+        t, pico, log = medir(lambda: LogSesion(ruta))
+        print(f"{'Índice disperso':<30} {t:7.2f} s  pico {pico:7.1f} MB  ({len(log.tiempos)} entradas)")
+
+        t, pico, resumen = medir(lambda: log.agregar_por_ventana(args.ventana))
+        print(f"{'agregar_por_ventana':<30} {t:7.2f} s  pico {pico:7.1f} MB  ({len(resumen)} ventanas)")
+
+        mitad = args.horas * 3600.0 / 2
+
+        def una_hora():
+            return sum(len(b) for b in log.bloques(mitad, mitad + 3600.0, ['Temp1_C']))
+        t, pico, filas = medir(una_hora)
+        print(f"{'Una hora del medio':<30} {t:7.2f} s  pico {pico:7.1f} MB  ({filas} filas)")
+        print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
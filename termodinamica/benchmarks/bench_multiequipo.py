@@ -0,0 +1,153 @@
+"""
+Benchmark de adquisición de varios equipos: un hilo por puerto vs. asyncio
+
+Levanta 1, 4 y 16 Arduinos de Segunda Ley simulados (en un proceso aparte,
+para no mezclar su CPU con la medida) y los atiende de dos formas, ambas
+con parser, CSV de sesión y log de eventos por equipo:
+
+- hilos: un ``Adquisidor`` de comun/adquisicion.py por puerto, como correr
+  un servicio (o una interfaz) por equipo
+- asyncio: un solo ``ServidorMultiequipo`` (comun/multiequipo.py)
+
+Informa tramas/s agregadas, CPU del proceso adquisidor y microsegundos de
+CPU por trama. Con ``--tasa 0`` los simuladores envían tan rápido como se
+lea y las tramas/s son el máximo sostenible.
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_multiequipo.py --tasa 200 --segundos 5
+    python benchmarks/bench_multiequipo.py --tasa 0 --puertos 1 4 16
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.adquisicion import Adquisidor
+from comun.escritura import PoliticaEscritura
+from comun.multiequipo import PuertoEquipo, ServidorMultiequipo
+from comun.simulador import Simulador, crear_arduino
+
+CALENTAMIENTO_S = 1.0
+
+
+def simuladores(n, tasa, canal):
+    """Proceso hijo: ``n`` simuladores; envía sus puertos y espera la orden de detenerse"""
+    lista = [Simulador(crear_arduino('segundaley', semilla=i), tasa=tasa) for i in range(n)]
+    canal.send([s.iniciar() for s in lista])
+    canal.recv()
+    for simulador in lista:
+        simulador.detener()
+
+
+class ConHilos:
+    """Un Adquisidor (hilo lector bloqueante) por puerto"""
+
+    def __init__(self, puertos, directorio):
+        self.adquisidores = [
+            Adquisidor('segundaley', puerto, escucha=('127.0.0.1', 0),
+                       directorio=os.path.join(directorio, str(i)), politica=PoliticaEscritura())
+            for i, puerto in enumerate(puertos)]
+        self.hilos = [threading.Thread(target=a.ejecutar, daemon=True) for a in self.adquisidores]
+
+    def iniciar(self):
+        for hilo in self.hilos:
+            hilo.start()
+
+    @property
+    def tramas(self):
+        return sum(a.registro.tramas for a in self.adquisidores)
+
+    def detener(self):
+        for adquisidor in self.adquisidores:
+            adquisidor.detener()
+        for hilo in self.hilos:
+            hilo.join(5.0)
+
+
+class ConAsyncio:
+    """Todos los puertos en un ServidorMultiequipo"""
+
+    def __init__(self, puertos, directorio):
+        self.servidor = ServidorMultiequipo(
+            PuertoEquipo('segundaley', puerto, os.path.join(directorio, str(i)),
+                         politica=PoliticaEscritura())
+            for i, puerto in enumerate(puertos))
+        self.hilo = threading.Thread(target=lambda: asyncio.run(self.servidor.ejecutar()),
+                                     daemon=True)
+
+    def iniciar(self):
+        self.hilo.start()
+
+    @property
+    def tramas(self):
+        return self.servidor.tramas
+
+    def detener(self):
+        self.servidor.detener()
+        self.hilo.join(10.0)
+
+
+def medir(modo, n, tasa, segundos):
+    """
+    Returns:
+        tuple: (tramas/s agregadas, % de CPU del proceso, µs de CPU por trama, hilos)
+    """
+    canal, canal_hijo = multiprocessing.Pipe()
+    hijo = multiprocessing.Process(target=simuladores, args=(n, tasa, canal_hijo), daemon=True)
+    hijo.start()
+    puertos = canal.recv()
+    # Los mensajes de sesión de cada equipo no interesan aquí
+    with tempfile.TemporaryDirectory() as directorio, contextlib.redirect_stdout(io.StringIO()):
+        adquisicion = (ConHilos if modo == 'hilos' else ConAsyncio)(puertos, directorio)
+        adquisicion.iniciar()
+        try:
+            time.sleep(CALENTAMIENTO_S)
+            tramas0, cpu0, t0 = adquisicion.tramas, time.process_time(), time.perf_counter()
+            time.sleep(segundos)
+            tramas = adquisicion.tramas - tramas0
+            cpu = time.process_time() - cpu0
+            transcurrido = time.perf_counter() - t0
+            hilos = threading.active_count() - 1
+        finally:
+            adquisicion.detener()
+            canal.send('fin')
+            hijo.join(5.0)
+    por_trama = cpu / tramas * 1e6 if tramas else float('nan')
+    return tramas / transcurrido, 100.0 * cpu / transcurrido, por_trama, hilos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--puertos', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--tasa', type=float, default=200.0,
+                        help="tramas/s de cada simulador (0 = tan rápido como se lea)")
+    parser.add_argument('--segundos', type=float, default=5.0, help="duración de cada medida")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK DE ADQUISICIÓN MULTIEQUIPO")
+    print("=" * 60)
+    tasa = "máxima" if args.tasa == 0 else f"{args.tasa:g} tramas/s por puerto"
+    print(f"Segunda Ley, {tasa}, {args.segundos:g} s por medida, {os.cpu_count()} CPU")
+    print("-" * 60)
+    print(f"{'puertos':>7} {'modo':<8} {'tramas/s':>10} {'CPU':>7} {'µs/trama':>9} {'hilos':>6}")
+    for n in args.puertos:
+        for modo in ('hilos', 'asyncio'):
+            tramas_s, cpu, por_trama, hilos = medir(modo, n, args.tasa, args.segundos)
+            print(f"{n:7d} {modo:<8} {tramas_s:10.0f} {cpu:6.1f}% {por_trama:9.1f} {hilos:6d}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Micro-benchmark del parser del protocolo de Segunda Ley
+
+Compara, en líneas por segundo, la cadena original de comparaciones ``in``
+de leer_datos contra ``comun.protocolo.ParserSegundaLey`` (por bloque con
+``procesar_texto`` y línea por línea con ``procesar_linea``), usando como
+entrada las sesiones grabadas en segundaley/logs/ convertidas al texto de
+app.ino. También verifica que ambos produzcan los mismos valores, y que
+la trama de monitoreo_sistema.ino (bombas sin PWM ni modo) se lea completa.
+
+Uso:
+    python benchmarks/bench_protocolo.py --repeticiones 5
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.protocolo import ParserSegundaLey, TramaSegundaLey
+
+DIR_LOGS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'segundaley', 'logs')
+
+# Bloque de MostrarDatos en segundaley/arduino/monitoreo_sistema.ino
+TRAMA_MONITOREO = (
+    "========================================\r\n"
+    "--- TEMPERATURAS ---\r\n"
+    "Sensor 1 (pin11): 24.50 °C\r\n"
+    "Sensor 2 (pin12): 25.00 °C\r\n"
+    "Sensor 3 (pin4): 23.75 °C\r\n"
+    "\r\n--- CAUDALIMETROS ---\r\n"
+    "Caudal 1 (pin2): 1.234 L/min  |  Vol: 0.500 L\r\n"
+    "Caudal 2 (pin3): 2.000 L/min  |  Vol: 1.000 L\r\n"
+    "\r\n--- BOMBAS ---\r\n"
+    "Bomba 1: ENCENDIDA\r\n"
+    "Bomba 2: ENCENDIDA\r\n"
+    "========================================\r\n\r\n"
+)
+ESPERADO_MONITOREO = {'temp1': 24.5, 'temp2': 25.0, 'temp3': 23.75, 'caudal1': 1.234,
+                      'caudal2': 2.0, 'volumen1': 0.5, 'volumen2': 1.0,
+                      'bomba1': 'ENCENDIDA', 'bomba2': 'ENCENDIDA'}
+
+
+def cargar_lineas():
+    """Devuelve las líneas (decodificadas y sin espacios) de todas las sesiones grabadas"""
+    lineas = []
+    for archivo in sorted(glob.glob(os.path.join(DIR_LOGS, 'datos_*.csv'))):
+        with open(archivo, newline='', encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                try:
+                    texto = TramaSegundaLey.desde_fila_csv(fila).a_texto()
+                except (KeyError, ValueError):
+                    continue
+                lineas.extend(l.strip() for l in texto.split('\n'))
+    return lineas
+
+
+def parsear_original(lineas):
+    """Copia del parseo de MonitorArduino.leer_datos antes de comun.protocolo"""
+    tramas = []
+    datos_actuales = {}
+    for linea in lineas:
+        if "Sistema:" in linea:
+            try:
+                estado = linea.split(":")[1].strip()
+                datos_actuales['sistema'] = estado
+            except:
+                pass
+
+        elif "Sensor 1 (pin11):" in linea:
+            try:
+                temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
+                datos_actuales['temp1'] = float(temp)
+            except:
+                pass
+
+        elif "Sensor 2 (pin12):" in linea:
+            try:
+                temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
+                datos_actuales['temp2'] = float(temp)
+            except:
+                pass
+
+        elif "Sensor 3 (pin4):" in linea:
+            try:
+                temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
+                datos_actuales['temp3'] = float(temp)
+            except:
+                pass
+
+        elif "Caudal 1 (pin2):" in linea:
+            try:
+                partes = linea.split("|")
+                caudal = partes[0].split(":")[1].replace("L/min", "").strip()
+                volumen = partes[1].split(":")[1].replace("L", "").strip()
+                datos_actuales['caudal1'] = float(caudal)
+                datos_actuales['volumen1'] = float(volumen)
+            except:
+                pass
+
+        elif "Caudal 2 (pin3):" in linea:
+            try:
+                partes = linea.split("|")
+                caudal = partes[0].split(":")[1].replace("L/min", "").strip()
+                volumen = partes[1].split(":")[1].replace("L", "").strip()
+                datos_actuales['caudal2'] = float(caudal)
+                datos_actuales['volumen2'] = float(volumen)
+            except:
+                pass
+
+        elif "Bomba 1:" in linea:
+            try:
+                partes = linea.split("|")
+                estado = partes[0].split(":")[1].strip()
+                pwm_str = partes[1].split(":")[1].strip()
+                pwm = pwm_str.split("(")[0].strip()
+                duty = pwm_str.split("(")[1].replace("%)", "").strip()
+                modo = partes[2].split(":")[1].strip()
+
+                datos_actuales['bomba1'] = estado
+                datos_actuales['pwm1'] = pwm
+                datos_actuales['duty1'] = duty
+                datos_actuales['modo1'] = modo
+            except:
+                pass
+
+        elif "Bomba 2:" in linea:
+            try:
+                partes = linea.split("|")
+                estado = partes[0].split(":")[1].strip()
+                pwm_str = partes[1].split(":")[1].strip()
+                pwm = pwm_str.split("(")[0].strip()
+                duty = pwm_str.split("(")[1].replace("%)", "").strip()
+                modo = partes[2].split(":")[1].strip()
+
+                datos_actuales['bomba2'] = estado
+                datos_actuales['pwm2'] = pwm
+                datos_actuales['duty2'] = duty
+                datos_actuales['modo2'] = modo
+            except:
+                pass
+
+        elif "Setpoint 1:" in linea:
+            try:
+                error = linea.split("Error:")[1].strip()
+                datos_actuales['error1'] = error
+            except:
+                pass
+
+        elif "Setpoint 2:" in linea:
+            try:
+                error = linea.split("Error:")[1].strip()
+                datos_actuales['error2'] = error
+            except:
+                pass
+
+        if "========================================" in linea and datos_actuales:
+            tramas.append(datos_actuales)
+            datos_actuales = {}
+    return tramas
+
+
+def parsear_bloque(texto):
+    """Parseo por bloque, como en leer_datos (expresión regular por trama)"""
+    return ParserSegundaLey().procesar_texto(texto)
+
+
+def parsear_tabla(lineas):
+    """Parseo línea por línea con la tabla de prefijos"""
+    parser = ParserSegundaLey()
+    tramas = []
+    for linea in lineas:
+        trama = parser.procesar_linea(linea)
+        if trama is not None:
+            tramas.append(trama)
+    return tramas
+
+
+def medir(funcion, lineas, repeticiones):
+    """Devuelve (mejor tiempo en s, resultado de la última ejecución)"""
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion(lineas)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def verificar(originales, nuevas):
+    """Compara los valores numéricos de ambas implementaciones"""
+    if len(originales) != len(nuevas):
+        return False
+    for a, b in zip(originales, nuevas):
+        b = b.como_dict()
+        for clave in ('temp1', 'temp2', 'temp3', 'caudal1', 'caudal2', 'volumen1', 'volumen2'):
+            if a.get(clave) != b.get(clave):
+                return False
+        for clave in ('pwm1', 'pwm2', 'duty1', 'duty2'):
+            if float(a[clave]) != float(b[clave]):
+                return False
+        if a.get('sistema') != b.get('sistema') or a.get('modo1') != b.get('modo1'):
+            return False
+    return True
+
+
+def verificar_monitoreo():
+    """La trama de monitoreo_sistema.ino da los mismos valores por bloque y por línea"""
+    por_bloque = ParserSegundaLey().procesar_texto(TRAMA_MONITOREO)
+    por_linea = parsear_tabla([l.strip() for l in TRAMA_MONITOREO.split('\n')])
+    return all(len(tramas) == 1 and tramas[0].como_dict() == ESPERADO_MONITOREO
+               for tramas in (por_bloque, por_linea))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    lineas = cargar_lineas()
+    if not lineas:
+        print(f"No se encontraron sesiones en {DIR_LOGS}")
+        return
+
+    texto = "\r\n".join(lineas) + "\r\n"
+    t_orig, r_orig = medir(parsear_original, lineas, args.repeticiones)
+    t_bloque, r_bloque = medir(parsear_bloque, texto, args.repeticiones)
+    t_tabla, r_tabla = medir(parsear_tabla, lineas, args.repeticiones)
+
+    print("=" * 60)
+    print("MICRO-BENCHMARK DEL PROTOCOLO SEGUNDA LEY")
+    print("=" * 60)
+    print(f"Líneas: {len(lineas)} | Tramas: {len(r_orig)}")
+    print("-" * 60)
+    for nombre, t, r in (('Cadena original (in/split)', t_orig, None),
+                         ('ParserSegundaLey.procesar_texto', t_bloque, r_bloque),
+                         ('ParserSegundaLey.procesar_linea', t_tabla, r_tabla)):
+        linea = f"{nombre:.<36} {len(lineas) / t:>12,.0f} líneas/s  {t_orig / t:5.2f} x"
+        if r is not None:
+            linea += "  OK" if verificar(r_orig, r) else "  DIFIERE"
+        print(linea)
+    print("-" * 60)
+    print(f"Trama de monitoreo_sistema.ino (bombas sin PWM): "
+          f"{'OK' if verificar_monitoreo() else 'DIFIERE'}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
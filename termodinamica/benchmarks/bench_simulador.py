@@ -0,0 +1,186 @@
+"""
+Benchmark de extremo a extremo con el simulador: lectura, registro y gráficas
+
+Conecta comun.simulador (pseudo-terminal) al mismo camino que siguen las
+interfaces y mide cuántas tramas por segundo se sostienen al agregar cada
+etapa:
+
+- lectura: LectorLineas + parser del equipo
+- registro: además, CSV de sesión (comun/registro.py) e historial circular
+- gráficas: además, GraficaBlit sobre un canvas Agg cada 100 ms
+
+Uso (solo Linux/macOS, requiere pty):
+    python benchmarks/bench_simulador.py --equipo segundaley --tramas 20000
+    python benchmarks/bench_simulador.py --equipo primeraley --tasa 5000 --reproducir
+
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.serie import LectorLineas
+from comun.protocolo import ParserPrimeraLey, ParserSegundaLey
+from comun.graficas import GraficaBlit
+from comun.historial import HistorialCircular
+from comun.registro import SesionSegundaLey, abrir_csv_operacion, fila_primera_ley
+from comun.simulador import Simulador, crear_arduino
+
+ETAPAS = ('lectura', 'registro', 'graficas')
+CANALES = {'segundaley': ('tiempo', 'temp1', 'temp2', 'temp3', 'caudal1', 'caudal2'),
+           'primeraley': ('tiempo', 'presion', 'temperatura')}
+
+
+def crear_grafica(equipo):
+    fig = Figure(figsize=(8, 6))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    grafica = GraficaBlit(canvas)
+    for canal in CANALES[equipo][1:]:
+        grafica.agregar_serie(canal, ax, '-', label=canal)
+    return grafica
+
+
+class Consumidor:
+    """Procesa el texto recibido con las etapas activas"""
+
+    def __init__(self, equipo, etapa, directorio):
+        self.equipo = equipo
+        self.etapa = etapa
+        self.tramas = 0
+        self.registrar = etapa != 'lectura'
+        self.historial = HistorialCircular(CANALES[equipo], 200000)
+        self.grafica = crear_grafica(equipo) if etapa == 'graficas' else None
+        self.redibujos = 0
+        self.csv = None
+        if equipo == 'segundaley':
+            self.parser = ParserSegundaLey()
+            self.sesion = SesionSegundaLey(directorio)
+            if self.registrar:
+                self.sesion.iniciar()
+        else:
+            self.parser = ParserPrimeraLey()
+            self.directorio = directorio
+
+    def procesar(self, texto):
+        if self.equipo == 'segundaley':
+            for trama in self.parser.procesar_texto(texto):
+                self.tramas += 1
+                if self.registrar:
+                    datos = trama.como_dict()
+                    self.sesion.guardar(datos)
+                    self.historial.agregar(dict(datos, tiempo=time.time()))
+            return
+        for linea in texto.split('\n'):
+            if self.parser.inicio_operacion(linea) and self.registrar:
+                self.cerrar_csv()
+                self.csv = abrir_csv_operacion(self.parser.inicio_operacion(linea), self.directorio)
+                continue
+            trama = self.parser.procesar_linea(linea)
+            if trama:
+                self.tramas += 1
+                if self.registrar:
+                    if self.csv:
+                        self.csv.escribir(fila_primera_ley(trama.presion, trama.temperatura))
+                    self.historial.agregar({'tiempo': time.time(), 'presion': trama.presion,
+                                            'temperatura': trama.temperatura})
+            elif self.parser.fin_operacion(linea):
+                self.cerrar_csv()
+
+    def graficar(self):
+        if self.grafica and len(self.historial):
+            vistas = self.historial.vistas()
+            self.grafica.actualizar(vistas['tiempo'] - vistas['tiempo'][0], vistas)
+            self.redibujos += 1
+
+    def cerrar_csv(self):
+        if self.csv:
+            self.csv.cerrar()
+            self.csv = None
+
+    def cerrar(self):
+        self.cerrar_csv()
+        if self.equipo == 'segundaley':
+            self.sesion.cerrar()
+
+
+def ejecutar(equipo, etapa, tramas, tasa, reproducir, limite_s):
+    """
+    Returns:
+        dict: tramas recibidas, tramas/s sostenidas, tasa del simulador, redibujos
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        arduino = crear_arduino(equipo, reproducir, semilla=1)
+        if equipo == 'primeraley' and reproducir is None:
+            # Operaciones continuas para que el registro abra y cierre CSVs
+            arduino.motor_duration = 5000
+        simulador = Simulador(arduino, tasa=tasa, tramas=tramas)
+        simulador.iniciar()
+        conexion = serial.Serial(simulador.puerto, arduino.BAUDIOS, timeout=0.2)
+        lector = LectorLineas(conexion)
+        consumidor = Consumidor(equipo, etapa, directorio)
+
+        inicio = time.perf_counter()
+        ultimo_grafico = inicio
+        ultimo_comando = inicio
+        comandos = 0
+        while consumidor.tramas < tramas and time.perf_counter() - inicio < limite_s:
+            consumidor.procesar(lector.leer_texto())
+            ahora = time.perf_counter()
+            if ahora - ultimo_grafico >= 0.1:
+                consumidor.graficar()
+                ultimo_grafico = ahora
+            if equipo == 'primeraley' and reproducir is None and ahora - ultimo_comando >= 0.05:
+                conexion.write(b'ER'[comandos % 2:comandos % 2 + 1])
+                comandos += 1
+                ultimo_comando = ahora
+        transcurrido = time.perf_counter() - inicio
+
+        consumidor.cerrar()
+        conexion.close()
+        simulador.detener()
+        return {
+            'recibidas': consumidor.tramas,
+            'tasa': consumidor.tramas / transcurrido,
+            'tasa_simulador': simulador.tasa_real,
+            'redibujos': consumidor.redibujos,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--equipo', choices=('primeraley', 'segundaley'), default='segundaley')
+    parser.add_argument('--tramas', type=int, default=20000, help="tramas por etapa")
+    parser.add_argument('--tasa', type=float, default=0,
+                        help="tramas por segundo del simulador (0 = sin pausa)")
+    parser.add_argument('--reproducir', nargs='*', metavar='CSV',
+                        help="reproducir sesiones grabadas en lugar del modelo")
+    parser.add_argument('--limite', type=float, default=60.0, help="segundos máximos por etapa")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"BENCHMARK DE EXTREMO A EXTREMO ({args.equipo}, simulador en pty)")
+    print("=" * 60)
+    print(f"Tramas por etapa: {args.tramas} | tasa pedida: "
+          f"{'sin pausa' if not args.tasa else f'{args.tasa:g} tramas/s'}")
+    print("-" * 60)
+    for etapa in ETAPAS:
+        r = ejecutar(args.equipo, etapa, args.tramas, args.tasa, args.reproducir, args.limite)
+        print(f"{etapa:<9} recibidas={r['recibidas']:<7} {r['tasa']:9.0f} tramas/s "
+              f"(simulador {r['tasa_simulador']:.0f}/s, redibujos {r['redibujos']})")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
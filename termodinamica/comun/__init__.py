@@ -0,0 +1,5 @@
+"""
+Módulos compartidos por las interfaces de Primera y Segunda Ley
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+"""
@@ -0,0 +1,262 @@
+"""
+Estadística en línea de las sesiones en curso
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Mientras corre una sesión, media, desviación, mínimo y máximo de cada canal
+se actualizan con cada trama usando el algoritmo de Welford: memoria fija
+por canal y sin volver a leer el CSV. Para la ventana móvil (p. ej. los
+últimos 60 s) el tiempo se divide en cubetas, cada una con su propio
+acumulador, que se combinan al consultar (fórmula de Chan et al.); la
+memoria sigue siendo fija: un acumulador por cubeta.
+
+Al cerrar la sesión, ``guardar_resumen`` escribe junto al CSV un
+``<nombre>_resumen.json`` con las estadísticas de toda la sesión.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Lectura de un DS18B20 desconectado
+TEMPERATURA_INVALIDA = -127.0
+
+
+class Welford:
+    """Media, varianza, mínimo y máximo acumulados en O(1) por muestra"""
+
+    __slots__ = ('n', 'media', 'm2', 'minimo', 'maximo')
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def agregar(self, valor):
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def combinar(self, otro):
+        """Agrega las muestras resumidas en ``otro`` (no lo modifica)"""
+        if not otro.n:
+            return
+        if not self.n:
+            self.n, self.media, self.m2 = otro.n, otro.media, otro.m2
+            self.minimo, self.maximo = otro.minimo, otro.maximo
+            return
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        self.media += delta * otro.n / n
+        self.m2 += otro.m2 + delta * delta * self.n * otro.n / n
+        self.n = n
+        self.minimo = min(self.minimo, otro.minimo)
+        self.maximo = max(self.maximo, otro.maximo)
+
+    @property
+    def varianza(self):
+        """Varianza muestral (NaN con menos de dos muestras)"""
+        return self.m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.varianza) if self.n > 1 else math.nan
+
+    def como_dict(self):
+        if not self.n:
+            return {'n': 0, 'media': math.nan, 'std': math.nan, 'min': math.nan, 'max': math.nan}
+        return {'n': self.n, 'media': self.media, 'std': self.std,
+                'min': self.minimo, 'max': self.maximo}
+
+
+class VentanaWelford:
+    """
+    Estadísticas de los últimos ``duracion_s`` segundos.
+
+    Las muestras se agrupan en ``cubetas`` intervalos de igual ancho; al
+    avanzar el tiempo se descarta la cubeta más vieja completa, así que la
+    ventana cubre entre ``duracion_s - ancho`` y ``duracion_s`` segundos.
+    """
+
+    def __init__(self, duracion_s=60.0, cubetas=12):
+        self.ancho = duracion_s / cubetas
+        self.cubetas = cubetas
+        self.historia = deque()  # (índice de cubeta, Welford)
+
+    def agregar(self, valor, t):
+        indice = int(t // self.ancho)
+        if not self.historia or self.historia[-1][0] != indice:
+            self.historia.append((indice, Welford()))
+        self.historia[-1][1].agregar(valor)
+        self._descartar(indice)
+
+    def _descartar(self, indice):
+        while self.historia and self.historia[0][0] <= indice - self.cubetas:
+            self.historia.popleft()
+
+    def total(self, t=None):
+        """Combina las cubetas vigentes en el instante ``t`` (por defecto, ahora)"""
+        if t is not None:
+            self._descartar(int(t // self.ancho))
+        resultado = Welford()
+        for _, cubeta in self.historia:
+            resultado.combinar(cubeta)
+        return resultado
+
+
+class EstadisticasEnLinea:
+    """
+    Estadísticas de sesión y de ventana móvil para varios canales.
+
+    ``agregar`` se llama desde el hilo lector; ``sesion``, ``ventana`` y
+    ``tabla`` desde la interfaz.
+
+    Uso:
+        estadisticas = EstadisticasEnLinea(('temp1', 'caudal1'), ventana_s=60)
+        estadisticas.agregar(trama.como_dict())
+        estadisticas.ventana()['temp1']['media']
+        estadisticas.guardar_resumen(sesion.ruta_csv)
+    """
+
+    def __init__(self, canales, ventana_s=60.0, cubetas=12, invalidos=None):
+        """
+        Args:
+            canales (sequence): Claves de las tramas a acumular
+            ventana_s (float): Duración de la ventana móvil
+            cubetas (int): Resolución de la ventana
+            invalidos (dict): Valor que se descarta por canal (p. ej. -127
+                de un sensor de temperatura desconectado)
+        """
+        self.canales = tuple(canales)
+        self.ventana_s = ventana_s
+        self.cubetas = cubetas
+        self.invalidos = invalidos or {}
+        self.candado = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self.candado:
+            self.acumulados = {canal: Welford() for canal in self.canales}
+            self.ventanas = {canal: VentanaWelford(self.ventana_s, self.cubetas)
+                             for canal in self.canales}
+            self.tramas = 0
+            self.inicio = None
+            self.fin = None
+
+    def agregar(self, datos, t=None):
+        """
+        Args:
+            datos (dict): Trama (los canales ausentes o no numéricos se omiten)
+            t (float): Tiempo de la muestra (por defecto ``time.time()``)
+        """
+        t = time.time() if t is None else t
+        with self.candado:
+            self.tramas += 1
+            if self.inicio is None:
+                self.inicio = t
+            self.fin = t
+            for canal in self.canales:
+                valor = datos.get(canal)
+                if not isinstance(valor, (int, float)) or valor != valor:
+                    continue
+                if valor == self.invalidos.get(canal):
+                    continue
+                self.acumulados[canal].agregar(valor)
+                self.ventanas[canal].agregar(valor, t)
+
+    def sesion(self):
+        """Estadísticas desde el inicio: ``{canal: {'n', 'media', 'std', 'min', 'max'}}``"""
+        with self.candado:
+            return {canal: acumulado.como_dict() for canal, acumulado in self.acumulados.items()}
+
+    def ventana(self, t=None):
+        """Estadísticas de los últimos ``ventana_s`` segundos"""
+        t = time.time() if t is None else t
+        with self.candado:
+            return {canal: ventana.total(t).como_dict() for canal, ventana in self.ventanas.items()}
+
+    def tabla(self, etiquetas=None, decimales=2):
+        """
+        Texto de ancho fijo con ventana y sesión, para una etiqueta de Tk
+
+        Args:
+            etiquetas (dict): Nombre a mostrar por canal
+            decimales (int): Decimales de los valores
+        """
+        etiquetas = etiquetas or {}
+        ventana = self.ventana()
+        sesion = self.sesion()
+        ancho = max([len(etiquetas.get(c, c)) for c in self.canales] + [4])
+        lineas = [f"{'':<{ancho}}  {f'Últimos {self.ventana_s:g} s':<20}  Sesión (mín – máx)"]
+        for canal in self.canales:
+            v, s = ventana[canal], sesion[canal]
+            if not s['n']:
+                lineas.append(f"{etiquetas.get(canal, canal):<{ancho}}  --")
+                continue
+            texto_v = (f"{v['media']:.{decimales}f} ±{_numero(v['std'], decimales)}"
+                       if v['n'] else "--")
+            lineas.append(f"{etiquetas.get(canal, canal):<{ancho}}  {texto_v:<20}  "
+                          f"{s['media']:.{decimales}f} ±{_numero(s['std'], decimales)} "
+                          f"({s['min']:.{decimales}f} – {s['max']:.{decimales}f})")
+        return '\n'.join(lineas)
+
+    def resumen(self):
+        """Resumen de la sesión como diccionario serializable a JSON"""
+        with self.candado:
+            inicio, fin, tramas = self.inicio, self.fin, self.tramas
+        return {
+            'inicio': _iso(inicio),
+            'fin': _iso(fin),
+            'duracion_s': (fin - inicio) if inicio is not None else 0.0,
+            'tramas': tramas,
+            'canales': {canal: {clave: (None if isinstance(valor, float) and valor != valor
+                                        else valor) for clave, valor in datos.items()}
+                        for canal, datos in self.sesion().items()},
+        }
+
+    def guardar_resumen(self, ruta_csv):
+        """
+        Escribe el resumen de la sesión junto al CSV
+
+        Args:
+            ruta_csv (str): CSV de la sesión (``datos_X.csv`` -> ``datos_X_resumen.json``)
+
+        Returns:
+            str: Ruta del resumen, o None si no hubo tramas o no se pudo escribir
+        """
+        resumen = self.resumen()
+        if not resumen['tramas']:
+            return None
+        resumen['archivo'] = os.path.basename(ruta_csv)
+        ruta = ruta_resumen(ruta_csv)
+        try:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(resumen, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"Error guardando resumen: {e}")
+            return None
+        return ruta
+
+
+def ruta_resumen(ruta_csv):
+    """Ruta del resumen de estadísticas que acompaña a un CSV"""
+    return os.path.splitext(ruta_csv)[0] + '_resumen.json'
+
+
+def _numero(valor, decimales):
+    return "--" if valor != valor else f"{valor:.{decimales}f}"
+
+
+def _iso(t):
+    return datetime.fromtimestamp(t).isoformat(sep=' ', timespec='milliseconds') if t else None
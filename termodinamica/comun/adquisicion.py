@@ -0,0 +1,426 @@
+"""
+Servicio de adquisición sin interfaz gráfica
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Las interfaces de Tk leen el puerto serie y escriben los CSV en el mismo
+proceso que dibuja las ventanas: si se abre un diálogo modal, si Tk se
+bloquea o si alguien cierra la ventana, la captura se detiene.
+
+Este servicio es el único dueño del puerto. Lee el flujo del Arduino,
+escribe los mismos archivos que las interfaces (ver comun/registro.py) y
+reenvía el texto recibido, sin modificar, a todos los clientes conectados
+a un socket TCP local. Las interfaces se conectan eligiendo
+``tcp://127.0.0.1:8765`` (Segunda Ley) o ``tcp://127.0.0.1:8766`` (Primera
+Ley) en la lista de puertos; como reciben exactamente el mismo texto, su
+parser no cambia. Lo que un cliente escribe (``S1:2.50``, ``E``, ``R``...)
+se envía al Arduino y queda registrado en el log de eventos.
+
+Si se pierde el puerto (cable, USB, o ``--silencio`` segundos sin datos),
+el servicio reconecta con espera creciente sin cerrar la sesión, y deja
+filas ``SIN ENLACE``/``ENLACE RESTABLECIDO`` en el CSV (ver comun/enlace.py).
+
+Uso (desde termodinamica/):
+    python -m comun.adquisicion --equipo segundaley --puerto COM3
+    python -m comun.adquisicion --equipo primeraley --puerto /dev/ttyACM0 --directorio primeraley/python
+    python -m comun.adquisicion --equipo segundaley --puerto COM3 --rotar-mb 64 --rotar-min 60
+"""
+
+import argparse
+import queue
+import socket
+import threading
+from datetime import datetime
+
+from .acumuladores import EstadisticasEnLinea, TEMPERATURA_INVALIDA
+from .escritura import PoliticaEscritura
+from .conexion import MARCAS_PRIMERA_LEY, MARCAS_SEGUNDA_LEY
+from .enlace import EnlaceSupervisado
+from .protocolo import (ESTADO_ENLACE_RESTABLECIDO, ESTADO_SIN_ENLACE, ParserPrimeraLey,
+                        ParserSegundaLey)
+from .registro import (SesionSegundaLey, abrir_csv_operacion, fila_enlace_primera_ley,
+                       fila_primera_ley)
+from .segmentos import PoliticaRotacion
+from .serie import abrir_puerto
+
+BAUDIOS = {'segundaley': 115200, 'primeraley': 9600}
+ESCUCHA = {'segundaley': ('127.0.0.1', 8765), 'primeraley': ('127.0.0.1', 8766)}
+DIRECTORIOS = {'segundaley': 'logs', 'primeraley': ''}
+MARCAS = {'segundaley': MARCAS_SEGUNDA_LEY, 'primeraley': MARCAS_PRIMERA_LEY}
+
+
+class _Cliente:
+    """Conexión de una interfaz: cola de salida propia y un hilo para cada sentido"""
+
+    def __init__(self, sock, direccion, difusor):
+        self.sock = sock
+        self.direccion = f"{direccion[0]}:{direccion[1]}"
+        self.difusor = difusor
+        self.salida = queue.Queue()
+        self.pendiente = 0
+        self.activo = True
+        threading.Thread(target=self._enviar, daemon=True).start()
+        threading.Thread(target=self._recibir, daemon=True).start()
+
+    def encolar(self, datos):
+        """Agrega datos a la cola de salida; descarta al cliente si se retrasa demasiado"""
+        if not self.activo:
+            return
+        if self.pendiente > self.difusor.max_pendiente:
+            self.cerrar(f"demasiado lento ({self.pendiente} bytes sin enviar)")
+            return
+        self.pendiente += len(datos)
+        self.salida.put(datos)
+
+    def _enviar(self):
+        while self.activo:
+            datos = self.salida.get()
+            if datos is None:
+                break
+            self.pendiente -= len(datos)
+            try:
+                self.sock.sendall(datos)
+            except OSError:
+                self.cerrar("conexión perdida")
+
+    def _recibir(self):
+        while self.activo:
+            try:
+                datos = self.sock.recv(4096)
+            except OSError:
+                datos = b''
+            if not datos:
+                self.cerrar("desconectado")
+                break
+            self.difusor.al_recibir(datos, self.direccion)
+
+    def cerrar(self, motivo):
+        if not self.activo:
+            return
+        self.activo = False
+        self.salida.put(None)
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self.difusor.quitar(self, motivo)
+
+
+class Difusor:
+    """
+    Servidor TCP que reparte el flujo del puerto a varios clientes.
+
+    Cada cliente tiene su propia cola, así que uno lento no frena a los
+    demás ni a la lectura del puerto; si acumula más de ``max_pendiente``
+    bytes sin enviar se le desconecta.
+    """
+
+    def __init__(self, host, puerto, al_recibir, al_evento=print, max_pendiente=4 << 20):
+        """
+        Args:
+            host (str): Dirección de escucha (por defecto solo local)
+            puerto (int): Puerto TCP
+            al_recibir (callable): ``al_recibir(datos, direccion)`` con lo que
+                escribe un cliente
+            al_evento (callable): Recibe mensajes de conexión/desconexión
+            max_pendiente (int): Bytes en cola tolerados por cliente
+        """
+        self.al_recibir = al_recibir
+        self.al_evento = al_evento
+        self.max_pendiente = max_pendiente
+        self.clientes = []
+        self.candado = threading.Lock()
+        self.servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.servidor.bind((host, puerto))
+        self.servidor.listen()
+        self.direccion = f"tcp://{host}:{self.servidor.getsockname()[1]}"
+        self.activo = False
+
+    def iniciar(self):
+        self.activo = True
+        threading.Thread(target=self._aceptar, daemon=True).start()
+
+    def _aceptar(self):
+        while self.activo:
+            try:
+                sock, direccion = self.servidor.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            cliente = _Cliente(sock, direccion, self)
+            with self.candado:
+                self.clientes.append(cliente)
+            self.al_evento(f"Cliente conectado: {cliente.direccion}")
+
+    def difundir(self, datos):
+        """Envía ``datos`` a todos los clientes conectados"""
+        with self.candado:
+            clientes = list(self.clientes)
+        for cliente in clientes:
+            cliente.encolar(datos)
+
+    def quitar(self, cliente, motivo):
+        with self.candado:
+            if cliente not in self.clientes:
+                return
+            self.clientes.remove(cliente)
+        self.al_evento(f"Cliente {cliente.direccion} {motivo}")
+
+    def cerrar(self):
+        self.activo = False
+        self.servidor.close()
+        with self.candado:
+            clientes = list(self.clientes)
+        for cliente in clientes:
+            cliente.cerrar("servicio detenido")
+
+
+class RegistroSegundaLey:
+    """Escribe datos_*.csv y eventos_*.log igual que segundaley/main.py"""
+
+    def __init__(self, directorio='logs', politica=None, rotacion=None):
+        self.sesion = SesionSegundaLey(directorio, politica, rotacion)
+        self.parser = ParserSegundaLey()
+        self.tramas = 0
+        self.estadisticas = EstadisticasEnLinea(
+            ('temp1', 'temp2', 'temp3', 'caudal1', 'caudal2'),
+            invalidos=dict.fromkeys(('temp1', 'temp2', 'temp3'), TEMPERATURA_INVALIDA))
+
+    def iniciar(self, puerto):
+        self.sesion.iniciar()
+        self.sesion.log(f"Conectado a puerto: {puerto}")
+        print(f"Sesión iniciada: {self.sesion.ruta_manifiesto or self.sesion.ruta_csv}")
+
+    def procesar(self, texto):
+        if "TEMPERATURA INICIAL ALCANZADA" in texto:
+            self.evento("Temperatura inicial alcanzada")
+        for trama in self.parser.procesar_texto(texto):
+            datos = trama.como_dict()
+            self.tramas += 1
+            self.sesion.guardar(datos)
+            self.estadisticas.agregar(datos)
+
+    def evento(self, mensaje):
+        self.sesion.log(mensaje)
+
+    def enlace(self, estado, mensaje):
+        """Fila de marca de enlace en el CSV y evento en el log"""
+        self.parser.reiniciar()  # la trama a medias no se completará
+        self.sesion.marcar_enlace(estado)
+        self.evento(mensaje)
+
+    def cerrar(self):
+        if self.sesion.activa:
+            ruta = self.estadisticas.guardar_resumen(self.sesion.ruta_csv)
+            if ruta:
+                self.evento(f"Resumen de estadísticas: {ruta}")
+        self.sesion.cerrar()
+
+
+class RegistroPrimeraLey:
+    """Abre un CSV por cada extensión/retracción, igual que MotorControlGUI"""
+
+    def __init__(self, directorio='', politica=None, rotacion=None):
+        # rotacion no aplica: ya se abre un CSV corto por operación
+        self.directorio = directorio
+        self.politica = politica
+        self.parser = ParserPrimeraLey()
+        self.csv_writer = None
+        self.tramas = 0
+        self.estadisticas = EstadisticasEnLinea(('presion', 'temperatura'))
+
+    def iniciar(self, puerto):
+        print(f"Conectado a puerto: {puerto}")
+
+    def procesar(self, texto):
+        for linea in texto.split('\n'):
+            linea = linea.strip()
+            if not linea:
+                continue
+            operacion = self.parser.inicio_operacion(linea)
+            if operacion:
+                self._cerrar_csv()
+                self.csv_writer = abrir_csv_operacion(operacion, self.directorio, self.politica)
+                self.estadisticas.reiniciar()
+                self.evento(f"CSV iniciado: {self.csv_writer.ruta}")
+                continue
+            trama = self.parser.procesar_linea(linea)
+            if trama:
+                self.tramas += 1
+            if trama and self.csv_writer:
+                self.csv_writer.escribir(fila_primera_ley(trama.presion, trama.temperatura))
+                self.estadisticas.agregar({'presion': trama.presion,
+                                           'temperatura': trama.temperatura})
+            elif self.parser.fin_operacion(linea):
+                self._cerrar_csv()
+
+    def _cerrar_csv(self):
+        if self.csv_writer:
+            self.csv_writer.cerrar()
+            self.evento(f"CSV cerrado: {self.csv_writer.ruta}")
+            ruta = self.estadisticas.guardar_resumen(self.csv_writer.ruta)
+            if ruta:
+                self.evento(f"Resumen de estadísticas: {ruta}")
+            self.csv_writer = None
+
+    def evento(self, mensaje):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {mensaje}")
+
+    def enlace(self, estado, mensaje):
+        """Al perder el enlace, cierra el CSV de la operación con una fila de marca"""
+        self.evento(mensaje)
+        if estado == ESTADO_SIN_ENLACE and self.csv_writer:
+            # Al reconectar el Arduino se reinicia: la operación no continúa
+            self.csv_writer.escribir(fila_enlace_primera_ley(estado))
+            self._cerrar_csv()
+
+    def cerrar(self):
+        self._cerrar_csv()
+
+
+REGISTROS = {'segundaley': RegistroSegundaLey, 'primeraley': RegistroPrimeraLey}
+
+
+class Adquisidor:
+    """
+    Lee el puerto, registra los datos y los reenvía a los clientes.
+
+    Uso:
+        adquisidor = Adquisidor('segundaley', 'COM3')
+        adquisidor.ejecutar()   # hasta Ctrl+C o detener()
+    """
+
+    def __init__(self, equipo, puerto, baudios=None, escucha=None, directorio=None,
+                 politica=None, rotacion=None, silencio_max_s=5.0):
+        """
+        Args:
+            equipo (str): 'segundaley' o 'primeraley'
+            puerto (str): Puerto serie del Arduino
+            baudios (int): Velocidad (por defecto la del sketch de cada equipo)
+            escucha (tuple): (host, puerto) del socket para las interfaces
+            directorio (str): Carpeta de los archivos de sesión
+            politica (PoliticaEscritura): Política de flush de los archivos
+            rotacion (PoliticaRotacion): Segmentos del CSV de Segunda Ley
+            silencio_max_s (float): Sin datos durante este tiempo se reconecta
+                (None = solo al fallar el puerto)
+        """
+        self.equipo = equipo
+        self.puerto = puerto
+        self.baudios = baudios or BAUDIOS[equipo]
+        if directorio is None:
+            directorio = DIRECTORIOS[equipo]
+        self.registro = REGISTROS[equipo](directorio, politica or PoliticaEscritura(), rotacion)
+        self.difusor = Difusor(*(escucha or ESCUCHA[equipo]), self._comando,
+                               al_evento=self.registro.evento)
+        self.candado_escritura = threading.Lock()
+        self.silencio_max_s = silencio_max_s
+        self.conexion = None
+        self.activo = False
+        self.bytes_recibidos = 0
+
+    def _comando(self, datos, direccion):
+        """Reenvía al Arduino lo que escribió un cliente"""
+        conexion = self.conexion
+        if not conexion:
+            return
+        try:
+            with self.candado_escritura:
+                conexion.write(datos)
+        except Exception as e:
+            self.registro.evento(f"Error enviando comando: {e}")
+            return
+        texto = datos.decode('utf-8', errors='ignore').strip()
+        if texto:
+            self.registro.evento(f"Comando de {direccion}: {texto}")
+
+    def _enlace_perdido(self, motivo):
+        self.registro.enlace(ESTADO_SIN_ENLACE, f"ENLACE PERDIDO: {motivo} - reconectando")
+
+    def _enlace_restablecido(self, duracion_s, intentos):
+        self.registro.enlace(ESTADO_ENLACE_RESTABLECIDO,
+                             f"ENLACE RESTABLECIDO tras {duracion_s:.1f} s ({intentos} intento(s))")
+
+    def ejecutar(self):
+        """Ciclo principal de lectura; regresa al detener (el puerto perdido se reconecta)"""
+        self.conexion = EnlaceSupervisado(
+            self.puerto, self.baudios, MARCAS[self.equipo],
+            abrir_puerto(self.puerto, self.baudios, timeout=0.5),
+            activo=lambda: self.activo, silencio_max_s=self.silencio_max_s,
+            al_perder=self._enlace_perdido, al_restablecer=self._enlace_restablecido,
+            timeout_lectura=0.5)
+        lector = self.conexion.lector
+        self.registro.iniciar(self.puerto)
+        self.difusor.iniciar()
+        print(f"Sirviendo {self.puerto} en {self.difusor.direccion}")
+        self.activo = True
+        try:
+            while self.activo:
+                datos = self.conexion.leer_bytes()
+                if not datos:
+                    continue
+                self.bytes_recibidos += len(datos)
+                self.difusor.difundir(datos)
+                texto = lector.procesar_bytes(datos)
+                if texto:
+                    self.registro.procesar(texto)
+        except Exception as e:
+            if self.activo:
+                self.registro.evento(f"Error en lectura: {e}")
+        finally:
+            self.activo = False
+            self.difusor.cerrar()
+            self.registro.cerrar()
+            self.conexion.close()
+
+    def detener(self):
+        self.activo = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--equipo', choices=sorted(REGISTROS), default='segundaley')
+    parser.add_argument('--puerto', required=True, help="puerto serie del Arduino")
+    parser.add_argument('--baudios', type=int, help="por defecto 115200 (Segunda Ley) o 9600 (Primera Ley)")
+    parser.add_argument('--escucha', help="host:puerto para las interfaces "
+                                          "(por defecto 127.0.0.1:8765 o 127.0.0.1:8766)")
+    parser.add_argument('--directorio', help="carpeta de los archivos de sesión")
+    parser.add_argument('--durable', action='store_true', help="fsync periódico de los archivos")
+    parser.add_argument('--puntos-control', type=float, metavar='S',
+                        help="flush + fsync + CRC en <archivo>.idx cada S segundos "
+                             "(se pierden como máximo S segundos si el servicio se cae)")
+    parser.add_argument('--rotar-mb', type=float, default=0,
+                        help="partir el CSV de Segunda Ley en segmentos de este tamaño")
+    parser.add_argument('--rotar-min', type=float, default=0,
+                        help="partir el CSV de Segunda Ley en segmentos de esta duración")
+    parser.add_argument('--compresion', choices=('gzip', 'zstd', 'ninguna'), default='gzip',
+                        help="compresión de los segmentos cerrados")
+    parser.add_argument('--silencio', type=float, default=5.0, metavar='S',
+                        help="reconectar si no llega nada en S segundos (0 = solo al fallar el puerto)")
+    args = parser.parse_args()
+
+    rotacion = None
+    if args.rotar_mb or args.rotar_min:
+        rotacion = PoliticaRotacion(int(args.rotar_mb * 1024 * 1024), args.rotar_min * 60.0,
+                                    None if args.compresion == 'ninguna' else args.compresion)
+
+    escucha = None
+    if args.escucha:
+        host, _, numero = args.escucha.rpartition(':')
+        escucha = (host or '127.0.0.1', int(numero))
+
+    if args.puntos_control:
+        politica = PoliticaEscritura.con_puntos_control(args.puntos_control)
+    else:
+        politica = PoliticaEscritura(durable=args.durable)
+    adquisidor = Adquisidor(args.equipo, args.puerto, args.baudios, escucha, args.directorio,
+                            politica, rotacion, args.silencio or None)
+    try:
+        adquisidor.ejecutar()
+    except KeyboardInterrupt:
+        adquisidor.detener()
+    print(f"Servicio detenido ({adquisidor.bytes_recibidos} bytes recibidos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Almacén columnar de experimentos (Parquet, particionado por equipo, fecha y operación)
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Los CSV de las interfaces son cómodos de abrir pero lentos de recargar:
+los de Primera Ley tienen tres renglones de encabezado (hay que leerlos con
+``skiprows=2``) y en ambos la columna Timestamp se vuelve a interpretar en
+cada carga; los de Segunda Ley repiten en cada fila textos como
+``Estado_Sistema`` y ``Modo1``.
+
+``convertir`` pasa los CSV a un dataset Parquet por equipo, con tipos ya
+resueltos (Timestamp como ``timestamp[ms]``, ERROR y '--' como nulos,
+textos repetidos como columnas de diccionario) y un archivo por fecha y
+operación; la columna ``corrida`` indica el CSV de origen::
+
+    almacen/
+        primeraley/_convertidos.json
+        primeraley/fecha=2025-10-03/operacion=extension/datos.parquet
+        segundaley/fecha=2025-12-05/operacion=operacion/datos.parquet
+
+``cargar`` lee el dataset completo o filtrado por fechas/operación sin
+abrir los archivos de otras particiones. La conversión es incremental:
+solo procesa los CSV nuevos o modificados desde la última vez.
+
+Una sesión rotada en segmentos (comun/segmentos.py) se convierte como una
+sola corrida, ``datos_<fecha>``, igual que si no se hubiera rotado.
+
+Requiere pyarrow.
+
+Uso (desde termodinamica/):
+    python -m comun.almacen                       # convierte primeraley/python y segundaley/logs
+    python -m comun.almacen --destino almacen primeraley/ejemplos/datos
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from .protocolo import ESTADOS_ENLACE
+from .segmentos import (EXTENSIONES, Manifiesto, cargar_sesion, corrida_de_manifiesto,
+                        firma_sesion, listar_corridas)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DESTINO = os.path.join(RAIZ, 'almacen')
+ORIGENES = (os.path.join(RAIZ, 'primeraley', 'python'),
+            os.path.join(RAIZ, 'segundaley', 'logs'))
+
+FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S.%f"
+COLUMNAS_PRIMERA_LEY = {'Timestamp': 'timestamp', 'Presion (kPa)': 'presion_kpa',
+                        'Temperatura (C)': 'temperatura_c'}
+COLUMNAS_SEGUNDA_LEY = {
+    'Timestamp': 'timestamp', 'Tiempo_Relativo_s': 'tiempo_s', 'Estado_Sistema': 'sistema',
+    'Temp1_C': 'temp1', 'Temp2_C': 'temp2', 'Temp3_C': 'temp3',
+    'Caudal1_Lmin': 'caudal1', 'Caudal2_Lmin': 'caudal2',
+    'Volumen1_L': 'volumen1', 'Volumen2_L': 'volumen2', 'PWM1': 'pwm1', 'PWM2': 'pwm2',
+    'Duty1_%': 'duty1', 'Duty2_%': 'duty2', 'Modo1': 'modo1', 'Modo2': 'modo2',
+    'Error1': 'error1', 'Error2': 'error2',
+}
+CATEGORICAS = ('corrida', 'sistema', 'modo1', 'modo2')
+ARCHIVO_PARTICION = 'datos.parquet'
+MANIFIESTO = '_convertidos.json'
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise ImportError("El almacén de experimentos necesita pyarrow (pip install pyarrow)")
+
+
+def _particiones():
+    texto = pa.dictionary(pa.int32(), pa.string())
+    return ds.partitioning(pa.schema([('fecha', texto), ('operacion', texto)]),
+                           flavor='hive', dictionaries='infer')
+
+
+def detectar_equipo(ruta):
+    """
+    Returns:
+        str: 'primeraley', 'segundaley' o None según el encabezado del CSV
+            (o el guardado en el manifiesto de una sesión segmentada)
+    """
+    if ruta.endswith('.json'):
+        try:
+            encabezado = ','.join(Manifiesto.cargar(ruta).datos['encabezado'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    else:
+        with open(ruta, encoding='utf-8', errors='ignore') as f:
+            encabezado = f.readline()
+    if encabezado.startswith('Timestamp,Presion'):
+        return 'primeraley'
+    if encabezado.startswith('Timestamp,Tiempo_Relativo_s'):
+        return 'segundaley'
+    return None
+
+
+def leer_csv_primera_ley(ruta):
+    """
+    Lee un CSV presion_*.csv de MotorControlGUI con tipos resueltos
+
+    Returns:
+        tuple: (operacion, DataFrame con timestamp, tiempo_s, presion_kpa y
+            temperatura_c; ERROR queda como NaN)
+    """
+    with open(ruta, encoding='utf-8') as f:
+        f.readline()
+        metadatos = f.readline().rstrip('\r\n').split(',')
+    tipo = metadatos[3] if len(metadatos) > 3 and metadatos[3] else os.path.basename(ruta)
+    operacion = 'retraccion' if 'retrac' in tipo.lower() else 'extension'
+
+    # Renglones 1 y 2: encabezado y metadatos; el tercero es el encabezado de los datos.
+    # Las marcas de enlace (comun/enlace.py) quedan como fila sin valores
+    df = pd.read_csv(ruta, skiprows=2, na_values=['ERROR', *ESTADOS_ENLACE])
+    df = df.rename(columns=COLUMNAS_PRIMERA_LEY)[list(COLUMNAS_PRIMERA_LEY.values())]
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format=FORMATO_TIMESTAMP)
+    if df.empty:
+        return operacion, df
+    df['tiempo_s'] = (df['timestamp'] - df['timestamp'].iloc[0]).dt.total_seconds()
+    df = df.astype({'presion_kpa': 'float64', 'temperatura_c': 'float64'})
+    return operacion, df[['timestamp', 'tiempo_s', 'presion_kpa', 'temperatura_c']]
+
+
+def leer_csv_segunda_ley(ruta):
+    """
+    Lee un CSV datos_*.csv de las interfaces de Segunda Ley con tipos resueltos
+
+    La operación de la sesión es 'test' si estuvo en MODO TEST, 'operacion'
+    si las bombas llegaron a operar y 'monitoreo' si nunca arrancaron.
+
+    Returns:
+        tuple: (operacion, DataFrame con las columnas de COLUMNAS_SEGUNDA_LEY;
+            '--' queda como nulo)
+    """
+    return _tipar_segunda_ley(pd.read_csv(ruta, na_values=['--']))
+
+
+def leer_sesion_segunda_ley(ruta_manifiesto):
+    """Como ``leer_csv_segunda_ley``, con todos los segmentos de una sesión"""
+    return _tipar_segunda_ley(cargar_sesion(ruta_manifiesto))
+
+
+def _tipar_segunda_ley(df):
+    df = df.rename(columns=COLUMNAS_SEGUNDA_LEY)
+    df = df[[c for c in COLUMNAS_SEGUNDA_LEY.values() if c in df]]
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format=FORMATO_TIMESTAMP)
+    for columna in ('pwm1', 'pwm2'):
+        if columna in df:
+            df[columna] = df[columna].astype('Int16')
+    estados = set(df['sistema'].dropna()) if 'sistema' in df else set()
+    if 'MODO TEST' in estados:
+        operacion = 'test'
+    elif 'EN OPERACION' in estados:
+        operacion = 'operacion'
+    else:
+        operacion = 'monitoreo'
+    return operacion, df
+
+
+LECTORES = {'primeraley': leer_csv_primera_ley, 'segundaley': leer_csv_segunda_ley}
+
+
+def _corridas_de_segmentos(ruta_manifiesto):
+    """Nombres con que se habrían convertido los segmentos sueltos de una sesión"""
+    nombres = set()
+    for segmento in Manifiesto.cargar(ruta_manifiesto).segmentos():
+        archivo = segmento['archivo']
+        for extension in EXTENSIONES.values():
+            if archivo.endswith(extension):
+                archivo = archivo[:-len(extension)]
+        nombres.add(os.path.splitext(archivo)[0])
+    return nombres
+
+
+def _a_tabla(df):
+    """DataFrame -> tabla de Arrow con los textos repetidos como diccionario"""
+    for columna in CATEGORICAS:
+        if columna in df:
+            df[columna] = df[columna].astype('category')
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    # Mismos tipos en todas las particiones: pandas elige int8/int16 para los
+    # índices del diccionario según el número de categorías de cada archivo
+    esquema = pa.schema([
+        pa.field(f.name, pa.timestamp('ms')) if f.name == 'timestamp' else
+        pa.field(f.name, pa.dictionary(pa.int32(), pa.string())) if f.name in CATEGORICAS else f
+        for f in tabla.schema])
+    return tabla.cast(esquema)
+
+
+def _leer_manifiesto(destino, equipo):
+    """corrida -> {'mtime', 'particion', 'filas'} de lo ya convertido"""
+    ruta = os.path.join(destino, equipo, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _guardar_manifiesto(destino, equipo, manifiesto):
+    ruta = os.path.join(destino, equipo, MANIFIESTO)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=1, sort_keys=True)
+    os.replace(ruta + '.tmp', ruta)
+
+
+def _reescribir_particion(destino, equipo, particion, nuevas, quitar):
+    """
+    Reescribe el archivo de una partición con las corridas nuevas
+
+    Args:
+        nuevas (list): DataFrames (con columna 'corrida') que se agregan
+        quitar (set): Corridas que se eliminan antes (reconvertidas o movidas)
+    """
+    carpeta = os.path.join(destino, equipo, *particion.split('/'))
+    ruta = os.path.join(carpeta, ARCHIVO_PARTICION)
+    quitar = set(quitar) | {df['corrida'].iloc[0] for df in nuevas}
+    partes = []
+    if os.path.exists(ruta):
+        # ParquetFile en lugar de read_table para no agregar las columnas de la ruta
+        existente = pq.ParquetFile(ruta).read().to_pandas()
+        existente = existente[~existente['corrida'].astype(str).isin(quitar)]
+        if len(existente):
+            partes.append(existente.astype({c: object for c in CATEGORICAS if c in existente}))
+    partes.extend(nuevas)
+
+    if not partes:
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        return
+    df = pd.concat(partes, ignore_index=True).sort_values(['timestamp', 'corrida'], kind='stable')
+    os.makedirs(carpeta, exist_ok=True)
+    pq.write_table(_a_tabla(df), ruta + '.tmp', compression='zstd')
+    os.replace(ruta + '.tmp', ruta)
+
+
+def convertir(origenes=ORIGENES, destino=DESTINO, forzar=False):
+    """
+    Convierte los CSV de los directorios (o archivos) indicados al almacén
+
+    Cada partición (equipo, fecha, operación) es un solo archivo Parquet
+    con todas sus corridas: miles de corridas cortas en archivos separados
+    se leerían casi tan lento como los CSV. El manifiesto ``_convertidos.json``
+    de cada equipo guarda qué CSV ya se convirtieron, así que solo se
+    reescriben las particiones que recibieron corridas nuevas o modificadas.
+    Las sesiones segmentadas se leen completas por su manifiesto.
+
+    Args:
+        origenes (list): Directorios con CSV o rutas de archivos (CSV o
+            manifiestos de sesión)
+        destino (str): Carpeta raíz del almacén
+        forzar (bool): Si True, vuelve a convertir aunque el CSV no haya cambiado
+
+    Returns:
+        dict: Número de archivos 'convertidos', 'al_dia' e 'ignorados'
+    """
+    _requerir_pyarrow()
+    rutas = []
+    for origen in origenes:
+        if os.path.isdir(origen):
+            rutas.extend(listar_corridas(origen))
+        else:
+            rutas.append(origen)
+
+    conteo = {'convertidos': 0, 'al_dia': 0, 'ignorados': 0}
+    manifiestos = {}
+    nuevas = {}  # (equipo, particion) -> [DataFrame]
+    quitar = {}  # (equipo, particion) -> {corrida}
+    for ruta in rutas:
+        equipo = detectar_equipo(ruta)
+        if equipo is None:
+            conteo['ignorados'] += 1
+            continue
+        if equipo not in manifiestos:
+            manifiestos[equipo] = _leer_manifiesto(destino, equipo)
+        manifiesto = manifiestos[equipo]
+        sesion = ruta.endswith('.json')
+        try:
+            if sesion:
+                corrida = corrida_de_manifiesto(ruta)
+                mtime = firma_sesion(ruta)[1]
+            else:
+                corrida = os.path.splitext(os.path.basename(ruta))[0]
+                mtime = os.path.getmtime(ruta)
+        except (OSError, ValueError) as e:
+            print(f"Error convirtiendo {ruta}: {e}")
+            conteo['ignorados'] += 1
+            continue
+        anterior = manifiesto.get(corrida)
+        if anterior and not forzar and anterior['mtime'] >= mtime:
+            conteo['al_dia'] += 1
+            continue
+        try:
+            operacion, df = leer_sesion_segunda_ley(ruta) if sesion else LECTORES[equipo](ruta)
+        except Exception as e:
+            print(f"Error convirtiendo {ruta}: {e}")
+            conteo['ignorados'] += 1
+            continue
+        if df.empty:
+            conteo['ignorados'] += 1
+            continue
+
+        fecha = df['timestamp'].iloc[0].strftime('%Y-%m-%d')
+        particion = f"fecha={fecha}/operacion={operacion}"
+        if anterior:
+            quitar.setdefault((equipo, anterior['particion']), set()).add(corrida)
+        if sesion:
+            # Segmentos convertidos por separado antes de leer la sesión completa
+            for segmento in _corridas_de_segmentos(ruta) & set(manifiesto):
+                quitar.setdefault((equipo, manifiesto.pop(segmento)['particion']), set()).add(segmento)
+        df.insert(0, 'corrida', corrida)
+        nuevas.setdefault((equipo, particion), []).append(df)
+        manifiesto[corrida] = {'mtime': mtime, 'particion': particion, 'filas': len(df)}
+        conteo['convertidos'] += 1
+
+    for equipo, particion in set(nuevas) | set(quitar):
+        _reescribir_particion(destino, equipo, particion, nuevas.get((equipo, particion), []),
+                              quitar.get((equipo, particion), set()))
+    for equipo, manifiesto in manifiestos.items():
+        if conteo['convertidos']:
+            _guardar_manifiesto(destino, equipo, manifiesto)
+    return conteo
+
+
+def cargar(equipo, destino=DESTINO, desde=None, hasta=None, operacion=None, columnas=None):
+    """
+    Carga las corridas de un equipo como un solo DataFrame
+
+    Los filtros de fecha y operación se resuelven con los nombres de las
+    carpetas, así que solo se leen los archivos que coinciden.
+
+    Args:
+        equipo (str): 'primeraley' o 'segundaley'
+        destino (str): Carpeta raíz del almacén
+        desde (str): Fecha inicial 'AAAA-MM-DD' (incluida)
+        hasta (str): Fecha final 'AAAA-MM-DD' (incluida)
+        operacion (str o list): p. ej. 'extension' o ['extension', 'retraccion']
+        columnas (list): Columnas a leer (None = todas, incluidas fecha y operacion)
+
+    Returns:
+        pandas.DataFrame: Una fila por muestra; 'corrida' identifica el CSV de origen
+    """
+    _requerir_pyarrow()
+    carpeta = os.path.join(destino, equipo)
+    if not os.path.isdir(carpeta):
+        return pd.DataFrame()
+    dataset = ds.dataset(carpeta, format='parquet', partitioning=_particiones())
+
+    filtro = None
+    condiciones = []
+    if desde:
+        condiciones.append(ds.field('fecha') >= desde)
+    if hasta:
+        condiciones.append(ds.field('fecha') <= hasta)
+    if operacion:
+        operaciones = [operacion] if isinstance(operacion, str) else list(operacion)
+        condiciones.append(ds.field('operacion').isin(operaciones))
+    for condicion in condiciones:
+        filtro = condicion if filtro is None else filtro & condicion
+
+    tabla = dataset.to_table(columns=columnas, filter=filtro)
+    return tabla.to_pandas()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('origenes', nargs='*', default=list(ORIGENES),
+                        help="directorios o CSV a convertir (por defecto los de ambos equipos)")
+    parser.add_argument('--destino', default=DESTINO, help="carpeta raíz del almacén")
+    parser.add_argument('--forzar', action='store_true', help="reconvertir aunque esté al día")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    conteo = convertir(args.origenes, args.destino, args.forzar)
+    print(f"{conteo['convertidos']} convertidos, {conteo['al_dia']} al día, "
+          f"{conteo['ignorados']} ignorados en {time.perf_counter() - inicio:.2f} s")
+    for equipo in ('primeraley', 'segundaley'):
+        df = cargar(equipo, args.destino, columnas=['corrida'])
+        if len(df):
+            print(f"  {equipo}: {df['corrida'].nunique()} corridas, {len(df)} muestras")
+
+
+if __name__ == "__main__":
+    main()
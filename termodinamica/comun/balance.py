@@ -0,0 +1,343 @@
+"""
+Balance de energía y generación de entropía del intercambiador (Segunda Ley)
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Cantidades (agua, cp = 4186 J/(kg·K), ρ = 1000 kg/m³; temperaturas en K
+para la entropía):
+
+- ṁ = Q · ρ / 60000                        flujo másico (Q en L/min) [kg/s]
+- Q̇_caliente = ṁ₁ · cp · (T1 − T2)          calor cedido por el circuito caliente [W]
+- Q̇_frio = M₃ · cp · dT3/dt                 calor ganado por la cubeta 3 [W]
+- Q̇_perdidas = Q̇_caliente − Q̇_frio; η = Q̇_frio / Q̇_caliente
+- ε = Q̇_caliente / (C₁ · (T1 − T3))         efectividad, C₁ = ṁ₁ · cp
+- Ṡ_gen = ṁ₁ · cp · ln(T2/T1) + Q̇_frio / T3 + Q̇_perdidas / T_amb
+                                           generación de entropía [W/K]
+
+El circuito frío recircula desde la cubeta 3 con un solo sensor (T3), así
+que su calor se obtiene del calentamiento de la cubeta: M₃ (volumen de
+agua en litros × ρ) por la pendiente de T3, ajustada por mínimos cuadrados
+en una ventana de ``ventana_s`` segundos para filtrar la cuantización del
+DS18B20. Si no se indica el volumen de la cubeta, Q̇_frio, pérdidas y η
+quedan en NaN y Ṡ_gen supone que todo el calor cedido llega a la cubeta
+(Q̇_frio = Q̇_caliente, sin pérdidas). Las pérdidas salen al ambiente a
+``t_ambiente_c`` (25 °C por defecto).
+
+Por lo mismo, el lado frío de la efectividad es la cubeta (a T3), no el
+caudal Q2 del circuito de recirculación: el circuito caliente cede calor
+aunque esa bomba esté apagada, y con Q2 ≈ 0 el C_min de libro daba
+efectividades de 5 o más. Con la cubeta como lado frío, C_min = C₁ y
+ε = (T1 − T2) / (T1 − T3). Una muestra con ε fuera de [0, 1] (T2 por
+debajo de T3 o por encima de T1: sensores o transitorio) queda en NaN y
+no entra en el promedio.
+
+``calcular`` trabaja sobre arreglos completos (un log ya grabado);
+``BalanceEnLinea`` calcula lo mismo trama por trama durante la sesión.
+
+Uso (desde termodinamica/):
+    python -m comun.balance segundaley/logs/datos_20251208_212433.csv --volumen-frio 10
+    python -m comun.balance segundaley/logs/datos_*.csv --salida balances/
+"""
+
+import argparse
+import math
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+CP_AGUA = 4186.0        # J/(kg·K)
+DENSIDAD_AGUA = 1000.0  # kg/m³
+KELVIN = 273.15
+TEMPERATURA_INVALIDA = -127.0
+TEMPERATURA_AMBIENTE = 25.0  # °C
+
+COLUMNAS_LOG = {'temp1': 'Temp1_C', 'temp2': 'Temp2_C', 'temp3': 'Temp3_C',
+                'caudal1': 'Caudal1_Lmin', 'caudal2': 'Caudal2_Lmin'}
+
+# Canales calculados (mismos nombres en ``calcular`` y ``BalanceEnLinea``)
+CANALES = ('calor_caliente', 'calor_frio', 'perdidas', 'eficiencia', 'efectividad', 'sgen')
+
+
+def flujo_masico(caudal_lmin, densidad=DENSIDAD_AGUA):
+    """Caudal en L/min -> flujo másico en kg/s"""
+    return np.asarray(caudal_lmin, dtype=float) * densidad / 60000.0
+
+
+def _balance(t1, t2, t3, q1, pendiente_t3, masa_fria, cp, t_ambiente):
+    """Fórmulas comunes; aceptan escalares o arreglos de NumPy"""
+    c_caliente = flujo_masico(q1) * cp
+    calor_caliente = c_caliente * (t1 - t2)
+    if masa_fria:
+        calor_frio = masa_fria * cp * pendiente_t3
+    else:
+        calor_frio = np.full_like(np.asarray(calor_caliente, dtype=float), np.nan)
+    perdidas = calor_caliente - calor_frio
+    with np.errstate(invalid='ignore', divide='ignore'):
+        efectividad = calor_caliente / (c_caliente * (t1 - t3))
+        eficiencia = calor_frio / calor_caliente * 100.0
+        sin_lado_frio = np.isnan(calor_frio)
+        calor_cubeta = np.where(sin_lado_frio, calor_caliente, calor_frio)
+        sgen = (c_caliente * np.log((t2 + KELVIN) / (t1 + KELVIN))
+                + calor_cubeta / (t3 + KELVIN)
+                + np.where(sin_lado_frio, 0.0, perdidas) / (t_ambiente + KELVIN))
+    # Sin flujo caliente no hay intercambio que evaluar; fuera de [0, 1] la
+    # muestra no es físicamente posible
+    with np.errstate(invalid='ignore'):
+        invalida = (c_caliente <= 0) | ~((efectividad >= 0) & (efectividad <= 1))
+    efectividad = np.where(invalida, np.nan, efectividad)
+    return {
+        'calor_caliente': calor_caliente,
+        'calor_frio': calor_frio,
+        'perdidas': perdidas,
+        'eficiencia': eficiencia,
+        'efectividad': efectividad,
+        'sgen': sgen,
+    }
+
+
+def pendiente_movil(t_s, valores, ventana_s):
+    """
+    Pendiente por mínimos cuadrados de los últimos ``ventana_s`` segundos
+
+    Vectorizada con sumas acumuladas: O(n) para toda la serie, con base de
+    tiempo irregular. Las muestras NaN se omiten.
+
+    Returns:
+        numpy.ndarray: Pendiente en unidades/s por muestra (NaN con menos de
+            3 muestras en la ventana)
+    """
+    t_s = np.asarray(t_s, dtype=float)
+    valores = np.asarray(valores, dtype=float)
+    pendiente = np.full(len(t_s), np.nan)
+    validos = np.isfinite(t_s) & np.isfinite(valores)
+    if validos.sum() < 3:
+        return pendiente
+    t = t_s[validos] - t_s[validos][0]
+    x = valores[validos]
+
+    def acumulada(a):
+        return np.concatenate(([0.0], np.cumsum(a)))
+
+    s_t, s_x, s_tt, s_tx = acumulada(t), acumulada(x), acumulada(t * t), acumulada(t * x)
+    fin = np.arange(1, len(t) + 1)
+    inicio = np.searchsorted(t, t - ventana_s, side='left')
+    n = fin - inicio
+    st, sx = s_t[fin] - s_t[inicio], s_x[fin] - s_x[inicio]
+    stt, stx = s_tt[fin] - s_tt[inicio], s_tx[fin] - s_tx[inicio]
+    denominador = n * stt - st * st
+    with np.errstate(invalid='ignore', divide='ignore'):
+        resultado = (n * stx - st * sx) / denominador
+    resultado[(n < 3) | (denominador <= 0)] = np.nan
+    pendiente[validos] = resultado
+    return pendiente
+
+
+def calcular(t_s, t1, t2, t3, q1, q2, volumen_frio_l=None, ventana_s=30.0,
+             t_ambiente_c=TEMPERATURA_AMBIENTE, cp=CP_AGUA, densidad=DENSIDAD_AGUA):
+    """
+    Balance de toda una sesión en una pasada vectorizada
+
+    Args:
+        t_s (array): Tiempo de cada trama en segundos
+        t1, t2, t3 (array): Temperaturas en °C
+        q1, q2 (array): Caudales en L/min (Q2 no interviene: el lado frío
+            es la cubeta 3)
+        volumen_frio_l (float): Litros de agua en la cubeta 3 (None si no se conoce)
+        ventana_s (float): Ventana del ajuste de dT3/dt
+        t_ambiente_c (float): Temperatura a la que salen las pérdidas
+        cp, densidad: Propiedades del agua
+
+    Returns:
+        dict: Arreglos de ``CANALES`` y 'energia_caliente' (J acumulados)
+    """
+    t_s = np.asarray(t_s, dtype=float)
+    t1, t2, t3 = (_limpiar_temperatura(t) for t in (t1, t2, t3))
+    q1 = np.asarray(q1, dtype=float)
+    masa_fria = volumen_frio_l * densidad / 1000.0 if volumen_frio_l else None
+    resultado = _balance(t1, t2, t3, q1, pendiente_movil(t_s, t3, ventana_s),
+                         masa_fria, cp, t_ambiente_c)
+
+    # Energía cedida acumulada (trapecio sobre el tiempo real; NaN cuenta como 0)
+    potencia = np.nan_to_num(resultado['calor_caliente'])
+    tramos = 0.5 * (potencia[1:] + potencia[:-1]) * np.diff(t_s)
+    resultado['energia_caliente'] = np.concatenate(([0.0], np.cumsum(np.nan_to_num(tramos))))
+    return resultado
+
+
+def _limpiar_temperatura(valores):
+    valores = np.asarray(valores, dtype=float).copy()
+    valores[valores == TEMPERATURA_INVALIDA] = np.nan
+    return valores
+
+
+def analizar_sesion(ruta, volumen_frio_l=None, ventana_s=30.0, t_ambiente_c=TEMPERATURA_AMBIENTE):
+    """
+    Balance de un ``datos_*.csv`` grabado
+
+    Args:
+        ruta (str): CSV de sesión de Segunda Ley
+        volumen_frio_l (float): Litros de agua en la cubeta 3
+        ventana_s (float): Ventana del ajuste de dT3/dt
+        t_ambiente_c (float): Temperatura a la que salen las pérdidas
+
+    Returns:
+        tuple: (DataFrame con las columnas del log más las calculadas,
+            dict con el resumen de la sesión)
+    """
+    df = pd.read_csv(ruta, na_values=['--'])
+    columnas = {canal: pd.to_numeric(df[columna], errors='coerce').to_numpy(dtype=float)
+                for canal, columna in COLUMNAS_LOG.items()}
+    resultado = calcular(df['Tiempo_Relativo_s'].to_numpy(dtype=float),
+                         columnas['temp1'], columnas['temp2'], columnas['temp3'],
+                         columnas['caudal1'], columnas['caudal2'],
+                         volumen_frio_l, ventana_s, t_ambiente_c)
+    unidades = {'calor_caliente': 'Calor_Caliente_W', 'calor_frio': 'Calor_Frio_W',
+                'perdidas': 'Perdidas_W', 'eficiencia': 'Eficiencia_%',
+                'efectividad': 'Efectividad', 'sgen': 'Sgen_W_K',
+                'energia_caliente': 'Energia_Caliente_J'}
+    for canal, columna in unidades.items():
+        df[columna] = resultado[canal]
+
+    con_flujo = columnas['caudal1'] > 0
+    with np.errstate(invalid='ignore'):
+        def promedio(canal):
+            valores = resultado[canal][con_flujo]
+            valores = valores[np.isfinite(valores)]
+            return float(valores.mean()) if len(valores) else None
+
+        resumen = {
+            'archivo': os.path.basename(ruta),
+            'duracion_s': float(df['Tiempo_Relativo_s'].iloc[-1]) if len(df) else 0.0,
+            'tramas_con_flujo': int(con_flujo.sum()),
+            'energia_cedida_J': float(resultado['energia_caliente'][-1]) if len(df) else 0.0,
+            'calor_caliente_medio_W': promedio('calor_caliente'),
+            'calor_frio_medio_W': promedio('calor_frio'),
+            'eficiencia_media_%': promedio('eficiencia'),
+            'efectividad_media': promedio('efectividad'),
+            'sgen_medio_W_K': promedio('sgen'),
+        }
+    return df, resumen
+
+
+class BalanceEnLinea:
+    """
+    Las mismas cantidades de ``calcular``, trama por trama.
+
+    La pendiente de T3 se ajusta con sumas móviles sobre las muestras de la
+    ventana (O(1) por trama) y la energía se acumula por trapecios.
+
+    Uso:
+        balance = BalanceEnLinea(volumen_frio_l=10)
+        valores = balance.agregar(trama.como_dict())   # {'calor_caliente': ..., ...}
+    """
+
+    def __init__(self, volumen_frio_l=None, ventana_s=30.0, t_ambiente_c=TEMPERATURA_AMBIENTE,
+                 cp=CP_AGUA, densidad=DENSIDAD_AGUA):
+        self.volumen_frio_l = volumen_frio_l
+        self.ventana_s = ventana_s
+        self.t_ambiente_c = t_ambiente_c
+        self.cp = cp
+        self.densidad = densidad
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.t0 = None
+        self.muestras = deque()  # (t, T3) de la ventana
+        self.sumas = [0.0, 0.0, 0.0, 0.0]  # Σt, ΣT3, Σt², Σt·T3
+        self.energia_caliente = 0.0
+        self.anterior = None  # (t, Q̇_caliente)
+
+    def _pendiente_t3(self, t, t3):
+        if t3 == t3:
+            self.muestras.append((t, t3))
+            self._sumar(t, t3, 1.0)
+        while self.muestras and self.muestras[0][0] < t - self.ventana_s:
+            self._sumar(*self.muestras.popleft(), -1.0)
+        n = len(self.muestras)
+        st, sx, stt, stx = self.sumas
+        denominador = n * stt - st * st
+        if n < 3 or denominador <= 0:
+            return math.nan
+        return (n * stx - st * sx) / denominador
+
+    def _sumar(self, t, x, signo):
+        self.sumas[0] += signo * t
+        self.sumas[1] += signo * x
+        self.sumas[2] += signo * t * t
+        self.sumas[3] += signo * t * x
+
+    def agregar(self, datos, t=None):
+        """
+        Args:
+            datos (dict): Trama con temp1..temp3 y caudal1..caudal2
+            t (float): Tiempo de la trama (por defecto ``time.time()``)
+
+        Returns:
+            dict: Valores de ``CANALES`` y 'energia_caliente' para esta trama
+                (NaN los que no se pueden calcular)
+        """
+        if t is None:
+            t = time.time()
+        if self.t0 is None:
+            self.t0 = t
+        # Tiempo relativo: mantiene pequeñas las sumas de la regresión
+        t -= self.t0
+
+        def valor(canal, temperatura=False):
+            v = datos.get(canal)
+            if not isinstance(v, (int, float)) or (temperatura and v == TEMPERATURA_INVALIDA):
+                return math.nan
+            return float(v)
+
+        t1, t2, t3 = valor('temp1', True), valor('temp2', True), valor('temp3', True)
+        q1 = valor('caudal1')
+        masa_fria = self.volumen_frio_l * self.densidad / 1000.0 if self.volumen_frio_l else None
+        resultado = {canal: float(v) for canal, v in
+                     _balance(t1, t2, t3, q1, self._pendiente_t3(t, t3),
+                              masa_fria, self.cp, self.t_ambiente_c).items()}
+
+        potencia = resultado['calor_caliente']
+        potencia = potencia if potencia == potencia else 0.0
+        if self.anterior:
+            self.energia_caliente += 0.5 * (potencia + self.anterior[1]) * (t - self.anterior[0])
+        self.anterior = (t, potencia)
+        resultado['energia_caliente'] = self.energia_caliente
+        return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('archivos', nargs='+', help="datos_*.csv de Segunda Ley")
+    parser.add_argument('--volumen-frio', type=float, metavar='LITROS',
+                        help="agua en la cubeta 3 (sin él no se calcula el lado frío)")
+    parser.add_argument('--ventana', type=float, default=30.0, help="segundos para dT3/dt")
+    parser.add_argument('--ambiente', type=float, default=TEMPERATURA_AMBIENTE,
+                        help="temperatura ambiente en °C (pérdidas)")
+    parser.add_argument('--salida', metavar='DIRECTORIO',
+                        help="guardar ahí <archivo>_balance.csv con las columnas calculadas "
+                             "(fuera de logs/, para que no se tome como otra sesión)")
+    args = parser.parse_args()
+
+    for ruta in args.archivos:
+        df, resumen = analizar_sesion(ruta, args.volumen_frio, args.ventana, args.ambiente)
+        print("=" * 60)
+        print(f"BALANCE DE ENERGÍA: {resumen['archivo']}")
+        print("=" * 60)
+        for clave, valor in resumen.items():
+            if clave == 'archivo':
+                continue
+            texto = f"{valor:.3f}" if isinstance(valor, float) else ("--" if valor is None else valor)
+            print(f"{clave:.<40} {texto}")
+        if args.salida:
+            os.makedirs(args.salida, exist_ok=True)
+            nombre = os.path.splitext(os.path.basename(ruta))[0] + '_balance.csv'
+            salida = os.path.join(args.salida, nombre)
+            df.to_csv(salida, index=False)
+            print(f"Guardado: {salida}")
+
+
+if __name__ == "__main__":
+    main()
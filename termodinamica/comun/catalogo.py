@@ -0,0 +1,399 @@
+"""
+Catálogo SQLite de las corridas grabadas por ambos equipos
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Para responder preguntas como "todas las retracciones del 2025-10-03 que
+pasaron de 150 kPa" había que abrir cada CSV. ``Catalogo`` lee cada
+archivo una sola vez y guarda en una tabla su equipo, tipo de operación,
+inicio y fin, número de muestras y mínimo/máximo/promedio de presión y
+temperatura; las consultas después no tocan los datos.
+
+``actualizar`` es incremental: solo vuelve a leer los archivos nuevos o
+cuyo tamaño o fecha de modificación cambió, y quita los que ya no existen.
+Una sesión rotada en segmentos (comun/segmentos.py) es una sola corrida,
+indexada por su ``sesion_<fecha>.json``; cambia cuando cambia cualquiera
+de sus segmentos.
+
+Operaciones (las mismas que comun/almacen.py):
+
+- Primera Ley: 'extension' o 'retraccion' (fila de metadatos del CSV)
+- Segunda Ley: 'test', 'operacion' o 'monitoreo' según los estados de la
+  sesión; la temperatura es la del sensor 1 (la que dispara el arranque) y
+  no hay presión
+
+Uso (desde termodinamica/):
+    python -m comun.catalogo                          # indexa primeraley/python y segundaley/logs
+    python -m comun.catalogo --vigilar 10             # y sigue indexando lo nuevo cada 10 s
+    python -m comun.catalogo --buscar --operacion retraccion --fecha 2025-10-03 --presion-sobre 150
+"""
+
+import argparse
+import csv
+import math
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from .almacen import ORIGENES, detectar_equipo
+from .protocolo import ESTADOS_ENLACE
+from .segmentos import Manifiesto, abrir_segmentos, firma_sesion, listar_corridas
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DATOS = os.path.join(RAIZ, 'catalogo.sqlite')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS corridas (
+    ruta TEXT PRIMARY KEY,
+    equipo TEXT NOT NULL,
+    operacion TEXT NOT NULL,
+    inicio TEXT,
+    fin TEXT,
+    duracion_s REAL,
+    muestras INTEGER NOT NULL,
+    presion_min REAL,
+    presion_max REAL,
+    presion_media REAL,
+    temperatura_min REAL,
+    temperatura_max REAL,
+    temperatura_media REAL,
+    tamano INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS corridas_equipo_inicio ON corridas (equipo, operacion, inicio);
+CREATE INDEX IF NOT EXISTS corridas_presion ON corridas (presion_max);
+"""
+
+# DS18B20 desconectado
+TEMPERATURA_INVALIDA = -127.0
+
+
+class _Acumulado:
+    """Mínimo, máximo y promedio en una pasada, ignorando valores no numéricos"""
+
+    def __init__(self):
+        self.n = 0
+        self.suma = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def agregar(self, texto, invalido=None):
+        try:
+            valor = float(texto)
+        except (TypeError, ValueError):
+            return
+        if valor != valor or valor == invalido:
+            return
+        self.n += 1
+        self.suma += valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    def resultado(self):
+        """(min, max, media) o (None, None, None) si no hubo valores"""
+        if not self.n:
+            return None, None, None
+        return self.minimo, self.maximo, self.suma / self.n
+
+
+def _filas_csv(ruta):
+    """Renglones de un CSV, encabezado incluido"""
+    with open(ruta, newline='', encoding='utf-8', errors='ignore') as f:
+        yield from csv.reader(f)
+
+
+def _filas_sesion(ruta_manifiesto):
+    """Encabezado de la sesión y luego las filas de todos sus segmentos"""
+    yield Manifiesto.cargar(ruta_manifiesto).datos['encabezado']
+    for archivo in abrir_segmentos(ruta_manifiesto):
+        lector = csv.reader(archivo)
+        next(lector, None)  # cada segmento repite el encabezado
+        yield from lector
+
+
+def _firma(ruta):
+    """(tamaño, mtime) del archivo o de la sesión completa"""
+    if ruta.endswith('.json'):
+        return firma_sesion(ruta)
+    estado = os.stat(ruta)
+    return estado.st_size, estado.st_mtime
+
+
+def resumir_archivo(ruta):
+    """
+    Lee un CSV (o una sesión segmentada) de cualquiera de los equipos y
+    calcula su fila del catálogo
+
+    Returns:
+        dict: Columnas de la tabla ``corridas`` (sin tamano/mtime), o None
+            si el archivo no es de ningún equipo o no tiene datos
+    """
+    equipo = detectar_equipo(ruta)
+    if equipo is None:
+        return None
+
+    presion = _Acumulado()
+    temperatura = _Acumulado()
+    inicio = fin = None
+    muestras = 0
+    estados = set()
+    filas = _filas_sesion(ruta) if ruta.endswith('.json') else _filas_csv(ruta)
+    encabezado = next(filas, [])
+    if equipo == 'primeraley':
+        metadatos = next(filas, [])
+        next(filas, None)  # encabezado de los datos
+        tipo = metadatos[3] if len(metadatos) > 3 and metadatos[3] else os.path.basename(ruta)
+        operacion = 'retraccion' if 'retrac' in tipo.lower() else 'extension'
+        for fila in filas:
+            if len(fila) < 3 or fila[2] in ESTADOS_ENLACE:
+                continue
+            muestras += 1
+            inicio = inicio or fila[0]
+            fin = fila[0]
+            presion.agregar(fila[1])
+            temperatura.agregar(fila[2])
+    else:
+        i_estado = encabezado.index('Estado_Sistema')
+        i_temp = encabezado.index('Temp1_C')
+        for fila in filas:
+            if len(fila) <= i_temp or fila[i_estado] in ESTADOS_ENLACE:
+                continue
+            muestras += 1
+            inicio = inicio or fila[0]
+            fin = fila[0]
+            estados.add(fila[i_estado])
+            temperatura.agregar(fila[i_temp], TEMPERATURA_INVALIDA)
+        if 'MODO TEST' in estados:
+            operacion = 'test'
+        elif 'EN OPERACION' in estados:
+            operacion = 'operacion'
+        else:
+            operacion = 'monitoreo'
+
+    if not muestras:
+        return None
+    duracion = None
+    try:
+        formato = "%Y-%m-%d %H:%M:%S.%f"
+        duracion = (datetime.strptime(fin, formato) - datetime.strptime(inicio, formato)).total_seconds()
+    except ValueError:
+        pass
+
+    p_min, p_max, p_media = presion.resultado()
+    t_min, t_max, t_media = temperatura.resultado()
+    return {
+        'ruta': os.path.abspath(ruta), 'equipo': equipo, 'operacion': operacion,
+        'inicio': inicio, 'fin': fin, 'duracion_s': duracion, 'muestras': muestras,
+        'presion_min': p_min, 'presion_max': p_max, 'presion_media': p_media,
+        'temperatura_min': t_min, 'temperatura_max': t_max, 'temperatura_media': t_media,
+    }
+
+
+class Catalogo:
+    """
+    Índice persistente de los archivos de corridas.
+
+    Uso:
+        with Catalogo() as catalogo:
+            catalogo.actualizar()
+            for corrida in catalogo.buscar(operacion='retraccion', fecha='2025-10-03',
+                                           presion_sobre=150):
+                print(corrida['ruta'], corrida['presion_max'])
+    """
+
+    def __init__(self, ruta=BASE_DATOS):
+        """
+        Args:
+            ruta (str): Archivo SQLite (se crea si no existe)
+        """
+        self.ruta = ruta
+        self.conexion = sqlite3.connect(ruta)
+        self.conexion.row_factory = sqlite3.Row
+        # WAL: las consultas no se bloquean mientras otro proceso actualiza
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.executescript(ESQUEMA)
+
+    def actualizar(self, origenes=ORIGENES):
+        """
+        Indexa los CSV nuevos o modificados y quita los que ya no existen
+
+        Args:
+            origenes (list): Directorios con CSV o rutas de archivos (CSV o
+                manifiestos de sesión)
+
+        Returns:
+            dict: Número de archivos 'nuevos', 'actualizados', 'sin_cambios',
+                'eliminados' e 'ignorados'
+        """
+        conteo = dict.fromkeys(('nuevos', 'actualizados', 'sin_cambios', 'eliminados', 'ignorados'), 0)
+        conocidos = {fila['ruta']: (fila['tamano'], fila['mtime']) for fila in
+                     self.conexion.execute("SELECT ruta, tamano, mtime FROM corridas")}
+
+        vistos = set()
+        directorios = []
+        with self.conexion:
+            for origen in origenes:
+                if os.path.isdir(origen):
+                    directorios.append(os.path.abspath(origen))
+                    rutas = listar_corridas(origen)
+                else:
+                    rutas = [origen]
+                for ruta in rutas:
+                    ruta = os.path.abspath(ruta)
+                    vistos.add(ruta)
+                    resultado = self._indexar(ruta, conocidos.get(ruta))
+                    conteo[resultado] += 1
+
+            # Archivos borrados de los directorios revisados, y segmentos
+            # indexados antes por separado: ahora cuentan con su sesión
+            for ruta in conocidos:
+                if ruta not in vistos and os.path.dirname(ruta) in directorios \
+                        and (not os.path.exists(ruta) or ruta.endswith('.csv')):
+                    self.conexion.execute("DELETE FROM corridas WHERE ruta = ?", (ruta,))
+                    conteo['eliminados'] += 1
+        return conteo
+
+    def registrar(self, ruta):
+        """Indexa (o vuelve a indexar) un solo archivo, p. ej. al cerrarlo el registrador"""
+        ruta = os.path.abspath(ruta)
+        fila = self.conexion.execute("SELECT tamano, mtime FROM corridas WHERE ruta = ?",
+                                     (ruta,)).fetchone()
+        with self.conexion:
+            return self._indexar(ruta, tuple(fila) if fila else None)
+
+    def _indexar(self, ruta, conocido):
+        try:
+            tamano, mtime = _firma(ruta)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Error indexando {ruta}: {e}")
+            return 'ignorados'
+        if conocido == (tamano, mtime):
+            return 'sin_cambios'
+        try:
+            fila = resumir_archivo(ruta)
+        except (OSError, ValueError, ImportError, csv.Error) as e:
+            print(f"Error indexando {ruta}: {e}")
+            fila = None
+        if fila is None:
+            if conocido:
+                self.conexion.execute("DELETE FROM corridas WHERE ruta = ?", (ruta,))
+            return 'ignorados'
+        fila.update(tamano=tamano, mtime=mtime)
+        columnas = ', '.join(fila)
+        self.conexion.execute(
+            f"INSERT OR REPLACE INTO corridas ({columnas}) VALUES ({', '.join('?' * len(fila))})",
+            tuple(fila.values()))
+        return 'actualizados' if conocido else 'nuevos'
+
+    def buscar(self, equipo=None, operacion=None, fecha=None, desde=None, hasta=None,
+               presion_sobre=None, presion_bajo=None, temperatura_sobre=None, orden='inicio'):
+        """
+        Consulta el catálogo
+
+        Args:
+            equipo (str): 'primeraley' o 'segundaley'
+            operacion (str): 'extension', 'retraccion', 'test', 'operacion', 'monitoreo'
+            fecha (str): Día 'AAAA-MM-DD' en que inició la corrida
+            desde (str): Inicio mínimo ('AAAA-MM-DD' o 'AAAA-MM-DD HH:MM:SS')
+            hasta (str): Inicio máximo (mismo formato; una fecha sola incluye todo el día)
+            presion_sobre (float): Presión máxima mayor que este valor (kPa)
+            presion_bajo (float): Presión mínima menor que este valor (kPa)
+            temperatura_sobre (float): Temperatura máxima mayor que este valor (°C)
+            orden (str): Columna para ordenar
+
+        Returns:
+            list: Filas como ``sqlite3.Row`` (se accede por nombre de columna)
+        """
+        condiciones, parametros = [], []
+        for columna, operador, valor in (
+                ('equipo', '=', equipo), ('operacion', '=', operacion),
+                ('inicio', '>=', desde), ('presion_max', '>', presion_sobre),
+                ('presion_min', '<', presion_bajo), ('temperatura_max', '>', temperatura_sobre)):
+            if valor is not None:
+                condiciones.append(f"{columna} {operador} ?")
+                parametros.append(valor)
+        if fecha:
+            # Rango sobre el índice en lugar de date(inicio) = ?
+            condiciones.append("inicio >= ? AND inicio < ?")
+            parametros += [fecha, fecha + '~']
+        if hasta:
+            condiciones.append("inicio <= ?")
+            parametros.append(hasta + '~' if len(hasta) == 10 else hasta)
+        if orden not in self.columnas():
+            raise ValueError(f"Columna desconocida: {orden}")
+
+        consulta = "SELECT * FROM corridas"
+        if condiciones:
+            consulta += " WHERE " + " AND ".join(condiciones)
+        return self.conexion.execute(f"{consulta} ORDER BY {orden}", parametros).fetchall()
+
+    def columnas(self):
+        return [fila[1] for fila in self.conexion.execute("PRAGMA table_info(corridas)")]
+
+    def vigilar(self, origenes=ORIGENES, intervalo_s=10.0):
+        """Actualiza el catálogo cada ``intervalo_s`` segundos hasta Ctrl+C"""
+        try:
+            while True:
+                conteo = self.actualizar(origenes)
+                if conteo['nuevos'] or conteo['actualizados'] or conteo['eliminados']:
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] {conteo['nuevos']} nuevos, "
+                          f"{conteo['actualizados']} actualizados, {conteo['eliminados']} eliminados")
+                time.sleep(intervalo_s)
+        except KeyboardInterrupt:
+            pass
+
+    def cerrar(self):
+        self.conexion.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('origenes', nargs='*', default=list(ORIGENES),
+                        help="directorios o CSV a indexar (por defecto los de ambos equipos)")
+    parser.add_argument('--base', default=BASE_DATOS, help="archivo SQLite del catálogo")
+    parser.add_argument('--vigilar', type=float, metavar='SEGUNDOS',
+                        help="seguir indexando archivos nuevos cada tantos segundos")
+    parser.add_argument('--buscar', action='store_true', help="consultar en lugar de indexar")
+    parser.add_argument('--equipo')
+    parser.add_argument('--operacion')
+    parser.add_argument('--fecha', help="AAAA-MM-DD")
+    parser.add_argument('--desde')
+    parser.add_argument('--hasta')
+    parser.add_argument('--presion-sobre', type=float)
+    parser.add_argument('--temperatura-sobre', type=float)
+    args = parser.parse_args()
+
+    with Catalogo(args.base) as catalogo:
+        if args.buscar:
+            inicio = time.perf_counter()
+            filas = catalogo.buscar(args.equipo, args.operacion, args.fecha, args.desde, args.hasta,
+                                    args.presion_sobre, temperatura_sobre=args.temperatura_sobre)
+            transcurrido = (time.perf_counter() - inicio) * 1000.0
+            for fila in filas:
+                presion = f"{fila['presion_max']:8.2f} kPa" if fila['presion_max'] is not None else " " * 12
+                temperatura = (f"{fila['temperatura_max']:6.2f} °C"
+                               if fila['temperatura_max'] is not None else "")
+                print(f"{fila['inicio']}  {fila['operacion']:<10} {fila['muestras']:>6}  "
+                      f"{presion}  {temperatura}  {os.path.basename(fila['ruta'])}")
+            print(f"{len(filas)} corridas ({transcurrido:.1f} ms)")
+            return
+
+        inicio = time.perf_counter()
+        conteo = catalogo.actualizar(args.origenes)
+        print(f"{conteo['nuevos']} nuevos, {conteo['actualizados']} actualizados, "
+              f"{conteo['sin_cambios']} sin cambios, {conteo['eliminados']} eliminados, "
+              f"{conteo['ignorados']} ignorados ({time.perf_counter() - inicio:.2f} s)")
+        if args.vigilar:
+            catalogo.vigilar(args.origenes, args.vigilar)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Cola de actualizaciones entre el hilo lector y el hilo de Tk
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Tkinter no es seguro entre hilos: las interfaces modificaban ``StringVar``s
+desde el hilo que lee el puerto serie, o programaban un ``root.after(0, ...)``
+por cada línea recibida, lo que con ráfagas del Arduino llenaba el ciclo de
+Tk con miles de callbacks.
+
+Con ``ColaUI`` el hilo lector solo publica mensajes (un ``deque``, cuyo
+``append``/``popleft`` no necesita candado en CPython). El hilo de Tk vacía
+la cola cada ``intervalo_ms`` y entrega a cada manejador un solo valor por
+tipo de mensaje, combinado según el modo con que se registró:
+
+- ``'ultimo'``: solo el último valor publicado
+- ``'dict'``: los diccionarios publicados fusionados en orden (gana el más reciente por clave)
+- ``'lista'``: la lista de todos los valores publicados, en orden
+"""
+
+from collections import deque
+
+
+class ColaUI:
+    """
+    Entrega mensajes de cualquier hilo al hilo de Tk, agrupados por tick.
+
+    Uso:
+        cola = ColaUI(root, intervalo_ms=100)
+        cola.registrar('datos', self.actualizar_display, 'dict')
+        cola.iniciar()
+        ...
+        cola.publicar('datos', datos)   # desde el hilo lector
+    """
+
+    MODOS = ('ultimo', 'dict', 'lista')
+
+    def __init__(self, root, intervalo_ms=100):
+        """
+        Args:
+            root: Ventana principal de Tk
+            intervalo_ms (int): Periodo con que el hilo de Tk vacía la cola
+        """
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.cola = deque()
+        self.manejadores = {}
+        self.activa = False
+
+    def registrar(self, tipo, funcion, modo='ultimo'):
+        """
+        Asocia un tipo de mensaje con la función que lo procesa en el hilo de Tk
+
+        Args:
+            tipo (str): Nombre del tipo de mensaje
+            funcion (callable): Recibe el valor combinado del tick
+            modo (str): 'ultimo', 'dict' o 'lista'
+        """
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo desconocido: {modo}")
+        self.manejadores[tipo] = (funcion, modo)
+
+    def publicar(self, tipo, valor=None):
+        """Encola un mensaje; se puede llamar desde cualquier hilo"""
+        self.cola.append((tipo, valor))
+
+    def iniciar(self):
+        """Comienza a vaciar la cola periódicamente (llamar desde el hilo de Tk)"""
+        if not self.activa:
+            self.activa = True
+            self.root.after(self.intervalo_ms, self._drenar)
+
+    def detener(self):
+        self.activa = False
+
+    def vaciar(self):
+        """Procesa de inmediato todo lo pendiente (llamar desde el hilo de Tk)"""
+        combinados = {}
+        for _ in range(len(self.cola)):
+            tipo, valor = self.cola.popleft()
+            if tipo not in self.manejadores:
+                continue
+            modo = self.manejadores[tipo][1]
+            if modo == 'dict':
+                combinados.setdefault(tipo, {}).update(valor)
+            elif modo == 'lista':
+                combinados.setdefault(tipo, []).append(valor)
+            else:
+                combinados[tipo] = valor
+
+        for tipo, valor in combinados.items():
+            try:
+                self.manejadores[tipo][0](valor)
+            except Exception as e:
+                print(f"Error actualizando interfaz ({tipo}): {e}")
+
+    def _drenar(self):
+        if not self.activa:
+            return
+        self.vaciar()
+        self.root.after(self.intervalo_ms, self._drenar)
@@ -0,0 +1,168 @@
+"""
+Canal de comandos hacia el Arduino con coalescencia por clave
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+El ``Scale`` de Tk llama a ``actualizar_setpoint1``/``2`` con cada paso de
+0.1 L/min: al arrastrar un deslizador se escribían decenas de ``S1:x`` por
+segundo en el mismo enlace de 115200 baudios que trae la telemetría, y cada
+uno dejaba un renglón en ``eventos_*.log``.
+
+``CanalComandos`` separa los comandos en dos tipos:
+
+- Con clave (``fijar('S1', 2.5)``): gana el último valor. Un hilo escritor
+  envía el primero de inmediato y, mientras no pase ``ventana_s`` desde el
+  último envío de esa clave, solo guarda el más reciente. Al terminar de
+  arrastrar se envía el valor final, y ``al_aplicar`` se llama solo con
+  los valores que sí salieron (lo que se registra en el log de eventos).
+- Sin clave (``enviar_ahora(b"STOP\\n")``): se escriben en el hilo que los
+  pide, con el mismo candado que el escritor. Con ``descartar=True`` se
+  tiran antes los valores pendientes, incluidos los que el escritor ya sacó
+  de la cola y aún no escribe, para que un ``S1`` viejo no llegue después
+  de un ``OFF``.
+
+``solicitados``/``enviados`` y sus bytes permiten medir lo que se ahorra.
+``reenviar`` vuelve a encolar el último valor escrito de cada clave (p. ej.
+después de que el Arduino se reinició al reconectar, ver comun/enlace.py);
+un ``enviar_ahora(..., descartar=True)`` olvida también esos valores, para
+que un ``STOP`` no se deshaga al reconectar.
+"""
+
+import threading
+import time
+
+
+class CanalComandos:
+    """
+    Uso:
+        canal = CanalComandos(conexion, ventana_s=0.15, al_aplicar=registrar)
+        canal.fijar('S1', 2.5)            # desde el callback del Scale
+        canal.enviar_ahora(b"OFF\\n", descartar=True)
+        canal.cerrar()
+    """
+
+    def __init__(self, conexion, ventana_s=0.15, al_aplicar=None, formato="{clave}:{valor}\n"):
+        """
+        Args:
+            conexion: Objeto con ``write(bytes)`` (serial.Serial o ConexionTCP)
+            ventana_s (float): Tiempo mínimo entre dos envíos de la misma clave
+            al_aplicar (callable): ``al_aplicar(clave, valor)`` después de enviar
+                un valor con clave (corre en el hilo escritor)
+            formato (str): Texto del comando con clave
+        """
+        self.conexion = conexion
+        self.ventana_s = ventana_s
+        self.al_aplicar = al_aplicar
+        self.formato = formato
+        self.pendientes = {}       # clave -> valor más reciente sin enviar
+        self.ultimo_envio = {}     # clave -> time.monotonic() del último envío
+        self.ultimos = {}          # clave -> último valor escrito desde el último descarte
+        # Orden de los candados: candado_escritura antes que condicion;
+        # condicion protege también los contadores
+        self.condicion = threading.Condition()
+        self.candado_escritura = threading.Lock()
+        self.activo = True
+        self.generacion = 0        # aumenta con cada descarte (solo con ambos candados)
+        self.solicitados = 0
+        self.enviados = 0
+        self.bytes_solicitados = 0
+        self.bytes_enviados = 0
+        self.hilo = threading.Thread(target=self._ciclo, daemon=True, name="canal-comandos")
+        self.hilo.start()
+
+    def _texto(self, clave, valor):
+        return self.formato.format(clave=clave, valor=valor).encode()
+
+    def fijar(self, clave, valor):
+        """Pide enviar ``clave:valor``; reemplaza un valor de la misma clave aún sin enviar"""
+        with self.condicion:
+            if not self.activo:
+                return
+            self.pendientes[clave] = valor
+            self.solicitados += 1
+            self.bytes_solicitados += len(self._texto(clave, valor))
+            self.condicion.notify()
+
+    def enviar_ahora(self, datos, descartar=False):
+        """
+        Escribe ``datos`` en este hilo (las excepciones llegan al llamador)
+
+        Args:
+            datos (bytes): Comando completo, con su salto de línea
+            descartar (bool): Tirar los valores con clave pendientes
+        """
+        with self.candado_escritura:
+            if descartar:
+                with self.condicion:
+                    self.pendientes.clear()
+                    self.ultimos.clear()
+                    self.generacion += 1
+            self.conexion.write(datos)
+            with self.condicion:
+                self.bytes_solicitados += len(datos)
+                self.bytes_enviados += len(datos)
+
+    def cerrar(self, enviar_pendientes=False):
+        """Detiene el hilo escritor; por defecto los valores pendientes se descartan"""
+        with self.condicion:
+            if not enviar_pendientes:
+                self.pendientes.clear()
+            self.activo = False
+            self.condicion.notify()
+        self.hilo.join(timeout=1.0)
+
+    def reenviar(self):
+        """Encola de nuevo el último valor de cada clave (sin pisar uno pendiente)"""
+        with self.condicion:
+            for clave, valor in self.ultimos.items():
+                self.pendientes.setdefault(clave, valor)
+            self.ultimo_envio.clear()
+            self.condicion.notify()
+
+    @property
+    def bytes_ahorrados(self):
+        return self.bytes_solicitados - self.bytes_enviados
+
+    def _ciclo(self):
+        while True:
+            with self.condicion:
+                while True:
+                    ahora = time.monotonic()
+                    listos = [clave for clave in self.pendientes
+                              if ahora - self.ultimo_envio.get(clave, -1e9) >= self.ventana_s]
+                    if listos or (not self.activo and not self.pendientes):
+                        break
+                    if not self.activo:
+                        listos = list(self.pendientes)  # cerrar(enviar_pendientes=True)
+                        break
+                    espera = None
+                    if self.pendientes:
+                        espera = min(self.ultimo_envio[clave] + self.ventana_s
+                                     for clave in self.pendientes) - ahora
+                    self.condicion.wait(espera)
+                if not listos:
+                    return
+                envios = [(clave, self.pendientes.pop(clave)) for clave in listos]
+                generacion = self.generacion
+                for clave in listos:
+                    self.ultimo_envio[clave] = ahora
+
+            for clave, valor in envios:
+                datos = self._texto(clave, valor)
+                try:
+                    with self.candado_escritura:
+                        if self.generacion != generacion:
+                            break  # un enviar_ahora(descartar=True) se adelantó
+                        self.conexion.write(datos)
+                        with self.condicion:
+                            self.enviados += 1
+                            self.bytes_enviados += len(datos)
+                            self.ultimos[clave] = valor
+                except Exception as e:
+                    print(f"Error enviando {datos.strip()!r}: {e}")
+                    continue
+                if self.al_aplicar:
+                    try:
+                        self.al_aplicar(clave, valor)
+                    except Exception as e:
+                        print(f"Error registrando comando {clave}: {e}")
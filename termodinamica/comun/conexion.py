@@ -0,0 +1,220 @@
+"""
+Conexión con el Arduino sin bloquear el hilo de Tk
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Al abrir el puerto serie el Arduino se reinicia (DTR), y las interfaces
+esperaban con ``time.sleep(2)`` en el hilo de Tk a que terminara el
+bootloader; ``MotorControlGUI`` ni siquiera esperaba. Al desconectar,
+``time.sleep(0.5)`` congelaba la ventana otra vez.
+
+Aquí la apertura corre en un hilo: después de abrir se leen las líneas que
+envía el firmware hasta reconocer una marca de que ya está en ``loop()``
+(``"Sistema listo."`` en primeraley, el delimitador de la primera trama en
+segundaley). Lo normal es que eso tome lo que tarda el bootloader más el
+``setup()`` (0.5-1.5 s) en lugar de 2 s fijos; si no llega ninguna marca en
+``timeout_s``, el puerto se cierra y se informa el error. Lo recibido durante
+la espera se entrega en ``Saludo.texto`` para que el hilo lector no pierda
+la primera trama.
+
+Uso:
+    conector = conectar_en_segundo_plano(puerto, 115200, MARCAS_SEGUNDA_LEY,
+                                         lambda r: cola_ui.publicar('conexion', r))
+    ...
+    def conexion_lista(self, resultado):       # hilo de Tk
+        if resultado.error: ...
+        self.serial_connection = resultado.conexion
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from .protocolo import DELIMITADOR
+from .serie import LectorLineas, abrir_puerto, es_remoto
+
+# Líneas que indican que el firmware ya terminó setup()
+MARCAS_SEGUNDA_LEY = (DELIMITADOR, "Sistema listo.")
+MARCAS_PRIMERA_LEY = ("Sistema listo.", "Pressure:")
+
+# Granularidad de la espera (el timeout de las GUIs es de 1 s)
+PASO_LECTURA_S = 0.05
+
+
+@dataclass
+class Saludo:
+    """Resultado de esperar a que el firmware esté listo"""
+    listo: bool
+    marca: str = None       # marca reconocida (None si venció el tiempo)
+    texto: str = ""         # líneas completas recibidas durante la espera
+    lector: LectorLineas = None   # conserva la línea incompleta pendiente
+    latencia_s: float = 0.0
+
+
+@dataclass
+class ResultadoConexion:
+    """Lo que recibe ``al_terminar`` de ``conectar_en_segundo_plano``"""
+    puerto: str
+    conexion: object = None
+    saludo: Saludo = None
+    error: Exception = None
+    latencia_s: float = 0.0
+
+
+def esperar_listo(conexion, marcas, timeout_s=4.0, cancelado=None):
+    """
+    Lee el puerto hasta recibir una línea que empiece con alguna de ``marcas``
+
+    Args:
+        conexion: serial.Serial o ConexionRemota ya abierta
+        marcas (tuple): Prefijos de línea que indican que el firmware está listo
+        timeout_s (float): Tiempo máximo de espera
+        cancelado (callable): Devuelve True para abandonar la espera
+
+    Returns:
+        Saludo
+    """
+    inicio = time.perf_counter()
+    lector = LectorLineas(conexion)
+    recibido = []
+    timeout_original = conexion.timeout
+    conexion.timeout = PASO_LECTURA_S
+    try:
+        while time.perf_counter() - inicio < timeout_s:
+            if cancelado and cancelado():
+                break
+            texto = lector.leer_texto()
+            if not texto:
+                continue
+            recibido.append(texto)
+            for linea in texto.split('\n'):
+                linea = linea.strip()
+                for marca in marcas:
+                    if linea.startswith(marca):
+                        return Saludo(True, marca, ''.join(recibido), lector,
+                                      time.perf_counter() - inicio)
+    finally:
+        conexion.timeout = timeout_original
+    return Saludo(False, None, ''.join(recibido), lector, time.perf_counter() - inicio)
+
+
+def conectar(puerto, baudios, marcas, timeout_s=4.0, timeout_lectura=1, cancelado=None):
+    """
+    Abre ``puerto`` y espera el saludo del firmware (bloquea; usar desde un hilo)
+
+    Returns:
+        tuple: (conexion, Saludo)
+
+    Raises:
+        TimeoutError: Si no llegó ninguna marca en ``timeout_s`` (el puerto queda cerrado)
+    """
+    conexion = abrir_puerto(puerto, baudios, timeout=timeout_lectura)
+    try:
+        if not es_remoto(puerto):
+            # Lo que quedó en el buffer del sistema es de antes del reinicio
+            conexion.reset_input_buffer()
+        saludo = esperar_listo(conexion, marcas, timeout_s, cancelado)
+    except Exception:
+        conexion.close()
+        raise
+    if not saludo.listo:
+        conexion.close()
+        if cancelado and cancelado():
+            raise TimeoutError("Conexión cancelada")
+        raise TimeoutError(f"El firmware no respondió en {timeout_s:g} s en {puerto}")
+    return conexion, saludo
+
+
+class Conector:
+    """Hilo que ejecuta ``conectar`` y entrega un ``ResultadoConexion``"""
+
+    def __init__(self, puerto, baudios, marcas, al_terminar, timeout_s=4.0, timeout_lectura=1):
+        """
+        Args:
+            puerto (str): Puerto serie o 'tcp://host:puerto'
+            baudios (int): Velocidad
+            marcas (tuple): Ver ``esperar_listo``
+            al_terminar (callable): Recibe el ``ResultadoConexion`` (en el hilo
+                del conector: publicarlo en la ColaUI, no tocar Tk)
+            timeout_s (float): Tiempo máximo para el saludo
+            timeout_lectura (float): ``timeout`` con que queda la conexión
+        """
+        self.puerto = puerto
+        self.baudios = baudios
+        self.marcas = marcas
+        self.al_terminar = al_terminar
+        self.timeout_s = timeout_s
+        self.timeout_lectura = timeout_lectura
+        self.cancelar_evento = threading.Event()
+        self.hilo = threading.Thread(target=self._correr, daemon=True, name="conector")
+
+    def iniciar(self):
+        self.hilo.start()
+        return self
+
+    def cancelar(self):
+        """Abandona la espera; si la conexión ya se abrió, se cierra sin entregarla"""
+        self.cancelar_evento.set()
+
+    def _correr(self):
+        inicio = time.perf_counter()
+        resultado = ResultadoConexion(self.puerto)
+        try:
+            resultado.conexion, resultado.saludo = conectar(
+                self.puerto, self.baudios, self.marcas, self.timeout_s,
+                self.timeout_lectura, self.cancelar_evento.is_set)
+        except Exception as e:
+            resultado.error = e
+        resultado.latencia_s = time.perf_counter() - inicio
+        if self.cancelar_evento.is_set():
+            if resultado.conexion:
+                resultado.conexion.close()
+            return
+        self.al_terminar(resultado)
+
+
+def conectar_en_segundo_plano(puerto, baudios, marcas, al_terminar, timeout_s=4.0,
+                              timeout_lectura=1):
+    """Crea e inicia un ``Conector``; ver su constructor"""
+    return Conector(puerto, baudios, marcas, al_terminar, timeout_s, timeout_lectura).iniciar()
+
+
+def cerrar_en_segundo_plano(conexion, hilo_lector, al_terminar, espera_s=2.0, antes=None):
+    """
+    Cierra la conexión sin bloquear el hilo de Tk
+
+    Interrumpe la lectura en curso (``cancel_read`` de pyserial), espera a
+    que el hilo lector salga de su ciclo (la bandera que lo controla ya debe
+    estar en False) y cierra el puerto.
+
+    Args:
+        conexion: serial.Serial o ConexionRemota (o None)
+        hilo_lector (threading.Thread): Hilo que lee la conexión (o None)
+        al_terminar (callable): Sin argumentos, al final (en el hilo de cierre)
+        espera_s (float): Tiempo máximo de espera del hilo lector
+        antes (callable): Se ejecuta después de detener al lector y antes de cerrar
+            (p. ej. cerrar el canal de comandos)
+    """
+    def cerrar():
+        cancelar_lectura = getattr(conexion, 'cancel_read', None)
+        if cancelar_lectura:
+            try:
+                cancelar_lectura()
+            except Exception:
+                pass
+        if hilo_lector and hilo_lector is not threading.current_thread():
+            hilo_lector.join(espera_s)
+        try:
+            if antes:
+                antes()
+        finally:
+            if conexion:
+                try:
+                    conexion.close()
+                except Exception as e:
+                    print(f"Error cerrando la conexión: {e}")
+            al_terminar()
+
+    hilo = threading.Thread(target=cerrar, daemon=True, name="cierre-conexion")
+    hilo.start()
+    return hilo
@@ -0,0 +1,93 @@
+"""
+Reducción de puntos para graficar sesiones largas
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Con un historial de horas, dibujar cada muestra hace que matplotlib tarde
+en proporción a la duración de la sesión, aunque en pantalla no quepan más
+puntos que píxeles. Estas funciones reducen una serie a un número fijo de
+puntos:
+
+- ``decimar_minmax``: divide la serie en cubetas y conserva el mínimo y el
+  máximo de cada una, en orden temporal. Los picos se conservan exactos;
+  es la que usan las gráficas en vivo.
+- ``lttb``: Largest-Triangle-Three-Buckets, un punto por cubeta elegido
+  por área visual. Da una forma más suave pero recorre las cubetas en un
+  ciclo de Python, así que es más lenta.
+"""
+
+import numpy as np
+
+
+def decimar_minmax(x, y, cubetas):
+    """
+    Conserva el mínimo y el máximo de cada cubeta
+
+    Args:
+        x (numpy.ndarray): Eje X (creciente)
+        y (numpy.ndarray): Valores; los NaN se conservan como huecos
+        cubetas (int): Número de cubetas (el resultado tiene hasta 2 * cubetas puntos)
+
+    Returns:
+        tuple: (x, y) reducidos; si la serie ya es corta se devuelve sin cambios
+    """
+    n = len(y)
+    if cubetas < 1 or n <= 2 * cubetas:
+        return x, y
+
+    por_cubeta = -(-n // cubetas)
+    cubetas = -(-n // por_cubeta)
+    relleno = cubetas * por_cubeta - n
+
+    nulos = np.isnan(y)
+    if nulos.any():
+        para_min = np.where(nulos, np.inf, y)
+        para_max = np.where(nulos, -np.inf, y)
+    else:
+        para_min = para_max = y
+    if relleno:
+        para_min = np.concatenate((para_min, np.full(relleno, np.inf)))
+        para_max = np.concatenate((para_max, np.full(relleno, -np.inf)))
+
+    base = np.arange(cubetas) * por_cubeta
+    i_min = para_min.reshape(cubetas, por_cubeta).argmin(axis=1) + base
+    i_max = para_max.reshape(cubetas, por_cubeta).argmax(axis=1) + base
+
+    indices = np.sort(np.stack((i_min, i_max), axis=1), axis=1).ravel()
+    np.minimum(indices, n - 1, out=indices)
+    return x[indices], y[indices]
+
+
+def lttb(x, y, puntos):
+    """
+    Largest-Triangle-Three-Buckets
+
+    Args:
+        x (numpy.ndarray): Eje X (creciente)
+        y (numpy.ndarray): Valores
+        puntos (int): Número de puntos del resultado (incluye el primero y el último)
+
+    Returns:
+        tuple: (x, y) reducidos; si la serie ya es corta se devuelve sin cambios
+    """
+    n = len(y)
+    if puntos < 3 or n <= puntos:
+        return x, y
+
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(int)
+    indices = np.empty(puntos, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(puntos - 2):
+        ini, fin = bordes[i], bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else n
+        # Vértice C: promedio de la cubeta siguiente
+        cx = x[fin:sig_fin].mean()
+        cy = y[fin:sig_fin].mean()
+        area = np.abs((x[a] - cx) * (y[ini:fin] - y[a]) - (x[a] - x[ini:fin]) * (cy - y[a]))
+        area[np.isnan(area)] = -1.0
+        a = ini + int(area.argmax())
+        indices[i + 1] = a
+    return x[indices], y[indices]
@@ -0,0 +1,229 @@
+"""
+Reglas de disparo evaluadas por trama
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+``segundaley/test.py`` esperaba la temperatura objetivo releyendo
+``float(self.temp1.get())`` (una variable de Tk, desde el hilo lector) en
+cada vuelta del ciclo de lectura. Aquí la condición se compila una vez
+(canal, comparación, umbral) y se evalúa sobre los valores ya tipados de
+cada trama, en el mismo hilo que la recibió:
+
+- Histéresis: una regla que se vuelve a armar sola (``una_vez=False``)
+  solo dispara de nuevo después de que el valor regresó más allá de
+  ``umbral ∓ histeresis``, así que el ruido alrededor del umbral no la
+  dispara varias veces.
+- Antirrebote: la condición debe cumplirse en ``muestras`` tramas
+  seguidas y durante al menos ``sostener_s`` segundos.
+- Latencia: cada disparo registra el tiempo desde la primera trama que
+  cruzó el umbral y desde la trama que completó el antirrebote hasta que
+  la acción (p. ej. escribir ``START\\n``) terminó.
+
+Uso:
+    reglas = MotorReglas()
+    reglas.agregar(Regla('inicio', Condicion('temp1', '>=', 40.0, muestras=2),
+                         lambda disparo: conexion.write(b"START\\n")))
+    reglas.armar('inicio', umbral=45.0)
+    ...
+    for trama in parser.procesar_texto(texto):
+        reglas.evaluar(trama.como_dict(), t_lectura)
+"""
+
+import math
+import operator
+import threading
+import time
+from dataclasses import dataclass
+
+from .acumuladores import TEMPERATURA_INVALIDA, Welford
+
+_OPERADORES = {'>=': operator.ge, '>': operator.gt, '<=': operator.le, '<': operator.lt}
+
+
+@dataclass
+class Condicion:
+    """
+    Umbral sobre un canal de la trama
+
+    Attributes:
+        canal (str): Clave de ``TramaSegundaLey.como_dict()`` (p. ej. 'temp1')
+        operador (str): '>=', '>', '<=' o '<'
+        umbral (float): Valor de comparación
+        histeresis (float): Margen para volver a armar la regla
+        muestras (int): Tramas seguidas que deben cumplir la condición
+        sostener_s (float): Tiempo mínimo que la condición debe mantenerse
+        invalido (float): Valor que se ignora (lectura de un sensor desconectado)
+    """
+    canal: str
+    operador: str
+    umbral: float
+    histeresis: float = 0.0
+    muestras: int = 1
+    sostener_s: float = 0.0
+    invalido: float = TEMPERATURA_INVALIDA
+
+    def compilar(self):
+        """
+        Returns:
+            tuple: (cumple, rearma); funciones de un valor que indican si se
+                cumple la condición y si el valor ya salió de la banda de
+                histéresis
+        """
+        comparar = _OPERADORES[self.operador]
+        umbral = float(self.umbral)
+        if self.operador in ('>=', '>'):
+            rearme = umbral - self.histeresis
+            return (lambda valor: comparar(valor, umbral)), (lambda valor: valor < rearme)
+        rearme = umbral + self.histeresis
+        return (lambda valor: comparar(valor, umbral)), (lambda valor: valor > rearme)
+
+
+@dataclass
+class Disparo:
+    """Datos que recibe la acción de una regla"""
+    regla: str
+    valor: float
+    t_cruce: float    # perf_counter de la primera trama que cumplió la condición
+    t_trama: float    # perf_counter de la trama que completó el antirrebote
+    latencia_s: float = math.nan     # cruce -> fin de la acción
+    despacho_s: float = math.nan     # trama -> fin de la acción
+
+
+class Regla:
+    """Condición compilada más la acción que se ejecuta al cumplirse"""
+
+    def __init__(self, nombre, condicion, accion, una_vez=True, armada=False):
+        """
+        Args:
+            nombre (str): Identificador para armar/desarmar
+            condicion (Condicion): Condición a evaluar
+            accion (callable): Recibe un ``Disparo``; corre en el hilo lector
+            una_vez (bool): Desarmarse después de disparar (si no, se rearma
+                al salir de la banda de histéresis)
+            armada (bool): Estado inicial
+        """
+        self.nombre = nombre
+        self.accion = accion
+        self.una_vez = una_vez
+        self.armada = armada
+        self.disparos = 0
+        self.latencias = Welford()
+        self.ultimo = None
+        self.configurar(condicion)
+
+    def configurar(self, condicion):
+        self.condicion = condicion
+        self.cumple, self.rearma = condicion.compilar()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.seguidas = 0
+        self.t_cruce = None
+        self.esperando_rearme = False
+
+    def evaluar(self, valor, t):
+        """Devuelve un ``Disparo`` si la regla debe ejecutarse con esta trama"""
+        if self.esperando_rearme:
+            if self.rearma(valor):
+                self.esperando_rearme = False
+            return None
+        if not self.cumple(valor):
+            self.seguidas = 0
+            self.t_cruce = None
+            return None
+        if self.t_cruce is None:
+            self.t_cruce = t
+        self.seguidas += 1
+        condicion = self.condicion
+        if self.seguidas < condicion.muestras or t - self.t_cruce < condicion.sostener_s:
+            return None
+        disparo = Disparo(self.nombre, valor, self.t_cruce, t)
+        if self.una_vez:
+            self.armada = False
+        self.reiniciar()
+        self.esperando_rearme = not self.una_vez
+        return disparo
+
+
+class MotorReglas:
+    """
+    Conjunto de reglas indexadas por canal.
+
+    ``evaluar`` se llama desde el hilo lector una vez por trama; ``armar`` y
+    ``desarmar`` desde la interfaz.
+    """
+
+    def __init__(self):
+        self.reglas = {}
+        self.por_canal = {}
+        self.candado = threading.Lock()
+
+    def agregar(self, regla):
+        with self.candado:
+            self.reglas[regla.nombre] = regla
+            self._indexar()
+
+    def _indexar(self):
+        self.por_canal = {}
+        for regla in self.reglas.values():
+            self.por_canal.setdefault(regla.condicion.canal, []).append(regla)
+
+    def armar(self, nombre, **cambios):
+        """
+        Arma una regla, opcionalmente con otra condición
+
+        Args:
+            nombre (str): Regla a armar
+            **cambios: Campos de ``Condicion`` a reemplazar (p. ej. ``umbral=45.0``)
+        """
+        with self.candado:
+            regla = self.reglas[nombre]
+            if cambios:
+                actual = regla.condicion
+                regla.configurar(Condicion(**dict(vars(actual), **cambios)))
+                self._indexar()
+            else:
+                regla.reiniciar()
+            regla.armada = True
+
+    def desarmar(self, nombre):
+        with self.candado:
+            self.reglas[nombre].armada = False
+
+    def evaluar(self, datos, t=None):
+        """
+        Evalúa las reglas armadas de los canales presentes en ``datos``
+
+        Args:
+            datos (dict): Trama tipada (``TramaSegundaLey.como_dict()``)
+            t (float): ``time.perf_counter()`` de la recepción (por defecto, ahora)
+
+        Returns:
+            list: Disparos ejecutados con esta trama
+        """
+        t = time.perf_counter() if t is None else t
+        pendientes = []
+        with self.candado:
+            for canal, reglas in self.por_canal.items():
+                valor = datos.get(canal)
+                if not isinstance(valor, (int, float)) or valor != valor:
+                    continue
+                for regla in reglas:
+                    if not regla.armada or valor == regla.condicion.invalido:
+                        continue
+                    disparo = regla.evaluar(valor, t)
+                    if disparo:
+                        pendientes.append((regla, disparo))
+        # Las acciones corren fuera del candado: pueden armar o desarmar reglas
+        for regla, disparo in pendientes:
+            try:
+                regla.accion(disparo)
+            except Exception as e:
+                print(f"Error en la acción de la regla {regla.nombre}: {e}")
+            fin = time.perf_counter()
+            disparo.latencia_s = fin - disparo.t_cruce
+            disparo.despacho_s = fin - disparo.t_trama
+            regla.disparos += 1
+            regla.latencias.agregar(disparo.despacho_s)
+            regla.ultimo = disparo
+        return [disparo for _, disparo in pendientes]
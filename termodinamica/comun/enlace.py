@@ -0,0 +1,214 @@
+"""
+Enlace con el Arduino que se reconecta solo
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Si se desconectaba el USB, ``leer_datos`` de segundaley registraba
+``ERROR LECTURA`` cada 0.1 s para siempre y ``MotorControlGUI.read_serial``
+dejaba de leer sin avisar: una corrida nocturna terminaba con el primer
+tirón del cable.
+
+``EnlaceSupervisado`` envuelve la conexión abierta por ``comun/conexion.py``
+y se usa igual que ella (``write``, ``close``, ``cancel_read``,
+``is_open``), más los métodos de ``LectorLineas`` para el hilo lector:
+
+- Una excepción del puerto, o ``silencio_max_s`` sin recibir nada, cuenta
+  como enlace perdido: se cierra la conexión y se llama ``al_perder``.
+- El hilo lector se queda dentro de ``leer_*`` reintentando ``conectar``
+  (apertura + saludo del firmware) con espera creciente de
+  ``espera_inicial_s`` a ``espera_max_s``, hasta lograrlo o hasta que
+  ``activo()`` sea False.
+- Al reconectar se llama ``al_restablecer`` con la duración del hueco y la
+  lectura sigue con el texto del saludo, sin cerrar la sesión de registro.
+
+Al abrir el puerto el Arduino se reinicia: los setpoints y el estado del
+firmware se pierden, así que ``al_restablecer`` es el lugar para reenviarlos.
+
+Uso (en el hilo lector):
+    enlace = EnlaceSupervisado(puerto, 115200, MARCAS_SEGUNDA_LEY, conexion, saludo,
+                               activo=lambda: self.is_monitoring,
+                               al_perder=self.enlace_perdido,
+                               al_restablecer=self.enlace_restablecido)
+    while self.is_monitoring:
+        texto = enlace.leer_texto()
+"""
+
+import threading
+import time
+
+import serial
+
+from .conexion import conectar
+from .serie import LectorLineas
+
+
+class EnlaceSupervisado:
+    """Conexión con reconexión automática; ver el docstring del módulo"""
+
+    def __init__(self, puerto, baudios, marcas, conexion, saludo=None, activo=None,
+                 al_perder=None, al_restablecer=None, silencio_max_s=None,
+                 espera_inicial_s=0.5, espera_max_s=30.0, timeout_saludo_s=4.0,
+                 timeout_lectura=1):
+        """
+        Args:
+            puerto (str): Puerto con que se abrió ``conexion`` (se reabre el mismo)
+            baudios (int): Velocidad
+            marcas (tuple): Marcas de firmware listo (ver ``conexion.esperar_listo``)
+            conexion: Conexión ya abierta
+            saludo (Saludo): Lo recibido al conectar; se entrega primero
+            activo (callable): Mientras devuelva True se sigue reintentando
+                (por defecto, hasta ``close``)
+            al_perder (callable): ``al_perder(motivo)`` al detectar la caída
+            al_restablecer (callable): ``al_restablecer(duracion_s, intentos)``
+                ya con la conexión nueva (ambas corren en el hilo lector)
+            silencio_max_s (float): Sin datos durante este tiempo se da el
+                enlace por perdido (None = solo por error del puerto)
+            espera_inicial_s (float): Espera antes del primer reintento
+            espera_max_s (float): Tope de la espera entre reintentos
+            timeout_saludo_s (float): Timeout del saludo de cada reintento
+            timeout_lectura (float): ``timeout`` de las conexiones nuevas
+        """
+        self.puerto = puerto
+        self.baudios = baudios
+        self.marcas = marcas
+        self.conexion = conexion
+        self.activo = activo
+        self.al_perder = al_perder
+        self.al_restablecer = al_restablecer
+        self.silencio_max_s = silencio_max_s
+        self.espera_inicial_s = espera_inicial_s
+        self.espera_max_s = espera_max_s
+        self.timeout_saludo_s = timeout_saludo_s
+        self.timeout_lectura = timeout_lectura
+
+        self.lector = LectorLineas(conexion)
+        self.pendiente = b''
+        if saludo:
+            self._tomar_saludo(saludo)
+        self.conectado = True
+        self.cerrado = False
+        self.despertar = threading.Event()
+        self.ultimo_dato = time.monotonic()
+
+        # Contabilidad de huecos
+        self.caidas = 0
+        self.reintentos = 0
+        self.tiempo_sin_enlace_s = 0.0
+
+    def _tomar_saludo(self, saludo):
+        """El texto del saludo (y su línea a medias) se entrega antes que lo nuevo"""
+        self.pendiente = saludo.texto.encode('utf-8') + bytes(saludo.lector.pendiente)
+
+    def _sigue_activo(self):
+        return not self.cerrado and (self.activo is None or self.activo())
+
+    # ---------- Lectura (hilo lector) ----------
+
+    def leer_bytes(self):
+        """Como ``LectorLineas.leer_bytes``; si el enlace se cae, reconecta antes de regresar"""
+        if self.pendiente:
+            datos, self.pendiente = self.pendiente, b''
+            return datos
+        try:
+            datos = self.lector.leer_bytes()
+        except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+            # TypeError/AttributeError: pyserial con el descriptor ya cerrado
+            if not self._sigue_activo():
+                return b''
+            self._reconectar(e)
+            return self.leer_bytes() if self.pendiente else b''
+        ahora = time.monotonic()
+        if datos:
+            self.ultimo_dato = ahora
+        elif self.silencio_max_s and ahora - self.ultimo_dato > self.silencio_max_s:
+            if self._sigue_activo():
+                self._reconectar(f"sin datos durante {self.silencio_max_s:g} s")
+                return self.leer_bytes() if self.pendiente else b''
+        return datos
+
+    def leer_texto(self):
+        """Como ``LectorLineas.leer_texto``"""
+        return self.lector.procesar_bytes(self.leer_bytes())
+
+    def leer_lineas(self):
+        """Como ``LectorLineas.leer_lineas``"""
+        texto = self.leer_texto()
+        if not texto:
+            return []
+        lineas = texto.split('\n')
+        if not lineas[-1]:
+            lineas.pop()
+        return [linea.strip() for linea in lineas]
+
+    def _reconectar(self, motivo):
+        self.conectado = False
+        self.caidas += 1
+        inicio = time.monotonic()
+        try:
+            self.conexion.close()
+        except Exception:
+            pass
+        print(f"Enlace perdido en {self.puerto}: {motivo}")
+        if self.al_perder:
+            self.al_perder(motivo)
+
+        espera = self.espera_inicial_s
+        intentos = 0
+        while self._sigue_activo():
+            self.despertar.wait(espera)
+            if not self._sigue_activo():
+                break
+            intentos += 1
+            self.reintentos += 1
+            try:
+                conexion, saludo = conectar(self.puerto, self.baudios, self.marcas,
+                                            self.timeout_saludo_s, self.timeout_lectura,
+                                            cancelado=lambda: not self._sigue_activo())
+            except Exception as e:
+                print(f"Reintento {intentos} en {self.puerto}: {e}")
+                espera = min(espera * 2, self.espera_max_s)
+                continue
+            if not self._sigue_activo():
+                conexion.close()
+                break
+            duracion = time.monotonic() - inicio
+            self.tiempo_sin_enlace_s += duracion
+            self.conexion = conexion
+            self.lector.conexion = conexion
+            self.lector.reiniciar()
+            self._tomar_saludo(saludo)
+            self.ultimo_dato = time.monotonic()
+            self.conectado = True
+            print(f"Enlace restablecido en {self.puerto} tras {duracion:.1f} s "
+                  f"({intentos} intento(s))")
+            if self.al_restablecer:
+                self.al_restablecer(duracion, intentos)
+            return
+        self.tiempo_sin_enlace_s += time.monotonic() - inicio
+
+    # ---------- Interfaz de serial.Serial (cualquier hilo) ----------
+
+    @property
+    def is_open(self):
+        return self.conectado and not self.cerrado
+
+    def write(self, datos):
+        """Escribe en la conexión actual (falla mientras el enlace está caído)"""
+        if not self.conectado:
+            raise serial.SerialException(f"Sin enlace con {self.puerto}")
+        return self.conexion.write(datos)
+
+    def cancel_read(self):
+        """Interrumpe la lectura o la espera entre reintentos"""
+        self.despertar.set()
+        cancelar = getattr(self.conexion, 'cancel_read', None)
+        if cancelar:
+            try:
+                cancelar()
+            except Exception:
+                pass
+
+    def close(self):
+        self.cerrado = True
+        self.despertar.set()
+        self.conexion.close()
@@ -0,0 +1,257 @@
+"""
+Escritura de archivos de registro en un hilo dedicado
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Las interfaces llamaban ``flush()`` después de cada fila del CSV y de cada
+evento del log, desde el mismo hilo que lee el puerto serie. En discos
+lentos eso detiene la lectura. Aquí el hilo lector solo encola el registro;
+un hilo escritor los toma en lotes, los escribe y hace ``flush`` según la
+``PoliticaEscritura`` (por número de filas o por tiempo). En modo
+``durable`` además llama ``os.fsync`` cada cierto intervalo.
+
+Al cerrar el escritor se vacía la cola completa antes de cerrar el archivo,
+así que ninguna fila encolada antes de ``cerrar()`` se pierde.
+
+Con ``puntos_control`` cada bloque bajado a disco queda registrado en
+``<archivo>.idx`` (tamaño acumulado, registros y CRC32 del bloque) y al
+cerrar se agrega una línea ``cierre``. Un archivo cuyo índice no termina en
+``cierre`` quedó interrumpido; comun/recuperacion.py lo verifica y repara.
+"""
+
+import csv
+import io
+import os
+import queue
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+
+_FIN = object()
+
+
+@dataclass
+class PoliticaEscritura:
+    """
+    Cuándo bajar a disco lo escrito
+
+    Attributes:
+        filas (int): Hacer flush al acumular este número de registros (0 = solo
+            por tiempo)
+        intervalo_s (float): Hacer flush si pasó este tiempo desde el último
+        durable (bool): Si True, además llama os.fsync()
+        intervalo_fsync_s (float): Tiempo mínimo entre dos fsync en modo durable
+        puntos_control (bool): Registrar cada bloque bajado a disco (tras el
+            fsync en modo durable) en ``<archivo>.idx`` con su CRC32
+    """
+    filas: int = 50
+    intervalo_s: float = 1.0
+    durable: bool = False
+    intervalo_fsync_s: float = 5.0
+    puntos_control: bool = False
+
+    @classmethod
+    def con_puntos_control(cls, segundos=2.0):
+        """
+        Flush, fsync y punto de control cada ``segundos`` en lugar de por filas
+
+        Si el programa o el equipo se caen, se pierden como máximo los últimos
+        ``segundos`` de datos y el índice indica hasta dónde el archivo es válido.
+        """
+        return cls(filas=0, intervalo_s=segundos, durable=True, intervalo_fsync_s=segundos,
+                   puntos_control=True)
+
+
+class EscritorAsincrono:
+    """Base de los escritores: cola, hilo escritor y política de flush/fsync"""
+
+    def __init__(self, ruta, politica=None, encoding=None):
+        """
+        Args:
+            ruta (str): Archivo a crear (se sobrescribe si existe)
+            politica (PoliticaEscritura): Política de flush; por defecto PoliticaEscritura()
+            encoding (str): Codificación del archivo (None = la del sistema, como open())
+        """
+        self.ruta = ruta
+        self.politica = politica or PoliticaEscritura()
+        self.archivo = open(ruta, 'w', newline='', encoding=encoding)
+        self.cola = queue.Queue()
+        self.cerrado = False
+        # Ningún registro entra a la cola después de _FIN
+        self.candado = threading.Lock()
+        self.escritos = 0
+        self.tamano = 0  # caracteres escritos (≈ bytes en ASCII), para rotar por tamaño
+        self.error = None
+
+        # Índice de puntos de control: bytes y registros totales, CRC del bloque en curso
+        self.indice = None
+        if self.politica.puntos_control:
+            self.indice = open(ruta + '.idx', 'w', encoding='ascii')
+        self.bytes_totales = 0
+        self.registros_totales = 0
+        self.crc_bloque = 0
+        self.bytes_bloque = 0
+
+        self._preparar_archivo()
+
+        self.hilo = threading.Thread(target=self._ciclo, daemon=True,
+                                     name=f"escritor-{os.path.basename(ruta)}")
+        self.hilo.start()
+
+    def escribir(self, registro):
+        """
+        Encola un registro sin bloquear al llamador
+
+        Returns:
+            bool: False si el escritor ya fue cerrado (el registro se descarta)
+        """
+        with self.candado:
+            if self.cerrado:
+                return False
+            self.cola.put(registro)
+        return True
+
+    def cerrar(self, timeout=None):
+        """Escribe todo lo pendiente, baja a disco y cierra el archivo"""
+        with self.candado:
+            if self.cerrado:
+                return
+            self.cerrado = True
+            self.cola.put(_FIN)
+        self.hilo.join(timeout)
+
+    def _preparar_archivo(self):
+        """Se ejecuta antes de arrancar el hilo (p. ej. para escribir encabezados)"""
+
+    def _escribir_lote(self, lote):
+        raise NotImplementedError
+
+    def _volcar(self, texto, registros):
+        """Escribe ``texto`` (``registros`` registros) y lo suma al bloque en curso"""
+        self.archivo.write(texto)
+        self.tamano += len(texto)
+        if self.indice:
+            datos = texto.encode(self.archivo.encoding)
+            self.crc_bloque = zlib.crc32(datos, self.crc_bloque)
+            self.bytes_bloque += len(datos)
+            self.registros_totales += registros
+
+    def _punto_control(self, cierre=False):
+        """Agrega al índice el bloque ya bajado a disco (y la línea de cierre)"""
+        if not self.indice:
+            return
+        lineas = ''
+        if self.bytes_bloque:
+            self.bytes_totales += self.bytes_bloque
+            lineas += (f"{self.bytes_totales},{self.registros_totales},"
+                       f"{self.crc_bloque:08x},{time.time():.3f}\n")
+            self.crc_bloque = 0
+            self.bytes_bloque = 0
+        if cierre:
+            lineas += f"cierre,{self.bytes_totales},{self.registros_totales},{time.time():.3f}\n"
+        if lineas:
+            self.indice.write(lineas)
+            self.indice.flush()
+            if self.politica.durable:
+                os.fsync(self.indice.fileno())
+
+    def _ciclo(self):
+        politica = self.politica
+        pendientes = 0
+        sin_fsync = False
+        ultimo_flush = ultimo_fsync = time.monotonic()
+        terminar = False
+
+        while not terminar:
+            # Esperar lo justo para cumplir el siguiente flush/fsync por tiempo
+            plazos = []
+            if pendientes:
+                plazos.append(ultimo_flush + politica.intervalo_s)
+            if sin_fsync:
+                plazos.append(ultimo_fsync + politica.intervalo_fsync_s)
+            espera = max(0.0, min(plazos) - time.monotonic()) if plazos else None
+
+            lote = []
+            try:
+                registro = self.cola.get(timeout=espera)
+                while True:
+                    if registro is _FIN:
+                        terminar = True
+                        break
+                    lote.append(registro)
+                    registro = self.cola.get_nowait()
+            except queue.Empty:
+                pass
+
+            if lote:
+                try:
+                    self._escribir_lote(lote)
+                    self.escritos += len(lote)
+                except Exception as e:
+                    self._reportar(e)
+                pendientes += len(lote)
+
+            ahora = time.monotonic()
+            try:
+                if pendientes and (terminar or (politica.filas and pendientes >= politica.filas)
+                                   or ahora - ultimo_flush >= politica.intervalo_s):
+                    self.archivo.flush()
+                    pendientes = 0
+                    ultimo_flush = ahora
+                    sin_fsync = politica.durable
+                    if not politica.durable:
+                        self._punto_control()
+                if sin_fsync and (terminar or ahora - ultimo_fsync >= politica.intervalo_fsync_s):
+                    os.fsync(self.archivo.fileno())
+                    sin_fsync = False
+                    ultimo_fsync = ahora
+                    self._punto_control()
+            except Exception as e:
+                self._reportar(e)
+
+        try:
+            self._punto_control(cierre=True)
+            self.archivo.close()
+            if self.indice:
+                self.indice.close()
+        except Exception as e:
+            self._reportar(e)
+
+    def _reportar(self, error):
+        self.error = error
+        print(f"Error escribiendo {self.ruta}: {error}")
+
+
+class EscritorCSV(EscritorAsincrono):
+    """Escritor de filas CSV; ``escribir`` recibe una lista de valores"""
+
+    def __init__(self, ruta, encabezados=(), politica=None, encoding=None):
+        """
+        Args:
+            ruta (str): Archivo CSV a crear
+            encabezados (list): Filas a escribir al inicio (lista de listas)
+            politica (PoliticaEscritura): Política de flush
+        """
+        self.encabezados = list(encabezados)
+        super().__init__(ruta, politica, encoding)
+
+    def _preparar_archivo(self):
+        # El lote se arma en memoria y se escribe de una vez para llevar la cuenta
+        # del tamaño sin llamar tell() (que forzaría un flush en cada lote)
+        self.buffer = io.StringIO()
+        self.escritor_csv = csv.writer(self.buffer)
+        self._escribir_lote(self.encabezados)
+
+    def _escribir_lote(self, lote):
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.escritor_csv.writerows(lote)
+        self._volcar(self.buffer.getvalue(), len(lote))
+
+
+class EscritorTexto(EscritorAsincrono):
+    """Escritor de líneas de texto; ``escribir`` recibe la cadena con su salto de línea"""
+
+    def _escribir_lote(self, lote):
+        self._volcar(''.join(lote), len(lote))
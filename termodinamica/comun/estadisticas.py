@@ -0,0 +1,211 @@
+"""
+Estadística descriptiva vectorizada con caché por contenido de archivo
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+``describir`` calcula de una vez, para todas las columnas de una matriz,
+lo que pide el análisis del examen (examen/README.md, paso 1.2): número de
+muestras, valores inicial y final, mínimo, máximo, rango, media,
+desviación estándar, varianza, coeficiente de variación y cuantiles. Las
+columnas se ordenan una sola vez (mínimo, máximo y cuantiles salen del
+arreglo ordenado) y media y varianza salen de una suma y una suma de
+cuadrados, en lugar de una llamada de pandas por estadístico.
+
+``CacheEstadisticas`` guarda resultados por archivo y huella de su
+contenido: si el CSV cambia, cambia la huella y el resultado anterior deja
+de usarse. La ruta forma parte de la clave porque algunos resultados la
+incluyen (p. ej. la columna ``Archivo`` del resumen). Para no leer el
+archivo en cada consulta, la huella se recalcula solo cuando cambia su
+tamaño o fecha de modificación.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def describir(matriz, nombres, cuantiles=CUANTILES):
+    """
+    Estadísticos de cada columna de ``matriz`` en una pasada vectorizada
+
+    Los NaN (lecturas ERROR del sensor) se ignoran columna por columna.
+    Desviación estándar y varianza son muestrales (ddof=1), como en pandas.
+
+    Args:
+        matriz (array): Arreglo (n_muestras, n_columnas) convertible a float
+        nombres (sequence): Nombre de cada columna
+        cuantiles (sequence): Cuantiles a calcular, entre 0 y 1
+
+    Returns:
+        dict: ``{nombre: {'n', 'inicial', 'final', 'min', 'max', 'rango',
+            'media', 'std', 'varianza', 'cv', 'q05', 'q25', ...}}``; los
+            estadísticos de una columna sin datos son NaN
+    """
+    datos = np.asarray(matriz, dtype=float)
+    if datos.ndim == 1:
+        datos = datos[:, None]
+    validos = ~np.isnan(datos)
+    n = validos.sum(axis=0)
+    columnas = np.arange(datos.shape[1])
+
+    # np.sort deja los NaN al final: las primeras n[j] filas son los datos válidos
+    ordenados = np.sort(datos, axis=0)
+    ultimo = np.maximum(n - 1, 0)
+    minimo = ordenados[0]
+    maximo = ordenados[ultimo, columnas]
+
+    # Sumas sobre los datos desplazados al mínimo: evita perder precisión
+    # en la varianza cuando la dispersión es pequeña frente a la media
+    desplazados = np.where(validos, datos - minimo, 0.0)
+    suma = desplazados.sum(axis=0)
+    suma_cuadrados = np.einsum('ij,ij->j', desplazados, desplazados)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_desplazada = suma / n
+        media = minimo + media_desplazada
+        varianza = np.maximum(suma_cuadrados - n * media_desplazada ** 2, 0.0) / (n - 1)
+        desviacion = np.sqrt(varianza)
+        cv = desviacion / np.abs(media) * 100.0
+
+    # Cuantiles con interpolación lineal (method='linear' de NumPy)
+    posiciones = np.outer(cuantiles, ultimo)
+    abajo = np.floor(posiciones).astype(int)
+    arriba = np.minimum(abajo + 1, ultimo)
+    fraccion = posiciones - abajo
+    valores_cuantiles = (ordenados[abajo, columnas] * (1.0 - fraccion)
+                         + ordenados[arriba, columnas] * fraccion)
+
+    # Primer y último valor válido de cada columna
+    primero = validos.argmax(axis=0)
+    final = datos.shape[0] - 1 - validos[::-1].argmax(axis=0)
+
+    resultado = {}
+    for j, nombre in enumerate(nombres):
+        if not n[j]:
+            vacio = dict.fromkeys(('inicial', 'final', 'min', 'max', 'rango', 'media', 'std',
+                                   'varianza', 'cv'), np.nan)
+            vacio.update({f"q{round(q * 100):02d}": np.nan for q in cuantiles}, n=0)
+            resultado[nombre] = vacio
+            continue
+        estadisticas = {
+            'n': int(n[j]),
+            'inicial': float(datos[primero[j], j]),
+            'final': float(datos[final[j], j]),
+            'min': float(minimo[j]),
+            'max': float(maximo[j]),
+            'rango': float(maximo[j] - minimo[j]),
+            'media': float(media[j]),
+            'std': float(desviacion[j]),
+            'varianza': float(varianza[j]),
+            'cv': float(cv[j]),
+        }
+        for i, q in enumerate(cuantiles):
+            estadisticas[f"q{round(q * 100):02d}"] = float(valores_cuantiles[i, j])
+        resultado[nombre] = estadisticas
+    return resultado
+
+
+class CacheEstadisticas:
+    """
+    Resultados memorizados por ruta y huella de contenido de archivo.
+
+    Uso:
+        stats = CACHE.obtener(ruta, 'estadisticas', lambda: describir(...))
+    """
+
+    def __init__(self, maximo=8192):
+        """
+        Args:
+            maximo (int): Entradas guardadas (se descartan las menos usadas)
+        """
+        self.maximo = maximo
+        self.resultados = OrderedDict()
+        self.huellas = {}
+        self.candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def huella(self, ruta):
+        """
+        Hash BLAKE2b del contenido de ``ruta``
+
+        Se reutiliza mientras tamaño y fecha de modificación no cambien.
+        """
+        estado = os.stat(ruta)
+        clave = os.path.abspath(ruta)
+        firma = (estado.st_size, estado.st_mtime_ns)
+        with self.candado:
+            anterior = self.huellas.get(clave)
+        if anterior and anterior[0] == firma:
+            return anterior[1]
+        digesto = hashlib.blake2b(digest_size=16)
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                digesto.update(bloque)
+        huella = digesto.hexdigest()
+        with self.candado:
+            self.huellas[clave] = (firma, huella)
+        return huella
+
+    def _clave(self, ruta, tipo, huella=None):
+        return (os.path.abspath(ruta), huella or self.huella(ruta), tipo)
+
+    def buscar(self, ruta, tipo):
+        """Resultado guardado para el contenido actual de ``ruta`` o None"""
+        clave = self._clave(ruta, tipo)
+        with self.candado:
+            if clave in self.resultados:
+                self.resultados.move_to_end(clave)
+                self.aciertos += 1
+                return self.resultados[clave]
+            self.fallos += 1
+        return None
+
+    def guardar(self, ruta, tipo, resultado, huella=None):
+        """
+        Args:
+            huella (str): Huella con la que se calculó el resultado; si se
+                omite se usa la del contenido actual del archivo
+        """
+        clave = self._clave(ruta, tipo, huella)
+        with self.candado:
+            self.resultados[clave] = resultado
+            self.resultados.move_to_end(clave)
+            while len(self.resultados) > self.maximo:
+                self.resultados.popitem(last=False)
+
+    def obtener(self, ruta, tipo, calcular, huella=None):
+        """
+        Devuelve el resultado guardado o lo calcula con ``calcular()``
+
+        Args:
+            ruta (str): Archivo del que dependen los datos
+            tipo (str): Nombre del resultado (varios por archivo)
+            calcular (callable): Se llama sin argumentos si no hay resultado
+            huella (str): Huella del contenido con que se leyeron los datos
+                (para no mezclar datos viejos con un archivo ya modificado)
+        """
+        huella = huella or self.huella(ruta)
+        clave = self._clave(ruta, tipo, huella)
+        with self.candado:
+            if clave in self.resultados:
+                self.resultados.move_to_end(clave)
+                self.aciertos += 1
+                return self.resultados[clave]
+            self.fallos += 1
+        resultado = calcular()
+        self.guardar(ruta, tipo, resultado, huella)
+        return resultado
+
+    def limpiar(self):
+        with self.candado:
+            self.resultados.clear()
+            self.huellas.clear()
+
+
+# Caché compartido del proceso
+CACHE = CacheEstadisticas()
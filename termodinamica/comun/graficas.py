@@ -0,0 +1,162 @@
+"""
+Gráficas en tiempo real con líneas persistentes y blitting
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Antes, cada refresco de ``actualizar_graficas`` borraba los ejes, volvía a
+crear títulos, rejilla, leyenda y líneas, llamaba ``tight_layout`` y
+redibujaba la figura completa. ``GraficaBlit`` crea las líneas una sola vez
+(``animated=True``) y en cada refresco solo cambia sus datos con
+``set_data``: restaura el fondo guardado (ejes, textos, leyenda), dibuja
+las líneas encima y copia a pantalla únicamente el área de los ejes.
+
+La figura completa solo se vuelve a dibujar cuando los datos salen de los
+límites actuales (o quedan muy por dentro de ellos); los límites se amplían
+con un margen para que eso ocurra pocas veces.
+
+Antes de dibujar, cada serie se reduce a un número fijo de puntos por
+píxel de ancho de los ejes (ver comun/decimacion.py), así que el costo de
+un refresco no crece con la duración de la sesión.
+"""
+
+import numpy as np
+
+from .decimacion import decimar_minmax, lttb
+
+
+class GraficaBlit:
+    """
+    Actualiza las líneas de una figura sin redibujarla completa.
+
+    Uso:
+        grafica = GraficaBlit(canvas)
+        grafica.agregar_serie('temp1', ax1, 'r-', label='T1', linewidth=2)
+        ax1.legend(...)
+        ...
+        grafica.actualizar(tiempos, {'temp1': valores})
+    """
+
+    def __init__(self, canvas, margen=0.1, ocupacion_minima=0.3,
+                 decimacion='minmax', puntos_por_pixel=2.0):
+        """
+        Args:
+            canvas: Canvas de matplotlib (FigureCanvasTkAgg, FigureCanvasAgg, ...)
+            margen (float): Fracción del rango de datos que se deja libre al
+                recalcular límites
+            ocupacion_minima (float): Si los datos ocupan menos de esta fracción
+                del eje Y, los límites se ajustan de nuevo
+            decimacion (str): 'minmax' (conserva picos), 'lttb' o None para
+                dibujar todas las muestras
+            puntos_por_pixel (float): Presupuesto de puntos por píxel de ancho
+                de los ejes para cada serie
+        """
+        self.canvas = canvas
+        self.fig = canvas.figure
+        self.margen = margen
+        self.ocupacion_minima = ocupacion_minima
+        self.decimacion = decimacion
+        self.puntos_por_pixel = puntos_por_pixel
+        self.series = {}
+        self.ejes = []
+        self.fondo = None
+        self.redibujados = 0
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def agregar_serie(self, nombre, ax, estilo='-', **kwargs):
+        """
+        Crea la línea de una serie (vacía) en los ejes indicados
+
+        Args:
+            nombre (str): Clave con la que se pasan los datos a ``actualizar``
+            ax: Ejes de matplotlib
+            estilo (str): Formato de ``ax.plot`` (p. ej. 'r-')
+            **kwargs: Argumentos de ``ax.plot`` (label, linewidth, ...)
+
+        Returns:
+            Line2D: La línea creada
+        """
+        linea, = ax.plot([], [], estilo, animated=True, **kwargs)
+        self.series[nombre] = linea
+        if ax not in self.ejes:
+            self.ejes.append(ax)
+        return linea
+
+    def actualizar(self, x, valores):
+        """
+        Cambia los datos de las series y refresca la figura
+
+        Args:
+            x (sequence): Eje X común (p. ej. tiempo relativo en s)
+            valores (dict): nombre de serie -> secuencia de valores Y; si una
+                serie es más corta o más larga que ``x`` se alinean los
+                últimos puntos de ambas. Las claves que no son series se ignoran
+        """
+        x = np.asarray(x, dtype=float)
+        for nombre, linea in self.series.items():
+            if nombre not in valores:
+                continue
+            y = np.asarray(valores[nombre], dtype=float)
+            n = min(len(x), len(y))
+            linea.set_data(*self._decimar(linea.axes, x[len(x) - n:], y[len(y) - n:]))
+
+        if self._ajustar_limites() or self.fondo is None:
+            # Cambió la escala: ejes, marcas y leyenda se dibujan de nuevo y
+            # _al_dibujar guarda el nuevo fondo
+            self.redibujados += 1
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.fondo)
+        self._dibujar_lineas()
+        for ax in self.ejes:
+            self.canvas.blit(ax.bbox)
+
+    def _decimar(self, ax, x, y):
+        """Reduce la serie al presupuesto de puntos según el ancho actual de los ejes"""
+        presupuesto = int(ax.bbox.width * self.puntos_por_pixel)
+        if self.decimacion == 'minmax':
+            return decimar_minmax(x, y, presupuesto // 2)
+        if self.decimacion == 'lttb':
+            return lttb(x, y, presupuesto)
+        return x, y
+
+    def _ajustar_limites(self):
+        """Recalcula los límites de los ejes cuyos datos ya no caben; True si cambió alguno"""
+        cambio = False
+        for ax in self.ejes:
+            xs, ys = [], []
+            for linea in ax.get_lines():
+                if linea.get_animated() and len(linea.get_xdata()):
+                    xs.append(linea.get_xdata())
+                    ys.append(linea.get_ydata())
+            if not xs:
+                continue
+            xs = np.concatenate(xs)
+            ys = np.concatenate(ys)
+            ys = ys[np.isfinite(ys)]
+            if not len(ys):
+                continue
+
+            x_min, x_max = xs.min(), xs.max()
+            x0, x1 = ax.get_xlim()
+            if x_min < x0 or x_max > x1:
+                ancho = max(x_max - x_min, 1.0)
+                ax.set_xlim(x_min, x_max + ancho * self.margen)
+                cambio = True
+
+            y_min, y_max = ys.min(), ys.max()
+            y0, y1 = ax.get_ylim()
+            rango = max(y_max - y_min, 1e-3)
+            if y_min < y0 or y_max > y1 or rango < self.ocupacion_minima * (y1 - y0):
+                ax.set_ylim(y_min - rango * self.margen, y_max + rango * self.margen)
+                cambio = True
+        return cambio
+
+    def _al_dibujar(self, evento):
+        """Después de cada dibujo completo (incluye cambios de tamaño de la ventana)"""
+        self.fondo = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._dibujar_lineas()
+
+    def _dibujar_lineas(self):
+        for linea in self.series.values():
+            linea.axes.draw_artist(linea)
@@ -0,0 +1,111 @@
+"""
+Historial circular de muestras sobre arreglos de NumPy
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Reemplaza a los ``deque(maxlen=50)`` de las interfaces. Cada muestra se
+guarda en dos posiciones de un arreglo del doble de la capacidad (``i`` e
+``i + capacidad``), de modo que las últimas ``n`` muestras siempre quedan
+contiguas en memoria: ``vista()`` devuelve una rebanada del arreglo sin
+copiar nada, y ``agregar()`` cuesta lo mismo con 50 muestras que con horas
+de datos.
+
+Las vistas son el arreglo interno, así que ``agregar`` y ``vista`` deben
+llamarse desde el mismo hilo: en las interfaces, el hilo lector publica
+las muestras en ``ColaUI`` (comun/cola_ui.py) y el hilo de Tk las agrega
+antes de graficar.
+"""
+
+import math
+
+import numpy as np
+
+
+class HistorialCircular:
+    """
+    Historial de tamaño fijo con varios canales alineados (una fila por trama).
+
+    Uso:
+        historial = HistorialCircular.por_duracion(('tiempo', 'temp1'), horas=6, periodo_s=0.5)
+        historial.agregar({'tiempo': time.time(), 'temp1': 25.3})
+        t = historial.vista('tiempo')     # vista de NumPy, sin copia
+    """
+
+    def __init__(self, canales, capacidad):
+        """
+        Args:
+            canales (tuple): Nombres de los canales (p. ej. 'tiempo', 'temp1', ...)
+            capacidad (int): Número máximo de muestras que se conservan
+        """
+        self.canales = tuple(canales)
+        self.indices = {c: i for i, c in enumerate(self.canales)}
+        self.capacidad = int(capacidad)
+        # Una posición extra: una vista de ``capacidad`` muestras no se ve
+        # afectada si se agrega una muestra antes de que matplotlib dibuje
+        self._tamano = self.capacidad + 1
+        self.datos = np.full((len(self.canales), 2 * self._tamano), np.nan)
+        self.escritos = 0
+
+    @classmethod
+    def por_duracion(cls, canales, horas, periodo_s):
+        """
+        Crea un historial con capacidad para ``horas`` de datos
+
+        Args:
+            canales (tuple): Nombres de los canales
+            horas (float): Duración que debe cubrir el historial
+            periodo_s (float): Periodo esperado entre tramas, en segundos
+        """
+        return cls(canales, max(1, math.ceil(horas * 3600.0 / periodo_s)))
+
+    def agregar(self, valores):
+        """
+        Agrega una muestra; los canales que no vengan en ``valores`` quedan en NaN
+
+        Args:
+            valores (dict): canal -> valor numérico
+        """
+        fila = [valores.get(c, np.nan) for c in self.canales]
+        self.agregar_fila(fila)
+
+    def agregar_fila(self, fila):
+        """Agrega una muestra con los valores en el orden de ``canales``"""
+        i = self.escritos % self._tamano
+        self.datos[:, i] = fila
+        self.datos[:, i + self._tamano] = fila
+        self.escritos += 1
+
+    def __len__(self):
+        return min(self.escritos, self.capacidad)
+
+    def vista(self, canal, n=None):
+        """
+        Devuelve las últimas ``n`` muestras de un canal, de la más antigua a la más reciente
+
+        Args:
+            canal (str): Nombre del canal
+            n (int): Número de muestras (por defecto, todas las disponibles)
+
+        Returns:
+            numpy.ndarray: Vista (sin copia) del arreglo interno; sus valores
+                cambian conforme se agregan más de ``capacidad - n`` muestras
+        """
+        inicio, fin = self._rango(n)
+        return self.datos[self.indices[canal], inicio:fin]
+
+    def vistas(self, n=None):
+        """Devuelve dict canal -> vista, todas sobre las mismas muestras"""
+        inicio, fin = self._rango(n)
+        return {c: self.datos[i, inicio:fin] for c, i in self.indices.items()}
+
+    def _rango(self, n):
+        escritos = self.escritos
+        disponibles = min(escritos, self.capacidad)
+        n = disponibles if n is None else min(n, disponibles)
+        fin = escritos % self._tamano + self._tamano
+        return fin - n, fin
+
+    def limpiar(self):
+        """Descarta todas las muestras"""
+        self.datos.fill(np.nan)
+        self.escritos = 0
@@ -0,0 +1,349 @@
+"""
+Lectura por bloques de logs de sesión grandes (Segunda Ley)
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Una corrida desatendida de varios días deja un ``datos_*.csv`` de cientos
+de MB; cargarlo completo en pandas para ver una gráfica de tendencias no
+es viable. ``LogSesion`` lo lee sin cargarlo:
+
+- Índice disperso: cada ``paso_indice`` bytes se toma la primera línea
+  completa y se guarda su ``Tiempo_Relativo_s`` junto con su posición.
+  Como el tiempo solo crece dentro del archivo, basta un salto y una línea
+  por entrada (no se recorre el archivo) y ``posicion(t)`` es una búsqueda
+  binaria. Si el archivo sigue creciendo, ``actualizar_indice`` agrega solo
+  las entradas nuevas.
+- ``bloques`` entrega DataFrames de ``filas_por_bloque`` filas entre dos
+  tiempos, leyendo solo esa parte del archivo.
+- ``agregar_por_ventana`` resume por ventanas de tiempo (conteo, media,
+  desviación, mínimo, máximo) combinando resultados parciales entre
+  bloques: la memoria depende del tamaño del bloque, no del archivo.
+- ``huecos`` lista los intervalos en que se perdió el puerto (filas
+  ``SIN ENLACE``/``ENLACE RESTABLECIDO``, ver comun/enlace.py), para no
+  confundirlos con tramos en que el sistema estaba estable.
+
+Uso (desde termodinamica/):
+    python -m comun.log_sesion segundaley/logs/datos_20251208_212433.csv --ventana 60
+    python -m comun.log_sesion logs/datos_X.csv --ventana 300 --desde 3600 --grafica tendencias.png
+"""
+
+import argparse
+import bisect
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from .protocolo import ESTADO_SIN_ENLACE, ESTADOS_ENLACE
+
+COLUMNA_TIEMPO = 'Tiempo_Relativo_s'
+COLUMNA_ESTADO = 'Estado_Sistema'
+# Columnas numéricas que se resumen por defecto
+COLUMNAS_NUMERICAS = ('Temp1_C', 'Temp2_C', 'Temp3_C', 'Caudal1_Lmin', 'Caudal2_Lmin',
+                      'Volumen1_L', 'Volumen2_L', 'PWM1', 'PWM2', 'Duty1_%', 'Duty2_%')
+
+
+class _Tramo(io.RawIOBase):
+    """Vista de solo lectura de ``[inicio, fin)`` de un archivo abierto en binario"""
+
+    def __init__(self, archivo, inicio, fin):
+        self.archivo = archivo
+        self.restante = fin - inicio
+        archivo.seek(inicio)
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        if self.restante <= 0:
+            return 0
+        datos = self.archivo.read(min(len(destino), self.restante))
+        destino[:len(datos)] = datos
+        self.restante -= len(datos)
+        return len(datos)
+
+
+class LogSesion:
+    """
+    Log ``datos_*.csv`` de Segunda Ley con índice disperso por tiempo.
+
+    Uso:
+        log = LogSesion('logs/datos_20251208_212433.csv')
+        for bloque in log.bloques(desde_s=3600, hasta_s=7200, columnas=['Temp1_C']):
+            ...
+        resumen = log.agregar_por_ventana(60)   # una fila por minuto
+    """
+
+    def __init__(self, ruta, paso_indice=256 * 1024):
+        """
+        Args:
+            ruta (str): CSV de sesión
+            paso_indice (int): Bytes entre entradas del índice
+        """
+        self.ruta = ruta
+        self.paso_indice = paso_indice
+        with open(ruta, 'rb') as f:
+            primera = f.readline()
+            self.inicio_datos = f.tell()
+        self.columnas = primera.decode('utf-8', errors='ignore').strip().split(',')
+        if COLUMNA_TIEMPO not in self.columnas:
+            raise ValueError(f"{ruta} no tiene columna {COLUMNA_TIEMPO}")
+        self.i_tiempo = self.columnas.index(COLUMNA_TIEMPO)
+        self.tiempos = []     # Tiempo_Relativo_s de cada entrada
+        self.posiciones = []  # byte donde empieza esa línea
+        self.fin = self.inicio_datos  # después del último salto de línea indexado
+        self.actualizar_indice()
+
+    def actualizar_indice(self):
+        """
+        Agrega al índice la parte del archivo escrita desde la última llamada
+
+        Returns:
+            int: Número de entradas nuevas
+        """
+        antes = len(self.tiempos)
+        with open(self.ruta, 'rb') as f:
+            tamano = os.fstat(f.fileno()).st_size
+            fin = self._ultimo_salto(f, tamano)
+            posicion = self.posiciones[-1] + self.paso_indice if self.posiciones else self.inicio_datos
+            while posicion < fin:
+                f.seek(posicion)
+                if posicion != self.inicio_datos:
+                    f.readline()  # completar la línea en la que cayó el salto
+                inicio_linea = f.tell()
+                if inicio_linea >= fin:
+                    break
+                tiempo = self._tiempo(f.readline())
+                if tiempo is not None and (not self.tiempos or tiempo >= self.tiempos[-1]):
+                    self.tiempos.append(tiempo)
+                    self.posiciones.append(inicio_linea)
+                posicion = max(posicion + self.paso_indice, f.tell())
+        self.fin = fin
+        return len(self.tiempos) - antes
+
+    @staticmethod
+    def _ultimo_salto(f, tamano):
+        """Posición después del último '\\n': una línea a medio escribir no se lee"""
+        bloque = 4096
+        posicion = tamano
+        while posicion > 0:
+            inicio = max(0, posicion - bloque)
+            f.seek(inicio)
+            datos = f.read(posicion - inicio)
+            i = datos.rfind(b'\n')
+            if i >= 0:
+                return inicio + i + 1
+            posicion = inicio
+        return 0
+
+    def _tiempo(self, linea):
+        campos = linea.split(b',')
+        try:
+            return float(campos[self.i_tiempo])
+        except (IndexError, ValueError):
+            return None
+
+    @property
+    def duracion_s(self):
+        """Tiempo de la última entrada del índice (aproximado al paso del índice)"""
+        return self.tiempos[-1] if self.tiempos else 0.0
+
+    def posicion(self, t):
+        """Byte desde el que hay que leer para no perder filas con tiempo >= ``t``"""
+        i = bisect.bisect_right(self.tiempos, t) - 1
+        return self.posiciones[i] if i >= 0 else self.inicio_datos
+
+    def bloques(self, desde_s=None, hasta_s=None, columnas=None, filas_por_bloque=50000):
+        """
+        Lee el log por bloques, solo entre ``desde_s`` y ``hasta_s``
+
+        Args:
+            desde_s (float): Tiempo relativo inicial (None = desde el principio)
+            hasta_s (float): Tiempo relativo final (None = hasta el final)
+            columnas (list): Columnas a leer además de Tiempo_Relativo_s
+                (None = todas)
+            filas_por_bloque (int): Filas por DataFrame
+
+        Yields:
+            pandas.DataFrame: Filas del bloque con ``desde_s <= t <= hasta_s``
+        """
+        usar = None
+        if columnas is not None:
+            usar = [COLUMNA_TIEMPO] + [c for c in columnas if c != COLUMNA_TIEMPO]
+        inicio = self.posicion(desde_s) if desde_s is not None else self.inicio_datos
+        with open(self.ruta, 'rb') as f:
+            tramo = io.BufferedReader(_Tramo(f, inicio, self.fin), 1 << 20)
+            lector = pd.read_csv(tramo, names=self.columnas, header=None, usecols=usar,
+                                 na_values=['--'], chunksize=filas_por_bloque)
+            for bloque in lector:
+                tiempo = pd.to_numeric(bloque[COLUMNA_TIEMPO], errors='coerce')
+                mascara = tiempo.notna()
+                if desde_s is not None:
+                    mascara &= tiempo >= desde_s
+                if hasta_s is not None:
+                    mascara &= tiempo <= hasta_s
+                if mascara.any():
+                    yield bloque[mascara]
+                if hasta_s is not None and len(tiempo) and tiempo.iloc[-1] > hasta_s:
+                    break
+
+    def agregar_por_ventana(self, ventana_s, columnas=COLUMNAS_NUMERICAS, desde_s=None,
+                            hasta_s=None, filas_por_bloque=50000):
+        """
+        Resume el log por ventanas de tiempo en memoria constante
+
+        Args:
+            ventana_s (float): Ancho de cada ventana en segundos
+            columnas (sequence): Columnas numéricas a resumir
+            desde_s, hasta_s (float): Rango de tiempo relativo
+            filas_por_bloque (int): Filas leídas a la vez
+
+        Returns:
+            pandas.DataFrame: Índice 'inicio_s' (inicio de cada ventana) y
+                columnas ``(columna, estadístico)`` con n, media, std, min y
+                max; 'filas' es el número de tramas de la ventana
+        """
+        columnas = [c for c in columnas if c in self.columnas]
+        parciales = []
+        pendiente = None  # ventana que puede continuar en el siguiente bloque
+
+        for bloque in self.bloques(desde_s, hasta_s, columnas, filas_por_bloque):
+            valores = bloque[columnas].apply(pd.to_numeric, errors='coerce')
+            ventana = (bloque[COLUMNA_TIEMPO].to_numpy(dtype=float) // ventana_s).astype(np.int64)
+            grupos = valores.groupby(ventana)
+            parcial = pd.concat({
+                'n': grupos.count(),
+                'suma': grupos.sum(),
+                'suma2': (valores ** 2).groupby(ventana).sum(),
+                'min': grupos.min(),
+                'max': grupos.max(),
+            }, axis=1)
+            parcial['filas'] = grupos.size()
+            if pendiente is not None:
+                parcial = _combinar(pendiente, parcial)
+            # La última ventana del bloque puede seguir en el siguiente
+            parciales.append(parcial.iloc[:-1])
+            pendiente = parcial.iloc[-1:]
+        if pendiente is not None:
+            parciales.append(pendiente)
+        if not parciales:
+            return pd.DataFrame()
+
+        total = pd.concat(parciales)
+        resultado = {}
+        for columna in columnas:
+            n = total[('n', columna)]
+            media = total[('suma', columna)] / n.where(n > 0)
+            varianza = (total[('suma2', columna)] - n * media ** 2) / (n - 1).where(n > 1)
+            resultado[(columna, 'n')] = n
+            resultado[(columna, 'media')] = media
+            resultado[(columna, 'std')] = np.sqrt(varianza.clip(lower=0))
+            resultado[(columna, 'min')] = total[('min', columna)]
+            resultado[(columna, 'max')] = total[('max', columna)]
+        salida = pd.DataFrame(resultado)
+        salida['filas'] = total['filas'].to_numpy()
+        salida.index = pd.Index(total.index.to_numpy() * ventana_s, name='inicio_s')
+        return salida
+
+    def huecos(self, desde_s=None, hasta_s=None):
+        """
+        Intervalos sin enlace con el Arduino, según las filas de marca
+
+        Returns:
+            pandas.DataFrame: 'inicio_s', 'fin_s' y 'duracion_s' de cada hueco;
+                'fin_s' es NaN si el registro terminó sin recuperar el enlace
+        """
+        intervalos = []
+        inicio = None
+        if COLUMNA_ESTADO in self.columnas:
+            for bloque in self.bloques(desde_s, hasta_s, [COLUMNA_ESTADO]):
+                marcas = bloque[bloque[COLUMNA_ESTADO].isin(ESTADOS_ENLACE)]
+                for t, estado in zip(marcas[COLUMNA_TIEMPO].astype(float), marcas[COLUMNA_ESTADO]):
+                    if estado == ESTADO_SIN_ENLACE:
+                        inicio = t if inicio is None else inicio
+                    elif inicio is not None:
+                        intervalos.append((inicio, t))
+                        inicio = None
+        if inicio is not None:
+            intervalos.append((inicio, np.nan))
+        resultado = pd.DataFrame(intervalos, columns=['inicio_s', 'fin_s'], dtype=float)
+        resultado['duracion_s'] = resultado['fin_s'] - resultado['inicio_s']
+        return resultado
+
+
+def _combinar(anterior, parcial):
+    """Une la ventana pendiente del bloque anterior con la primera del nuevo"""
+    clave = anterior.index[0]
+    if clave not in parcial.index:
+        return pd.concat([anterior, parcial])
+    fila = parcial.loc[[clave]].copy()
+    for estadistico in ('n', 'suma', 'suma2'):
+        fila[estadistico] = fila[estadistico].to_numpy() + anterior[estadistico].to_numpy()
+    fila['min'] = np.fmin(fila['min'].to_numpy(), anterior['min'].to_numpy())
+    fila['max'] = np.fmax(fila['max'].to_numpy(), anterior['max'].to_numpy())
+    fila['filas'] = fila['filas'].to_numpy() + anterior['filas'].to_numpy()
+    return pd.concat([fila, parcial.drop(index=clave)])
+
+
+def graficar_tendencias(resumen, salida, columnas=('Temp1_C', 'Temp2_C', 'Temp3_C')):
+    """
+    Guarda una gráfica de media y banda mín–máx por ventana
+
+    Args:
+        resumen (pandas.DataFrame): Resultado de ``agregar_por_ventana``
+        salida (str): Archivo de imagen
+        columnas (sequence): Columnas a graficar
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    horas = resumen.index.to_numpy() / 3600.0
+    fig, ax = plt.subplots(figsize=(12, 6))
+    for columna in columnas:
+        if (columna, 'media') not in resumen:
+            continue
+        linea, = ax.plot(horas, resumen[(columna, 'media')], linewidth=1.5, label=columna)
+        ax.fill_between(horas, resumen[(columna, 'min')], resumen[(columna, 'max')],
+                        color=linea.get_color(), alpha=0.2)
+    ax.set_xlabel('Tiempo (h)')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(salida, dpi=150)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('archivo', help="datos_*.csv de Segunda Ley")
+    parser.add_argument('--ventana', type=float, default=60.0, help="segundos por ventana")
+    parser.add_argument('--desde', type=float, help="tiempo relativo inicial (s)")
+    parser.add_argument('--hasta', type=float, help="tiempo relativo final (s)")
+    parser.add_argument('--salida', help="guardar el resumen por ventana en CSV")
+    parser.add_argument('--grafica', help="guardar una gráfica de temperaturas (PNG)")
+    args = parser.parse_args()
+
+    log = LogSesion(args.archivo)
+    resumen = log.agregar_por_ventana(args.ventana, desde_s=args.desde, hasta_s=args.hasta)
+    print(f"{args.archivo}: {os.path.getsize(args.archivo) / 1e6:.1f} MB, "
+          f"~{log.duracion_s / 3600:.2f} h, {len(log.tiempos)} entradas de índice, "
+          f"{len(resumen)} ventanas de {args.ventana:g} s")
+    if len(resumen):
+        medias = resumen.xs('media', axis=1, level=1)
+        print(medias.round(2).to_string(max_rows=20))
+    huecos = log.huecos(args.desde, args.hasta)
+    if len(huecos):
+        print(f"{len(huecos)} hueco(s) sin enlace, {huecos['duracion_s'].sum():.1f} s en total:")
+        print(huecos.round(1).to_string(index=False, max_rows=20))
+    if args.salida:
+        resumen.to_csv(args.salida)
+        print(f"Resumen guardado: {args.salida}")
+    if args.grafica and len(resumen):
+        graficar_tendencias(resumen, args.grafica)
+        print(f"Gráfica guardada: {args.grafica}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+Adquisición de varios equipos en un solo proceso con asyncio
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Cada ``MonitorArduino``, ``MotorControlGUI`` o ``comun.adquisicion`` atiende
+un solo puerto con un hilo bloqueado en ``read``. Con varios
+intercambiadores y pistones a la vez eso son N procesos o N hilos lectores
+compitiendo por el GIL, cada uno despertando por su cuenta.
+
+``ServidorMultiequipo`` abre todos los puertos en un solo hilo con un ciclo
+de asyncio:
+
+- Cada puerto se registra con ``loop.add_reader``: el sistema operativo
+  avisa cuando hay bytes y se lee todo lo disponible sin bloquear. Sin
+  datos no se ejecuta nada, así que el costo crece con las tramas
+  recibidas y no con el número de puertos. En Windows (sin ``add_reader``
+  para puertos serie) se sondea cada ``PASO_SONDEO_S``.
+- Cada puerto usa el registro de su equipo (``RegistroSegundaLey`` o
+  ``RegistroPrimeraLey`` de comun/adquisicion.py) en su propia carpeta, así
+  que los archivos son los mismos que con el servicio de un solo puerto.
+- La apertura con saludo del firmware (comun/conexion.py) corre en un
+  ejecutor; si un puerto se pierde o deja de enviar datos se reabre con
+  espera creciente y se marcan los huecos (``SIN ENLACE`` /
+  ``ENLACE RESTABLECIDO``) sin detener a los demás.
+- Con ``--escucha`` cada equipo reenvía su flujo por TCP como el servicio
+  de un solo puerto (puertos consecutivos desde el indicado), para conectar
+  las interfaces con ``tcp://127.0.0.1:<puerto>``.
+
+Uso (desde termodinamica/):
+    python -m comun.multiequipo segundaley:/dev/ttyACM0 segundaley:/dev/ttyACM1 primeraley:/dev/ttyUSB0
+    python -m comun.multiequipo segundaley:COM3 segundaley:COM5 --escucha 8765
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+
+from .adquisicion import BAUDIOS, DIRECTORIOS, MARCAS, REGISTROS
+from .conexion import conectar
+from .escritura import PoliticaEscritura
+from .protocolo import ESTADO_ENLACE_RESTABLECIDO, ESTADO_SIN_ENLACE
+from .segmentos import PoliticaRotacion
+from .serie import LectorLineas
+
+# Sondeo cuando el ciclo no puede vigilar el puerto (Windows)
+PASO_SONDEO_S = 0.02
+# Bytes por lectura cuando el puerto avisa que hay datos
+TAM_LECTURA = 65536
+# Revisión de silencio de todos los puertos
+PERIODO_SUPERVISION_S = 1.0
+
+
+class PuertoEquipo:
+    """Un puerto del servidor: lectura sin bloqueo, registro, reconexión y clientes TCP"""
+
+    def __init__(self, equipo, puerto, directorio=None, baudios=None, escucha=None,
+                 politica=None, rotacion=None, silencio_max_s=5.0, espera_inicial_s=0.5,
+                 espera_max_s=30.0, timeout_saludo_s=4.0, max_pendiente=4 << 20):
+        """
+        Args:
+            equipo (str): 'segundaley' o 'primeraley'
+            puerto (str): Puerto serie del Arduino
+            directorio (str): Carpeta de los archivos de sesión (por defecto
+                la del equipo más el nombre del puerto)
+            baudios (int): Velocidad (por defecto la del sketch de cada equipo)
+            escucha (tuple): (host, puerto) para las interfaces (None = sin TCP)
+            politica (PoliticaEscritura): Política de flush de los archivos
+            rotacion (PoliticaRotacion): Segmentos del CSV de Segunda Ley
+            silencio_max_s (float): Sin datos durante este tiempo se reconecta
+                (None = solo al fallar el puerto)
+            espera_inicial_s (float): Espera antes del primer reintento
+            espera_max_s (float): Tope de la espera entre reintentos
+            timeout_saludo_s (float): Timeout del saludo del firmware
+            max_pendiente (int): Bytes en cola tolerados por cliente TCP
+        """
+        self.equipo = equipo
+        self.puerto = puerto
+        self.nombre = f"{equipo}:{os.path.basename(puerto)}"
+        if directorio is None:
+            directorio = os.path.join(DIRECTORIOS[equipo], os.path.basename(puerto))
+        self.directorio = directorio
+        self.baudios = baudios or BAUDIOS[equipo]
+        self.escucha = escucha
+        self.registro = REGISTROS[equipo](directorio, politica or PoliticaEscritura(), rotacion)
+        self.silencio_max_s = silencio_max_s
+        self.espera_inicial_s = espera_inicial_s
+        self.espera_max_s = espera_max_s
+        self.timeout_saludo_s = timeout_saludo_s
+        self.max_pendiente = max_pendiente
+
+        self.loop = None
+        self.ejecutor = None
+        self.conexion = None
+        self.lector = None
+        self.vigilado = False        # add_reader activo
+        self.sondeo = None           # tarea de sondeo (sin add_reader)
+        self.reconexion = None       # tarea de reconexión en curso
+        self.servidor = None
+        self.clientes = {}           # StreamWriter -> dirección
+        self.activo = False
+        self.ultimo_dato = time.monotonic()
+
+        self.bytes_recibidos = 0
+        self.caidas = 0
+        self.reintentos = 0
+        self.tiempo_sin_enlace_s = 0.0
+
+    @property
+    def tramas(self):
+        return self.registro.tramas
+
+    @property
+    def conectado(self):
+        return self.conexion is not None
+
+    # ---------- Apertura y cierre ----------
+
+    async def iniciar(self, ejecutor=None):
+        """Abre el puerto (o empieza a reintentar) e inicia la sesión y el socket"""
+        self.loop = asyncio.get_event_loop()
+        self.ejecutor = ejecutor
+        self.activo = True
+        os.makedirs(self.directorio, exist_ok=True)
+        self.registro.iniciar(self.puerto)
+        if self.escucha:
+            self.servidor = await asyncio.start_server(self._atender_cliente, *self.escucha)
+            host, numero = self.servidor.sockets[0].getsockname()[:2]
+            print(f"[{self.nombre}] Sirviendo en tcp://{host}:{numero}")
+        try:
+            self._empezar(*await self._abrir())
+        except Exception as e:
+            print(f"[{self.nombre}] No se pudo abrir {self.puerto}: {e}")
+            self.reconexion = self.loop.create_task(self._reconectar(time.monotonic(), marcar=False))
+
+    async def _abrir(self):
+        # timeout 0: read() devuelve lo disponible sin bloquear el ciclo
+        return await self.loop.run_in_executor(
+            self.ejecutor, conectar, self.puerto, self.baudios, MARCAS[self.equipo],
+            self.timeout_saludo_s, 0, lambda: not self.activo)
+
+    def _empezar(self, conexion, saludo):
+        """Usa la conexión recién abierta; lo recibido en el saludo se procesa primero"""
+        self.conexion = conexion
+        self.lector = LectorLineas(conexion)
+        self.ultimo_dato = time.monotonic()
+        try:
+            self.loop.add_reader(conexion.fileno(), self._legible_fd, conexion.fileno())
+            self.vigilado = True
+        except (AttributeError, NotImplementedError, ValueError):
+            self.sondeo = self.loop.create_task(self._sondear())
+        self._recibir(saludo.texto.encode('utf-8') + bytes(saludo.lector.pendiente))
+
+    def _soltar(self):
+        """Deja de vigilar y cierra la conexión actual"""
+        conexion, self.conexion = self.conexion, None
+        if conexion is None:
+            return
+        if self.vigilado:
+            self.loop.remove_reader(conexion.fileno())
+            self.vigilado = False
+        if self.sondeo:
+            self.sondeo.cancel()
+            self.sondeo = None
+        try:
+            conexion.close()
+        except Exception:
+            pass
+
+    async def cerrar(self):
+        """Cierra puerto, clientes y sesión"""
+        self.activo = False
+        if self.reconexion:
+            self.reconexion.cancel()
+        self._soltar()
+        if self.servidor:
+            self.servidor.close()
+            for escritor in list(self.clientes):
+                self._quitar_cliente(escritor, "servicio detenido")
+            await self.servidor.wait_closed()
+        self.registro.cerrar()
+
+    # ---------- Lectura ----------
+
+    def _legible_fd(self, fd):
+        """El puerto tiene datos (o se cerró): una sola llamada al sistema lee todo"""
+        try:
+            datos = os.read(fd, TAM_LECTURA)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._perder(e)
+            return
+        if not datos:
+            # Legible pero sin datos: el dispositivo desapareció (igual que en pyserial)
+            self._perder("el puerto se cerró")
+            return
+        self._recibir(datos)
+
+    async def _sondear(self):
+        while self.conexion is not None:
+            try:
+                datos = self.conexion.read(self.conexion.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError, AttributeError) as e:
+                self._perder(e)
+                return
+            self._recibir(datos)
+            await asyncio.sleep(PASO_SONDEO_S)
+
+    def _recibir(self, datos):
+        if not datos:
+            return
+        self.ultimo_dato = time.monotonic()
+        self.bytes_recibidos += len(datos)
+        self._difundir(datos)
+        texto = self.lector.procesar_bytes(datos)
+        if texto:
+            self.registro.procesar(texto)
+
+    # ---------- Reconexión ----------
+
+    def revisar(self, ahora):
+        """Llamado periódicamente por el servidor: detecta el silencio del puerto"""
+        if (self.conectado and self.silencio_max_s
+                and ahora - self.ultimo_dato > self.silencio_max_s):
+            self._perder(f"sin datos durante {self.silencio_max_s:g} s")
+
+    def _perder(self, motivo):
+        if not self.conectado or not self.activo:
+            return
+        self.caidas += 1
+        self._soltar()
+        print(f"[{self.nombre}] Enlace perdido: {motivo}")
+        self.registro.enlace(ESTADO_SIN_ENLACE, f"ENLACE PERDIDO: {motivo} - reconectando")
+        self.reconexion = self.loop.create_task(self._reconectar(time.monotonic()))
+
+    async def _reconectar(self, inicio, marcar=True):
+        """Reintenta con espera creciente; ``marcar`` deja la fila de enlace restablecido"""
+        espera = self.espera_inicial_s
+        intentos = 0
+        while self.activo:
+            await asyncio.sleep(espera)
+            intentos += 1
+            self.reintentos += 1
+            try:
+                conexion, saludo = await self._abrir()
+            except Exception as e:
+                print(f"[{self.nombre}] Reintento {intentos}: {e}")
+                espera = min(espera * 2, self.espera_max_s)
+                continue
+            if not self.activo:
+                conexion.close()
+                return
+            duracion = time.monotonic() - inicio
+            if marcar:
+                self.tiempo_sin_enlace_s += duracion
+                self.registro.enlace(ESTADO_ENLACE_RESTABLECIDO,
+                                     f"ENLACE RESTABLECIDO tras {duracion:.1f} s ({intentos} intento(s))")
+            else:
+                self.registro.evento(f"Conectado tras {intentos} intento(s)")
+            print(f"[{self.nombre}] Conectado a {self.puerto}")
+            self.reconexion = None
+            self._empezar(conexion, saludo)
+            return
+
+    # ---------- Clientes TCP ----------
+
+    async def _atender_cliente(self, lector, escritor):
+        direccion = "{}:{}".format(*escritor.get_extra_info('peername')[:2])
+        self.clientes[escritor] = direccion
+        self.registro.evento(f"Cliente conectado: {direccion}")
+        motivo = "desconectado"
+        try:
+            while True:
+                datos = await lector.read(4096)
+                if not datos:
+                    break
+                self._comando(datos, direccion)
+        except (ConnectionError, OSError):
+            motivo = "conexión perdida"
+        finally:
+            self._quitar_cliente(escritor, motivo)
+
+    def _difundir(self, datos):
+        for escritor in list(self.clientes):
+            if escritor.transport.get_write_buffer_size() > self.max_pendiente:
+                self._quitar_cliente(escritor, "demasiado lento")
+            else:
+                escritor.write(datos)
+
+    def _quitar_cliente(self, escritor, motivo):
+        direccion = self.clientes.pop(escritor, None)
+        if direccion is None:
+            return
+        escritor.close()
+        self.registro.evento(f"Cliente {direccion} {motivo}")
+
+    def _comando(self, datos, direccion):
+        """Reenvía al Arduino lo que escribió un cliente"""
+        if not self.conectado:
+            self.registro.evento(f"Comando de {direccion} descartado: sin enlace")
+            return
+        try:
+            self.conexion.write(datos)
+        except Exception as e:
+            self.registro.evento(f"Error enviando comando: {e}")
+            return
+        texto = datos.decode('utf-8', errors='ignore').strip()
+        if texto:
+            self.registro.evento(f"Comando de {direccion}: {texto}")
+
+
+class ServidorMultiequipo:
+    """
+    Atiende varios ``PuertoEquipo`` en un solo ciclo de asyncio.
+
+    Uso:
+        servidor = ServidorMultiequipo([PuertoEquipo('segundaley', '/dev/ttyACM0'),
+                                        PuertoEquipo('primeraley', '/dev/ttyUSB0')])
+        asyncio.run(servidor.ejecutar())   # hasta Ctrl+C o detener()
+    """
+
+    def __init__(self, puertos):
+        self.puertos = list(puertos)
+        self.loop = None
+        self.detenido = None
+
+    async def ejecutar(self):
+        """Abre todos los puertos y los atiende hasta ``detener``"""
+        self.loop = asyncio.get_event_loop()
+        self.detenido = asyncio.Event()
+        # Un hilo por puerto solo para abrir: el saludo puede tardar segundos
+        with ThreadPoolExecutor(max_workers=max(1, len(self.puertos)),
+                                thread_name_prefix="apertura") as ejecutor:
+            try:
+                await asyncio.gather(*(p.iniciar(ejecutor) for p in self.puertos))
+                while not self.detenido.is_set():
+                    try:
+                        await asyncio.wait_for(self.detenido.wait(), PERIODO_SUPERVISION_S)
+                    except asyncio.TimeoutError:
+                        pass
+                    ahora = time.monotonic()
+                    for puerto in self.puertos:
+                        puerto.revisar(ahora)
+            finally:
+                for puerto in self.puertos:
+                    await puerto.cerrar()
+
+    def detener(self):
+        """Se puede llamar desde otro hilo"""
+        if self.loop and self.detenido:
+            self.loop.call_soon_threadsafe(self.detenido.set)
+
+    @property
+    def tramas(self):
+        return sum(p.tramas for p in self.puertos)
+
+    def resumen(self):
+        """Una línea por puerto con tramas, bytes y huecos"""
+        return "\n".join(
+            f"{p.nombre}: {p.tramas} tramas, {p.bytes_recibidos} bytes, "
+            f"{p.caidas} caída(s), {p.tiempo_sin_enlace_s:.1f} s sin enlace"
+            for p in self.puertos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('equipos', nargs='+', metavar='EQUIPO:PUERTO',
+                        help="p. ej. segundaley:/dev/ttyACM0 o primeraley:COM4")
+    parser.add_argument('--directorio', help="carpeta base; cada puerto escribe en una subcarpeta "
+                                             "(por defecto la del equipo)")
+    parser.add_argument('--escucha', type=int, default=0, metavar='PUERTO',
+                        help="reenviar por TCP en 127.0.0.1 desde este puerto, uno por equipo")
+    parser.add_argument('--durable', action='store_true', help="fsync periódico de los archivos")
+    parser.add_argument('--puntos-control', type=float, metavar='S',
+                        help="flush + fsync + CRC en <archivo>.idx cada S segundos")
+    parser.add_argument('--rotar-mb', type=float, default=0,
+                        help="partir los CSV de Segunda Ley en segmentos de este tamaño")
+    parser.add_argument('--rotar-min', type=float, default=0,
+                        help="partir los CSV de Segunda Ley en segmentos de esta duración")
+    parser.add_argument('--compresion', choices=('gzip', 'zstd', 'ninguna'), default='gzip',
+                        help="compresión de los segmentos cerrados")
+    parser.add_argument('--silencio', type=float, default=5.0, metavar='S',
+                        help="reconectar si no llega nada en S segundos (0 = solo al fallar el puerto)")
+    args = parser.parse_args()
+
+    puertos = []
+    for i, especificacion in enumerate(args.equipos):
+        equipo, _, puerto = especificacion.partition(':')
+        if equipo not in REGISTROS or not puerto:
+            parser.error(f"Equipo no válido: {especificacion} (se espera segundaley:PUERTO "
+                         f"o primeraley:PUERTO)")
+        if args.puntos_control:
+            politica = PoliticaEscritura.con_puntos_control(args.puntos_control)
+        else:
+            politica = PoliticaEscritura(durable=args.durable)
+        rotacion = None
+        if args.rotar_mb or args.rotar_min:
+            rotacion = PoliticaRotacion(int(args.rotar_mb * 1024 * 1024), args.rotar_min * 60.0,
+                                        None if args.compresion == 'ninguna' else args.compresion)
+        directorio = None
+        if args.directorio:
+            directorio = os.path.join(args.directorio, equipo, os.path.basename(puerto))
+        escucha = ('127.0.0.1', args.escucha + i) if args.escucha else None
+        puertos.append(PuertoEquipo(equipo, puerto, directorio, escucha=escucha, politica=politica,
+                                    rotacion=rotacion, silencio_max_s=args.silencio or None))
+
+    servidor = ServidorMultiequipo(puertos)
+    try:
+        asyncio.run(servidor.ejecutar())
+    except KeyboardInterrupt:
+        pass
+    print("Servidor detenido")
+    print(servidor.resumen())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Protocolos de texto de los Arduino del laboratorio
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Segunda Ley (segundaley/arduino/app.ino):
+
+El firmware imprime cada ~100 ms un bloque delimitado por
+``========================================`` con el estado del sistema,
+las tres temperaturas, los dos caudalímetros, las bombas y (solo en modo
+AUTO) los setpoints. ``ParserSegundaLey`` convierte ese bloque en una sola
+``TramaSegundaLey``: primero intenta reconocer el bloque completo con una
+expresión regular precompilada (una sola llamada por trama) y, si el bloque
+viene incompleto o con ruido, recurre a una tabla de prefijos que procesa
+línea por línea con una búsqueda en diccionario en lugar de una cadena de
+comparaciones ``in``.
+
+Primera Ley (primeraley/arduino/control_actuador/arduino_motor_code.ino):
+
+Una línea por lectura, ``Pressure: X kPa | Temperature: Y C``, más líneas
+de estado como "Extendiendo motor..." y "Extension completada.".
+``ParserPrimeraLey`` convierte cada lectura en una ``TramaPrimeraLey``.
+"""
+
+import re
+from dataclasses import dataclass, fields
+
+DELIMITADOR = "========================================"
+
+# Columnas de logs/datos_*.csv y su clave equivalente en la trama
+COLUMNAS_CSV = {
+    'Estado_Sistema': 'sistema',
+    'Temp1_C': 'temp1',
+    'Temp2_C': 'temp2',
+    'Temp3_C': 'temp3',
+    'Caudal1_Lmin': 'caudal1',
+    'Caudal2_Lmin': 'caudal2',
+    'Volumen1_L': 'volumen1',
+    'Volumen2_L': 'volumen2',
+    'PWM1': 'pwm1',
+    'PWM2': 'pwm2',
+    'Duty1_%': 'duty1',
+    'Duty2_%': 'duty2',
+    'Modo1': 'modo1',
+    'Modo2': 'modo2',
+    'Error1': 'error1',
+    'Error2': 'error2',
+}
+
+# Filas de marca que escriben las interfaces cuando se pierde el puerto y
+# cuando se recupera (ver comun/enlace.py): van en Estado_Sistema (o en la
+# columna de temperatura en Primera Ley) con los demás campos vacíos. Entre
+# las dos no faltan datos porque el sistema estuviera estable: no había enlace.
+ESTADO_SIN_ENLACE = "SIN ENLACE"
+ESTADO_ENLACE_RESTABLECIDO = "ENLACE RESTABLECIDO"
+ESTADOS_ENLACE = (ESTADO_SIN_ENLACE, ESTADO_ENLACE_RESTABLECIDO)
+
+# Bloque completo tal como lo imprime MostrarDatos() entre dos delimitadores
+_RE_TRAMA = re.compile(
+    r'\s*--- ESTADO SISTEMA ---\s+'
+    r'Sistema: ([^\r\n]*)\s+'
+    r'--- TEMPERATURAS ---\s+'
+    r'Sensor 1 \(pin11\): (\S+)[^\r\n]*\s+'
+    r'Sensor 2 \(pin12\): (\S+)[^\r\n]*\s+'
+    r'Sensor 3 \(pin4\): (\S+)[^\r\n]*\s+'
+    r'--- CAUDALIMETROS ---\s+'
+    r'Caudal 1 \(pin2\): (\S+) L/min  \|  Vol: (\S+) L\s+'
+    r'Caudal 2 \(pin3\): (\S+) L/min  \|  Vol: (\S+) L\s+'
+    r'--- BOMBAS ---\s+'
+    r'Bomba 1: (\S+) \| PWM: (-?\d+) \((\S+)%\) \| Modo: ([^\r\n]*)\s+'
+    r'Bomba 2: (\S+) \| PWM: (-?\d+) \((\S+)%\) \| Modo: ([^\r\n]*)\s+'
+    r'(?:Setpoint 1: (\S+) L/min \| Error: (\S+)\s+)?'
+    r'(?:Setpoint 2: (\S+) L/min \| Error: (\S+)\s+)?\Z'
+)
+
+# Líneas sueltas, para bloques que no coinciden con _RE_TRAMA
+_RE_CAUDAL = re.compile(r'\s*([^\s|]+)\s*L/min\s*\|\s*Vol:\s*([^\sL]+)')
+# monitoreo_sistema.ino solo imprime el estado ("Bomba 1: ENCENDIDA")
+_RE_BOMBA = re.compile(r'\s*([^\s|]+)\s*(?:\|\s*PWM:\s*(-?\d+)\s*\(\s*([^\s%]+)%\)\s*\|\s*Modo:(.*))?')
+_RE_SETPOINT = re.compile(r'\s*([^\s|]+)\s*L/min\s*\|\s*Error:\s*(\S+)')
+
+
+@dataclass
+class TramaSegundaLey:
+    """Lectura completa de un bloque de app.ino; los campos no recibidos quedan en None"""
+    sistema: str = None
+    temp1: float = None
+    temp2: float = None
+    temp3: float = None
+    caudal1: float = None
+    caudal2: float = None
+    volumen1: float = None
+    volumen2: float = None
+    bomba1: str = None
+    bomba2: str = None
+    pwm1: int = None
+    pwm2: int = None
+    duty1: float = None
+    duty2: float = None
+    modo1: str = None
+    modo2: str = None
+    setpoint1: float = None
+    setpoint2: float = None
+    error1: float = None
+    error2: float = None
+
+    def como_dict(self):
+        """Devuelve solo los campos recibidos, con las claves que usan las interfaces"""
+        return {k: v for k, v in vars(self).items() if v is not None}
+
+    @classmethod
+    def desde_fila_csv(cls, fila):
+        """
+        Reconstruye una trama a partir de una fila de logs/datos_*.csv
+
+        Args:
+            fila (dict): Fila leída con ``csv.DictReader``
+        """
+        trama = cls()
+        tipos = {f.name: f.type for f in fields(cls)}
+        for columna, clave in COLUMNAS_CSV.items():
+            valor = fila.get(columna)
+            if valor in (None, '', '--'):
+                continue
+            tipo = tipos[clave]
+            if tipo is int:
+                valor = int(float(valor))
+            elif tipo is float:
+                valor = float(valor)
+            setattr(trama, clave, valor)
+        if trama.pwm1 is not None:
+            trama.bomba1 = "ENCENDIDA" if trama.pwm1 > 0 else "APAGADA"
+        if trama.pwm2 is not None:
+            trama.bomba2 = "ENCENDIDA" if trama.pwm2 > 0 else "APAGADA"
+        return trama
+
+    def a_texto(self):
+        """Genera el bloque de texto tal como lo imprime app.ino (MostrarDatos)"""
+        lineas = [DELIMITADOR, "--- ESTADO SISTEMA ---", f"Sistema: {self.sistema or 'DETENIDO'}",
+                  "", "--- TEMPERATURAS ---"]
+        for n, pin, t in (('1', '11', self.temp1), ('2', '12', self.temp2), ('3', '4', self.temp3)):
+            lineas.append(f"Sensor {n} (pin{pin}): {(t if t is not None else -127.0):.2f} °C")
+        lineas += ["", "--- CAUDALIMETROS ---"]
+        for n, pin, q, v in (('1', '2', self.caudal1, self.volumen1),
+                             ('2', '3', self.caudal2, self.volumen2)):
+            lineas.append(f"Caudal {n} (pin{pin}): {q or 0.0:.3f} L/min  |  Vol: {v or 0.0:.3f} L")
+        lineas += ["", "--- BOMBAS ---"]
+        for n, pwm, modo in (('1', self.pwm1, self.modo1), ('2', self.pwm2, self.modo2)):
+            pwm = pwm or 0
+            estado = "ENCENDIDA" if pwm > 0 else "APAGADA"
+            lineas.append(f"Bomba {n}: {estado} | PWM: {pwm} ({pwm * 100.0 / 255.0:.1f}%) "
+                          f"| Modo: {modo or 'MANUAL'}")
+        for n, sp, err in (('1', self.setpoint1, self.error1), ('2', self.setpoint2, self.error2)):
+            if err is not None:
+                lineas.append(f"Setpoint {n}: {sp or 0.0:.2f} L/min | Error: {err:.3f}")
+        lineas += [DELIMITADOR, ""]
+        return "\r\n".join(lineas) + "\r\n"
+
+
+class ParserSegundaLey:
+    """
+    Convierte la salida de app.ino en objetos ``TramaSegundaLey``.
+
+    Uso con texto en bloque (lo más rápido):
+        parser = ParserSegundaLey()
+        for trama in parser.procesar_texto(lector.leer_texto()):
+            ...
+
+    o línea por línea con ``procesar_linea``. No se deben mezclar ambas
+    formas sobre el mismo parser.
+    """
+
+    # Prefijo (texto antes del primer ':') -> (tipo de línea, claves de la trama)
+    TABLA = {
+        "Sistema": ('sistema', 'sistema'),
+        "Sensor 1 (pin11)": ('temperatura', 'temp1'),
+        "Sensor 2 (pin12)": ('temperatura', 'temp2'),
+        "Sensor 3 (pin4)": ('temperatura', 'temp3'),
+        "Caudal 1 (pin2)": ('caudal', ('caudal1', 'volumen1')),
+        "Caudal 2 (pin3)": ('caudal', ('caudal2', 'volumen2')),
+        "Bomba 1": ('bomba', ('bomba1', 'pwm1', 'duty1', 'modo1')),
+        "Bomba 2": ('bomba', ('bomba2', 'pwm2', 'duty2', 'modo2')),
+        "Setpoint 1": ('setpoint', ('setpoint1', 'error1')),
+        "Setpoint 2": ('setpoint', ('setpoint2', 'error2')),
+    }
+
+    def __init__(self):
+        self.valores = {}
+        self.pendiente = ""
+
+    def procesar_texto(self, texto):
+        """
+        Procesa texto crudo del puerto (una o varias líneas completas)
+
+        Args:
+            texto (str): Texto decodificado, p. ej. de ``LectorLineas.leer_texto``
+
+        Returns:
+            list: Tramas completadas con este texto (puede estar vacía)
+        """
+        if not texto:
+            return []
+        partes = (self.pendiente + texto).split(DELIMITADOR)
+        self.pendiente = partes.pop()
+
+        tramas = []
+        for parte in partes:
+            trama = self.procesar_bloque(parte)
+            if trama is not None:
+                tramas.append(trama)
+        return tramas
+
+    def procesar_bloque(self, bloque):
+        """Convierte el texto entre dos delimitadores en una trama (None si no trae datos)"""
+        m = _RE_TRAMA.match(bloque)
+        if m is not None:
+            (sistema, t1, t2, t3, q1, v1, q2, v2,
+             b1, pwm1, duty1, modo1, b2, pwm2, duty2, modo2, sp1, e1, sp2, e2) = m.groups()
+            try:
+                return TramaSegundaLey(
+                    sistema.strip(), float(t1), float(t2), float(t3),
+                    float(q1), float(q2), float(v1), float(v2),
+                    b1, b2, int(pwm1), int(pwm2), float(duty1), float(duty2),
+                    modo1.strip(), modo2.strip(),
+                    float(sp1) if sp1 else None, float(sp2) if sp2 else None,
+                    float(e1) if e1 else None, float(e2) if e2 else None)
+            except ValueError:
+                pass
+
+        # Bloque incompleto o con ruido: campo por campo
+        if ':' not in bloque:
+            return None
+        valores = {}
+        for linea in bloque.split('\n'):
+            self._procesar_campo(valores, linea.strip())
+        return TramaSegundaLey(**valores) if valores else None
+
+    def procesar_linea(self, linea):
+        """
+        Procesa una línea ya decodificada y sin espacios en los extremos
+
+        Returns:
+            TramaSegundaLey o None: La trama completa al llegar al delimitador
+                de cierre; None mientras el bloque sigue incompleto
+        """
+        if linea.startswith(DELIMITADOR):
+            if self.valores:
+                trama = TramaSegundaLey(**self.valores)
+                self.valores = {}
+                return trama
+            return None
+        self._procesar_campo(self.valores, linea)
+        return None
+
+    def reiniciar(self):
+        """Descarta el bloque parcial en curso"""
+        self.valores = {}
+        self.pendiente = ""
+
+    def _procesar_campo(self, valores, linea):
+        clave, sep, resto = linea.partition(':')
+        if not sep:
+            return
+        entrada = self.TABLA.get(clave)
+        if entrada is None:
+            return
+
+        tipo, claves = entrada
+        try:
+            if tipo == 'temperatura':
+                valores[claves] = float(resto.split(None, 1)[0])
+            elif tipo == 'caudal':
+                m = _RE_CAUDAL.match(resto)
+                valores[claves[0]] = float(m.group(1))
+                valores[claves[1]] = float(m.group(2))
+            elif tipo == 'bomba':
+                estado, pwm, duty, modo = _RE_BOMBA.match(resto).groups()
+                valores[claves[0]] = estado
+                if pwm is not None:
+                    valores[claves[1]] = int(pwm)
+                    valores[claves[2]] = float(duty)
+                    valores[claves[3]] = modo.strip()
+            elif tipo == 'setpoint':
+                m = _RE_SETPOINT.match(resto)
+                valores[claves[0]] = float(m.group(1))
+                valores[claves[1]] = float(m.group(2))
+            else:
+                valores[claves] = resto.strip()
+        except (ValueError, IndexError, AttributeError):
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Primera Ley (primeraley/arduino/control_actuador/arduino_motor_code.ino)
+# ---------------------------------------------------------------------------
+
+# "Pressure: 101.32 kPa | Temperature: 24.50 C" o "... | Temperature: ERROR"
+_RE_PRESION = re.compile(r'Pressure:\s*(\S+)\s*kPa\s*\|\s*Temperature:\s*(\S+)')
+
+# Líneas que marcan inicio y fin de una operación del actuador
+INICIO_OPERACION = {"Extendiendo motor...": "extension", "Retrayendo motor...": "retraction"}
+
+
+@dataclass
+class TramaPrimeraLey:
+    """Lectura del sensor de presión/temperatura; temperatura None si el sensor reportó ERROR"""
+    presion: float = None
+    temperatura: float = None
+
+
+class ParserPrimeraLey:
+    """Convierte las líneas de arduino_motor_code.ino en objetos ``TramaPrimeraLey``"""
+
+    def procesar_linea(self, linea):
+        """
+        Args:
+            linea (str): Línea decodificada
+
+        Returns:
+            TramaPrimeraLey o None: None si la línea no es una lectura válida
+        """
+        m = _RE_PRESION.search(linea)
+        if m is None:
+            return None
+        try:
+            presion = float(m.group(1))
+        except ValueError:
+            return None
+        try:
+            temperatura = float(m.group(2).rstrip('C'))
+        except ValueError:
+            temperatura = None
+        return TramaPrimeraLey(presion, temperatura)
+
+    @staticmethod
+    def inicio_operacion(linea):
+        """Devuelve 'extension'/'retraction' si la línea anuncia el inicio de una operación"""
+        return INICIO_OPERACION.get(linea.strip())
+
+    @staticmethod
+    def fin_operacion(linea):
+        """True si la línea anuncia el fin de una operación ("Extension completada.")"""
+        linea = linea.lower()
+        return "completada" in linea or "completado" in linea
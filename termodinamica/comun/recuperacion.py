@@ -0,0 +1,442 @@
+"""
+Verificación y reparación de sesiones interrumpidas
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Si la interfaz o el servicio se cierran de golpe, el CSV puede quedar con
+una última fila a medias y nada indica dónde terminó la sesión. Con
+``PoliticaEscritura.con_puntos_control`` (comun/escritura.py) cada archivo
+tiene un ``<archivo>.idx`` de solo agregado:
+
+    fin_bytes,registros,crc32_del_bloque,unix_time   (un renglón por bloque)
+    cierre,fin_bytes,registros,unix_time              (al cerrar normalmente)
+
+``reparar`` verifica el CRC de cada bloque registrado, conserva de lo que
+sigue al último punto de control solo las filas completas y con el número
+de campos del encabezado, trunca el resto, agrega esa cola al índice y lo
+cierra como ``cierre_recuperado``. ``recuperar_directorio`` busca las
+sesiones sin ``cierre`` (o con el manifiesto de segmentos aún activo), las
+repara y deja la marca ``=== SESIÓN INTERRUMPIDA ===`` en su log de eventos;
+``SesionSegundaLey.iniciar`` lo llama antes de abrir la sesión nueva.
+
+Mientras está abierta, cada sesión tiene bloqueado ``sesion_<fecha>.lock``
+(``tomar_candado``). El sistema operativo suelta el bloqueo cuando el
+proceso termina, aunque sea de golpe, así que una sesión con candado libre
+se repara en el acto y una con candado tomado no se toca. Solo las
+sesiones sin candado (grabadas antes de que existiera) esperan
+``INACTIVO_S`` sin cambios.
+
+Un archivo sin índice (sesiones anteriores) se puede reparar a mano; en
+ese caso el índice se construye desde cero por bloques de 1 MiB.
+
+Uso (desde termodinamica/):
+    python -m comun.recuperacion segundaley/logs                 # sesiones interrumpidas
+    python -m comun.recuperacion logs/datos_20251208_212433.csv  # un archivo
+    python -m comun.recuperacion logs/datos_X.csv --verificar    # solo informar
+"""
+
+import argparse
+import csv
+import glob
+import io
+import os
+import re
+import time
+import zlib
+from datetime import datetime
+
+from .segmentos import Manifiesto
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BLOQUE_REINDEXADO = 1 << 20
+# Sin candado, un archivo modificado hace menos que esto puede seguir abierto en otro proceso
+INACTIVO_S = 600.0
+_SESION = re.compile(r'^(?:datos|eventos|sesion)_(\d{8}_\d{6})')
+
+
+def ruta_candado(directorio, marca):
+    """``sesion_<marca>.lock`` de la sesión iniciada en ``marca`` (AAAAMMDD_HHMMSS)"""
+    return os.path.join(directorio, f"sesion_{marca}.lock")
+
+
+def tomar_candado(ruta):
+    """
+    Abre y bloquea ``ruta`` sin esperar
+
+    El bloqueo dura hasta ``soltar_candado`` o hasta que el proceso termine.
+
+    Returns:
+        archivo: El candado abierto, o None si otro lo tiene tomado
+    """
+    archivo = open(ruta, 'a+', encoding='ascii')
+    try:
+        if fcntl:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        archivo.close()
+        return None
+    return archivo
+
+
+def soltar_candado(archivo):
+    """Borra y cierra un candado de ``tomar_candado``"""
+    try:
+        os.remove(archivo.name)
+    except OSError:
+        pass
+    archivo.close()
+
+
+def _estado_candado(directorio, marca):
+    """
+    Returns:
+        bool: True si la sesión sigue abierta en otro proceso, False si su
+            proceso ya terminó (el candado se borra) y None si no tiene candado
+    """
+    ruta = ruta_candado(directorio, marca)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        archivo = tomar_candado(ruta)
+    except OSError:
+        return None
+    if archivo is None:
+        return True
+    soltar_candado(archivo)
+    return False
+
+
+def leer_indice(ruta):
+    """
+    Lee ``<ruta>.idx``
+
+    Returns:
+        tuple: (bloques, cierre); bloques es una lista de (fin_bytes,
+            registros, crc32) y cierre la línea de cierre (lista) o None. Un
+            renglón a medio escribir al final se ignora.
+    """
+    bloques, cierre = [], None
+    try:
+        with open(ruta + '.idx', encoding='ascii', errors='ignore') as f:
+            for linea in f:
+                if not linea.endswith('\n'):
+                    break
+                campos = linea.strip().split(',')
+                if campos[0].startswith('cierre'):
+                    cierre = campos
+                    continue
+                try:
+                    bloques.append((int(campos[0]), int(campos[1]), int(campos[2], 16)))
+                except (IndexError, ValueError):
+                    break
+    except FileNotFoundError:
+        return None, None
+    return bloques, cierre
+
+
+def verificar(ruta):
+    """
+    Comprueba los bloques registrados en el índice de ``ruta``
+
+    Returns:
+        dict: 'indice' (hay .idx), 'cerrado' (termina en cierre), 'bloques',
+            'corruptos' (números de bloque con CRC distinto o fuera del
+            archivo), 'fin_verificado' (bytes), 'registros_verificados' y
+            'cola_bytes' (bytes sin punto de control al final)
+    """
+    tamano = os.path.getsize(ruta)
+    bloques, cierre = leer_indice(ruta)
+    informe = {'archivo': ruta, 'indice': bloques is not None, 'cerrado': cierre is not None,
+               'bloques': len(bloques or ()), 'corruptos': [], 'fin_verificado': 0,
+               'registros_verificados': 0, 'cola_bytes': tamano}
+    if not bloques:
+        return informe
+    inicio = 0
+    with open(ruta, 'rb') as f:
+        for numero, (fin, registros, crc) in enumerate(bloques):
+            if fin > tamano:
+                # Bloque registrado pero no presente (p. ej. sin fsync antes del corte)
+                informe['corruptos'].extend(range(numero, len(bloques)))
+                break
+            f.seek(inicio)
+            if zlib.crc32(f.read(fin - inicio)) != crc:
+                informe['corruptos'].append(numero)
+            informe['fin_verificado'] = fin
+            informe['registros_verificados'] = registros
+            inicio = fin
+    informe['cola_bytes'] = tamano - informe['fin_verificado']
+    return informe
+
+
+def _campos_esperados(ruta):
+    if not ruta.endswith('.csv'):
+        return None
+    with open(ruta, newline='', encoding='utf-8', errors='ignore') as f:
+        encabezado = next(csv.reader(f), None)
+    return len(encabezado) if encabezado else None
+
+
+def _cola_valida(cola, campos):
+    """Bytes de ``cola`` que son filas completas (y con ``campos`` campos, si se indica)"""
+    valida = 0
+    filas = 0
+    ultima = None
+    for linea in cola.splitlines(keepends=True):
+        if not linea.endswith(b'\n'):
+            break
+        texto = linea.decode('utf-8', errors='replace')
+        if campos is not None:
+            fila = next(csv.reader(io.StringIO(texto)), [])
+            if len(fila) != campos:
+                break
+            ultima = fila[0]
+        valida += len(linea)
+        filas += 1
+    return valida, filas, ultima
+
+
+def _ultima_linea(ruta, fin=None):
+    """Campos de la última línea antes de ``fin`` (por defecto, del archivo)"""
+    fin = os.path.getsize(ruta) if fin is None else fin
+    with open(ruta, 'rb') as f:
+        f.seek(max(0, fin - 4096))
+        lineas = f.read(fin - max(0, fin - 4096)).splitlines()
+    return lineas[-1].decode('utf-8', errors='replace').split(',') if lineas else []
+
+
+def _ultima_fila(ruta, fin):
+    """Timestamp de la última fila antes de ``fin``"""
+    campos = _ultima_linea(ruta, fin)
+    return campos[0] if campos else None
+
+
+def _tiempo_final(ruta, anterior):
+    """Tiempo_Relativo_s de la última fila de un segmento"""
+    try:
+        return float(_ultima_linea(ruta)[1])
+    except (IndexError, ValueError):
+        return anterior
+
+
+def reindexar(ruta, fin=None, desde=0, registros=0):
+    """
+    Agrega al índice bloques de ~1 MiB, alineados a fin de línea, de ``[desde, fin)``
+
+    Returns:
+        list: Renglones agregados al índice
+    """
+    fin = os.path.getsize(ruta) if fin is None else fin
+    lineas = []
+    with open(ruta, 'rb') as f:
+        f.seek(desde)
+        posicion = desde
+        while posicion < fin:
+            datos = f.read(min(BLOQUE_REINDEXADO, fin - posicion))
+            corte = datos.rfind(b'\n') + 1 if posicion + len(datos) < fin else len(datos)
+            datos = datos[:corte or len(datos)]
+            f.seek(posicion + len(datos))
+            posicion += len(datos)
+            registros += datos.count(b'\n')
+            lineas.append(f"{posicion},{registros},{zlib.crc32(datos):08x},{time.time():.3f}\n")
+    return lineas
+
+
+def reparar(ruta, escribir=True):
+    """
+    Repara un archivo interrumpido y cierra su índice
+
+    Args:
+        ruta (str): CSV de datos o log de eventos
+        escribir (bool): False para solo calcular el informe
+
+    Returns:
+        dict: Informe de ``verificar`` más 'registros' (filas conservadas),
+            'bytes_descartados', 'ultima_fila' (Timestamp de la última fila) y
+            'reparado'
+    """
+    informe = verificar(ruta)
+    informe.update(registros=informe['registros_verificados'], bytes_descartados=0,
+                   ultima_fila=None, reparado=False)
+    if informe['cerrado'] and not informe['cola_bytes']:
+        return informe
+
+    bloques, _ = leer_indice(ruta)
+    bloques = bloques or []
+    # Se descartan del índice los bloques que apuntan más allá del archivo
+    validos = [b for b in bloques if b[0] <= informe['fin_verificado']]
+    inicio_cola = informe['fin_verificado']
+    with open(ruta, 'rb') as f:
+        f.seek(inicio_cola)
+        cola = f.read()
+    campos = _campos_esperados(ruta)
+    valida, filas, ultima = _cola_valida(cola, campos)
+    fin = inicio_cola + valida
+    informe['bytes_descartados'] = len(cola) - valida
+    informe['registros'] = informe['registros_verificados'] + filas
+    informe['ultima_fila'] = ultima or (_ultima_fila(ruta, fin) if fin else None)
+    if not escribir:
+        return informe
+
+    if informe['bytes_descartados']:
+        with open(ruta, 'r+b') as f:
+            f.truncate(fin)
+            f.flush()
+            os.fsync(f.fileno())
+    registros = validos[-1][1] if validos else 0
+    lineas = [f"{b[0]},{b[1]},{b[2]:08x},{time.time():.3f}\n" for b in validos]
+    _cerrar_indice(ruta, lineas + reindexar(ruta, fin, inicio_cola, registros), fin)
+    informe['reparado'] = True
+    return informe
+
+
+def _cerrar_indice(ruta, lineas, fin):
+    """Reemplaza el índice de ``ruta`` por ``lineas`` más el cierre de recuperación"""
+    total = int(lineas[-1].split(',')[1]) if lineas else 0
+    lineas = lineas + [f"cierre_recuperado,{fin},{total},{time.time():.3f}\n"]
+    with open(ruta + '.idx.tmp', 'w', encoding='ascii') as f:
+        f.writelines(lineas)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta + '.idx.tmp', ruta + '.idx')
+
+
+def _marcar_eventos(ruta_log, informe):
+    """Agrega al log de eventos la marca de fin de una sesión interrumpida"""
+    if not os.path.exists(ruta_log):
+        return
+    with open(ruta_log, 'r+b') as f:
+        datos = f.read()
+        f.truncate(datos.rfind(b'\n') + 1)  # sin el renglón a medio escribir
+    ahora = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    with open(ruta_log, 'a', encoding='utf-8') as f:
+        f.write(f"[{ahora}] === SESIÓN INTERRUMPIDA === recuperada: "
+                f"{informe['registros']} registros, última fila {informe['ultima_fila']}, "
+                f"{informe['bytes_descartados']} bytes descartados\n")
+    if os.path.exists(ruta_log + '.idx'):
+        _cerrar_indice(ruta_log, reindexar(ruta_log), os.path.getsize(ruta_log))
+
+
+def _recuperar_manifiesto(ruta):
+    """Repara el segmento en curso de una sesión segmentada y cierra el manifiesto"""
+    manifiesto = Manifiesto.cargar(ruta)
+    informe = None
+    for segmento in manifiesto.segmentos():
+        if segmento['estado'] != 'escribiendo' or not os.path.exists(segmento['ruta']):
+            continue
+        informe = reparar(segmento['ruta'])
+        manifiesto.actualizar(segmento['indice'], estado='cerrado', fin=informe['ultima_fila'],
+                              t_fin_s=_tiempo_final(segmento['ruta'], segmento['t_fin_s']),
+                              filas=max(informe['registros'] - 1, 0),  # sin el encabezado
+                              bytes=os.path.getsize(segmento['ruta']))
+    with manifiesto.candado:
+        manifiesto.datos['interrumpida'] = True
+        manifiesto.datos['activa'] = False
+        if informe and informe['ultima_fila']:
+            manifiesto.datos['fin'] = informe['ultima_fila']
+    manifiesto.guardar()
+    return informe
+
+
+def recuperar_directorio(directorio, inactivo_s=INACTIVO_S):
+    """
+    Repara las sesiones de ``directorio`` que no se cerraron
+
+    Solo se consideran archivos con índice o manifiesto (las sesiones
+    anteriores, sin índice, no se tocan). Los de una sesión con candado se
+    reparan en cuanto el candado está libre; los de una sin candado, tras
+    ``inactivo_s`` sin cambios.
+
+    Returns:
+        list: Informes de ``reparar`` de los archivos reparados
+    """
+    limite = time.time() - inactivo_s
+    informes = []
+    candados = {}
+
+    def abierta(ruta, *archivos):
+        """True si la sesión de ``ruta`` puede seguir escribiendo ``archivos``"""
+        coincidencia = _SESION.match(os.path.basename(ruta))
+        marca = coincidencia.group(1) if coincidencia else None
+        if marca and marca not in candados:
+            candados[marca] = _estado_candado(directorio, marca)
+        if candados.get(marca) is not None:
+            return candados[marca]
+        return any(os.path.exists(a) and os.path.getmtime(a) > limite for a in archivos)
+
+    for ruta in sorted(glob.glob(os.path.join(directorio, 'sesion_*.json'))):
+        try:
+            manifiesto = Manifiesto.cargar(ruta)
+        except (OSError, ValueError):
+            continue
+        if not manifiesto.datos.get('activa') \
+                or abierta(ruta, ruta, *(s['ruta'] for s in manifiesto.segmentos())):
+            continue
+        informe = _recuperar_manifiesto(ruta)
+        if informe:
+            informes.append(informe)
+            _marcar_eventos(os.path.join(directorio, manifiesto.datos['eventos']), informe)
+
+    for indice in sorted(glob.glob(os.path.join(directorio, 'datos_*.csv.idx'))):
+        ruta = indice[:-len('.idx')]
+        if not os.path.exists(ruta) or abierta(ruta, ruta, indice):
+            continue
+        if leer_indice(ruta)[1] is not None:
+            continue
+        informe = reparar(ruta)
+        informes.append(informe)
+        coincidencia = _SESION.match(os.path.basename(ruta))
+        if coincidencia:
+            _marcar_eventos(os.path.join(directorio, f"eventos_{coincidencia.group(1)}.log"), informe)
+    # Candados de sesiones sin índice ni manifiesto que terminaron de golpe
+    for ruta in glob.glob(os.path.join(directorio, 'sesion_*.lock')):
+        abierta(ruta)
+    for informe in informes:
+        print(f"Sesión interrumpida reparada: {informe['archivo']} ({informe['registros']} "
+              f"registros, {informe['bytes_descartados']} bytes descartados)")
+    return informes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('rutas', nargs='+', help="directorio de logs o archivos a reparar")
+    parser.add_argument('--verificar', action='store_true', help="solo informar, sin modificar")
+    parser.add_argument('--inactivo', type=float, default=INACTIVO_S,
+                        help="segundos sin cambios para considerar interrumpida una "
+                             "sesión sin candado")
+    args = parser.parse_args()
+
+    for ruta in args.rutas:
+        if os.path.isdir(ruta):
+            if args.verificar:
+                for archivo in sorted(glob.glob(os.path.join(ruta, 'datos_*.csv'))):
+                    _imprimir(verificar(archivo))
+            else:
+                informes = recuperar_directorio(ruta, args.inactivo)
+                print(f"{ruta}: {len(informes)} sesiones reparadas")
+        else:
+            _imprimir(reparar(ruta, escribir=not args.verificar))
+
+
+def _imprimir(informe):
+    estado = 'cerrado' if informe['cerrado'] else 'sin cierre'
+    if not informe['indice']:
+        estado = 'sin índice'
+    print(f"{informe['archivo']}: {estado}, {informe['bloques']} bloques, "
+          f"{len(informe['corruptos'])} con CRC inválido {informe['corruptos'] or ''}, "
+          f"{informe['cola_bytes']} bytes sin punto de control")
+    if 'reparado' in informe:
+        print(f"  {informe['registros']} registros conservados, {informe['bytes_descartados']} bytes "
+              f"descartados, última fila {informe['ultima_fila']}"
+              f"{', índice reconstruido' if informe['reparado'] else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Archivos de sesión de ambos equipos (CSV de datos y log de eventos)
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Reúne en un solo lugar el formato de los archivos que antes armaba cada
+interfaz, para que las interfaces de Tk y el servicio de adquisición
+(comun/adquisicion.py) escriban exactamente lo mismo:
+
+- Segunda Ley: ``logs/datos_<fecha>.csv`` (una fila por trama) y
+  ``logs/eventos_<fecha>.log``, ver ``SesionSegundaLey``. Con una
+  ``PoliticaRotacion`` el CSV se parte en ``datos_<fecha>_NNN.csv``
+  comprimidos y listados en ``sesion_<fecha>.json`` (comun/segmentos.py).
+- Primera Ley: ``presion_<extension|retraccion>_<fecha>.csv`` con tres
+  filas de encabezado, ver ``abrir_csv_operacion``.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+from .escritura import EscritorCSV, EscritorTexto
+from .protocolo import COLUMNAS_CSV, ESTADOS_ENLACE
+from .recuperacion import recuperar_directorio, ruta_candado, soltar_candado, tomar_candado
+from .segmentos import COMPRESOR, Manifiesto, comprimir_pendientes
+
+ENCABEZADO_SEGUNDA_LEY = ['Timestamp', 'Tiempo_Relativo_s'] + list(COLUMNAS_CSV)
+_CLAVES_SEGUNDA_LEY = list(COLUMNAS_CSV.values())
+
+
+def marca_tiempo(momento=None):
+    """Formato de la columna Timestamp: 2025-12-05 17:29:38.120"""
+    return (momento or datetime.now()).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+class SesionSegundaLey:
+    """
+    Sesión de registro del sistema de Segunda Ley.
+
+    Uso:
+        sesion = SesionSegundaLey('logs', politica)
+        sesion.iniciar()
+        sesion.guardar(trama.como_dict())
+        sesion.log("Setpoint Bomba 1: 2.0 L/min")
+        sesion.cerrar()
+
+    Con ``rotacion``, ``ruta_csv`` es el nombre base de la sesión (se usa
+    para el resumen de estadísticas) y los datos van a ``ruta_segmento``.
+    """
+
+    def __init__(self, directorio='logs', politica=None, rotacion=None):
+        """
+        Args:
+            directorio (str): Carpeta donde se crean los archivos
+            politica (PoliticaEscritura): Política de flush de ambos archivos
+            rotacion (PoliticaRotacion): Partir el CSV en segmentos (None = un
+                solo archivo por sesión)
+        """
+        self.directorio = directorio
+        self.politica = politica
+        self.rotacion = rotacion
+        self.inicio = None
+        self.csv = None
+        self.log_file = None
+        self.ruta_csv = None
+        self.ruta_log = None
+        self.manifiesto = None
+        self.ruta_manifiesto = None
+        self.ruta_segmento = None
+        self.segmento = 0
+        self.candado = threading.Lock()
+        # Bloqueado mientras la sesión está abierta (comun/recuperacion.py)
+        self.candado_sesion = None
+
+    def iniciar(self):
+        """Crea los archivos de la sesión y escribe los encabezados"""
+        os.makedirs(self.directorio, exist_ok=True)
+        # Sesiones anteriores que no se cerraron (caída del programa o del equipo)
+        recuperar_directorio(self.directorio)
+        self.inicio = datetime.now()
+        timestamp = self.inicio.strftime("%Y%m%d_%H%M%S")
+        self.candado_sesion = tomar_candado(ruta_candado(self.directorio, timestamp))
+        if self.candado_sesion:
+            self.candado_sesion.write(f"{os.getpid()}\n")
+            self.candado_sesion.flush()
+
+        self.ruta_csv = os.path.join(self.directorio, f"datos_{timestamp}.csv")
+        self.ruta_log = os.path.join(self.directorio, f"eventos_{timestamp}.log")
+        if self.rotacion:
+            # Segmentos que una sesión anterior dejó sin comprimir
+            comprimir_pendientes(self.directorio)
+            self.ruta_manifiesto = os.path.join(self.directorio, f"sesion_{timestamp}.json")
+            self.manifiesto = Manifiesto.crear(self.ruta_manifiesto, self.inicio,
+                                               ENCABEZADO_SEGUNDA_LEY, self.rotacion, self.ruta_log)
+            self.segmento = 0
+            self._abrir_segmento(self.inicio, 0.0)
+        else:
+            self.csv = EscritorCSV(self.ruta_csv, encabezados=[ENCABEZADO_SEGUNDA_LEY],
+                                   politica=self.politica)
+        self.log_file = EscritorTexto(self.ruta_log, politica=self.politica)
+
+        self.log("=== SESIÓN INICIADA ===")
+        if self.manifiesto:
+            self.log(f"Manifiesto de segmentos: {self.ruta_manifiesto}")
+            self.log(f"Segmento 1: {self.ruta_segmento}")
+        else:
+            self.log(f"Archivo de datos: {self.ruta_csv}")
+        self.log(f"Archivo de eventos: {self.ruta_log}")
+
+    def _abrir_segmento(self, momento, tiempo_relativo):
+        self.segmento += 1
+        base = os.path.splitext(self.ruta_csv)[0]
+        self.ruta_segmento = f"{base}_{self.segmento:03d}.csv"
+        self.csv = EscritorCSV(self.ruta_segmento, encabezados=[ENCABEZADO_SEGUNDA_LEY],
+                               politica=self.politica)
+        self.inicio_segmento = momento
+        self.filas_segmento = 0
+        self.t_fin_segmento = None
+        self.manifiesto.agregar(self.segmento, self.ruta_segmento, momento, tiempo_relativo)
+
+    def _cerrar_segmento(self, momento, escritor):
+        """Registra el fin del segmento y deja cierre y compresión al compresor"""
+        self.manifiesto.actualizar(self.segmento,
+                                   fin=momento.isoformat(sep=' ', timespec='milliseconds'),
+                                   t_fin_s=self.t_fin_segmento, filas=self.filas_segmento)
+        COMPRESOR.encolar(self.manifiesto, self.segmento, escritor, self.rotacion.compresion)
+
+    def _toca_rotar(self, ahora, escritor):
+        rotacion = self.rotacion
+        return ((rotacion.bytes_max and escritor.tamano >= rotacion.bytes_max)
+                or (rotacion.duracion_max_s
+                    and (ahora - self.inicio_segmento).total_seconds() >= rotacion.duracion_max_s))
+
+    def _rotar(self, ahora, tiempo_relativo, escritor):
+        """Cierra el segmento actual y abre el siguiente; devuelve el escritor nuevo"""
+        with self.candado:
+            if self.csv is not escritor:
+                return self.csv  # la sesión se cerró mientras tanto
+            self._cerrar_segmento(ahora, escritor)
+            self._abrir_segmento(ahora, tiempo_relativo)
+            nuevo = self.csv
+        self.log(f"Segmento {self.segmento}: {self.ruta_segmento}")
+        return nuevo
+
+    @property
+    def activa(self):
+        return self.csv is not None
+
+    def guardar(self, datos):
+        """
+        Escribe una fila en el CSV; los campos que falten quedan como '--'
+
+        Args:
+            datos (dict): Campos de la trama (``TramaSegundaLey.como_dict()``)
+        """
+        csv_writer = self.csv
+        if not csv_writer:
+            return
+        ahora = datetime.now()
+        tiempo_relativo = (ahora - self.inicio).total_seconds()
+        if self.manifiesto:
+            if self._toca_rotar(ahora, csv_writer):
+                csv_writer = self._rotar(ahora, tiempo_relativo, csv_writer)
+                if not csv_writer:
+                    return
+            self.filas_segmento += 1
+            self.t_fin_segmento = round(tiempo_relativo, 3)
+        csv_writer.escribir([marca_tiempo(ahora), f"{tiempo_relativo:.3f}"]
+                            + [datos.get(clave, '--') for clave in _CLAVES_SEGUNDA_LEY])
+
+    def marcar_enlace(self, estado):
+        """
+        Escribe una fila de marca de enlace (solo Timestamp, tiempo y estado)
+
+        Args:
+            estado (str): ``ESTADO_SIN_ENLACE`` o ``ESTADO_ENLACE_RESTABLECIDO``
+        """
+        if estado not in ESTADOS_ENLACE:
+            raise ValueError(f"Estado de enlace desconocido: {estado}")
+        self.guardar({'sistema': estado})
+
+    def log(self, mensaje):
+        """Escribe un evento con marca de tiempo en el log"""
+        log_file = self.log_file
+        if log_file:
+            log_file.escribir(f"[{marca_tiempo()}] {mensaje}\n")
+
+    def cerrar(self):
+        """
+        Cierra ambos archivos, escribiendo antes todo lo que siga en cola
+
+        Con rotación, el último segmento se comprime después en segundo plano.
+        """
+        with self.candado:
+            csv_writer, self.csv = self.csv, None
+        if csv_writer:
+            csv_writer.cerrar()
+            if self.manifiesto:
+                fin = datetime.now()
+                self._cerrar_segmento(fin, None)
+                self.manifiesto.finalizar(fin)
+        if self.log_file:
+            self.log("=== SESIÓN FINALIZADA ===")
+            self.log_file.cerrar()
+            self.log_file = None
+        if self.candado_sesion:
+            soltar_candado(self.candado_sesion)
+            self.candado_sesion = None
+
+
+def abrir_csv_operacion(operacion, directorio='', politica=None):
+    """
+    Crea el CSV de una operación del actuador de Primera Ley
+
+    Args:
+        operacion (str): 'extension' o 'retraction'/'retraccion'
+        directorio (str): Carpeta donde se crea el archivo ('' = directorio actual)
+        politica (PoliticaEscritura): Política de flush
+
+    Returns:
+        EscritorCSV: Escritor con los tres renglones de encabezado ya escritos
+    """
+    nombre = "extension" if operacion == "extension" else "retraccion"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    ruta = os.path.join(directorio, f"presion_{nombre}_{timestamp}.csv")
+    return EscritorCSV(ruta, politica=politica, encabezados=[
+        ['Timestamp', 'Presion (kPa)', 'Temperatura (C)', 'Tipo'],
+        ['', '', '', nombre],  # Fila de identificación
+        ['Timestamp', 'Presion (kPa)', 'Temperatura (C)'],  # Headers de datos
+    ])
+
+
+def fila_primera_ley(presion, temperatura):
+    """Fila de datos del CSV de Primera Ley (temperatura None -> 'ERROR')"""
+    return [marca_tiempo(), presion, temperatura if temperatura is not None else "ERROR"]
+
+
+def fila_enlace_primera_ley(estado):
+    """Fila de marca de enlace del CSV de Primera Ley (el estado va en la temperatura)"""
+    if estado not in ESTADOS_ENLACE:
+        raise ValueError(f"Estado de enlace desconocido: {estado}")
+    return [marca_tiempo(), '', estado]
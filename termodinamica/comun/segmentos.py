@@ -0,0 +1,388 @@
+"""
+Rotación, compresión y manifiesto de los archivos de sesión
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Con una ``PoliticaRotacion``, ``SesionSegundaLey`` (comun/registro.py) no
+escribe un solo ``datos_<fecha>.csv`` por conexión sino segmentos
+``datos_<fecha>_001.csv``, ``_002.csv``... que se cierran al llegar a un
+tamaño o a una duración. Cada segmento lleva el encabezado y el
+``Tiempo_Relativo_s`` sigue contando desde el inicio de la sesión, así que
+cada uno se puede analizar por separado o todos concatenados.
+
+Los segmentos cerrados se comprimen (gzip, o zstd si está instalado
+``zstandard``) en un hilo aparte; el hilo lector nunca espera por la
+compresión. ``sesion_<fecha>.json`` (el manifiesto) lista los segmentos en
+orden con su estado (``escribiendo``, ``cerrado``, ``comprimido``),
+rango de tiempo y número de filas, y se reescribe de forma atómica en cada
+cambio: mientras la sesión sigue corriendo, ``cargar_sesion`` ya puede
+leer lo grabado hasta el momento.
+
+Si el programa termina antes de comprimir un segmento cerrado, el
+segmento queda intacto y ``comprimir_pendientes`` lo comprime al iniciar
+la siguiente sesión.
+
+Para quien recorre un directorio de logs (catálogo, almacén), una sesión
+segmentada es una sola corrida: ``listar_corridas`` devuelve su manifiesto
+en lugar de los segmentos, ``firma_sesion`` cambia con cada fila escrita en
+cualquiera de ellos y ``abrir_segmentos`` los entrega como texto en orden.
+"""
+
+import glob
+import gzip
+import io
+import json
+import os
+import queue
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSIONES = {'gzip': '.gz', 'zstd': '.zst'}
+
+
+@dataclass
+class PoliticaRotacion:
+    """
+    Cuándo cerrar un segmento y abrir el siguiente
+
+    Attributes:
+        bytes_max (int): Tamaño máximo de cada segmento (0 = sin límite)
+        duracion_max_s (float): Duración máxima de cada segmento (0 = sin límite)
+        compresion (str): 'gzip', 'zstd' o None para dejar los segmentos en texto
+    """
+    bytes_max: int = 64 * 1024 * 1024
+    duracion_max_s: float = 3600.0
+    compresion: str = 'gzip'
+
+
+class Manifiesto:
+    """Índice JSON de los segmentos de una sesión, seguro entre hilos"""
+
+    def __init__(self, ruta, datos):
+        self.ruta = ruta
+        self.datos = datos
+        self.candado = threading.Lock()
+
+    @classmethod
+    def crear(cls, ruta, inicio, encabezado, rotacion, eventos):
+        manifiesto = cls(ruta, {
+            'inicio': inicio.isoformat(sep=' ', timespec='milliseconds'),
+            'fin': None,
+            'activa': True,
+            'encabezado': list(encabezado),
+            'rotacion': asdict(rotacion),
+            'eventos': os.path.basename(eventos),
+            'segmentos': [],
+        })
+        manifiesto.guardar()
+        return manifiesto
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            return cls(ruta, json.load(f))
+
+    @property
+    def directorio(self):
+        return os.path.dirname(self.ruta)
+
+    def guardar(self):
+        with self.candado:
+            texto = json.dumps(self.datos, indent=2, ensure_ascii=False)
+            try:
+                with open(self.ruta + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(texto)
+                os.replace(self.ruta + '.tmp', self.ruta)
+            except OSError as e:
+                print(f"Error guardando manifiesto {self.ruta}: {e}")
+
+    def agregar(self, indice, archivo, inicio, t_inicio_s):
+        with self.candado:
+            self.datos['segmentos'].append({
+                'indice': indice,
+                'archivo': os.path.basename(archivo),
+                'estado': 'escribiendo',
+                'inicio': inicio.isoformat(sep=' ', timespec='milliseconds'),
+                'fin': None,
+                't_inicio_s': round(t_inicio_s, 3),
+                't_fin_s': None,
+                'filas': 0,
+                'bytes': None,
+            })
+        self.guardar()
+
+    def actualizar(self, indice, **campos):
+        with self.candado:
+            for segmento in self.datos['segmentos']:
+                if segmento['indice'] == indice:
+                    segmento.update(campos)
+        self.guardar()
+
+    def finalizar(self, fin):
+        with self.candado:
+            self.datos['fin'] = fin.isoformat(sep=' ', timespec='milliseconds')
+            self.datos['activa'] = False
+        self.guardar()
+
+    def segmentos(self):
+        """Copia de la lista de segmentos con la ruta completa de cada archivo"""
+        with self.candado:
+            return [dict(s, ruta=os.path.join(self.directorio, s['archivo']))
+                    for s in self.datos['segmentos']]
+
+
+class Compresor:
+    """
+    Hilo que cierra y comprime segmentos en orden de llegada.
+
+    El hilo arranca al encolar trabajo y termina cuando la cola se vacía; no
+    es daemon, así que al salir del programa se termina el segmento en curso.
+    """
+
+    def __init__(self):
+        self.cola = queue.Queue()
+        self.candado = threading.Lock()
+        self.hilo = None
+
+    def encolar(self, manifiesto, indice, escritor=None, compresion='gzip'):
+        """
+        Args:
+            manifiesto (Manifiesto): Manifiesto de la sesión
+            indice (int): Segmento a comprimir
+            escritor (EscritorCSV): Escritor del segmento, si sigue abierto
+                (se cierra en este hilo para no bloquear al lector)
+            compresion (str): 'gzip' o 'zstd'
+        """
+        self.cola.put((manifiesto, indice, escritor, compresion))
+        with self.candado:
+            if self.hilo is None or not self.hilo.is_alive():
+                self.hilo = threading.Thread(target=self._ciclo, name="compresor-segmentos")
+                self.hilo.start()
+
+    def esperar(self):
+        """Bloquea hasta que se terminen los trabajos encolados"""
+        self.cola.join()
+
+    def _ciclo(self):
+        while True:
+            try:
+                trabajo = self.cola.get(timeout=1.0)
+            except queue.Empty:
+                return
+            try:
+                self._procesar(*trabajo)
+            except Exception as e:
+                print(f"Error comprimiendo segmento: {e}")
+            finally:
+                self.cola.task_done()
+
+    def _procesar(self, manifiesto, indice, escritor, compresion):
+        if escritor is not None:
+            escritor.cerrar()
+        segmento = next((s for s in manifiesto.segmentos() if s['indice'] == indice), None)
+        if segmento is None or not os.path.exists(segmento['ruta']):
+            return
+        ruta = segmento['ruta']
+        bytes_texto = os.path.getsize(ruta)
+        if segmento['estado'] == 'escribiendo':
+            manifiesto.actualizar(indice, estado='cerrado', bytes=bytes_texto)
+        if not compresion:
+            return
+        destino = comprimir(ruta, compresion)
+        # Primero el manifiesto apunta al comprimido, después se borra el texto
+        manifiesto.actualizar(indice, archivo=os.path.basename(destino), estado='comprimido',
+                              bytes=bytes_texto, bytes_comprimido=os.path.getsize(destino))
+        os.remove(ruta)
+        # El comprimido lleva su propio CRC; el índice de puntos de control ya no aplica
+        if os.path.exists(ruta + '.idx'):
+            os.remove(ruta + '.idx')
+
+
+# Compresor compartido del proceso
+COMPRESOR = Compresor()
+
+
+def comprimir(ruta, compresion='gzip'):
+    """
+    Comprime ``ruta`` junto al original (que no se borra)
+
+    Returns:
+        str: Ruta del archivo comprimido
+    """
+    if compresion == 'zstd' and zstandard is None:
+        print("zstandard no está instalado (pip install zstandard); se usa gzip")
+        compresion = 'gzip'
+    destino = ruta + EXTENSIONES[compresion]
+    with open(ruta, 'rb') as origen:
+        if compresion == 'zstd':
+            with open(destino + '.tmp', 'wb') as f:
+                with zstandard.ZstdCompressor(level=3).stream_writer(f) as salida:
+                    shutil.copyfileobj(origen, salida, 1 << 20)
+        else:
+            with gzip.open(destino + '.tmp', 'wb', compresslevel=6) as salida:
+                shutil.copyfileobj(origen, salida, 1 << 20)
+    os.replace(destino + '.tmp', destino)
+    return destino
+
+
+def comprimir_pendientes(directorio, compresion=None):
+    """
+    Encola los segmentos cerrados que quedaron sin comprimir
+
+    Args:
+        directorio (str): Carpeta con los ``sesion_*.json``
+        compresion (str): Forzar un formato (por defecto, el de cada sesión)
+
+    Returns:
+        int: Segmentos encolados
+    """
+    encolados = 0
+    for ruta in sorted(glob.glob(os.path.join(directorio, 'sesion_*.json'))):
+        try:
+            manifiesto = Manifiesto.cargar(ruta)
+        except (OSError, ValueError) as e:
+            print(f"Manifiesto ilegible {ruta}: {e}")
+            continue
+        formato = compresion or manifiesto.datos.get('rotacion', {}).get('compresion')
+        if not formato:
+            continue
+        for segmento in manifiesto.segmentos():
+            if segmento['estado'] == 'cerrado' and os.path.exists(segmento['ruta']):
+                COMPRESOR.encolar(manifiesto, segmento['indice'], compresion=formato)
+                encolados += 1
+    return encolados
+
+
+def leer_segmentos(ruta_manifiesto, columnas=None):
+    """
+    Lee los segmentos de una sesión, en orden, aunque siga activa
+
+    Los segmentos en texto se leen con ``LogSesion`` (se omite la última
+    línea si se está escribiendo); los comprimidos, con pandas.
+
+    Args:
+        ruta_manifiesto (str): ``sesion_<fecha>.json``
+        columnas (list): Columnas a leer (None = todas)
+
+    Yields:
+        pandas.DataFrame: Filas de cada segmento
+    """
+    import pandas as pd
+
+    from .log_sesion import LogSesion
+
+    indices = [s['indice'] for s in Manifiesto.cargar(ruta_manifiesto).segmentos()]
+    for indice in indices:
+        # Se relee el manifiesto: el segmento pudo comprimirse mientras tanto
+        for _ in range(2):
+            segmento = next(s for s in Manifiesto.cargar(ruta_manifiesto).segmentos()
+                            if s['indice'] == indice)
+            try:
+                if segmento['estado'] == 'comprimido':
+                    bloques = [pd.read_csv(segmento['ruta'], usecols=columnas, na_values=['--'])]
+                else:
+                    bloques = list(LogSesion(segmento['ruta']).bloques(columnas=columnas))
+            except FileNotFoundError:
+                continue
+            if bloques:
+                yield pd.concat(bloques, ignore_index=True)
+            break
+
+
+def corrida_de_manifiesto(ruta_manifiesto):
+    """'.../sesion_<fecha>.json' -> 'datos_<fecha>', el nombre de la sesión sin rotar"""
+    nombre = os.path.splitext(os.path.basename(ruta_manifiesto))[0]
+    return 'datos_' + nombre[len('sesion_'):]
+
+
+def listar_corridas(directorio):
+    """
+    CSV sueltos y manifiestos de sesión de ``directorio``, sin los segmentos
+
+    Returns:
+        list: Rutas ordenadas; cada sesión segmentada aparece una sola vez,
+            como su ``sesion_<fecha>.json``
+    """
+    manifiestos = sorted(glob.glob(os.path.join(directorio, 'sesion_*.json')))
+    segmentos = set()
+    for ruta in manifiestos:
+        try:
+            archivos = [s['archivo'] for s in Manifiesto.cargar(ruta).datos['segmentos']]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Manifiesto ilegible {ruta}: {e}")
+            continue
+        for archivo in archivos:
+            # Mientras se comprime pueden existir el texto y el comprimido
+            segmentos.add(archivo)
+            for extension in EXTENSIONES.values():
+                if archivo.endswith(extension):
+                    segmentos.add(archivo[:-len(extension)])
+    sueltos = [ruta for ruta in glob.glob(os.path.join(directorio, '*.csv'))
+               if os.path.basename(ruta) not in segmentos]
+    return sorted(sueltos + manifiestos)
+
+
+def firma_sesion(ruta_manifiesto):
+    """
+    Returns:
+        tuple: (bytes, mtime) del manifiesto más sus segmentos existentes;
+            cambia al agregar filas al segmento activo, no solo al rotar
+    """
+    estado = os.stat(ruta_manifiesto)
+    tamano, mtime = estado.st_size, estado.st_mtime
+    for segmento in Manifiesto.cargar(ruta_manifiesto).segmentos():
+        try:
+            estado = os.stat(segmento['ruta'])
+        except OSError:
+            continue
+        tamano += estado.st_size
+        mtime = max(mtime, estado.st_mtime)
+    return tamano, mtime
+
+
+def abrir_texto(ruta):
+    """Abre un segmento en modo texto, comprimido o no, según su extensión"""
+    if ruta.endswith(EXTENSIONES['gzip']):
+        return gzip.open(ruta, 'rt', encoding='utf-8', errors='ignore', newline='')
+    if ruta.endswith(EXTENSIONES['zstd']):
+        if zstandard is None:
+            raise ImportError(f"{ruta} requiere zstandard (pip install zstandard)")
+        crudo = zstandard.ZstdDecompressor().stream_reader(open(ruta, 'rb'), closefd=True)
+        return io.TextIOWrapper(crudo, encoding='utf-8', errors='ignore', newline='')
+    return open(ruta, encoding='utf-8', errors='ignore', newline='')
+
+
+def abrir_segmentos(ruta_manifiesto):
+    """
+    Recorre los segmentos de una sesión en orden, abiertos en modo texto
+
+    Yields:
+        archivo de texto: Cada segmento, con su renglón de encabezado
+    """
+    indices = [s['indice'] for s in Manifiesto.cargar(ruta_manifiesto).segmentos()]
+    for indice in indices:
+        # Como en leer_segmentos: el segmento pudo comprimirse mientras tanto
+        for _ in range(2):
+            segmento = next(s for s in Manifiesto.cargar(ruta_manifiesto).segmentos()
+                            if s['indice'] == indice)
+            try:
+                archivo = abrir_texto(segmento['ruta'])
+            except FileNotFoundError:
+                continue
+            with archivo:
+                yield archivo
+            break
+
+
+def cargar_sesion(ruta_manifiesto, columnas=None):
+    """Todos los segmentos de una sesión en un solo DataFrame"""
+    import pandas as pd
+
+    partes = list(leer_segmentos(ruta_manifiesto, columnas))
+    return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
@@ -0,0 +1,192 @@
+"""
+Lectura de líneas desde el puerto serie sin sondeo activo
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+``abrir_puerto`` acepta, además del nombre de un puerto (COM3,
+/dev/ttyACM0), una dirección ``tcp://host:puerto`` del servicio de
+adquisición (comun/adquisicion.py). En ese caso devuelve una
+``ConexionRemota``, que se usa igual que un ``serial.Serial``.
+"""
+
+import select
+import socket
+import time
+
+import serial
+
+PREFIJO_REMOTO = "tcp://"
+
+
+def es_remoto(puerto):
+    """True si ``puerto`` es la dirección de un servicio de adquisición"""
+    return puerto.startswith(PREFIJO_REMOTO)
+
+
+def abrir_puerto(puerto, baudios, timeout=1):
+    """
+    Abre un puerto serie o una conexión al servicio de adquisición
+
+    Args:
+        puerto (str): 'COM3', '/dev/ttyACM0' o 'tcp://127.0.0.1:8765'
+        baudios (int): Velocidad (se ignora en conexiones remotas)
+        timeout (float): Tiempo máximo de espera de ``read``
+
+    Returns:
+        serial.Serial o ConexionRemota
+    """
+    if es_remoto(puerto):
+        host, _, numero = puerto[len(PREFIJO_REMOTO):].rpartition(':')
+        return ConexionRemota(host or '127.0.0.1', int(numero), timeout)
+    return serial.Serial(puerto, baudios, timeout=timeout)
+
+
+class ConexionRemota:
+    """
+    Conexión TCP con la misma interfaz que usan las GUIs de ``serial.Serial``.
+
+    A diferencia de ``socket://`` de pyserial, ``in_waiting`` devuelve el
+    número real de bytes recibidos, así que ``LectorLineas`` puede leer
+    ráfagas completas de una vez.
+    """
+
+    def __init__(self, host, puerto, timeout=1):
+        self.timeout = timeout
+        self.port = f"{PREFIJO_REMOTO}{host}:{puerto}"
+        self.sock = socket.create_connection((host, puerto), timeout=5)
+        self.buffer = bytearray()
+        self.is_open = True
+
+    def _recibir(self, espera):
+        listos, _, _ = select.select([self.sock], [], [], espera)
+        if not listos:
+            return
+        datos = self.sock.recv(65536)
+        if not datos:
+            self.is_open = False
+            raise serial.SerialException("El servicio de adquisición cerró la conexión")
+        self.buffer.extend(datos)
+
+    @property
+    def in_waiting(self):
+        if self.is_open:
+            self._recibir(0)
+        return len(self.buffer)
+
+    def read(self, size=1):
+        """Espera hasta ``timeout`` a que haya datos y devuelve hasta ``size`` bytes"""
+        limite = time.monotonic() + (self.timeout or 0)
+        while not self.buffer and self.is_open:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            self._recibir(restante)
+        datos = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return datos
+
+    def readline(self):
+        limite = time.monotonic() + (self.timeout or 0)
+        while b'\n' not in self.buffer and self.is_open:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            self._recibir(restante)
+        corte = self.buffer.find(b'\n') + 1 or len(self.buffer)
+        datos = bytes(self.buffer[:corte])
+        del self.buffer[:corte]
+        return datos
+
+    def write(self, datos):
+        self.sock.sendall(datos)
+        return len(datos)
+
+    def reset_input_buffer(self):
+        self.buffer.clear()
+
+    def close(self):
+        self.is_open = False
+        self.sock.close()
+
+
+class LectorLineas:
+    """
+    Divide en líneas el flujo de bytes de un puerto serie.
+
+    En lugar de preguntar por ``in_waiting`` en un ciclo sin pausa, cada
+    llamada a ``leer_lineas`` se bloquea en el sistema operativo hasta que
+    llega al menos un byte (o vence el ``timeout`` del puerto) y después lee
+    de una sola vez todo lo que esté en el buffer. Así el hilo de lectura
+    no consume CPU mientras el Arduino no envía nada, y las ráfagas se
+    procesan con pocas llamadas al sistema.
+    """
+
+    def __init__(self, conexion, max_linea=4096):
+        """
+        Args:
+            conexion: Objeto ``serial.Serial`` ya abierto (con ``timeout``
+                para que el hilo pueda revisar periódicamente si debe salir)
+            max_linea (int): Tamaño máximo de una línea sin salto; si se
+                excede, el fragmento se entrega tal cual para no crecer sin límite
+        """
+        self.conexion = conexion
+        self.max_linea = max_linea
+        self.pendiente = bytearray()
+
+    def leer_bytes(self):
+        """Espera datos y devuelve todos los bytes disponibles (b'' si venció el timeout)"""
+        datos = self.conexion.read(self.conexion.in_waiting or 1)
+        if datos:
+            resto = self.conexion.in_waiting
+            if resto:
+                datos += self.conexion.read(resto)
+        return datos
+
+    def leer_texto(self):
+        """
+        Devuelve el texto de todas las líneas completas recibidas desde la última llamada
+
+        Returns:
+            str: Texto decodificado terminado en '\\n' ('' si no llegó ninguna
+                línea completa); lo que quede después del último salto se
+                conserva para la siguiente llamada
+        """
+        return self.procesar_bytes(self.leer_bytes())
+
+    def procesar_bytes(self, datos):
+        """
+        Agrega bytes ya leídos (p. ej. con ``leer_bytes``) y devuelve el texto
+        de las líneas que quedaron completas, igual que ``leer_texto``
+        """
+        if not datos:
+            return ""
+        self.pendiente.extend(datos)
+
+        corte = self.pendiente.rfind(b'\n') + 1
+        if corte == 0:
+            if len(self.pendiente) <= self.max_linea:
+                return ""
+            corte = len(self.pendiente)
+        completo = bytes(self.pendiente[:corte])
+        del self.pendiente[:corte]
+        return completo.decode('utf-8', errors='ignore')
+
+    def leer_lineas(self):
+        """
+        Devuelve la lista de líneas completas recibidas desde la última llamada
+
+        Returns:
+            list: Líneas decodificadas y sin espacios en los extremos
+                (vacía si no llegó ninguna línea completa)
+        """
+        texto = self.leer_texto()
+        if not texto:
+            return []
+        lineas = texto.split('\n')
+        if not lineas[-1]:
+            lineas.pop()
+        return [linea.strip() for linea in lineas]
+
+    def reiniciar(self):
+        """Descarta cualquier línea incompleta pendiente"""
+        self.pendiente.clear()
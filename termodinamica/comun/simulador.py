@@ -0,0 +1,673 @@
+"""
+Simulador de los Arduinos de ambos equipos sobre un pseudo-terminal
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+Crea un pseudo-terminal (``/dev/pts/N``) que se comporta como el puerto del
+Arduino: imprime exactamente el mismo texto que los sketches y responde a
+los mismos comandos, así que las interfaces, el servicio de adquisición y
+los benchmarks se pueden probar sin hardware.
+
+- ``ArduinoPrimeraLey``: ``primeraley/arduino/control_actuador/arduino_motor_code.ino``
+  ("Pressure: 96.62 kPa | Temperature: 23.50 C", "Extension completada.",
+  comandos E, R, F, B, S, T:ms y P:pwm).
+- ``ArduinoSegundaLey``: ``segundaley/arduino/app.ino`` (bloques de
+  MostrarDatos, comandos S1:, S2:, M1:, M2:, TINIT:, TEST, START, STOP...).
+
+Cada uno genera datos con un modelo sencillo del equipo o reproduce las
+sesiones grabadas (``primeraley/python/presion_*.csv`` y
+``segundaley/logs/datos_*.csv``). El tiempo simulado avanza un periodo del
+sketch por trama (0.5 s), así que ``tasa`` solo cambia qué tan rápido
+transcurre: con la tasa por defecto se ve lo mismo que con el equipo; con
+miles de tramas/s se prueba el desempeño de lectura, registro y gráficas.
+
+Uso (desde termodinamica/, solo Linux/macOS):
+    python -m comun.simulador --equipo segundaley
+    python -m comun.simulador --equipo primeraley --tasa 5000 --reproducir
+    python -m comun.simulador --equipo segundaley --reproducir segundaley/logs/datos_20251208_*.csv
+"""
+
+import argparse
+import csv
+import glob
+import math
+import os
+import random
+import select
+import threading
+import time
+
+from .protocolo import ESTADOS_ENLACE, TramaSegundaLey
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_PRIMERA_LEY = os.path.join(RAIZ, 'primeraley', 'python')
+DIR_SEGUNDA_LEY = os.path.join(RAIZ, 'segundaley', 'logs')
+
+
+def _a_float(texto):
+    """``String.toFloat()`` de Arduino: 0.0 si el texto no es un número"""
+    try:
+        return float(texto)
+    except ValueError:
+        return 0.0
+
+
+def _a_int(texto):
+    """``String.toInt()`` de Arduino"""
+    try:
+        return int(float(texto))
+    except ValueError:
+        return 0
+
+
+def cargar_operaciones_primera_ley(rutas=None):
+    """
+    Lee los CSV de presión grabados por MotorControlGUI
+
+    Args:
+        rutas (list): Archivos a leer (por defecto todos los de primeraley/python/)
+
+    Returns:
+        list: Una tupla (operacion, [(presion, temperatura), ...]) por
+            archivo; temperatura es None donde se registró ERROR
+    """
+    if not rutas:
+        rutas = sorted(glob.glob(os.path.join(DIR_PRIMERA_LEY, 'presion_*.csv')))
+    operaciones = []
+    for ruta in rutas:
+        with open(ruta, newline='', encoding='utf-8') as f:
+            filas = list(csv.reader(f))
+        # Tres renglones de encabezado; el segundo trae el tipo de operación
+        tipo = filas[1][3] if len(filas) > 1 and len(filas[1]) > 3 else ''
+        operacion = 'retraction' if tipo.startswith('retrac') else 'extension'
+        muestras = []
+        for fila in filas[3:]:
+            try:
+                presion = float(fila[1])
+            except (IndexError, ValueError):
+                continue
+            try:
+                temperatura = float(fila[2])
+            except (IndexError, ValueError):
+                temperatura = None
+            muestras.append((presion, temperatura))
+        if muestras:
+            operaciones.append((operacion, muestras))
+    return operaciones
+
+
+def cargar_tramas_segunda_ley(rutas=None):
+    """
+    Lee las sesiones datos_*.csv grabadas por las interfaces de Segunda Ley
+
+    Args:
+        rutas (list): Archivos a leer (por defecto todos los de segundaley/logs/)
+
+    Returns:
+        list: Objetos ``TramaSegundaLey`` en orden
+    """
+    if not rutas:
+        rutas = sorted(glob.glob(os.path.join(DIR_SEGUNDA_LEY, 'datos_*.csv')))
+    tramas = []
+    for ruta in rutas:
+        with open(ruta, newline='', encoding='utf-8') as f:
+            for fila in csv.DictReader(f):
+                if fila.get('Estado_Sistema') in ESTADOS_ENLACE:
+                    continue
+                try:
+                    tramas.append(TramaSegundaLey.desde_fila_csv(fila))
+                except (KeyError, ValueError):
+                    pass
+    return tramas
+
+
+class ArduinoPrimeraLey:
+    """
+    Emula arduino_motor_code.ino: actuador con sensor MPX5700AP y termopar MAX6675.
+
+    El modelo comprime el gas de forma isotérmica mientras el vástago
+    avanza; la presión se cuantiza al paso del ADC de 10 bits y la
+    temperatura al de 0.25 °C del MAX6675, como en las lecturas reales.
+    """
+
+    PERIODO_S = 0.5  # lastSensorRead
+    BAUDIOS = 9600
+
+    def __init__(self, operaciones=None, semilla=None, presion_atm=96.62,
+                 temperatura_amb=24.0, compresion_por_s=0.047):
+        """
+        Args:
+            operaciones (list): Resultado de ``cargar_operaciones_primera_ley``
+                para reproducir; None genera datos con el modelo
+            semilla (int): Semilla del ruido (para corridas repetibles)
+            presion_atm (float): Presión con el vástago retraído (kPa)
+            temperatura_amb (float): Temperatura del termopar en reposo (°C)
+            compresion_por_s (float): Fracción del volumen que barre el
+                vástago por segundo a PWM 255
+        """
+        self.operaciones = operaciones
+        self.azar = random.Random(semilla)
+        self.presion_atm = presion_atm
+        self.temperatura_amb = temperatura_amb
+        self.compresion_por_s = compresion_por_s
+
+        self.motor_duration = 10000
+        self.manual_pwm = 128
+        self.extending = False
+        self.retracting = False
+        self.manual = 0  # +1 forward, -1 backward
+        self.tiempo_ms = 0.0
+        self.inicio_ms = 0.0
+        self.posicion = 0.0  # fracción de volumen desplazada (0 = retraído)
+        self.entrada = ""
+        self._reproduccion = self._reproducir() if operaciones else None
+
+    def bienvenida(self):
+        """Texto de setup()"""
+        return ("Sistema listo.\r\n"
+                "Comandos: E=extender | R=retraer | T:ms=tiempo | P:pwm=PWM | F=forward "
+                "| B=backward | S=stop\r\n"
+                f"Tiempo actual: {self.motor_duration} ms\r\n"
+                f"PWM manual: {self.manual_pwm}\r\n")
+
+    def comando(self, datos):
+        """
+        Procesa bytes recibidos carácter por carácter, igual que loop()
+
+        Returns:
+            str: Respuesta del sketch ('' si no imprime nada)
+        """
+        salida = []
+        for c in datos.decode('utf-8', errors='ignore'):
+            if c in 'Ee':
+                self.manual = 0
+                salida.append(self._iniciar('extension'))
+            elif c in 'Rr':
+                self.manual = 0
+                salida.append(self._iniciar('retraction'))
+            elif c in 'Ff':
+                self.extending = self.retracting = False
+                self.manual = 1
+                salida.append(f"Manual Forward - PWM: {self.manual_pwm}\r\n")
+            elif c in 'Bb':
+                self.extending = self.retracting = False
+                self.manual = -1
+                salida.append(f"Manual Backward - PWM: {self.manual_pwm}\r\n")
+            elif c in 'Ss':
+                self.extending = self.retracting = False
+                self.manual = 0
+                salida.append("Motor detenido.\r\n")
+            elif c == '\n':
+                salida.append(self._comando_compuesto(self.entrada.strip()))
+                self.entrada = ""
+            else:
+                self.entrada += c
+        return "".join(salida)
+
+    def _iniciar(self, operacion):
+        self.extending = operacion == 'extension'
+        self.retracting = not self.extending
+        self.inicio_ms = self.tiempo_ms
+        return "Extendiendo motor...\r\n" if self.extending else "Retrayendo motor...\r\n"
+
+    def _comando_compuesto(self, comando):
+        if comando[:2] in ('T:', 't:'):
+            valor = _a_int(comando[2:])
+            if 1000 <= valor <= 60000:
+                self.motor_duration = valor
+                return f"Tiempo actualizado a: {valor} ms\r\n"
+            return "Error: Tiempo debe estar entre 1000 y 60000 ms\r\n"
+        if comando[:2] in ('P:', 'p:'):
+            valor = _a_int(comando[2:])
+            if 0 <= valor <= 255:
+                self.manual_pwm = valor
+                return f"PWM manual actualizado a: {valor}\r\n"
+            return "Error: PWM debe estar entre 0 y 255\r\n"
+        return ""
+
+    def muestra(self):
+        """Texto de un periodo de loop(): la lectura de sensores y, si toca, el fin de operación"""
+        if self._reproduccion is not None:
+            return next(self._reproduccion)
+
+        # Movimiento del vástago durante el periodo
+        if self.extending or self.retracting:
+            velocidad = self.compresion_por_s if self.extending else -self.compresion_por_s
+        else:
+            velocidad = self.manual * self.compresion_por_s * self.manual_pwm / 255.0
+        self.posicion = min(max(self.posicion + velocidad * self.PERIODO_S, 0.0), 0.9)
+
+        # Isotérmico: P * V = cte; el ADC cuantiza la presión en pasos de ~0.76 kPa
+        presion = self.presion_atm / (1.0 - self.posicion)
+        cuentas = round(((presion * 4.5 / 700.0) + 0.2) * 1023.0 / 5.0) + self.azar.choice((-1, 0, 0, 1))
+        presion = ((cuentas * 5.0 / 1023.0) - 0.2) * 700.0 / 4.5
+        temperatura = self.temperatura_amb + 2.0 * self.posicion + self.azar.gauss(0.0, 0.2)
+        temperatura = round(temperatura * 4.0) / 4.0
+
+        texto = f"Pressure: {presion:.2f} kPa | Temperature: {temperatura:.2f} C\r\n"
+        self.tiempo_ms += self.PERIODO_S * 1000.0
+        if (self.extending or self.retracting) and self.tiempo_ms - self.inicio_ms >= self.motor_duration:
+            texto += "Extension completada.\r\n" if self.extending else "Retraccion completada.\r\n"
+            self.extending = self.retracting = False
+        return texto
+
+    def _reproducir(self):
+        """Repite las operaciones grabadas, cada una entre sus mensajes de inicio y fin"""
+        while True:
+            for operacion, muestras in self.operaciones:
+                extension = operacion == 'extension'
+                inicio = "Extendiendo motor...\r\n" if extension else "Retrayendo motor...\r\n"
+                for i, (presion, temperatura) in enumerate(muestras):
+                    if temperatura is None:
+                        texto = f"Pressure: {presion:.2f} kPa | Temperature: ERROR\r\n"
+                    else:
+                        texto = f"Pressure: {presion:.2f} kPa | Temperature: {temperatura:.2f} C\r\n"
+                    if i == 0:
+                        texto = inicio + texto
+                    if i == len(muestras) - 1:
+                        texto += "Extension completada.\r\n" if extension else "Retraccion completada.\r\n"
+                    yield texto
+
+
+class ArduinoSegundaLey:
+    """
+    Emula app.ino: dos bombas con PID de caudal, tres DS18B20 y arranque por temperatura.
+
+    El PID, los comandos y los mensajes son los del sketch. Los caudales
+    siguen al PWM con un retardo de primer orden y se miden contando
+    pulsos del YF-S201 (ruido de Poisson); las temperaturas se cuantizan a
+    0.5 °C (resolución de 9 bits).
+    """
+
+    PERIODO_S = 0.5
+    BAUDIOS = 115200
+    FACTOR_CONVERSION = 7.11
+
+    def __init__(self, tramas=None, semilla=None, temperatura_amb=25.0,
+                 temperatura_caliente=60.0, constante_termica_s=600.0,
+                 caudal_maximo=8.0):
+        """
+        Args:
+            tramas (list): Resultado de ``cargar_tramas_segunda_ley`` para
+                reproducir; None genera datos con el modelo
+            semilla (int): Semilla del ruido (para corridas repetibles)
+            temperatura_amb (float): Temperatura inicial y del sensor 3 (°C)
+            temperatura_caliente (float): Temperatura final del tanque caliente (°C)
+            constante_termica_s (float): Constante de tiempo del calentamiento
+            caudal_maximo (float): Caudal con PWM 255 (L/min)
+        """
+        self.tramas = tramas
+        self.indice = 0
+        self.azar = random.Random(semilla)
+        self.temperatura_amb = temperatura_amb
+        self.temperatura_caliente = temperatura_caliente
+        self.constante_termica_s = constante_termica_s
+        self.caudal_maximo = caudal_maximo
+
+        self.pwm = [200, 180]
+        self.auto = [False, False]
+        self.setpoint = [0.0, 0.0]
+        self.error = [0.0, 0.0]
+        self.error_anterior = [0.0, 0.0]
+        self.integral = [0.0, 0.0]
+        self.caudal_real = [0.0, 0.0]
+        self.caudal = [0.0, 0.0]
+        self.volumen = [0.0, 0.0]
+        self.temp_inicial_setpoint = 0.0
+        self.temp_inicial_alcanzada = False
+        self.modo_test = False
+        self.sistema_iniciado = False
+        self.tiempo_s = 0.0
+        self.entrada = ""
+
+    def bienvenida(self):
+        """Texto de setup()"""
+        return "\r\n".join([
+            "Sistema de control de caudal con temperatura inicial",
+            "Comandos:",
+            "  r = reset volumenes",
+            "  S1:X = setpoint bomba 1 (L/min)",
+            "  S2:X = setpoint bomba 2 (L/min)",
+            "  M1:X = PWM manual bomba 1 (0-255)",
+            "  M2:X = PWM manual bomba 2 (0-255)",
+            "  TINIT:X = temperatura inicial (C)",
+            "  TEST = activar modo test",
+            "  NORMAL = modo normal",
+            "  START = iniciar sistema",
+            "  STOP = detener sistema",
+            "  OFF = apagar bombas",
+            "  STATUS = estado del sistema\n",
+        ]) + "\r\n"
+
+    def comando(self, datos):
+        """
+        Procesa las líneas completas recibidas (``readStringUntil('\\n')``)
+
+        Returns:
+            str: Respuesta del sketch ('' si no imprime nada)
+        """
+        self.entrada += datos.decode('utf-8', errors='ignore')
+        salida = []
+        while '\n' in self.entrada:
+            linea, self.entrada = self.entrada.split('\n', 1)
+            salida.append(self._comando(linea.strip()))
+        return "".join(salida)
+
+    def _comando(self, comando):
+        if comando in ('r', 'R'):
+            self.volumen = [0.0, 0.0]
+            return "Volumenes reiniciados\r\n"
+        if comando[:3] in ('S1:', 'S2:'):
+            i = int(comando[1]) - 1
+            valor = _a_float(comando[3:])
+            self.setpoint[i] = valor
+            self.auto[i] = valor > 0
+            return f"Setpoint Bomba {i + 1}: {valor:.2f}\r\n"
+        if comando[:3] in ('M1:', 'M2:'):
+            i = int(comando[1]) - 1
+            self.pwm[i] = min(max(_a_int(comando[3:]), 0), 255)
+            self.auto[i] = False
+            return f"PWM Manual Bomba {i + 1}: {self.pwm[i]}\r\n"
+        if comando.startswith('TINIT:'):
+            valor = _a_float(comando[6:])
+            self.temp_inicial_setpoint = valor
+            self.temp_inicial_alcanzada = False
+            self.sistema_iniciado = False
+            return f"Temperatura inicial configurada: {valor:.2f} C\r\n"
+        if comando == 'TEST':
+            self.modo_test = True
+            self.sistema_iniciado = True
+            return "MODO TEST ACTIVADO - Sistema iniciado\r\n"
+        if comando == 'NORMAL':
+            self.modo_test = False
+            self.sistema_iniciado = False
+            self.temp_inicial_alcanzada = False
+            return "MODO NORMAL - Sistema detenido\r\n"
+        if comando == 'START':
+            if self.modo_test or self.temp_inicial_alcanzada:
+                self.sistema_iniciado = True
+                return "Sistema INICIADO manualmente\r\n"
+            return "ERROR: Temperatura inicial no alcanzada\r\n"
+        if comando in ('STOP', 'OFF'):
+            self.sistema_iniciado = False
+            self.pwm = [0, 0]
+            self.auto = [False, False]
+            return "Sistema DETENIDO\r\n" if comando == 'STOP' else "Bombas apagadas\r\n"
+        if comando == 'STATUS':
+            return (f"=== ESTADO DEL SISTEMA ===\r\n"
+                    f"Temperatura setpoint: {self.temp_inicial_setpoint:.2f}\r\n"
+                    f"Temperatura alcanzada: {'SI' if self.temp_inicial_alcanzada else 'NO'}\r\n"
+                    f"Modo test: {'SI' if self.modo_test else 'NO'}\r\n"
+                    f"Sistema iniciado: {'SI' if self.sistema_iniciado else 'NO'}\r\n"
+                    f"========================\r\n")
+        return ""
+
+    def muestra(self):
+        """Texto de un periodo de loop(): aviso de temperatura (si toca) y bloque de MostrarDatos"""
+        if self.tramas:
+            trama = self.tramas[self.indice % len(self.tramas)]
+            self.indice += 1
+            return trama.a_texto()
+
+        dt = self.PERIODO_S
+        self.tiempo_s += dt
+        texto = ""
+
+        # Temperaturas: el tanque caliente se acerca a su valor final; el
+        # sensor 2 mezcla ambas corrientes según los caudales
+        t1 = self.temperatura_caliente - (self.temperatura_caliente - self.temperatura_amb) * \
+            math.exp(-self.tiempo_s / self.constante_termica_s)
+        total = self.caudal_real[0] + self.caudal_real[1]
+        fraccion = self.caudal_real[0] / total if total > 0.05 else 0.5
+        t3 = self.temperatura_amb
+        t2 = t3 + (t1 - t3) * fraccion
+        t1, t2, t3 = (round((t + self.azar.gauss(0.0, 0.1)) * 2.0) / 2.0 for t in (t1, t2, t3))
+
+        if (not self.sistema_iniciado and not self.modo_test and self.temp_inicial_setpoint != 0
+                and t1 >= self.temp_inicial_setpoint and not self.temp_inicial_alcanzada):
+            self.temp_inicial_alcanzada = True
+            self.sistema_iniciado = True
+            texto += "*** TEMPERATURA INICIAL ALCANZADA - SISTEMA INICIADO ***\r\n"
+
+        for i in (0, 1):
+            # Bomba con retardo de primer orden; arranca a partir de PWM ~40
+            pwm = self.pwm[i] if self.sistema_iniciado else 0
+            objetivo = max(0.0, (pwm - 40) / 215.0) * self.caudal_maximo
+            self.caudal_real[i] += (objetivo - self.caudal_real[i]) * min(1.0, dt / 0.8)
+            pulsos = self._poisson(self.caudal_real[i] * self.FACTOR_CONVERSION * dt)
+            self.caudal[i] = pulsos / dt / self.FACTOR_CONVERSION
+            self.volumen[i] += self.caudal[i] * (dt / 60.0)
+            if self.sistema_iniciado:
+                self._pid(i, dt)
+
+        if self.modo_test:
+            sistema = "MODO TEST"
+        elif self.sistema_iniciado:
+            sistema = "EN OPERACION"
+        elif self.temp_inicial_setpoint > 0:
+            sistema = f"ESPERANDO TEMP ({self.temp_inicial_setpoint:.1f} C)"
+        else:
+            sistema = "DETENIDO"
+
+        trama = TramaSegundaLey(
+            sistema=sistema, temp1=t1, temp2=t2, temp3=t3,
+            caudal1=self.caudal[0], caudal2=self.caudal[1],
+            volumen1=self.volumen[0], volumen2=self.volumen[1],
+            pwm1=self.pwm[0], pwm2=self.pwm[1],
+            modo1="AUTO" if self.auto[0] else "MANUAL",
+            modo2="AUTO" if self.auto[1] else "MANUAL",
+            setpoint1=self.setpoint[0] if self.auto[0] else None,
+            setpoint2=self.setpoint[1] if self.auto[1] else None,
+            error1=self.error[0] if self.auto[0] else None,
+            error2=self.error[1] if self.auto[1] else None)
+        return texto + trama.a_texto()
+
+    def _pid(self, i, dt):
+        """ControlPID_Bomba1/2 del sketch (PWM incremental)"""
+        if not self.auto[i] or self.setpoint[i] == 0:
+            return
+        error = self.setpoint[i] - self.caudal[i]
+        self.integral[i] = min(max(self.integral[i] + error * dt, -50.0), 50.0)
+        ajuste = 20.0 * error + 5.0 * self.integral[i] + 2.0 * (error - self.error_anterior[i]) / dt
+        self.pwm[i] = min(max(self.pwm[i] + int(ajuste), 0), 255)
+        self.error[i] = error
+        self.error_anterior[i] = error
+
+    def _poisson(self, media):
+        """Pulsos contados en un periodo (aproximación normal para medias grandes)"""
+        if media <= 0:
+            return 0
+        if media > 30:
+            return max(0, round(self.azar.gauss(media, math.sqrt(media))))
+        limite, k, p = math.exp(-media), 0, 1.0
+        while True:
+            p *= self.azar.random()
+            if p <= limite:
+                return k
+            k += 1
+
+
+class Simulador:
+    """
+    Conecta un Arduino emulado a un pseudo-terminal.
+
+    Uso:
+        simulador = Simulador(ArduinoSegundaLey(), tasa=1000)
+        simulador.iniciar()
+        serial.Serial(simulador.puerto, 115200)   # o la interfaz, con ese puerto
+        ...
+        simulador.detener()
+    """
+
+    def __init__(self, arduino, tasa=None, tramas=None, lote_max=1000, arranque_s=0.0):
+        """
+        Args:
+            arduino: ``ArduinoPrimeraLey`` o ``ArduinoSegundaLey``
+            tasa (float): Tramas por segundo (None = la del equipo real;
+                0 = tan rápido como lo acepte el lector)
+            tramas (int): Detenerse después de enviar este número (None = sin límite)
+            lote_max (int): Máximo de tramas que se juntan en una sola escritura
+            arranque_s (float): Espera antes del mensaje de arranque, como el
+                bootloader y el setup() del equipo después del reinicio
+        """
+        self.arduino = arduino
+        self.tasa = 1.0 / arduino.PERIODO_S if tasa is None else tasa
+        self.tramas = tramas
+        self.lote_max = lote_max
+        self.arranque_s = arranque_s
+        self.puerto = None
+        self.maestro = None
+        self.esclavo = None
+        self.activo = False
+        self.hilo = None
+        self.enviadas = 0
+        self.bytes_enviados = 0
+        self.inicio = None
+        self.fin = None
+
+    def iniciar(self):
+        """Crea el pseudo-terminal, imprime el mensaje de arranque y empieza a enviar tramas"""
+        import tty  # solo existe en sistemas POSIX
+
+        self.maestro, self.esclavo = os.openpty()
+        tty.setraw(self.esclavo)
+        self.puerto = os.ttyname(self.esclavo)
+        self.activo = True
+        self.hilo = threading.Thread(target=self._ejecutar, daemon=True)
+        self.hilo.start()
+        return self.puerto
+
+    def _ejecutar(self):
+        limite = time.perf_counter() + self.arranque_s
+        while self.activo and time.perf_counter() < limite:
+            time.sleep(max(0.0, min(0.05, limite - time.perf_counter())))
+        self._escribir(self.arduino.bienvenida().encode('utf-8'))
+        self.inicio = time.perf_counter()
+        try:
+            while self.activo and (self.tramas is None or self.enviadas < self.tramas):
+                if self.tasa > 0:
+                    debidas = int((time.perf_counter() - self.inicio) * self.tasa) + 1
+                else:
+                    debidas = self.enviadas + self.lote_max
+                if self.tramas is not None:
+                    debidas = min(debidas, self.tramas)
+                lote = min(debidas - self.enviadas, self.lote_max)
+                if lote > 0:
+                    texto = "".join(self.arduino.muestra() for _ in range(lote))
+                    if not self._escribir(texto.encode('utf-8')):
+                        break
+                    self.enviadas += lote
+                    self._atender_comandos(0)
+                else:
+                    siguiente = self.inicio + (self.enviadas + 1) / self.tasa
+                    self._atender_comandos(max(0.0, siguiente - time.perf_counter()))
+        except OSError:
+            pass
+        self.fin = time.perf_counter()
+        # Sigue respondiendo comandos hasta que se detenga
+        while self.activo:
+            try:
+                self._atender_comandos(0.1)
+            except OSError:
+                break
+
+    def _atender_comandos(self, espera):
+        listos, _, _ = select.select([self.maestro], [], [], espera)
+        if listos:
+            respuesta = self.arduino.comando(os.read(self.maestro, 4096))
+            if respuesta:
+                self._escribir(respuesta.encode('utf-8'))
+
+    def _escribir(self, datos):
+        """Escribe todo ``datos``; si el lector no consume, espera sin bloquear ``detener``"""
+        vista = memoryview(datos)
+        while vista and self.activo:
+            _, listos, _ = select.select([], [self.maestro], [], 0.2)
+            if listos:
+                escritos = os.write(self.maestro, vista)
+                self.bytes_enviados += escritos
+                vista = vista[escritos:]
+        return not vista
+
+    @property
+    def terminado(self):
+        """True cuando ya se enviaron las ``tramas`` pedidas"""
+        return self.fin is not None
+
+    @property
+    def tasa_real(self):
+        """Tramas por segundo enviadas hasta ahora"""
+        if self.inicio is None:
+            return 0.0
+        transcurrido = (self.fin or time.perf_counter()) - self.inicio
+        return self.enviadas / transcurrido if transcurrido > 0 else 0.0
+
+    def detener(self):
+        self.activo = False
+        if self.hilo:
+            self.hilo.join(timeout=2)
+        for fd in (self.esclavo, self.maestro):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.maestro = self.esclavo = None
+
+
+def crear_arduino(equipo, reproducir=None, semilla=None):
+    """
+    Args:
+        equipo (str): 'primeraley' o 'segundaley'
+        reproducir (list): None para el modelo; lista de archivos (vacía =
+            todas las sesiones grabadas del equipo) para reproducirlos
+        semilla (int): Semilla del ruido del modelo
+    """
+    if equipo == 'primeraley':
+        operaciones = None
+        if reproducir is not None:
+            operaciones = cargar_operaciones_primera_ley(reproducir)
+            if not operaciones:
+                raise ValueError("No se encontraron CSV de presión para reproducir")
+        return ArduinoPrimeraLey(operaciones, semilla=semilla)
+    tramas = None
+    if reproducir is not None:
+        tramas = cargar_tramas_segunda_ley(reproducir)
+        if not tramas:
+            raise ValueError("No se encontraron sesiones datos_*.csv para reproducir")
+    return ArduinoSegundaLey(tramas, semilla=semilla)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--equipo', choices=('primeraley', 'segundaley'), default='segundaley')
+    parser.add_argument('--tasa', type=float,
+                        help="tramas por segundo (por defecto la del equipo real; 0 = sin pausa)")
+    parser.add_argument('--tramas', type=int, help="número de tramas a enviar (por defecto sin límite)")
+    parser.add_argument('--reproducir', nargs='*', metavar='CSV',
+                        help="reproducir sesiones grabadas (sin archivos = todas las del equipo)")
+    parser.add_argument('--semilla', type=int, help="semilla del ruido del modelo")
+    parser.add_argument('--arranque', type=float, default=0.0,
+                        help="segundos antes del mensaje de arranque (bootloader + setup)")
+    args = parser.parse_args()
+
+    rutas = None
+    if args.reproducir is not None:
+        rutas = [r for patron in args.reproducir for r in sorted(glob.glob(patron))]
+    simulador = Simulador(crear_arduino(args.equipo, rutas, args.semilla), args.tasa, args.tramas,
+                          arranque_s=args.arranque)
+    puerto = simulador.iniciar()
+    print(f"Puerto simulado ({args.equipo}, {simulador.arduino.BAUDIOS} baudios): {puerto}")
+    print("Ctrl+C para terminar")
+    try:
+        while simulador.hilo.is_alive():
+            time.sleep(5)
+            print(f"{simulador.enviadas} tramas | {simulador.bytes_enviados / 1024:.0f} KiB "
+                  f"| {simulador.tasa_real:.1f} tramas/s")
+    except KeyboardInterrupt:
+        pass
+    simulador.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Trabajo de frontera ∫P dV de las corridas de Primera Ley
+Autor: obieuan
+Repositorio: https://github.com/obieuan/laboratorioTermodinamica
+
+El volumen se reconstruye a partir de la carrera del actuador en lugar de
+repartirlo por número de muestra: el actuador se mueve a velocidad
+constante durante la operación, así que el émbolo avanza en proporción al
+tiempo real transcurrido (columna ``Timestamp``), aunque las lecturas
+lleguen a intervalos irregulares de ~500 ms.
+
+    V(t) = A · (x_residual + x(t))
+    x(t) = x_max · (1 - t/duración)   en extensión (compresión)
+    x(t) = x_max · t/duración         en retracción (expansión)
+
+con A = π(D/2)², D = 46 mm y x_max el desplazamiento de cada dataset
+(tabla de examen/README.md). El residual de 1 mm es el mismo que usa el
+examen para evitar V = 0.
+
+``trabajo_campana`` calcula el trabajo de muchas corridas con una sola
+operación de NumPy: rellena las corridas a la misma longitud y aplica la
+regla del trapecio por filas.
+
+Convención de signo: trabajo hecho por el gas, W = ∫P dV (negativo al
+comprimir, positivo al expandir).
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+DIAMETRO_M = 0.046
+RESIDUAL_M = 0.001
+
+# Desplazamiento máximo del émbolo por dataset del examen (mm)
+DESPLAZAMIENTOS_MM = {1: 8.3, 2: 8.2, 3: 12.2, 4: 12.0, 5: 12.2,
+                      6: 12.3, 7: 11.9, 8: 11.0, 9: 10.9, 10: 10.8}
+
+# np.trapz se eliminó en NumPy 2.x a favor de np.trapezoid (NumPy >= 2.0)
+_trapecio = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def area_piston(diametro_m=DIAMETRO_M):
+    """Área transversal del cilindro en m²"""
+    return math.pi * (diametro_m / 2.0) ** 2
+
+
+def volumen(t_s, desplazamiento_m, compresion=True, duracion_s=None,
+            diametro_m=DIAMETRO_M, residual_m=RESIDUAL_M):
+    """
+    Volumen del cilindro en cada instante
+
+    Args:
+        t_s (array): Segundos desde el inicio de la operación
+        desplazamiento_m (float): Carrera máxima del émbolo en metros
+        compresion (bool): True en extensión, False en retracción
+        duracion_s (float): Duración de la carrera (por defecto, el último
+            tiempo de ``t_s``; con el ``T:`` del sketch si se conoce)
+        diametro_m (float): Diámetro del cilindro
+        residual_m (float): Longitud que queda al final de la compresión
+
+    Returns:
+        numpy.ndarray: Volumen en m³, del mismo tamaño que ``t_s``
+    """
+    t_s = np.asarray(t_s, dtype=float)
+    if duracion_s is None:
+        duracion_s = t_s[-1] if len(t_s) else 0.0
+    if duracion_s > 0:
+        avance = np.clip(t_s / duracion_s, 0.0, 1.0)
+    else:
+        avance = np.zeros_like(t_s)
+    if compresion:
+        avance = 1.0 - avance
+    return area_piston(diametro_m) * (residual_m + desplazamiento_m * avance)
+
+
+def tiempo_relativo(timestamps):
+    """Segundos desde la primera marca de tiempo (texto o datetime)"""
+    tiempos = pd.to_datetime(pd.Series(timestamps), errors='coerce')
+    return (tiempos - tiempos.iloc[0]).dt.total_seconds().to_numpy()
+
+
+def cargar_corrida(ruta):
+    """
+    Lee un CSV de presión de Primera Ley
+
+    Returns:
+        tuple: (t_s, presion_kpa, compresion); se descartan las filas sin
+            presión o sin marca de tiempo válida
+    """
+    with open(ruta, encoding='utf-8', errors='ignore') as f:
+        f.readline()
+        metadatos = f.readline().strip().split(',')
+    tipo = metadatos[3] if len(metadatos) > 3 and metadatos[3] else str(ruta)
+    df = pd.read_csv(ruta, skiprows=2)
+    t_s = tiempo_relativo(df['Timestamp'])
+    presion = pd.to_numeric(df['Presion (kPa)'], errors='coerce').to_numpy(dtype=float)
+    validos = ~(np.isnan(t_s) | np.isnan(presion))
+    return t_s[validos], presion[validos], 'retrac' not in tipo.lower()
+
+
+def trabajo(t_s, presion_kpa, desplazamiento_m, compresion=True, duracion_s=None,
+            diametro_m=DIAMETRO_M, residual_m=RESIDUAL_M):
+    """
+    Trabajo de una corrida integrando P dV sobre la base de tiempo real
+
+    Args:
+        t_s (array): Segundos desde el inicio de la operación
+        presion_kpa (array): Presión absoluta en kPa
+        desplazamiento_m (float): Carrera máxima del émbolo en metros
+        compresion (bool): True en extensión, False en retracción
+        duracion_s, diametro_m, residual_m: Ver ``volumen``
+
+    Returns:
+        dict: 'W_J' (∫P dV), 'W_isotermico_J' (P̄·V₀·ln(V_f/V₀), paso 5.2 del
+            examen), 'V_inicial_m3', 'V_final_m3' y 'P_promedio_kPa'
+    """
+    t_s = np.asarray(t_s, dtype=float)
+    presion_pa = np.asarray(presion_kpa, dtype=float) * 1000.0
+    v = volumen(t_s, desplazamiento_m, compresion, duracion_s, diametro_m, residual_m)
+    if len(t_s) < 2:
+        return {'W_J': np.nan, 'W_isotermico_J': np.nan, 'V_inicial_m3': np.nan,
+                'V_final_m3': np.nan, 'P_promedio_kPa': np.nan}
+    # Promedio de presión ponderado por tiempo (las muestras no son equiespaciadas)
+    duracion_muestras = t_s[-1] - t_s[0]
+    if duracion_muestras > 0:
+        p_promedio = _trapecio(presion_pa, t_s) / duracion_muestras
+    else:
+        p_promedio = presion_pa.mean()
+    return {
+        'W_J': float(_trapecio(presion_pa, v)),
+        'W_isotermico_J': float(p_promedio * v[0] * math.log(v[-1] / v[0])),
+        'V_inicial_m3': float(v[0]),
+        'V_final_m3': float(v[-1]),
+        'P_promedio_kPa': float(p_promedio / 1000.0),
+    }
+
+
+def trabajo_campana(corridas, desplazamientos_m, compresion=True, duracion_s=None,
+                    diametro_m=DIAMETRO_M, residual_m=RESIDUAL_M):
+    """
+    Trabajo de muchas corridas a la vez
+
+    Las corridas se rellenan con NaN hasta la más larga y la regla del
+    trapecio se aplica por filas; los tramos con relleno no suman.
+
+    Args:
+        corridas (list): Pares (t_s, presion_kpa) de cada corrida
+        desplazamientos_m (array): Carrera de cada corrida en metros (o un
+            solo valor para todas)
+        compresion (bool o array): Tipo de operación de cada corrida
+        duracion_s (float o array): Duración de la carrera (por defecto el
+            último tiempo de cada corrida)
+        diametro_m, residual_m: Ver ``volumen``
+
+    Returns:
+        numpy.ndarray: W en J por corrida (NaN si tiene menos de 2 muestras)
+    """
+    n = len(corridas)
+    if not n:
+        return np.array([])
+    largo = max(len(t) for t, _ in corridas)
+    t = np.full((n, largo), np.nan)
+    p = np.full((n, largo), np.nan)
+    for i, (t_s, presion_kpa) in enumerate(corridas):
+        t[i, :len(t_s)] = t_s
+        p[i, :len(presion_kpa)] = presion_kpa
+
+    x_max = np.broadcast_to(np.asarray(desplazamientos_m, dtype=float), (n,))
+    comprime = np.broadcast_to(np.asarray(compresion, dtype=bool), (n,))
+    if duracion_s is None:
+        duracion = np.nanmax(t, axis=1)
+    else:
+        duracion = np.broadcast_to(np.asarray(duracion_s, dtype=float), (n,))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avance = np.clip(t / duracion[:, None], 0.0, 1.0)
+    avance = np.where(duracion[:, None] > 0, avance, 0.0)
+    avance = np.where(comprime[:, None], 1.0 - avance, avance)
+    v = area_piston(diametro_m) * (residual_m + x_max[:, None] * avance)
+
+    # Regla del trapecio por filas; NaN del relleno -> tramo nulo
+    tramos = 0.5 * (p[:, 1:] + p[:, :-1]) * 1000.0 * np.diff(v, axis=1)
+    w = np.nansum(tramos, axis=1)
+    muestras = np.array([len(t_s) for t_s, _ in corridas])
+    w[muestras < 2] = np.nan
+    return w
+
+
+def trabajo_archivos(rutas, desplazamientos_mm, duracion_s=None, diametro_m=DIAMETRO_M):
+    """
+    Trabajo de una campaña completa a partir de sus CSV
+
+    Args:
+        rutas (list): CSV de presión de Primera Ley
+        desplazamientos_mm (list): Desplazamiento de cada archivo en mm
+            (p. ej. ``[DESPLAZAMIENTOS_MM[i] for i in range(1, 11)]``)
+        duracion_s (float): Duración de la carrera, si se conoce
+        diametro_m (float): Diámetro del cilindro
+
+    Returns:
+        pandas.DataFrame: 'Archivo', 'Operacion', 'Desplazamiento (mm)',
+            'Muestras', 'Duracion (s)' y 'W (J)'
+    """
+    corridas, compresiones = [], []
+    for ruta in rutas:
+        t_s, presion, compresion = cargar_corrida(ruta)
+        corridas.append((t_s, presion))
+        compresiones.append(compresion)
+    w = trabajo_campana(corridas, np.asarray(desplazamientos_mm, dtype=float) / 1000.0,
+                        compresiones, duracion_s, diametro_m)
+    return pd.DataFrame({
+        'Archivo': [str(r) for r in rutas],
+        'Operacion': ['extension' if c else 'retraccion' for c in compresiones],
+        'Desplazamiento (mm)': desplazamientos_mm,
+        'Muestras': [len(t) for t, _ in corridas],
+        'Duracion (s)': [t[-1] if len(t) else np.nan for t, _ in corridas],
+        'W (J)': w,
+    })
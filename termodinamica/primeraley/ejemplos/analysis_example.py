@@ -8,20 +8,38 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from pathlib import Path
+from multiprocessing import Pool
 import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from comun.estadisticas import CACHE, describir
+from comun.trabajo import DESPLAZAMIENTOS_MM, tiempo_relativo, trabajo
+
+COLUMNAS = {'presion': 'Presion (kPa)', 'temperatura': 'Temperatura (C)'}
 
 
 class AnalizadorTermodinamico:
     """Clase para analizar datos de experimentos de compresión/expansión"""
     
-    def __init__(self, archivo_csv):
+    def __init__(self, archivo_csv, convertir_tiempo=True):
         """
         Inicializa el analizador con un archivo CSV
         
         Args:
             archivo_csv (str): Ruta al archivo CSV del experimento
+            convertir_tiempo (bool): Si False, el Timestamp se deja como texto
+                (las estadísticas no lo usan y to_datetime es lo más lento de la carga)
         """
         self.archivo = archivo_csv
+        self.convertir_tiempo = convertir_tiempo
+        # Huella del contenido leído: las estadísticas se memorizan con ella
+        try:
+            self.huella = CACHE.huella(archivo_csv)
+        except OSError:
+            self.huella = None
         self.df = self.cargar_datos()
         self.tipo_experimento = self.detectar_tipo()
         
@@ -32,10 +50,11 @@ class AnalizadorTermodinamico:
             df = pd.read_csv(self.archivo, skiprows=2)
             
             # Convertir timestamp a datetime si es posible
-            try:
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-            except:
-                print("No se pudo convertir timestamp a datetime")
+            if self.convertir_tiempo:
+                try:
+                    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+                except:
+                    print("No se pudo convertir timestamp a datetime")
             
             return df
         except Exception as e:
@@ -52,25 +71,64 @@ class AnalizadorTermodinamico:
         else:
             return 'Desconocido'
     
-    def estadisticas_basicas(self):
-        """Calcula estadísticas básicas del experimento"""
+    def estadisticas(self):
+        """
+        Estadísticos de presión y temperatura (ver comun/estadisticas.py)
+        
+        Se calculan una sola vez por contenido de archivo: otras llamadas,
+        u otro analizador sobre el mismo CSV sin cambios, reutilizan el
+        resultado.
+        
+        Returns:
+            dict: ``{'presion': {...}, 'temperatura': {...}}`` con n, inicial,
+                final, min, max, rango, media, std, varianza, cv y cuantiles
+                (None si no hay datos)
+        """
         if self.df is None or self.df.empty:
             return None
         
-        presion = self.df['Presion (kPa)']
+        def calcular():
+            nombres = [n for n, c in COLUMNAS.items() if c in self.df]
+            matriz = self.df[[COLUMNAS[n] for n in nombres]].apply(pd.to_numeric, errors='coerce')
+            return describir(matriz.to_numpy(dtype=float), nombres)
+        
+        if self.huella is None:
+            return calcular()
+        return CACHE.obtener(self.archivo, 'estadisticas', calcular, self.huella)
+    
+    def estadisticas_basicas(self):
+        """Calcula estadísticas básicas del experimento"""
+        todas = self.estadisticas()
+        if not todas:
+            return None
         
+        presion = todas['presion']
         stats = {
             'Tipo': self.tipo_experimento,
-            'Presión Inicial (kPa)': presion.iloc[0],
-            'Presión Final (kPa)': presion.iloc[-1],
-            'Presión Máxima (kPa)': presion.max(),
-            'Presión Mínima (kPa)': presion.min(),
-            'Presión Promedio (kPa)': presion.mean(),
-            'Cambio de Presión (kPa)': presion.iloc[-1] - presion.iloc[0],
-            'Desviación Estándar (kPa)': presion.std(),
-            'Número de Muestras': len(presion)
+            'Presión Inicial (kPa)': presion['inicial'],
+            'Presión Final (kPa)': presion['final'],
+            'Presión Máxima (kPa)': presion['max'],
+            'Presión Mínima (kPa)': presion['min'],
+            'Presión Promedio (kPa)': presion['media'],
+            'Cambio de Presión (kPa)': presion['final'] - presion['inicial'],
+            'Desviación Estándar (kPa)': presion['std'],
+            'Número de Muestras': len(self.df),
+            # Paso 1.2 del examen (examen/README.md)
+            'Varianza (kPa²)': presion['varianza'],
+            'Coeficiente de Variación (%)': presion['cv'],
+            'Presión Q1 (kPa)': presion['q25'],
+            'Presión Mediana (kPa)': presion['q50'],
+            'Presión Q3 (kPa)': presion['q75'],
         }
         
+        temperatura = todas.get('temperatura')
+        if temperatura:
+            stats.update({
+                'Temperatura Promedio (C)': temperatura['media'],
+                'Desviación Estándar Temperatura (C)': temperatura['std'],
+                'Rango de Temperatura (C)': temperatura['rango'],
+            })
+        
         return stats
     
     def graficar_presion_vs_tiempo(self, guardar=False):
@@ -84,6 +142,8 @@ class AnalizadorTermodinamico:
             print("No hay datos para graficar")
             return
         
+        promedio = self.estadisticas()['presion']['media']
+        
         plt.figure(figsize=(12, 6))
         plt.plot(range(len(self.df)), self.df['Presion (kPa)'], 
                 linewidth=2, color='#2E86AB', marker='o', markersize=4)
@@ -95,9 +155,9 @@ class AnalizadorTermodinamico:
         plt.grid(True, alpha=0.3, linestyle='--')
         
         # Añadir líneas de referencia
-        plt.axhline(y=self.df['Presion (kPa)'].mean(), 
+        plt.axhline(y=promedio, 
                    color='red', linestyle='--', 
-                   label=f'Promedio: {self.df["Presion (kPa)"].mean():.2f} kPa', 
+                   label=f'Promedio: {promedio:.2f} kPa', 
                    alpha=0.7)
         
         plt.legend()
@@ -110,31 +170,36 @@ class AnalizadorTermodinamico:
         
         plt.show()
     
-    def estimar_trabajo(self, volumen_inicial, volumen_final):
+    def estimar_trabajo(self, desplazamiento_mm, diametro_mm=46.0, duracion_s=None):
         """
         Estima el trabajo termodinámico usando integración numérica
         W = ∫P dV
         
+        El volumen se obtiene de la carrera del émbolo sobre el tiempo real
+        de cada muestra (ver comun/trabajo.py), no del número de muestra.
+        
         Args:
-            volumen_inicial (float): Volumen inicial en litros
-            volumen_final (float): Volumen final en litros
+            desplazamiento_mm (float): Desplazamiento máximo del émbolo en mm
+                (tabla de examen/README.md, ``DESPLAZAMIENTOS_MM``)
+            diametro_mm (float): Diámetro del cilindro en mm
+            duracion_s (float): Duración de la carrera; por defecto la de la
+                grabación
             
         Returns:
-            float: Trabajo estimado en Joules
+            float: Trabajo estimado en Joules (magnitud)
         """
         if self.df is None or self.df.empty:
             return None
         
-        # Convertir presión de kPa a Pa
-        presion_pa = self.df['Presion (kPa)'] * 1000
+        datos = self.df[['Timestamp', 'Presion (kPa)']].dropna()
+        t_s = tiempo_relativo(datos['Timestamp'])
+        validos = ~np.isnan(t_s)
+        resultado = trabajo(t_s[validos], datos['Presion (kPa)'].to_numpy(dtype=float)[validos],
+                            desplazamiento_mm / 1000.0,
+                            compresion='Retracción' not in self.tipo_experimento,
+                            duracion_s=duracion_s, diametro_m=diametro_mm / 1000.0)
         
-        # Crear array de volumen linealmente espaciado
-        volumen_m3 = np.linspace(volumen_inicial/1000, volumen_final/1000, len(presion_pa))
-        
-        # Integración trapezoidal
-        trabajo_j = np.trapz(presion_pa, volumen_m3)
-        
-        return abs(trabajo_j)
+        return abs(resultado['W_J'])
     
     def analisis_completo(self):
         """Realiza un análisis completo y muestra todos los resultados"""
@@ -200,30 +265,154 @@ def comparar_experimentos(archivo_extension, archivo_retraccion):
     plt.show()
 
 
-def analizar_directorio(ruta_datos='datos/'):
+def analizar_archivo(archivo):
+    """
+    Estadísticas de un archivo para el resumen de ``analizar_directorio``
+    
+    Es una función de módulo para que los procesos del pool la puedan recibir.
+    
+    Args:
+        archivo (str): Ruta al CSV del experimento
+        
+    Returns:
+        dict: 'Archivo', 'Inicio', 'Fin' y las estadísticas básicas; si el
+            archivo no se pudo analizar, 'Archivo' y 'Error'
+    """
+    try:
+        analizador = AnalizadorTermodinamico(archivo, convertir_tiempo=False)
+        stats = analizador.estadisticas_basicas()
+    except Exception as e:
+        return {'Archivo': Path(archivo).name, 'Error': str(e)}
+    
+    if not stats:
+        return {'Archivo': Path(archivo).name, 'Error': 'Sin datos'}
+    
+    tiempos = analizador.df['Timestamp']
+    return {'Archivo': Path(archivo).name,
+            'Inicio': tiempos.iloc[0],
+            'Fin': tiempos.iloc[-1],
+            **stats}
+
+
+def guardar_resumen(resumen, salida):
+    """
+    Guarda el resumen en CSV o, si la extensión es .parquet, en Parquet
+    
+    Args:
+        resumen (pandas.DataFrame): Una fila por archivo
+        salida (str): Ruta del archivo de salida
+        
+    Returns:
+        str: Ruta del archivo escrito (CSV si no hay soporte de Parquet)
+    """
+    if Path(salida).suffix.lower() == '.parquet':
+        try:
+            resumen.to_parquet(salida, index=False)
+            return salida
+        except ImportError:
+            # to_parquet necesita pyarrow o fastparquet
+            salida = str(Path(salida).with_suffix('.csv'))
+            print(f"⚠️  Sin soporte de Parquet (instala pyarrow); se guarda {salida}")
+    resumen.to_csv(salida, index=False)
+    return salida
+
+
+def analizar_directorio(ruta_datos='datos/', procesos=None, salida=None, detalle=True):
     """
     Analiza todos los archivos CSV en un directorio
     
+    Con muchos archivos, el análisis se reparte entre ``procesos`` procesos
+    y los resultados se muestran conforme cada archivo termina, junto con
+    el avance y la velocidad en archivos por segundo.
+    
     Args:
         ruta_datos (str): Ruta al directorio con los CSVs
+        procesos (int): Número de procesos (None = uno por núcleo; 1 = sin pool)
+        salida (str): Si se indica, guarda el resumen consolidado (.csv o .parquet)
+        detalle (bool): Si True, imprime las estadísticas de cada archivo
+        
+    Returns:
+        pandas.DataFrame: Resumen con una fila por archivo, ordenado por nombre
+            (None si no hay archivos)
     """
-    archivos = glob.glob(f"{ruta_datos}/*.csv")
+    archivos = sorted(glob.glob(f"{ruta_datos}/*.csv"))
+    if salida:
+        # No analizar un resumen anterior guardado en el mismo directorio
+        archivos = [a for a in archivos if os.path.abspath(a) != os.path.abspath(salida)]
     
     if not archivos:
         print(f"No se encontraron archivos CSV en {ruta_datos}")
-        return
-    
-    print(f"\nSe encontraron {len(archivos)} archivos CSV\n")
+        return None
     
+    # Los archivos sin cambios desde un análisis anterior no se vuelven a leer
+    rutas = {Path(a).name: a for a in archivos}
+    previos = []
+    pendientes = []
     for archivo in archivos:
-        analizador = AnalizadorTermodinamico(archivo)
-        stats = analizador.estadisticas_basicas()
-        
-        if stats:
-            print(f"\n📊 {Path(archivo).name}")
+        try:
+            previo = CACHE.buscar(archivo, 'resumen')
+        except OSError:
+            previo = None
+        if previo is None:
+            pendientes.append(archivo)
+        else:
+            previos.append(previo)
+    
+    procesos = procesos or os.cpu_count() or 1
+    # Para pocos archivos arrancar el pool cuesta más que analizarlos
+    usar_pool = procesos > 1 and len(pendientes) >= 4 * procesos
+    print(f"\nSe encontraron {len(archivos)} archivos CSV"
+          f"{f' ({len(previos)} sin cambios)' if previos else ''}"
+          f"{f' ({procesos} procesos)' if usar_pool else ''}\n")
+    
+    resultados = []
+    inicio = time.perf_counter()
+    ultimo_aviso = inicio
+    
+    def recibir(stats, nuevo=True):
+        nonlocal ultimo_aviso
+        resultados.append(stats)
+        if nuevo and 'Error' not in stats:
+            CACHE.guardar(rutas[stats['Archivo']], 'resumen', stats)
+        if detalle and 'Error' not in stats:
+            print(f"\n📊 {stats['Archivo']}")
             print(f"   Tipo: {stats['Tipo']}")
             print(f"   ΔP: {stats['Cambio de Presión (kPa)']:.2f} kPa")
             print(f"   P_max: {stats['Presión Máxima (kPa)']:.2f} kPa")
+        ahora = time.perf_counter()
+        if ahora - ultimo_aviso >= 1.0:
+            ultimo_aviso = ahora
+            print(f"   [{len(resultados)}/{len(archivos)}] "
+                  f"{len(resultados) / (ahora - inicio):.1f} archivos/s")
+    
+    for stats in previos:
+        recibir(stats, nuevo=False)
+    if usar_pool:
+        # imap_unordered entrega cada resultado en cuanto termina; los lotes
+        # (chunksize) reducen la comunicación entre procesos
+        lote = max(1, min(32, len(pendientes) // (procesos * 8)))
+        with Pool(procesos) as pool:
+            for stats in pool.imap_unordered(analizar_archivo, pendientes, chunksize=lote):
+                recibir(stats)
+    else:
+        for archivo in pendientes:
+            recibir(analizar_archivo(archivo))
+    
+    transcurrido = time.perf_counter() - inicio
+    errores = [r for r in resultados if 'Error' in r]
+    for r in errores:
+        print(f"⚠️  {r['Archivo']}: {r['Error']}")
+    print(f"\n{len(resultados) - len(errores)} archivos analizados en {transcurrido:.2f} s "
+          f"({len(resultados) / transcurrido:.1f} archivos/s)")
+    
+    resumen = pd.DataFrame(resultados).sort_values('Archivo', ignore_index=True)
+    for columna in ('Inicio', 'Fin'):
+        if columna in resumen:
+            resumen[columna] = pd.to_datetime(resumen[columna], errors='coerce')
+    if salida:
+        salida = guardar_resumen(resumen, salida)
+        print(f"Resumen guardado: {salida}")
+    return resumen
 
 
 # ============================================================================
@@ -252,10 +441,10 @@ if __name__ == "__main__":
         analizador.analisis_completo()
         analizador.graficar_presion_vs_tiempo(guardar=True)
         
-        # Calcular trabajo (ejemplo con jeringa de 60 ml)
-        trabajo = analizador.estimar_trabajo(volumen_inicial=60, volumen_final=30)
-        if trabajo:
-            print(f"\n🔧 Trabajo estimado: {trabajo:.2f} J")
+        # Calcular trabajo (cilindro de 46 mm, desplazamiento del dataset 1)
+        trabajo_j = analizador.estimar_trabajo(desplazamiento_mm=DESPLAZAMIENTOS_MM[1])
+        if trabajo_j:
+            print(f"\n🔧 Trabajo estimado: {trabajo_j:.4f} J")
     else:
         print(f"⚠️  Archivo no encontrado: {archivo_ejemplo}")
         print("    Coloca un archivo CSV de ejemplo en la carpeta 'datos/'")
@@ -264,7 +453,9 @@ if __name__ == "__main__":
     # EJEMPLO 2: Analizar todos los archivos en el directorio
     print("\n\n📌 EJEMPLO 2: Análisis de Directorio")
     print("-" * 60)
-    analizar_directorio('datos/')
+    # Con muchos archivos se reparte entre todos los núcleos; el resumen
+    # también se puede guardar como .parquet
+    analizar_directorio('datos/', salida='datos/resumen_experimentos.csv')
     
     
     # EJEMPLO 3: Comparar dos experimentos
@@ -3,10 +3,22 @@ from tkinter import ttk, scrolledtext
 import serial
 import serial.tools.list_ports
 import threading
-import csv
-from datetime import datetime
+import sys
+from collections import deque
 import os
 
+# Módulos compartidos del laboratorio (termodinamica/comun)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from comun.escritura import PoliticaEscritura
+from comun.registro import abrir_csv_operacion, fila_enlace_primera_ley, fila_primera_ley
+from comun.serie import es_remoto
+from comun.conexion import MARCAS_PRIMERA_LEY, conectar_en_segundo_plano
+from comun.enlace import EnlaceSupervisado
+from comun.protocolo import ESTADO_SIN_ENLACE
+from comun.adquisicion import ESCUCHA
+from comun.cola_ui import ColaUI
+from comun.acumuladores import EstadisticasEnLinea
+
 
 class MotorControlGUI:
     def __init__(self, root):
@@ -15,13 +27,43 @@ class MotorControlGUI:
         self.root.geometry("800x600")
         
         self.serial_connection = None
+        self.connector = None  # conexión en curso (ver connect_serial)
+        # Sin lecturas en este tiempo se da el puerto por perdido y se
+        # reconecta (el firmware imprime presión y temperatura cada 500 ms)
+        self.silence_max_s = 5.0
         self.is_reading = False
-        self.csv_file = None
         self.csv_writer = None
         self.is_logging = False
+        # El CSV se escribe en segundo plano (ver comun/escritura.py):
+        # flush cada 10 muestras o cada segundo; durable=True añade fsync
+        self.politica_csv = PoliticaEscritura(filas=10, intervalo_s=1.0)
         self.current_operation = None  # 'extension' o 'retraction'
+        # Conectado al servicio de adquisición: el servicio escribe los CSV
+        self.remote = False
+        
+        # Consola: solo se muestran las últimas console_max_lines líneas; el
+        # registro completo (hasta console_history_lines) se guarda en memoria
+        self.console_max_lines = 1000
+        self.console_history_lines = 100000
+        self.console_history = deque(maxlen=self.console_history_lines)
+        self.console_paused = tk.BooleanVar(value=False)
+        
+        # Estadísticas en vivo (ver comun/acumuladores.py): de toda la conexión
+        # con ventana de 10 s, y de la operación en curso para su resumen
+        self.live_stats = EstadisticasEnLinea(('presion', 'temperatura'), ventana_s=10)
+        self.operation_stats = EstadisticasEnLinea(('presion', 'temperatura'), ventana_s=10)
+        
+        # El hilo de lectura no toca Tk: publica en esta cola y la interfaz
+        # la procesa por lotes cada 100 ms (ver comun/cola_ui.py)
+        self.cola_ui = ColaUI(self.root, intervalo_ms=100)
+        self.cola_ui.registrar('consola', self.append_console_lines, 'lista')
+        self.cola_ui.registrar('sensores', lambda valores: self.update_sensors(*valores))
+        self.cola_ui.registrar('fin_operacion', lambda _: self.stop_csv())
+        self.cola_ui.registrar('conexion', self.on_connected)
+        self.cola_ui.registrar('enlace', self.show_link)
         
         self.setup_gui()
+        self.cola_ui.iniciar()
         
     def setup_gui(self):
         # Frame de conexión serial
@@ -155,10 +197,24 @@ class MotorControlGUI:
                                           foreground="red")
         self.temperature_label.pack(side="left", padx=10)
         
+        # Estadísticas de la ventana y de la conexión
+        stats_frame = ttk.LabelFrame(self.root, text="Estadísticas", padding=10)
+        stats_frame.pack(fill="x", padx=10, pady=5)
+        
+        self.stats_label = ttk.Label(stats_frame, text="Sin datos", 
+                                     font=("Consolas", 9), justify="left")
+        self.stats_label.pack(anchor="w")
+        
         # Frame de consola
         console_frame = ttk.LabelFrame(self.root, text="Consola", padding=10)
         console_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
+        # Pausar solo detiene el refresco del widget; las líneas se siguen guardando
+        self.pause_check = ttk.Checkbutton(console_frame, text="Pausar consola",
+                                           variable=self.console_paused,
+                                           command=self.toggle_console_pause)
+        self.pause_check.pack(anchor="e")
+        
         self.console_text = scrolledtext.ScrolledText(console_frame, 
                                                      height=15, 
                                                      state='disabled',
@@ -183,20 +239,46 @@ class MotorControlGUI:
     def refresh_ports(self):
         ports = serial.tools.list_ports.comports()
         port_list = [port.device for port in ports]
+        # Servicio de adquisición local (python -m comun.adquisicion --equipo primeraley)
+        port_list.append("tcp://%s:%d" % ESCUCHA['primeraley'])
         self.port_combo['values'] = port_list
         if port_list:
             self.port_combo.current(0)
     
     def connect_serial(self):
+        if self.connector or self.serial_connection:
+            return
+        port = self.port_combo.get()
+        if not port:
+            self.log_console("Error: Selecciona un puerto")
+            return
+        
+        # El Arduino se reinicia al abrir el puerto: en otro hilo se espera
+        # "Sistema listo." (o la primera lectura de sensores) y on_connected
+        # termina en el hilo de Tk (ver comun/conexion.py)
+        self.connection_label.config(text="Conectando...", foreground="orange")
+        self.log_console(f"Conectando a {port}...")
+        self.connector = conectar_en_segundo_plano(
+            port, 9600, MARCAS_PRIMERA_LEY,
+            lambda result: self.cola_ui.publicar('conexion', result))
+    
+    def on_connected(self, result):
+        """Termina de conectar con el resultado del conector (hilo de Tk)"""
+        self.connector = None
         try:
-            port = self.port_combo.get()
-            if not port:
-                self.log_console("Error: Selecciona un puerto")
-                return
+            if result.error:
+                raise result.error
             
-            self.serial_connection = serial.Serial(port, 9600, timeout=1)
+            # Si se pierde el puerto, el enlace reconecta con espera creciente
+            # (ver comun/enlace.py); se usa como serial.Serial
+            self.serial_connection = EnlaceSupervisado(
+                result.puerto, 9600, MARCAS_PRIMERA_LEY, result.conexion, result.saludo,
+                activo=lambda: self.is_reading, silencio_max_s=self.silence_max_s,
+                al_perder=self.link_lost, al_restablecer=self.link_restored)
+            self.remote = es_remoto(result.puerto)
             self.connection_label.config(text="Conectado", foreground="green")
-            self.log_console(f"Conectado a {port}")
+            self.log_console(f"Conectado a {result.puerto} "
+                             f"(firmware listo en {result.latencia_s:.2f} s)")
             
             # Habilitar botones
             self.extend_btn.config(state="normal")
@@ -206,17 +288,33 @@ class MotorControlGUI:
             self.stop_btn.config(state="normal")
             
             # Iniciar lectura de datos
+            self.live_stats.reiniciar()
             self.is_reading = True
             self.read_thread = threading.Thread(target=self.read_serial, daemon=True)
             self.read_thread.start()
             
         except Exception as e:
+            self.is_reading = False
+            if self.serial_connection:
+                self.serial_connection.close()
+                self.serial_connection = None
+            self.connection_label.config(text="Desconectado", foreground="red")
             self.log_console(f"Error al conectar: {str(e)}")
     
     def disconnect_serial(self):
+        if self.connector:
+            self.connector.cancelar()
+            self.connector = None
+            self.connection_label.config(text="Desconectado", foreground="red")
         self.is_reading = False
-        if self.serial_connection and self.serial_connection.is_open:
-            self.serial_connection.close()
+        if self.serial_connection:
+            # También durante una reconexión, cuando is_open es False
+            link = self.serial_connection
+            self.serial_connection = None
+            link.close()
+            if link.caidas:
+                self.log_console(f"Enlace: {link.caidas} caída(s), "
+                                 f"{link.tiempo_sin_enlace_s:.1f} s sin datos")
             self.connection_label.config(text="Desconectado", foreground="red")
             self.log_console("Desconectado")
             
@@ -304,16 +402,14 @@ class MotorControlGUI:
             self.stop_csv()  # Detener registro si está activo
     
     def read_serial(self):
+        # El enlace entrega primero lo recibido durante el saludo y, si el
+        # puerto se cae, no regresa hasta reconectar (o hasta desconectar)
+        link = self.serial_connection
         while self.is_reading:
             try:
-                if self.serial_connection and self.serial_connection.is_open:
-                    # Pequeño delay para no saturar el CPU
-                    import time
-                    time.sleep(0.01)
-                    
-                    if self.serial_connection.in_waiting > 0:
-                        line = self.serial_connection.readline().decode('utf-8', 
-                                                                        errors='ignore').strip()
+                if link:
+                    # leer_lineas espera en el sistema operativo hasta que hay datos
+                    for line in link.leer_lineas():
                         if line:
                             self.log_console(line)
                             
@@ -332,25 +428,53 @@ class MotorControlGUI:
                                     else:
                                         temperature = None
                                     
-                                    self.root.after(0, self.update_sensors, pressure, temperature)
+                                    self.cola_ui.publicar('sensores', (pressure, temperature))
+                                    
+                                    sample = {'presion': pressure, 'temperatura': temperature}
+                                    self.live_stats.agregar(sample)
+                                    if self.is_logging:
+                                        self.operation_stats.agregar(sample)
                                     
                                     # Guardar en CSV si está activo
-                                    if self.is_logging and self.csv_writer:
-                                        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                                        temp_value = temperature if temperature is not None else "ERROR"
-                                        self.csv_writer.writerow([timestamp, pressure, temp_value])
-                                        self.csv_file.flush()
+                                    csv_writer = self.csv_writer
+                                    if self.is_logging and csv_writer:
+                                        csv_writer.escribir(fila_primera_ley(pressure, temperature))
                                 except Exception as e:
                                     pass
                             
                             # Detectar cuando termina la operación
                             if "completada" in line.lower() or "completado" in line.lower():
                                 if self.is_logging:
-                                    self.root.after(0, self.stop_csv)
+                                    self.cola_ui.publicar('fin_operacion')
             except Exception as e:
-                self.log_console(f"Error de lectura: {str(e)}")
+                # Al desconectar, el puerto se cierra con la lectura en curso
+                if self.is_reading:
+                    self.log_console(f"Error de lectura: {str(e)}")
                 break
     
+    def link_lost(self, reason):
+        """Cierra el CSV de la operación con una fila de marca (hilo de lectura)"""
+        self.log_console(f"Enlace perdido: {reason} - reconectando...")
+        self.cola_ui.publicar('enlace', False)
+        csv_writer = self.csv_writer
+        if self.is_logging and csv_writer:
+            # Al reconectar el Arduino se reinicia: la operación no continúa
+            csv_writer.escribir(fila_enlace_primera_ley(ESTADO_SIN_ENLACE))
+            self.cola_ui.publicar('fin_operacion')
+    
+    def link_restored(self, duration_s, attempts):
+        self.log_console(f"Enlace restablecido tras {duration_s:.1f} s ({attempts} intento(s)); "
+                         "el Arduino se reinició con tiempo y PWM por defecto")
+        self.cola_ui.publicar('enlace', True)
+    
+    def show_link(self, connected):
+        if not self.serial_connection:
+            return
+        if connected:
+            self.connection_label.config(text="Conectado", foreground="green")
+        else:
+            self.connection_label.config(text="Reconectando...", foreground="orange")
+    
     def update_sensors(self, pressure, temperature):
         """Actualiza tanto presión como temperatura"""
         self.pressure_label.config(text=f"{pressure:.2f} kPa")
@@ -358,31 +482,63 @@ class MotorControlGUI:
             self.temperature_label.config(text=f"{temperature:.2f} °C")
         else:
             self.temperature_label.config(text="ERROR")
+        self.stats_label.config(text=self.live_stats.tabla(
+            {'presion': 'P (kPa)', 'temperatura': 'T (°C)'}))
     
     def log_console(self, message):
-        def append():
-            self.console_text.config(state='normal')
-            self.console_text.insert(tk.END, message + '\n')
-            self.console_text.see(tk.END)
-            self.console_text.config(state='disabled')
-        
-        self.root.after(0, append)
+        # Se puede llamar desde cualquier hilo; se muestra en el siguiente tick
+        self.cola_ui.publicar('consola', message)
+    
+    def append_console_lines(self, messages):
+        """Agrega de una vez todas las líneas acumuladas en el tick"""
+        self.console_history.extend(messages)
+        if self.console_paused.get():
+            self.pause_check.config(text=f"Pausar consola ({len(self.console_history)} líneas)")
+            return
+        
+        # De una ráfaga más larga que el límite solo se muestran las últimas
+        messages = messages[-self.console_max_lines:]
+        self.console_text.config(state='normal')
+        self.console_text.insert(tk.END, '\n'.join(messages) + '\n')
+        self.trim_console()
+        self.console_text.see(tk.END)
+        self.console_text.config(state='disabled')
+    
+    def trim_console(self):
+        """Borra en un solo paso las líneas que exceden console_max_lines"""
+        # 'end-1c' está en la línea vacía que sigue al último salto
+        lines = int(self.console_text.index('end-1c').split('.')[0]) - 1
+        excess = lines - self.console_max_lines
+        if excess > 0:
+            self.console_text.delete('1.0', f'{excess + 1}.0')
+    
+    def toggle_console_pause(self):
+        """Al reanudar, vuelve a mostrar las últimas líneas del registro en memoria"""
+        if self.console_paused.get():
+            return
+        self.pause_check.config(text="Pausar consola")
+        recent = list(self.console_history)[-self.console_max_lines:]
+        self.console_text.config(state='normal')
+        self.console_text.delete('1.0', tk.END)
+        if recent:
+            self.console_text.insert(tk.END, '\n'.join(recent) + '\n')
+        self.console_text.see(tk.END)
+        self.console_text.config(state='disabled')
     
     def start_csv_for_operation(self, operation_type):
         # Cerrar CSV anterior si existe
-        if self.csv_file:
+        if self.csv_writer:
             self.stop_csv()
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        operation_name = "extension" if operation_type == "extension" else "retraccion"
-        filename = f"presion_{operation_name}_{timestamp}.csv"
+        if self.remote:
+            self.csv_label.config(text="CSV: Registrado por el servicio de adquisición",
+                                  foreground="green")
+            return
         
         try:
-            self.csv_file = open(filename, 'w', newline='')
-            self.csv_writer = csv.writer(self.csv_file)
-            self.csv_writer.writerow(['Timestamp', 'Presion (kPa)', 'Temperatura (C)', 'Tipo'])
-            self.csv_writer.writerow(['', '', '', operation_name])  # Fila de identificación
-            self.csv_writer.writerow(['Timestamp', 'Presion (kPa)', 'Temperatura (C)'])  # Headers de datos
+            self.csv_writer = abrir_csv_operacion(operation_type, politica=self.politica_csv)
+            filename = self.csv_writer.ruta
+            self.operation_stats.reiniciar()
             
             self.is_logging = True
             self.current_operation = operation_type
@@ -392,11 +548,13 @@ class MotorControlGUI:
             self.log_console(f"Error al crear CSV: {str(e)}")
     
     def stop_csv(self):
-        if self.csv_file:
-            self.csv_file.close()
-            self.csv_file = None
-            self.csv_writer = None
+        if self.csv_writer:
             self.is_logging = False
+            self.csv_writer.cerrar()  # escribe las muestras que sigan en cola
+            summary = self.operation_stats.guardar_resumen(self.csv_writer.ruta)
+            if summary:
+                self.log_console(f"Resumen de estadísticas: {summary}")
+            self.csv_writer = None
             self.current_operation = None
             self.csv_label.config(text="CSV: Esperando comando...", foreground="orange")
             self.log_console("Registro CSV completado y guardado")
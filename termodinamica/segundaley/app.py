@@ -4,12 +4,27 @@ import serial
 import serial.tools.list_ports
 import threading
 import time
-import csv
 import os
-from datetime import datetime
+import sys
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from collections import deque
+
+# Módulos compartidos del laboratorio (termodinamica/comun)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.serie import es_remoto
+from comun.protocolo import ESTADO_ENLACE_RESTABLECIDO, ESTADO_SIN_ENLACE, ParserSegundaLey
+from comun.graficas import GraficaBlit
+from comun.historial import HistorialCircular
+from comun.cola_ui import ColaUI
+from comun.escritura import PoliticaEscritura
+from comun.registro import SesionSegundaLey
+from comun.segmentos import PoliticaRotacion
+from comun.acumuladores import EstadisticasEnLinea, TEMPERATURA_INVALIDA
+from comun.balance import BalanceEnLinea
+from comun.adquisicion import ESCUCHA
+from comun.comandos import CanalComandos
+from comun.conexion import MARCAS_SEGUNDA_LEY, cerrar_en_segundo_plano, conectar_en_segundo_plano
+from comun.enlace import EnlaceSupervisado
 
 class MonitorArduino:
     def __init__(self, root):
@@ -23,11 +38,23 @@ class MonitorArduino:
         self.is_connected = False
         self.is_monitoring = False
         
-        # Archivos de logging
-        self.csv_file = None
-        self.csv_writer = None
-        self.log_file = None
-        self.session_start = None
+        # Sesión de logging (CSV + LOG en segundo plano, ver comun/registro.py).
+        # Si se conecta al servicio de adquisición, el servicio lleva los archivos
+        self.sesion = None
+        # Flush + fsync + punto de control (CRC en datos_*.csv.idx) cada 2 s: si el
+        # programa se cae se pierden como máximo 2 s y la sesión se repara al
+        # iniciar la siguiente (ver comun/recuperacion.py)
+        self.politica_escritura = PoliticaEscritura.con_puntos_control(2.0)
+        # Setpoints de los deslizadores: gana el último valor, como máximo un
+        # S1/S2 cada 150 ms (ver comun/comandos.py)
+        self.comandos = None
+        self.ventana_setpoint_s = 0.15
+        # Sin ninguna trama en este tiempo se da el puerto por perdido y se
+        # reconecta (el firmware envía una cada ~100 ms)
+        self.silencio_max_s = 5.0
+        # CSV en segmentos de 1 h o 64 MB, comprimidos al cerrarse y listados
+        # en logs/sesion_<fecha>.json (ver comun/segmentos.py)
+        self.politica_rotacion = PoliticaRotacion(bytes_max=64 * 1024 * 1024, duracion_max_s=3600.0)
         
         # Datos de sensores
         self.temp1 = tk.StringVar(value="--")
@@ -55,19 +82,46 @@ class MonitorArduino:
         self.estado_sistema = tk.StringVar(value="DETENIDO")
         self.modo_test_activo = tk.BooleanVar(value=False)
         
-        # Historial para gráficas
-        self.historial_temp1 = deque(maxlen=50)
-        self.historial_temp2 = deque(maxlen=50)
-        self.historial_temp3 = deque(maxlen=50)
-        self.historial_caudal1 = deque(maxlen=50)
-        self.historial_caudal2 = deque(maxlen=50)
-        self.historial_tiempo = deque(maxlen=50)
+        # Historial para gráficas: arreglos circulares de NumPy (ver comun/historial.py)
+        # con capacidad para horas_historial horas a una trama cada periodo_tramas_s
+        self.horas_historial = 6
+        self.periodo_tramas_s = 0.5
+        self.historial = HistorialCircular.por_duracion(
+            ('tiempo', 'temp1', 'temp2', 'temp3', 'caudal1', 'caudal2',
+             'calor_caliente', 'calor_frio', 'sgen'),
+            horas=self.horas_historial, periodo_s=self.periodo_tramas_s)
+        
+        # Media, desviación, mínimo y máximo en vivo, de la sesión y de los
+        # últimos 60 s (ver comun/acumuladores.py)
+        self.estadisticas = EstadisticasEnLinea(
+            ('temp1', 'temp2', 'temp3', 'caudal1', 'caudal2'), ventana_s=60,
+            invalidos=dict.fromkeys(('temp1', 'temp2', 'temp3'), TEMPERATURA_INVALIDA))
+        self.texto_estadisticas = tk.StringVar(value="Sin datos")
+        
+        # Calor transferido, balance y generación de entropía por trama (ver
+        # comun/balance.py). Con el volumen de agua de la cubeta 3 (litros)
+        # también se calcula el calor ganado por el circuito frío y las pérdidas
+        self.volumen_frio_l = None
+        self.balance = BalanceEnLinea(self.volumen_frio_l)
+        
+        # Periodo de refresco de las gráficas (ms); con blitting 10 Hz es viable
+        self.intervalo_graficas_ms = 100
         
         # Crear directorio de logs
         self.crear_directorio_logs()
         
         self.crear_interfaz()
         
+        # El hilo lector no toca Tk: publica aquí y la interfaz se
+        # actualiza una vez por tick con lo más reciente (ver comun/cola_ui.py)
+        self.cola_ui = ColaUI(self.root, intervalo_ms=100)
+        self.cola_ui.registrar('datos', self.actualizar_display, 'dict')
+        self.cola_ui.registrar('historial', self.agregar_historial, 'lista')
+        self.cola_ui.registrar('conexion', self.conexion_lista)
+        self.cola_ui.registrar('desconexion', self.desconexion_terminada)
+        self.cola_ui.registrar('enlace', self.mostrar_enlace)
+        self.cola_ui.iniciar()
+        
     def crear_directorio_logs(self):
         """Crea el directorio logs/ si no existe"""
         if not os.path.exists('logs'):
@@ -76,97 +130,35 @@ class MonitorArduino:
     
     def iniciar_sesion_logging(self):
         """Inicia una nueva sesión de logging con archivos CSV y LOG"""
-        self.session_start = datetime.now()
-        timestamp = self.session_start.strftime("%Y%m%d_%H%M%S")
-        
-        # Archivo CSV para datos
-        csv_filename = f"logs/datos_{timestamp}.csv"
-        self.csv_file = open(csv_filename, 'w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        
-        # Escribir encabezados
-        self.csv_writer.writerow([
-            'Timestamp',
-            'Tiempo_Relativo_s',
-            'Estado_Sistema',
-            'Temp1_C',
-            'Temp2_C',
-            'Temp3_C',
-            'Caudal1_Lmin',
-            'Caudal2_Lmin',
-            'Volumen1_L',
-            'Volumen2_L',
-            'PWM1',
-            'PWM2',
-            'Duty1_%',
-            'Duty2_%',
-            'Modo1',
-            'Modo2',
-            'Error1',
-            'Error2'
-        ])
-        
-        # Archivo LOG para eventos
-        log_filename = f"logs/eventos_{timestamp}.log"
-        self.log_file = open(log_filename, 'w')
-        
-        self.escribir_log(f"=== SESIÓN INICIADA ===")
-        self.escribir_log(f"Archivo de datos: {csv_filename}")
-        self.escribir_log(f"Archivo de eventos: {log_filename}")
-        
-        print(f"Logging iniciado: {csv_filename}")
+        self.sesion = SesionSegundaLey('logs', self.politica_escritura, self.politica_rotacion)
+        self.sesion.iniciar()
+        print(f"Logging iniciado: {self.sesion.ruta_manifiesto or self.sesion.ruta_csv}")
     
     def detener_sesion_logging(self):
         """Cierra los archivos de logging"""
-        if self.csv_file:
-            self.csv_file.close()
-            self.csv_file = None
-            self.csv_writer = None
-        
-        if self.log_file:
-            self.escribir_log("=== SESIÓN FINALIZADA ===")
-            self.log_file.close()
-            self.log_file = None
-        
-        print("Logging detenido")
+        # cerrar() espera a que se escriban las filas que sigan en cola
+        if self.sesion:
+            ruta = self.estadisticas.guardar_resumen(self.sesion.ruta_csv)
+            if ruta:
+                self.sesion.log(f"Resumen de estadísticas: {ruta}")
+            self.sesion.cerrar()
+            self.sesion = None
+            print("Logging detenido")
     
     def escribir_log(self, mensaje):
         """Escribe un mensaje en el archivo de log con timestamp"""
-        if self.log_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            self.log_file.write(f"[{timestamp}] {mensaje}\n")
-            self.log_file.flush()
+        sesion = self.sesion
+        if sesion:
+            sesion.log(mensaje)
     
     def guardar_datos_csv(self, datos):
         """Guarda una fila de datos en el CSV"""
-        if not self.csv_writer or not self.session_start:
+        sesion = self.sesion
+        if not sesion:
             return
         
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        tiempo_relativo = (datetime.now() - self.session_start).total_seconds()
-        
         try:
-            self.csv_writer.writerow([
-                timestamp,
-                f"{tiempo_relativo:.3f}",
-                datos.get('sistema', '--'),
-                datos.get('temp1', '--'),
-                datos.get('temp2', '--'),
-                datos.get('temp3', '--'),
-                datos.get('caudal1', '--'),
-                datos.get('caudal2', '--'),
-                datos.get('volumen1', '--'),
-                datos.get('volumen2', '--'),
-                datos.get('pwm1', '--'),
-                datos.get('pwm2', '--'),
-                datos.get('duty1', '--'),
-                datos.get('duty2', '--'),
-                datos.get('modo1', '--'),
-                datos.get('modo2', '--'),
-                datos.get('error1', '--'),
-                datos.get('error2', '--')
-            ])
-            self.csv_file.flush()
+            sesion.guardar(datos)
         except Exception as e:
             print(f"Error guardando en CSV: {e}")
             self.escribir_log(f"ERROR CSV: {e}")
@@ -524,14 +516,23 @@ class MonitorArduino:
         frame_col3 = tk.Frame(frame_principal, bg='#2b2b2b')
         frame_col3.pack(side='left', fill='both', expand=True, padx=(5, 0))
         
+        frame_estadisticas = tk.LabelFrame(frame_col3, text="ESTADÍSTICAS", 
+                                          bg='#363636', fg='white', 
+                                          font=('Arial', 12, 'bold'))
+        frame_estadisticas.pack(side='bottom', fill='x', pady=(10, 0))
+        
+        tk.Label(frame_estadisticas, textvariable=self.texto_estadisticas, bg='#363636', 
+                fg='#00ff00', font=('Courier', 9), justify='left', 
+                anchor='w').pack(fill='x', padx=10, pady=5)
+        
         frame_graficas = tk.LabelFrame(frame_col3, text="GRÁFICAS EN TIEMPO REAL", 
                                       bg='#363636', fg='white', 
                                       font=('Arial', 12, 'bold'))
         frame_graficas.pack(fill='both', expand=True)
         
-        self.fig = Figure(figsize=(8, 8), facecolor='#363636')
+        self.fig = Figure(figsize=(8, 10), facecolor='#363636')
         
-        self.ax1 = self.fig.add_subplot(211)
+        self.ax1 = self.fig.add_subplot(311)
         self.ax1.set_facecolor('#2b2b2b')
         self.ax1.set_title('Temperaturas', color='white', fontsize=12, fontweight='bold')
         self.ax1.set_xlabel('Tiempo (s)', color='white')
@@ -539,7 +540,7 @@ class MonitorArduino:
         self.ax1.tick_params(colors='white')
         self.ax1.grid(True, alpha=0.3)
         
-        self.ax2 = self.fig.add_subplot(212)
+        self.ax2 = self.fig.add_subplot(312)
         self.ax2.set_facecolor('#2b2b2b')
         self.ax2.set_title('Caudales', color='white', fontsize=12, fontweight='bold')
         self.ax2.set_xlabel('Tiempo (s)', color='white')
@@ -547,14 +548,45 @@ class MonitorArduino:
         self.ax2.tick_params(colors='white')
         self.ax2.grid(True, alpha=0.3)
         
+        self.ax3 = self.fig.add_subplot(313)
+        self.ax3.set_facecolor('#2b2b2b')
+        self.ax3.set_title('Balance de Energía', color='white', fontsize=12, fontweight='bold')
+        self.ax3.set_xlabel('Tiempo (s)', color='white')
+        self.ax3.set_ylabel('W', color='white')
+        self.ax3.tick_params(colors='white')
+        self.ax3.grid(True, alpha=0.3)
+        # Ṡ_gen (W/K) tiene otra escala: eje Y propio a la derecha
+        self.ax3_entropia = self.ax3.twinx()
+        self.ax3_entropia.set_ylabel('W/K', color='#ffc107')
+        self.ax3_entropia.tick_params(colors='#ffc107')
+        
         self.fig.tight_layout(pad=3.0)
         
         self.canvas = FigureCanvasTkAgg(self.fig, frame_graficas)
         self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=5, pady=5)
         
+        # Las líneas se crean una sola vez; actualizar_graficas solo cambia sus datos
+        self.grafica = GraficaBlit(self.canvas)
+        self.grafica.agregar_serie('temp1', self.ax1, 'r-', label='T1 (Entrada)', linewidth=2)
+        self.grafica.agregar_serie('temp2', self.ax1, 'g-', label='T2 (Salida)', linewidth=2)
+        self.grafica.agregar_serie('temp3', self.ax1, 'b-', label='T3 (Frío)', linewidth=2)
+        self.grafica.agregar_serie('caudal1', self.ax2, 'c-', label='Q1 (Caliente)', linewidth=2)
+        self.grafica.agregar_serie('caudal2', self.ax2, 'm-', label='Q2 (Frío)', linewidth=2)
+        self.ax1.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='best')
+        self.ax2.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='best')
+        self.grafica.agregar_serie('calor_caliente', self.ax3, 'r-', label='Q̇ cedido', linewidth=2)
+        self.grafica.agregar_serie('calor_frio', self.ax3, 'b-', label='Q̇ ganado (cubeta 3)', linewidth=2)
+        self.grafica.agregar_serie('sgen', self.ax3_entropia, 'y--', label='Ṡ gen', linewidth=1.5)
+        self.ax3.legend(handles=[self.grafica.series[c] for c in ('calor_caliente', 'calor_frio', 'sgen')],
+                        facecolor='#363636', edgecolor='white', labelcolor='white', loc='best')
+        
     def actualizar_puertos(self):
         puertos = serial.tools.list_ports.comports()
         lista_puertos = [puerto.device for puerto in puertos]
+        # Servicio de adquisición local (python -m comun.adquisicion)
+        lista_puertos.append("tcp://%s:%d" % ESCUCHA['segundaley'])
         self.combo_puertos['values'] = lista_puertos
         if lista_puertos:
             self.combo_puertos.current(0)
@@ -571,17 +603,40 @@ class MonitorArduino:
             messagebox.showerror("Error", "Selecciona un puerto COM")
             return
         
+        # El Arduino se reinicia al abrir el puerto: la espera de su saludo
+        # corre en otro hilo y conexion_lista termina en el hilo de Tk
+        # (ver comun/conexion.py)
+        self.btn_conectar.config(text="Conectando...", state='disabled')
+        self.combo_puertos.config(state='disabled')
+        self.label_estado.config(text="● Conectando...", fg='#ffc107')
+        conectar_en_segundo_plano(puerto, 115200, MARCAS_SEGUNDA_LEY,
+                                  lambda resultado: self.cola_ui.publicar('conexion', resultado))
+    
+    def conexion_lista(self, resultado):
+        """Termina de conectar con el resultado del conector (hilo de Tk)"""
+        puerto = resultado.puerto
         try:
-            self.serial_connection = serial.Serial(puerto, 115200, timeout=1)
-            time.sleep(2)
+            if resultado.error:
+                raise resultado.error
+            # Si se pierde el puerto, el enlace reconecta con espera creciente
+            # sin cerrar la sesión (ver comun/enlace.py); se usa como serial.Serial
+            self.serial_connection = EnlaceSupervisado(
+                puerto, 115200, MARCAS_SEGUNDA_LEY, resultado.conexion, resultado.saludo,
+                activo=lambda: self.is_monitoring, silencio_max_s=self.silencio_max_s,
+                al_perder=self.enlace_perdido, al_restablecer=self.enlace_restablecido)
+            self.comandos = CanalComandos(self.serial_connection, self.ventana_setpoint_s,
+                                          al_aplicar=self.setpoint_aplicado)
             self.is_connected = True
             self.is_monitoring = True
             
-            # Iniciar logging
-            self.iniciar_sesion_logging()
-            self.escribir_log(f"Conectado a puerto: {puerto}")
+            # Iniciar logging (con el servicio de adquisición los archivos ya
+            # los escribe el servicio)
+            if not es_remoto(puerto):
+                self.iniciar_sesion_logging()
+                self.escribir_log(f"Conectado a puerto: {puerto} "
+                                  f"(firmware listo en {resultado.latencia_s:.2f} s)")
             
-            self.btn_conectar.config(text="Desconectar", bg='#dc3545')
+            self.btn_conectar.config(text="Desconectar", bg='#dc3545', state='normal')
             self.label_estado.config(text="● Conectado", fg='#28a745')
             self.combo_puertos.config(state='disabled')
             self.btn_reset.config(state='normal')
@@ -594,28 +649,54 @@ class MonitorArduino:
             self.btn_start.config(state='normal')
             self.btn_stop.config(state='normal')
             
+            self.estadisticas.reiniciar()
+            self.balance.reiniciar()
             self.thread_lectura = threading.Thread(target=self.leer_datos, daemon=True)
             self.thread_lectura.start()
             
             self.actualizar_graficas()
+            self.actualizar_estadisticas()
             
         except Exception as e:
             self.escribir_log(f"ERROR CONEXIÓN: {str(e)}")
+            self.btn_conectar.config(text="Conectar", state='normal')
+            self.combo_puertos.config(state='readonly')
+            self.label_estado.config(text="● Desconectado", fg='#dc3545')
             messagebox.showerror("Error de Conexión", f"No se pudo conectar:\n{str(e)}")
     
     def desconectar(self):
         self.escribir_log("Desconectando...")
         self.is_monitoring = False
-        time.sleep(0.5)
+        self.is_connected = False
+        self.btn_conectar.config(text="Desconectando...", state='disabled')
         
-        if self.serial_connection:
-            self.serial_connection.close()
+        # El hilo lector puede estar dentro de read() hasta 1 s: se le espera
+        # fuera del hilo de Tk y desconexion_terminada sigue aquí
+        cerrar_en_segundo_plano(self.serial_connection, self.thread_lectura,
+                                lambda: self.cola_ui.publicar('desconexion'),
+                                antes=self.cerrar_comandos)
+    
+    def cerrar_comandos(self):
+        """Detiene el canal de comandos y registra cuánto se ahorró (hilo de cierre)"""
+        comandos = self.comandos
+        if comandos:
+            comandos.cerrar()
+            self.escribir_log(f"Setpoints: {comandos.solicitados} pedidos, "
+                              f"{comandos.enviados} enviados, "
+                              f"{comandos.bytes_ahorrados} bytes ahorrados")
+            self.comandos = None
+    
+    def desconexion_terminada(self, _):
+        """Cierra la sesión y restablece la interfaz una vez cerrado el puerto"""
+        enlace = self.serial_connection
+        if enlace and enlace.caidas:
+            self.escribir_log(f"Enlace: {enlace.caidas} caída(s), "
+                              f"{enlace.tiempo_sin_enlace_s:.1f} s sin datos")
         
         # Detener logging
         self.detener_sesion_logging()
         
-        self.is_connected = False
-        self.btn_conectar.config(text="Conectar", bg='#28a745')
+        self.btn_conectar.config(text="Conectar", bg='#28a745', state='normal')
         self.label_estado.config(text="● Desconectado", fg='#dc3545')
         self.combo_puertos.config(state='readonly')
         self.btn_reset.config(state='disabled')
@@ -634,7 +715,7 @@ class MonitorArduino:
             try:
                 temp_float = float(temp)
                 comando = f"TINIT:{temp_float}\n"
-                self.serial_connection.write(comando.encode())
+                self.comandos.enviar_ahora(comando.encode())
                 self.escribir_log(f"Temperatura inicial establecida: {temp_float}°C")
                 messagebox.showinfo("Temperatura Establecida", 
                                    f"Temperatura inicial: {temp_float}°C\n\n" +
@@ -648,13 +729,13 @@ class MonitorArduino:
     def toggle_modo_test(self):
         if self.is_connected:
             if self.modo_test_activo.get():
-                self.serial_connection.write(b"TEST\n")
+                self.comandos.enviar_ahora(b"TEST\n")
                 self.escribir_log("MODO TEST ACTIVADO")
                 messagebox.showinfo("Modo Test", 
                                    "Modo Test activado\n\n" +
                                    "Puedes iniciar el sistema sin esperar la temperatura.")
             else:
-                self.serial_connection.write(b"NORMAL\n")
+                self.comandos.enviar_ahora(b"NORMAL\n")
                 self.escribir_log("MODO NORMAL ACTIVADO")
                 messagebox.showinfo("Modo Normal", 
                                    "Modo Normal activado\n\n" +
@@ -663,7 +744,7 @@ class MonitorArduino:
     def iniciar_sistema(self):
         if self.is_connected:
             try:
-                self.serial_connection.write(b"START\n")
+                self.comandos.enviar_ahora(b"START\n")
                 self.escribir_log("COMANDO: Iniciar sistema")
             except Exception as e:
                 self.escribir_log(f"ERROR al iniciar: {str(e)}")
@@ -676,7 +757,7 @@ class MonitorArduino:
                                            "Las bombas se apagarán.")
             if respuesta:
                 try:
-                    self.serial_connection.write(b"STOP\n")
+                    self.comandos.enviar_ahora(b"STOP\n", descartar=True)
                     self.escribir_log("COMANDO: Detener sistema")
                 except Exception as e:
                     self.escribir_log(f"ERROR al detener: {str(e)}")
@@ -685,24 +766,23 @@ class MonitorArduino:
     def actualizar_setpoint1(self, valor):
         valor_float = float(valor)
         self.label_setpoint1.config(text=f"Setpoint: {valor_float:.1f} L/min")
-        if self.is_connected:
-            comando = f"S1:{valor_float}\n"
-            try:
-                self.serial_connection.write(comando.encode())
-                self.escribir_log(f"Setpoint Bomba 1: {valor_float} L/min")
-            except Exception as e:
-                print(f"Error enviando setpoint 1: {e}")
+        # El canal envía solo el último valor de cada arrastre; el log lo
+        # escribe setpoint_aplicado cuando el comando sale
+        comandos = self.comandos
+        if self.is_connected and comandos:
+            comandos.fijar('S1', valor_float)
     
     def actualizar_setpoint2(self, valor):
         valor_float = float(valor)
         self.label_setpoint2.config(text=f"Setpoint: {valor_float:.1f} L/min")
-        if self.is_connected:
-            comando = f"S2:{valor_float}\n"
-            try:
-                self.serial_connection.write(comando.encode())
-                self.escribir_log(f"Setpoint Bomba 2: {valor_float} L/min")
-            except Exception as e:
-                print(f"Error enviando setpoint 2: {e}")
+        comandos = self.comandos
+        if self.is_connected and comandos:
+            comandos.fijar('S2', valor_float)
+    
+    def setpoint_aplicado(self, clave, valor):
+        """Registra un setpoint enviado al Arduino (hilo del canal de comandos)"""
+        bomba = {'S1': 'Bomba 1', 'S2': 'Bomba 2'}[clave]
+        self.escribir_log(f"Setpoint {bomba}: {valor} L/min")
     
     def detener_todo(self):
         if self.is_connected:
@@ -711,7 +791,7 @@ class MonitorArduino:
                                            "Todas las bombas se apagarán inmediatamente.")
             if respuesta:
                 try:
-                    self.serial_connection.write(b"OFF\n")
+                    self.comandos.enviar_ahora(b"OFF\n", descartar=True)
                     self.slider_setpoint1.set(0)
                     self.slider_setpoint2.set(0)
                     self.modo_test_activo.set(False)
@@ -723,7 +803,7 @@ class MonitorArduino:
     def reset_volumenes(self):
         if self.is_connected and self.serial_connection:
             try:
-                self.serial_connection.write(b'r\n')
+                self.comandos.enviar_ahora(b'r\n')
                 self.escribir_log("Volúmenes reiniciados")
                 messagebox.showinfo("Reset", "Volúmenes reiniciados")
             except Exception as e:
@@ -731,116 +811,31 @@ class MonitorArduino:
                 messagebox.showerror("Error", f"No se pudo enviar comando:\n{str(e)}")
     
     def leer_datos(self):
-        datos_actuales = {}
+        # El enlace entrega primero lo recibido durante el saludo y, si el
+        # puerto se cae, no regresa hasta reconectar (o hasta desconectar)
+        enlace = self.serial_connection
+        parser = ParserSegundaLey()
         
         while self.is_monitoring:
             try:
-                if self.serial_connection.in_waiting:
-                    linea = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    
-                    # Estado del sistema
-                    if "Sistema:" in linea:
-                        try:
-                            estado = linea.split(":")[1].strip()
-                            datos_actuales['sistema'] = estado
-                        except:
-                            pass
-                    
-                    elif "Sensor 1 (pin11):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp1'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 2 (pin12):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp2'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 3 (pin4):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp3'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Caudal 1 (pin2):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal1'] = float(caudal)
-                            datos_actuales['volumen1'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Caudal 2 (pin3):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal2'] = float(caudal)
-                            datos_actuales['volumen2'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Bomba 1:" in linea:
-                        try:
-                            partes = linea.split("|")
-                            estado = partes[0].split(":")[1].strip()
-                            pwm_str = partes[1].split(":")[1].strip()
-                            pwm = pwm_str.split("(")[0].strip()
-                            duty = pwm_str.split("(")[1].replace("%)", "").strip()
-                            modo = partes[2].split(":")[1].strip()
-                            
-                            datos_actuales['bomba1'] = estado
-                            datos_actuales['pwm1'] = pwm
-                            datos_actuales['duty1'] = duty
-                            datos_actuales['modo1'] = modo
-                        except:
-                            pass
-                    
-                    elif "Bomba 2:" in linea:
-                        try:
-                            partes = linea.split("|")
-                            estado = partes[0].split(":")[1].strip()
-                            pwm_str = partes[1].split(":")[1].strip()
-                            pwm = pwm_str.split("(")[0].strip()
-                            duty = pwm_str.split("(")[1].replace("%)", "").strip()
-                            modo = partes[2].split(":")[1].strip()
-                            
-                            datos_actuales['bomba2'] = estado
-                            datos_actuales['pwm2'] = pwm
-                            datos_actuales['duty2'] = duty
-                            datos_actuales['modo2'] = modo
-                        except:
-                            pass
-                    
-                    elif "Setpoint 1:" in linea:
-                        try:
-                            error = linea.split("Error:")[1].strip()
-                            datos_actuales['error1'] = error
-                        except:
-                            pass
-                    
-                    elif "Setpoint 2:" in linea:
-                        try:
-                            error = linea.split("Error:")[1].strip()
-                            datos_actuales['error2'] = error
-                        except:
-                            pass
-                    
-                    # Detectar eventos especiales para logging
-                    if "TEMPERATURA INICIAL ALCANZADA" in linea:
-                        self.escribir_log("!!! TEMPERATURA INICIAL ALCANZADA - SISTEMA INICIADO !!!")
+                texto = enlace.leer_texto()
+                
+                # Detectar eventos especiales para logging
+                if "TEMPERATURA INICIAL ALCANZADA" in texto:
+                    self.escribir_log("!!! TEMPERATURA INICIAL ALCANZADA - SISTEMA INICIADO !!!")
+                
+                # Cada bloque completo de app.ino produce una sola trama
+                for trama in parser.procesar_texto(texto):
+                    datos_actuales = trama.como_dict()
                     
-                    if "========================================" in linea and datos_actuales:
-                        self.actualizar_display(datos_actuales)
-                        self.guardar_datos_csv(datos_actuales)
-                        datos_actuales = {}
+                    # Una fila del historial por trama; los canales que falten quedan en NaN
+                    if any(key in datos_actuales for key in ['temp1', 'caudal1']):
+                        ahora = time.time()
+                        balance = self.balance.agregar(datos_actuales, ahora)
+                        self.cola_ui.publicar('historial', dict(datos_actuales, **balance, tiempo=ahora))
+                        self.estadisticas.agregar(datos_actuales)
+                    self.cola_ui.publicar('datos', datos_actuales)
+                    self.guardar_datos_csv(datos_actuales)
                         
             except Exception as e:
                 error_msg = f"Error leyendo datos: {e}"
@@ -848,29 +843,58 @@ class MonitorArduino:
                 self.escribir_log(f"ERROR LECTURA: {e}")
                 time.sleep(0.1)
     
+    def enlace_perdido(self, motivo):
+        """Marca el inicio del hueco en el CSV y en las gráficas (hilo lector)"""
+        self.escribir_log(f"ENLACE PERDIDO: {motivo} - reconectando")
+        sesion = self.sesion
+        if sesion:
+            sesion.marcar_enlace(ESTADO_SIN_ENLACE)
+        # Una fila en NaN corta las líneas de las gráficas en el hueco
+        self.cola_ui.publicar('historial', {'tiempo': time.time()})
+        self.cola_ui.publicar('enlace', False)
+    
+    def enlace_restablecido(self, duracion_s, intentos):
+        """Marca el fin del hueco y reenvía los setpoints al Arduino reiniciado (hilo lector)"""
+        self.escribir_log(f"ENLACE RESTABLECIDO tras {duracion_s:.1f} s ({intentos} intento(s)); "
+                          "el Arduino se reinició, se reenvían los setpoints")
+        sesion = self.sesion
+        if sesion:
+            sesion.marcar_enlace(ESTADO_ENLACE_RESTABLECIDO)
+        if self.comandos:
+            self.comandos.reenviar()
+        self.cola_ui.publicar('enlace', True)
+    
+    def mostrar_enlace(self, conectado):
+        if not self.is_connected:
+            return
+        if conectado:
+            self.label_estado.config(text="● Conectado", fg='#28a745')
+        else:
+            self.label_estado.config(text="● Reconectando...", fg='#ffc107')
+    
+    def agregar_historial(self, filas):
+        """Agrega las muestras del tick en el hilo de Tk, el mismo que lee las vistas"""
+        for fila in filas:
+            self.historial.agregar(fila)
+    
     def actualizar_display(self, datos):
         if 'sistema' in datos:
             self.estado_sistema.set(datos['sistema'])
         
         if 'temp1' in datos:
             self.temp1.set(f"{datos['temp1']:.2f}")
-            self.historial_temp1.append(datos['temp1'])
         
         if 'temp2' in datos:
             self.temp2.set(f"{datos['temp2']:.2f}")
-            self.historial_temp2.append(datos['temp2'])
         
         if 'temp3' in datos:
             self.temp3.set(f"{datos['temp3']:.2f}")
-            self.historial_temp3.append(datos['temp3'])
         
         if 'caudal1' in datos:
             self.caudal1.set(f"{datos['caudal1']:.3f}")
-            self.historial_caudal1.append(datos['caudal1'])
         
         if 'caudal2' in datos:
             self.caudal2.set(f"{datos['caudal2']:.3f}")
-            self.historial_caudal2.append(datos['caudal2'])
         
         if 'volumen1' in datos:
             self.volumen1.set(f"{datos['volumen1']:.3f}")
@@ -913,67 +937,35 @@ class MonitorArduino:
         else:
             if self.modo2.get() == "MANUAL":
                 self.error2.set("--")
-        
-        if any(key in datos for key in ['temp1', 'caudal1']):
-            self.historial_tiempo.append(time.time())
     
     def actualizar_graficas(self):
         if not self.is_monitoring:
             return
         
         try:
-            self.ax1.clear()
-            self.ax2.clear()
-            
-            self.ax1.set_facecolor('#2b2b2b')
-            self.ax1.set_title('Temperaturas', color='white', fontsize=12, fontweight='bold')
-            self.ax1.set_xlabel('Tiempo (s)', color='white')
-            self.ax1.set_ylabel('°C', color='white')
-            self.ax1.tick_params(colors='white')
-            self.ax1.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                tiempo_relativo = [t - self.historial_tiempo[0] for t in self.historial_tiempo]
+            if len(self.historial) > 0:
+                # Vistas del historial, sin copias (ver comun/historial.py)
+                vistas = self.historial.vistas()
+                tiempo_relativo = vistas['tiempo'] - vistas['tiempo'][0]
                 
-                if len(self.historial_temp1) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp1), 
-                                 'r-', label='T1 (Entrada)', linewidth=2)
-                if len(self.historial_temp2) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp2), 
-                                 'g-', label='T2 (Salida)', linewidth=2)
-                if len(self.historial_temp3) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp3), 
-                                 'b-', label='T3 (Frío)', linewidth=2)
-                
-                self.ax1.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='best')
-            
-            self.ax2.set_facecolor('#2b2b2b')
-            self.ax2.set_title('Caudales', color='white', fontsize=12, fontweight='bold')
-            self.ax2.set_xlabel('Tiempo (s)', color='white')
-            self.ax2.set_ylabel('L/min', color='white')
-            self.ax2.tick_params(colors='white')
-            self.ax2.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                if len(self.historial_caudal1) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal1), 
-                                 'c-', label='Q1 (Caliente)', linewidth=2)
-                if len(self.historial_caudal2) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal2), 
-                                 'm-', label='Q2 (Frío)', linewidth=2)
-                
-                self.ax2.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='best')
-            
-            self.fig.tight_layout(pad=3.0)
-            self.canvas.draw()
+                # Solo cambian los datos de las líneas (ver comun/graficas.py)
+                self.grafica.actualizar(tiempo_relativo, vistas)
             
         except Exception as e:
             print(f"Error actualizando gráficas: {e}")
         
         if self.is_monitoring:
-            self.root.after(1000, self.actualizar_graficas)
+            self.root.after(self.intervalo_graficas_ms, self.actualizar_graficas)
+    
+    def actualizar_estadisticas(self):
+        """Refresca una vez por segundo el panel de estadísticas"""
+        if not self.is_monitoring:
+            return
+        
+        self.texto_estadisticas.set(self.estadisticas.tabla(
+            {'temp1': 'T1 (°C)', 'temp2': 'T2 (°C)', 'temp3': 'T3 (°C)',
+             'caudal1': 'Q1 (L/min)', 'caudal2': 'Q2 (L/min)'}))
+        self.root.after(1000, self.actualizar_estadisticas)
 
 if __name__ == "__main__":
     root = tk.Tk()
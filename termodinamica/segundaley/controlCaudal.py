@@ -4,9 +4,20 @@ import serial
 import serial.tools.list_ports
 import threading
 import time
+import os
+import sys
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from collections import deque
+
+# Módulos compartidos del laboratorio (termodinamica/comun)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.adquisicion import ESCUCHA
+from comun.protocolo import ParserSegundaLey
+from comun.graficas import GraficaBlit
+from comun.historial import HistorialCircular
+from comun.cola_ui import ColaUI
+from comun.conexion import MARCAS_SEGUNDA_LEY, cerrar_en_segundo_plano, conectar_en_segundo_plano
+from comun.enlace import EnlaceSupervisado
 
 class MonitorArduino:
     def __init__(self, root):
@@ -19,6 +30,11 @@ class MonitorArduino:
         self.serial_connection = None
         self.is_connected = False
         self.is_monitoring = False
+        # Sin ninguna trama en este tiempo se da el puerto por perdido y se
+        # reconecta (el firmware envía una cada ~100 ms)
+        self.silencio_max_s = 5.0
+        # Últimos setpoints pedidos; se reenvían al Arduino reiniciado al reconectar
+        self.setpoints = {}
         
         # Datos de sensores
         self.temp1 = tk.StringVar(value="--")
@@ -41,16 +57,29 @@ class MonitorArduino:
         self.error1 = tk.StringVar(value="--")
         self.error2 = tk.StringVar(value="--")
         
-        # Historial para gráficas
-        self.historial_temp1 = deque(maxlen=50)
-        self.historial_temp2 = deque(maxlen=50)
-        self.historial_temp3 = deque(maxlen=50)
-        self.historial_caudal1 = deque(maxlen=50)
-        self.historial_caudal2 = deque(maxlen=50)
-        self.historial_tiempo = deque(maxlen=50)
+        # Historial para gráficas: arreglos circulares de NumPy (ver comun/historial.py)
+        # con capacidad para horas_historial horas a una trama cada periodo_tramas_s
+        self.horas_historial = 6
+        self.periodo_tramas_s = 0.5
+        self.historial = HistorialCircular.por_duracion(
+            ('tiempo', 'temp1', 'temp2', 'temp3', 'caudal1', 'caudal2'),
+            horas=self.horas_historial, periodo_s=self.periodo_tramas_s)
+        
+        # Periodo de refresco de las gráficas (ms); con blitting 10 Hz es viable
+        self.intervalo_graficas_ms = 100
         
         self.crear_interfaz()
         
+        # El hilo lector no toca Tk: publica aquí y la interfaz se
+        # actualiza una vez por tick con lo más reciente (ver comun/cola_ui.py)
+        self.cola_ui = ColaUI(self.root, intervalo_ms=100)
+        self.cola_ui.registrar('datos', self.actualizar_display, 'dict')
+        self.cola_ui.registrar('historial', self.agregar_historial, 'lista')
+        self.cola_ui.registrar('conexion', self.conexion_lista)
+        self.cola_ui.registrar('desconexion', self.desconexion_terminada)
+        self.cola_ui.registrar('enlace', self.mostrar_enlace)
+        self.cola_ui.iniciar()
+        
     def crear_interfaz(self):
         # ========== PANEL DE CONEXIÓN (TOP) ==========
         frame_top = tk.Frame(self.root, bg='#2b2b2b')
@@ -364,9 +393,23 @@ class MonitorArduino:
         self.canvas = FigureCanvasTkAgg(self.fig, frame_graficas)
         self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=5, pady=5)
         
+        # Las líneas se crean una sola vez; actualizar_graficas solo cambia sus datos
+        self.grafica = GraficaBlit(self.canvas)
+        self.grafica.agregar_serie('temp1', self.ax1, 'r-', label='T1 (Entrada)', linewidth=2)
+        self.grafica.agregar_serie('temp2', self.ax1, 'g-', label='T2 (Salida)', linewidth=2)
+        self.grafica.agregar_serie('temp3', self.ax1, 'b-', label='T3 (Frío)', linewidth=2)
+        self.grafica.agregar_serie('caudal1', self.ax2, 'c-', label='Q1 (Caliente)', linewidth=2)
+        self.grafica.agregar_serie('caudal2', self.ax2, 'm-', label='Q2 (Frío)', linewidth=2)
+        self.ax1.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='best')
+        self.ax2.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='best')
+        
     def actualizar_puertos(self):
         puertos = serial.tools.list_ports.comports()
         lista_puertos = [puerto.device for puerto in puertos]
+        # Servicio de adquisición local (python -m comun.adquisicion)
+        lista_puertos.append("tcp://%s:%d" % ESCUCHA['segundaley'])
         self.combo_puertos['values'] = lista_puertos
         if lista_puertos:
             self.combo_puertos.current(0)
@@ -383,13 +426,30 @@ class MonitorArduino:
             messagebox.showerror("Error", "Selecciona un puerto COM")
             return
         
+        # El Arduino se reinicia al abrir el puerto: la espera de su saludo
+        # corre en otro hilo y conexion_lista termina en el hilo de Tk
+        # (ver comun/conexion.py)
+        self.btn_conectar.config(text="Conectando...", state='disabled')
+        self.combo_puertos.config(state='disabled')
+        self.label_estado.config(text="● Conectando...", fg='#ffc107')
+        conectar_en_segundo_plano(puerto, 115200, MARCAS_SEGUNDA_LEY,
+                                  lambda resultado: self.cola_ui.publicar('conexion', resultado))
+    
+    def conexion_lista(self, resultado):
+        """Termina de conectar con el resultado del conector (hilo de Tk)"""
         try:
-            self.serial_connection = serial.Serial(puerto, 115200, timeout=1)
-            time.sleep(2)
+            if resultado.error:
+                raise resultado.error
+            # Si se pierde el puerto, el enlace reconecta con espera creciente
+            # (ver comun/enlace.py); se usa como serial.Serial
+            self.serial_connection = EnlaceSupervisado(
+                resultado.puerto, 115200, MARCAS_SEGUNDA_LEY, resultado.conexion, resultado.saludo,
+                activo=lambda: self.is_monitoring, silencio_max_s=self.silencio_max_s,
+                al_perder=self.enlace_perdido, al_restablecer=self.enlace_restablecido)
             self.is_connected = True
             self.is_monitoring = True
             
-            self.btn_conectar.config(text="Desconectar", bg='#dc3545')
+            self.btn_conectar.config(text="Desconectar", bg='#dc3545', state='normal')
             self.label_estado.config(text="● Conectado", fg='#28a745')
             self.combo_puertos.config(state='disabled')
             self.btn_reset.config(state='normal')
@@ -403,17 +463,28 @@ class MonitorArduino:
             self.actualizar_graficas()
             
         except Exception as e:
+            self.btn_conectar.config(text="Conectar", state='normal')
+            self.combo_puertos.config(state='readonly')
+            self.label_estado.config(text="● Desconectado", fg='#dc3545')
             messagebox.showerror("Error de Conexión", f"No se pudo conectar:\n{str(e)}")
     
     def desconectar(self):
         self.is_monitoring = False
-        time.sleep(0.5)
+        self.is_connected = False
+        self.btn_conectar.config(text="Desconectando...", state='disabled')
         
-        if self.serial_connection:
-            self.serial_connection.close()
+        # El hilo lector puede estar dentro de read() hasta 1 s: se le espera
+        # fuera del hilo de Tk y desconexion_terminada sigue aquí
+        cerrar_en_segundo_plano(self.serial_connection, self.thread_lectura,
+                                lambda: self.cola_ui.publicar('desconexion'))
+    
+    def desconexion_terminada(self, _):
+        """Restablece la interfaz una vez cerrado el puerto (hilo de Tk)"""
+        enlace = self.serial_connection
+        if enlace and enlace.caidas:
+            print(f"Enlace: {enlace.caidas} caída(s), {enlace.tiempo_sin_enlace_s:.1f} s sin datos")
         
-        self.is_connected = False
-        self.btn_conectar.config(text="Conectar", bg='#28a745')
+        self.btn_conectar.config(text="Conectar", bg='#28a745', state='normal')
         self.label_estado.config(text="● Desconectado", fg='#dc3545')
         self.combo_puertos.config(state='readonly')
         self.btn_reset.config(state='disabled')
@@ -425,6 +496,7 @@ class MonitorArduino:
         valor_float = float(valor)
         self.label_setpoint1.config(text=f"Setpoint: {valor_float:.1f} L/min")
         if self.is_connected:
+            self.setpoints['S1'] = valor_float
             comando = f"S1:{valor_float}\n"
             try:
                 self.serial_connection.write(comando.encode())
@@ -435,6 +507,7 @@ class MonitorArduino:
         valor_float = float(valor)
         self.label_setpoint2.config(text=f"Setpoint: {valor_float:.1f} L/min")
         if self.is_connected:
+            self.setpoints['S2'] = valor_float
             comando = f"S2:{valor_float}\n"
             try:
                 self.serial_connection.write(comando.encode())
@@ -443,6 +516,8 @@ class MonitorArduino:
     
     def detener_todo(self):
         if self.is_connected:
+            # Tras OFF no hay setpoint que reenviar al reconectar
+            self.setpoints.clear()
             try:
                 self.serial_connection.write(b"OFF\n")
                 self.slider_setpoint1.set(0)
@@ -460,128 +535,73 @@ class MonitorArduino:
                 messagebox.showerror("Error", f"No se pudo enviar comando:\n{str(e)}")
     
     def leer_datos(self):
-        datos_actuales = {}
+        # El enlace entrega primero lo recibido durante el saludo y, si el
+        # puerto se cae, no regresa hasta reconectar (o hasta desconectar)
+        enlace = self.serial_connection
+        parser = ParserSegundaLey()
         
         while self.is_monitoring:
             try:
-                if self.serial_connection.in_waiting:
-                    linea = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    
-                    if "Sensor 1 (pin11):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp1'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 2 (pin12):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp2'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 3 (pin4):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp3'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Caudal 1 (pin2):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal1'] = float(caudal)
-                            datos_actuales['volumen1'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Caudal 2 (pin3):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal2'] = float(caudal)
-                            datos_actuales['volumen2'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Bomba 1:" in linea:
-                        try:
-                            partes = linea.split("|")
-                            estado = partes[0].split(":")[1].strip()
-                            pwm_str = partes[1].split(":")[1].strip()
-                            pwm = pwm_str.split("(")[0].strip()
-                            duty = pwm_str.split("(")[1].replace("%)", "").strip()
-                            modo = partes[2].split(":")[1].strip()
-                            
-                            datos_actuales['bomba1'] = estado
-                            datos_actuales['pwm1'] = pwm
-                            datos_actuales['duty1'] = duty
-                            datos_actuales['modo1'] = modo
-                        except:
-                            pass
-                    
-                    elif "Bomba 2:" in linea:
-                        try:
-                            partes = linea.split("|")
-                            estado = partes[0].split(":")[1].strip()
-                            pwm_str = partes[1].split(":")[1].strip()
-                            pwm = pwm_str.split("(")[0].strip()
-                            duty = pwm_str.split("(")[1].replace("%)", "").strip()
-                            modo = partes[2].split(":")[1].strip()
-                            
-                            datos_actuales['bomba2'] = estado
-                            datos_actuales['pwm2'] = pwm
-                            datos_actuales['duty2'] = duty
-                            datos_actuales['modo2'] = modo
-                        except:
-                            pass
-                    
-                    elif "Setpoint 1:" in linea:
-                        try:
-                            error = linea.split("Error:")[1].strip()
-                            datos_actuales['error1'] = error
-                        except:
-                            pass
-                    
-                    elif "Setpoint 2:" in linea:
-                        try:
-                            error = linea.split("Error:")[1].strip()
-                            datos_actuales['error2'] = error
-                        except:
-                            pass
+                texto = enlace.leer_texto()
+                
+                # Cada bloque completo de app.ino produce una sola trama
+                for trama in parser.procesar_texto(texto):
+                    datos_actuales = trama.como_dict()
                     
-                    if "========================================" in linea and datos_actuales:
-                        self.actualizar_display(datos_actuales)
-                        datos_actuales = {}
+                    # Una fila del historial por trama; los canales que falten quedan en NaN
+                    if any(key in datos_actuales for key in ['temp1', 'caudal1']):
+                        self.cola_ui.publicar('historial', dict(datos_actuales, tiempo=time.time()))
+                    self.cola_ui.publicar('datos', datos_actuales)
                         
             except Exception as e:
                 print(f"Error leyendo datos: {e}")
                 time.sleep(0.1)
     
+    def enlace_perdido(self, motivo):
+        """Corta las líneas de las gráficas en el hueco (hilo lector)"""
+        print(f"ENLACE PERDIDO: {motivo} - reconectando")
+        self.cola_ui.publicar('historial', {'tiempo': time.time()})
+        self.cola_ui.publicar('enlace', False)
+    
+    def enlace_restablecido(self, duracion_s, intentos):
+        """Fin del hueco, con los setpoints reenviados (hilo lector)"""
+        print(f"ENLACE RESTABLECIDO tras {duracion_s:.1f} s ({intentos} intento(s))")
+        # El Arduino se reinició: pierde los setpoints
+        for clave, valor in list(self.setpoints.items()):
+            try:
+                self.serial_connection.write(f"{clave}:{valor}\n".encode())
+            except Exception as e:
+                print(f"Error reenviando setpoint {clave}: {e}")
+        self.cola_ui.publicar('enlace', True)
+    
+    def mostrar_enlace(self, conectado):
+        if not self.is_connected:
+            return
+        if conectado:
+            self.label_estado.config(text="● Conectado", fg='#28a745')
+        else:
+            self.label_estado.config(text="● Reconectando...", fg='#ffc107')
+    
+    def agregar_historial(self, filas):
+        """Agrega las muestras del tick en el hilo de Tk, el mismo que lee las vistas"""
+        for fila in filas:
+            self.historial.agregar(fila)
+    
     def actualizar_display(self, datos):
         if 'temp1' in datos:
             self.temp1.set(f"{datos['temp1']:.2f}")
-            self.historial_temp1.append(datos['temp1'])
         
         if 'temp2' in datos:
             self.temp2.set(f"{datos['temp2']:.2f}")
-            self.historial_temp2.append(datos['temp2'])
         
         if 'temp3' in datos:
             self.temp3.set(f"{datos['temp3']:.2f}")
-            self.historial_temp3.append(datos['temp3'])
         
         if 'caudal1' in datos:
             self.caudal1.set(f"{datos['caudal1']:.3f}")
-            self.historial_caudal1.append(datos['caudal1'])
         
         if 'caudal2' in datos:
             self.caudal2.set(f"{datos['caudal2']:.3f}")
-            self.historial_caudal2.append(datos['caudal2'])
         
         if 'volumen1' in datos:
             self.volumen1.set(f"{datos['volumen1']:.3f}")
@@ -624,67 +644,25 @@ class MonitorArduino:
         else:
             if self.modo2.get() == "MANUAL":
                 self.error2.set("--")
-        
-        if any(key in datos for key in ['temp1', 'caudal1']):
-            self.historial_tiempo.append(time.time())
     
     def actualizar_graficas(self):
         if not self.is_monitoring:
             return
         
         try:
-            self.ax1.clear()
-            self.ax2.clear()
-            
-            self.ax1.set_facecolor('#2b2b2b')
-            self.ax1.set_title('Temperaturas', color='white', fontsize=12, fontweight='bold')
-            self.ax1.set_xlabel('Tiempo (s)', color='white')
-            self.ax1.set_ylabel('°C', color='white')
-            self.ax1.tick_params(colors='white')
-            self.ax1.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                tiempo_relativo = [t - self.historial_tiempo[0] for t in self.historial_tiempo]
-                
-                if len(self.historial_temp1) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp1), 
-                                 'r-', label='T1 (Entrada)', linewidth=2)
-                if len(self.historial_temp2) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp2), 
-                                 'g-', label='T2 (Salida)', linewidth=2)
-                if len(self.historial_temp3) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp3), 
-                                 'b-', label='T3 (Frío)', linewidth=2)
+            if len(self.historial) > 0:
+                # Vistas del historial, sin copias (ver comun/historial.py)
+                vistas = self.historial.vistas()
+                tiempo_relativo = vistas['tiempo'] - vistas['tiempo'][0]
                 
-                self.ax1.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='best')
-            
-            self.ax2.set_facecolor('#2b2b2b')
-            self.ax2.set_title('Caudales', color='white', fontsize=12, fontweight='bold')
-            self.ax2.set_xlabel('Tiempo (s)', color='white')
-            self.ax2.set_ylabel('L/min', color='white')
-            self.ax2.tick_params(colors='white')
-            self.ax2.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                if len(self.historial_caudal1) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal1), 
-                                 'c-', label='Q1 (Caliente)', linewidth=2)
-                if len(self.historial_caudal2) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal2), 
-                                 'm-', label='Q2 (Frío)', linewidth=2)
-                
-                self.ax2.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='best')
-            
-            self.fig.tight_layout(pad=3.0)
-            self.canvas.draw()
+                # Solo cambian los datos de las líneas (ver comun/graficas.py)
+                self.grafica.actualizar(tiempo_relativo, vistas)
             
         except Exception as e:
             print(f"Error actualizando gráficas: {e}")
         
         if self.is_monitoring:
-            self.root.after(1000, self.actualizar_graficas)
+            self.root.after(self.intervalo_graficas_ms, self.actualizar_graficas)
 
 if __name__ == "__main__":
     root = tk.Tk()
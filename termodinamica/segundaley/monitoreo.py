@@ -4,11 +4,22 @@ import serial
 import serial.tools.list_ports
 import threading
 import time
+import os
+import sys
 from datetime import datetime
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from collections import deque
+
+# Módulos compartidos del laboratorio (termodinamica/comun)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from comun.adquisicion import ESCUCHA
+from comun.protocolo import ParserSegundaLey
+from comun.graficas import GraficaBlit
+from comun.historial import HistorialCircular
+from comun.cola_ui import ColaUI
+from comun.conexion import MARCAS_SEGUNDA_LEY, cerrar_en_segundo_plano, conectar_en_segundo_plano
+from comun.enlace import EnlaceSupervisado
 
 class MonitorArduino:
     def __init__(self, root):
@@ -21,6 +32,9 @@ class MonitorArduino:
         self.serial_connection = None
         self.is_connected = False
         self.is_monitoring = False
+        # Sin ninguna trama en este tiempo se da el puerto por perdido y se
+        # reconecta (el firmware envía una cada ~100 ms)
+        self.silencio_max_s = 5.0
         
         # Datos de sensores
         self.temp1 = tk.StringVar(value="--")
@@ -33,16 +47,29 @@ class MonitorArduino:
         self.bomba1_estado = tk.StringVar(value="DESCONOCIDO")
         self.bomba2_estado = tk.StringVar(value="DESCONOCIDO")
         
-        # Historial para gráficas (últimos 50 puntos)
-        self.historial_temp1 = deque(maxlen=50)
-        self.historial_temp2 = deque(maxlen=50)
-        self.historial_temp3 = deque(maxlen=50)
-        self.historial_caudal1 = deque(maxlen=50)
-        self.historial_caudal2 = deque(maxlen=50)
-        self.historial_tiempo = deque(maxlen=50)
+        # Historial para gráficas: arreglos circulares de NumPy (ver comun/historial.py)
+        # con capacidad para horas_historial horas a una trama cada periodo_tramas_s
+        self.horas_historial = 6
+        self.periodo_tramas_s = 0.5
+        self.historial = HistorialCircular.por_duracion(
+            ('tiempo', 'temp1', 'temp2', 'temp3', 'caudal1', 'caudal2'),
+            horas=self.horas_historial, periodo_s=self.periodo_tramas_s)
+        
+        # Periodo de refresco de las gráficas (ms); con blitting 10 Hz es viable
+        self.intervalo_graficas_ms = 100
         
         self.crear_interfaz()
         
+        # El hilo lector no toca Tk: publica aquí y la interfaz se
+        # actualiza una vez por tick con lo más reciente (ver comun/cola_ui.py)
+        self.cola_ui = ColaUI(self.root, intervalo_ms=100)
+        self.cola_ui.registrar('datos', self.actualizar_display, 'dict')
+        self.cola_ui.registrar('historial', self.agregar_historial, 'lista')
+        self.cola_ui.registrar('conexion', self.conexion_lista)
+        self.cola_ui.registrar('desconexion', self.desconexion_terminada)
+        self.cola_ui.registrar('enlace', self.mostrar_enlace)
+        self.cola_ui.iniciar()
+        
     def crear_interfaz(self):
         # ========== PANEL DE CONEXIÓN ==========
         frame_conexion = tk.Frame(self.root, bg='#2b2b2b')
@@ -189,6 +216,18 @@ class MonitorArduino:
         self.canvas = FigureCanvasTkAgg(self.fig, frame_graficas)
         self.canvas.get_tk_widget().pack(fill='both', expand=True)
         
+        # Las líneas se crean una sola vez; actualizar_graficas solo cambia sus datos
+        self.grafica = GraficaBlit(self.canvas)
+        self.grafica.agregar_serie('temp1', self.ax1, 'r-', label='Sensor 1', linewidth=2)
+        self.grafica.agregar_serie('temp2', self.ax1, 'g-', label='Sensor 2', linewidth=2)
+        self.grafica.agregar_serie('temp3', self.ax1, 'b-', label='Sensor 3', linewidth=2)
+        self.grafica.agregar_serie('caudal1', self.ax2, 'c-', label='Caudal 1', linewidth=2)
+        self.grafica.agregar_serie('caudal2', self.ax2, 'm-', label='Caudal 2', linewidth=2)
+        self.ax1.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='upper left')
+        self.ax2.legend(facecolor='#363636', edgecolor='white', 
+                        labelcolor='white', loc='upper left')
+        
     def crear_display_sensor(self, parent, nombre, variable, unidad, columna):
         frame = tk.Frame(parent, bg='#363636')
         frame.pack(side='left', expand=True, fill='both', padx=10)
@@ -207,6 +246,8 @@ class MonitorArduino:
     def actualizar_puertos(self):
         puertos = serial.tools.list_ports.comports()
         lista_puertos = [puerto.device for puerto in puertos]
+        # Servicio de adquisición local (python -m comun.adquisicion)
+        lista_puertos.append("tcp://%s:%d" % ESCUCHA['segundaley'])
         self.combo_puertos['values'] = lista_puertos
         if lista_puertos:
             self.combo_puertos.current(0)
@@ -223,129 +264,128 @@ class MonitorArduino:
             messagebox.showerror("Error", "Selecciona un puerto COM")
             return
         
+        # El Arduino se reinicia al abrir el puerto: la espera de su saludo
+        # corre en otro hilo y conexion_lista termina en el hilo de Tk
+        # (ver comun/conexion.py)
+        self.btn_conectar.config(text="Conectando...", state='disabled')
+        self.combo_puertos.config(state='disabled')
+        self.label_estado.config(text="● Conectando...", fg='#ffc107')
+        conectar_en_segundo_plano(puerto, 115200, MARCAS_SEGUNDA_LEY,
+                                  lambda resultado: self.cola_ui.publicar('conexion', resultado))
+    
+    def conexion_lista(self, resultado):
+        """Termina de conectar con el resultado del conector (hilo de Tk)"""
         try:
-            self.serial_connection = serial.Serial(puerto, 115200, timeout=1)
-            time.sleep(2)  # Esperar a que Arduino se reinicie
+            if resultado.error:
+                raise resultado.error
+            # Si se pierde el puerto, el enlace reconecta con espera creciente
+            # (ver comun/enlace.py); se usa como serial.Serial
+            self.serial_connection = EnlaceSupervisado(
+                resultado.puerto, 115200, MARCAS_SEGUNDA_LEY, resultado.conexion, resultado.saludo,
+                activo=lambda: self.is_monitoring, silencio_max_s=self.silencio_max_s,
+                al_perder=self.enlace_perdido, al_restablecer=self.enlace_restablecido)
             self.is_connected = True
             self.is_monitoring = True
             
-            # Actualizar interfaz
-            self.btn_conectar.config(text="Desconectar", bg='#dc3545')
+            self.btn_conectar.config(text="Desconectar", bg='#dc3545', state='normal')
             self.label_estado.config(text="● Conectado", fg='#28a745')
             self.combo_puertos.config(state='disabled')
             self.btn_reset.config(state='normal')
             
-            # Iniciar hilo de lectura
             self.thread_lectura = threading.Thread(target=self.leer_datos, daemon=True)
             self.thread_lectura.start()
             
-            # Iniciar actualización de gráficas
             self.actualizar_graficas()
             
         except Exception as e:
+            self.btn_conectar.config(text="Conectar", state='normal')
+            self.combo_puertos.config(state='readonly')
+            self.label_estado.config(text="● Desconectado", fg='#dc3545')
             messagebox.showerror("Error de Conexión", f"No se pudo conectar:\n{str(e)}")
     
     def desconectar(self):
         self.is_monitoring = False
-        time.sleep(0.5)
+        self.is_connected = False
+        self.btn_conectar.config(text="Desconectando...", state='disabled')
         
-        if self.serial_connection:
-            self.serial_connection.close()
+        # El hilo lector puede estar dentro de read() hasta 1 s: se le espera
+        # fuera del hilo de Tk y desconexion_terminada sigue aquí
+        cerrar_en_segundo_plano(self.serial_connection, self.thread_lectura,
+                                lambda: self.cola_ui.publicar('desconexion'))
+    
+    def desconexion_terminada(self, _):
+        """Restablece la interfaz una vez cerrado el puerto (hilo de Tk)"""
+        enlace = self.serial_connection
+        if enlace and enlace.caidas:
+            print(f"Enlace: {enlace.caidas} caída(s), {enlace.tiempo_sin_enlace_s:.1f} s sin datos")
         
-        self.is_connected = False
-        self.btn_conectar.config(text="Conectar", bg='#28a745')
+        self.btn_conectar.config(text="Conectar", bg='#28a745', state='normal')
         self.label_estado.config(text="● Desconectado", fg='#dc3545')
         self.combo_puertos.config(state='readonly')
         self.btn_reset.config(state='disabled')
     
     def leer_datos(self):
-        buffer = ""
-        datos_actuales = {}
+        # El enlace entrega primero lo recibido durante el saludo y, si el
+        # puerto se cae, no regresa hasta reconectar (o hasta desconectar)
+        enlace = self.serial_connection
+        parser = ParserSegundaLey()
         
         while self.is_monitoring:
             try:
-                if self.serial_connection.in_waiting:
-                    linea = self.serial_connection.readline().decode('utf-8', errors='ignore').strip()
-                    
-                    # Parsear datos
-                    if "Sensor 1 (pin11):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp1'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 2 (pin12):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp2'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Sensor 3 (pin4):" in linea:
-                        try:
-                            temp = linea.split(":")[1].replace("°C", "").replace("C", "").strip()
-                            datos_actuales['temp3'] = float(temp)
-                        except:
-                            pass
-                    
-                    elif "Caudal 1 (pin2):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal1'] = float(caudal)
-                            datos_actuales['volumen1'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Caudal 2 (pin3):" in linea:
-                        try:
-                            partes = linea.split("|")
-                            caudal = partes[0].split(":")[1].replace("L/min", "").strip()
-                            volumen = partes[1].split(":")[1].replace("L", "").strip()
-                            datos_actuales['caudal2'] = float(caudal)
-                            datos_actuales['volumen2'] = float(volumen)
-                        except:
-                            pass
-                    
-                    elif "Bomba 1:" in linea:
-                        estado = linea.split(":")[1].strip()
-                        datos_actuales['bomba1'] = estado
-                    
-                    elif "Bomba 2:" in linea:
-                        estado = linea.split(":")[1].strip()
-                        datos_actuales['bomba2'] = estado
+                texto = enlace.leer_texto()
+                
+                # Cada bloque completo de app.ino produce una sola trama
+                for trama in parser.procesar_texto(texto):
+                    datos_actuales = trama.como_dict()
                     
-                    # Si tenemos un conjunto completo de datos, actualizar
-                    if "========================================" in linea and datos_actuales:
-                        self.actualizar_display(datos_actuales)
-                        datos_actuales = {}
+                    # Una fila del historial por trama; los canales que falten quedan en NaN
+                    if any(key in datos_actuales for key in ['temp1', 'caudal1']):
+                        self.cola_ui.publicar('historial', dict(datos_actuales, tiempo=time.time()))
+                    self.cola_ui.publicar('datos', datos_actuales)
                         
             except Exception as e:
                 print(f"Error leyendo datos: {e}")
                 time.sleep(0.1)
     
+    def enlace_perdido(self, motivo):
+        """Corta las líneas de las gráficas en el hueco (hilo lector)"""
+        print(f"ENLACE PERDIDO: {motivo} - reconectando")
+        self.cola_ui.publicar('historial', {'tiempo': time.time()})
+        self.cola_ui.publicar('enlace', False)
+    
+    def enlace_restablecido(self, duracion_s, intentos):
+        """Fin del hueco (hilo lector)"""
+        print(f"ENLACE RESTABLECIDO tras {duracion_s:.1f} s ({intentos} intento(s))")
+        self.cola_ui.publicar('enlace', True)
+    
+    def mostrar_enlace(self, conectado):
+        if not self.is_connected:
+            return
+        if conectado:
+            self.label_estado.config(text="● Conectado", fg='#28a745')
+        else:
+            self.label_estado.config(text="● Reconectando...", fg='#ffc107')
+    
+    def agregar_historial(self, filas):
+        """Agrega las muestras del tick en el hilo de Tk, el mismo que lee las vistas"""
+        for fila in filas:
+            self.historial.agregar(fila)
+    
     def actualizar_display(self, datos):
         if 'temp1' in datos:
             self.temp1.set(f"{datos['temp1']:.2f}")
-            self.historial_temp1.append(datos['temp1'])
         
         if 'temp2' in datos:
             self.temp2.set(f"{datos['temp2']:.2f}")
-            self.historial_temp2.append(datos['temp2'])
         
         if 'temp3' in datos:
             self.temp3.set(f"{datos['temp3']:.2f}")
-            self.historial_temp3.append(datos['temp3'])
         
         if 'caudal1' in datos:
             self.caudal1.set(f"{datos['caudal1']:.3f}")
-            self.historial_caudal1.append(datos['caudal1'])
         
         if 'caudal2' in datos:
             self.caudal2.set(f"{datos['caudal2']:.3f}")
-            self.historial_caudal2.append(datos['caudal2'])
         
         if 'volumen1' in datos:
             self.volumen1.set(f"{datos['volumen1']:.3f}")
@@ -358,69 +398,26 @@ class MonitorArduino:
         
         if 'bomba2' in datos:
             self.bomba2_estado.set(datos['bomba2'])
-        
-        # Agregar timestamp
-        if any(key in datos for key in ['temp1', 'caudal1']):
-            self.historial_tiempo.append(time.time())
     
     def actualizar_graficas(self):
         if not self.is_monitoring:
             return
         
         try:
-            # Limpiar gráficas
-            self.ax1.clear()
-            self.ax2.clear()
-            
-            # Configurar gráfica de temperaturas
-            self.ax1.set_facecolor('#2b2b2b')
-            self.ax1.set_title('Temperaturas', color='white')
-            self.ax1.set_ylabel('°C', color='white')
-            self.ax1.tick_params(colors='white')
-            self.ax1.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                tiempo_relativo = [t - self.historial_tiempo[0] for t in self.historial_tiempo]
-                
-                if len(self.historial_temp1) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp1), 
-                                 'r-', label='Sensor 1', linewidth=2)
-                if len(self.historial_temp2) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp2), 
-                                 'g-', label='Sensor 2', linewidth=2)
-                if len(self.historial_temp3) > 0:
-                    self.ax1.plot(tiempo_relativo, list(self.historial_temp3), 
-                                 'b-', label='Sensor 3', linewidth=2)
+            if len(self.historial) > 0:
+                # Vistas del historial, sin copias (ver comun/historial.py)
+                vistas = self.historial.vistas()
+                tiempo_relativo = vistas['tiempo'] - vistas['tiempo'][0]
                 
-                self.ax1.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='upper left')
-            
-            # Configurar gráfica de caudales
-            self.ax2.set_facecolor('#2b2b2b')
-            self.ax2.set_title('Caudales', color='white')
-            self.ax2.set_ylabel('L/min', color='white')
-            self.ax2.tick_params(colors='white')
-            self.ax2.grid(True, alpha=0.3)
-            
-            if len(self.historial_tiempo) > 0:
-                if len(self.historial_caudal1) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal1), 
-                                 'c-', label='Caudal 1', linewidth=2)
-                if len(self.historial_caudal2) > 0:
-                    self.ax2.plot(tiempo_relativo, list(self.historial_caudal2), 
-                                 'm-', label='Caudal 2', linewidth=2)
-                
-                self.ax2.legend(facecolor='#363636', edgecolor='white', 
-                              labelcolor='white', loc='upper left')
-            
-            self.canvas.draw()
+                # Solo cambian los datos de las líneas (ver comun/graficas.py)
+                self.grafica.actualizar(tiempo_relativo, vistas)
             
         except Exception as e:
             print(f"Error actualizando gráficas: {e}")
         
         # Programar siguiente actualización
         if self.is_monitoring:
-            self.root.after(1000, self.actualizar_graficas)
+            self.root.after(self.intervalo_graficas_ms, self.actualizar_graficas)
     
     def reset_volumenes(self):
         if self.is_connected and self.serial_connection: